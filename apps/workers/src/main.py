@@ -3,27 +3,20 @@
 import asyncio
 import logging
 from contextlib import asynccontextmanager
+from typing import Optional
 
 import nats
-from fastapi import FastAPI
+from fastapi import FastAPI, Header, HTTPException, Response
+from fastapi.responses import JSONResponse, PlainTextResponse
 from pydantic_settings import BaseSettings
 
+from workers.base import LoopLagMonitor, get_execution_pools
 from workers.config import get_settings
+from workers.llm import get_llm_client
+from workers.metrics import render as render_metrics
 from workers.nats_client import NATSClient
-from workers.workers import (
-    ProbeWorker,
-    ASRWorker,
-    DiarizationWorker,
-    SegmentationWorker,
-    SummarizationWorker,
-    QuoteWorker,
-    HighlightWorker,
-    ClipWorker,
-    ExportWorker,
-    SearchWorker,
-    SyncWorker,
-    QualityMetricsWorker,
-)
+from workers.profiling import get_profiler
+from workers.roles import create_workers
 
 # Configure logging
 logging.basicConfig(
@@ -32,31 +25,33 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Shortest stack sampling interval /admin/profile accepts, in seconds
+MIN_PROFILE_INTERVAL = 0.001
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager."""
     settings = get_settings()
     
+    # Watch for blocking calls that stall the shared event loop
+    loop_lag = LoopLagMonitor(settings.loop_lag_interval)
+    loop_lag.start()
+    app.state.loop_lag = loop_lag
+
     # Initialize NATS client
-    nats_client = NATSClient(settings.nats_url)
+    nats_client = NATSClient(settings.nats_url, settings.message_codec)
+    app.state.nats_client = nats_client
     await nats_client.connect()
+    if settings.jetstream_enabled:
+        await nats_client.ensure_stream(
+            settings.jetstream_stream,
+            settings.jetstream_subjects,
+            settings.jetstream_max_age,
+        )
     
     # Initialize workers
-    workers = [
-        ProbeWorker(nats_client),
-        ASRWorker(nats_client),
-        DiarizationWorker(nats_client),
-        SegmentationWorker(nats_client),
-        SummarizationWorker(nats_client),
-        QuoteWorker(nats_client),
-        HighlightWorker(nats_client),
-        ClipWorker(nats_client),
-        ExportWorker(nats_client),
-        SearchWorker(nats_client),
-        SyncWorker(nats_client),
-        QualityMetricsWorker(nats_client),
-    ]
+    workers = create_workers(settings.worker_roles, nats_client)
     
     # Start workers
     worker_tasks = []
@@ -64,15 +59,22 @@ async def lifespan(app: FastAPI):
         task = asyncio.create_task(worker.start())
         worker_tasks.append(task)
     
+    app.state.workers = workers
     logger.info(f"Started {len(workers)} workers")
     
     yield
     
-    # Cleanup
+    # Cleanup: cancelling a worker runs its stop(), which drains in-flight
+    # messages; wait for that before the connection and pools go away
     for task in worker_tasks:
         task.cancel()
-    
+    await asyncio.gather(*worker_tasks, return_exceptions=True)
+
     await nats_client.close()
+    await loop_lag.stop()
+    if get_llm_client.cache_info().currsize:
+        await get_llm_client().aclose()
+    get_execution_pools().shutdown(wait=False)
     logger.info("Workers stopped")
 
 
@@ -87,21 +89,98 @@ app = FastAPI(
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
-    return {"status": "healthy", "service": "ai-video-summarizer-workers"}
+    loop_lag = getattr(app.state, "loop_lag", None)
+    return {
+        "status": "healthy",
+        "service": "ai-video-summarizer-workers",
+        "loop_lag": loop_lag.stats() if loop_lag else None,
+        "pools": get_execution_pools().stats(),
+    }
 
 
 @app.get("/ready")
 async def readiness_check():
-    """Readiness check endpoint."""
-    return {"status": "ready"}
+    """Readiness: NATS connected, workers subscribed and warm, loop keeping up."""
+    settings = get_settings()
+    nats_client = getattr(app.state, "nats_client", None)
+    workers = getattr(app.state, "workers", [])
+    loop_lag = getattr(app.state, "loop_lag", None)
+
+    checks = {
+        "nats": bool(nats_client and nats_client.is_connected),
+        "workers": {worker.worker_name: worker.is_ready() for worker in workers},
+        "loop_lag": bool(loop_lag and loop_lag.last <= settings.ready_max_loop_lag),
+    }
+    ready = (
+        checks["nats"]
+        and bool(workers)
+        and all(checks["workers"].values())
+        and checks["loop_lag"]
+    )
+    return JSONResponse(
+        {"status": "ready" if ready else "not ready", "checks": checks},
+        status_code=200 if ready else 503,
+    )
+
+
+@app.get("/workers")
+async def worker_stats():
+    """In-flight, queued and rejected counts per worker."""
+    workers = getattr(app.state, "workers", [])
+    return {"workers": [worker.stats() for worker in workers]}
 
 
 @app.get("/live")
 async def liveness_check():
-    """Liveness check endpoint."""
+    """Alive unless the event loop has stopped making progress."""
+    loop_lag = getattr(app.state, "loop_lag", None)
+    if loop_lag is None or loop_lag.stalled(get_settings().live_max_loop_stall):
+        return JSONResponse({"status": "stalled"}, status_code=503)
     return {"status": "alive"}
 
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics: per-worker latency histograms, gauges and loop lag."""
+    payload, content_type = render_metrics()
+    return Response(content=payload, media_type=content_type)
+
+
+@app.post("/admin/profile")
+async def profile(
+    seconds: float = 10.0,
+    messages: Optional[int] = None,
+    interval: float = 0.005,
+    x_admin_token: Optional[str] = Header(None),
+):
+    """Sample stacks for ``seconds`` or ``messages`` messages; returns folded stacks.
+
+    The output feeds flamegraph.pl, speedscope or inferno directly.
+    """
+    settings = get_settings()
+    if not settings.admin_token:
+        raise HTTPException(status_code=403, detail="Profiling is disabled; set ADMIN_TOKEN")
+    if x_admin_token != settings.admin_token:
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+    if seconds <= 0 or (messages is not None and messages < 1):
+        raise HTTPException(status_code=400, detail="seconds and messages must be positive")
+    if interval < MIN_PROFILE_INTERVAL:
+        # A tighter loop would hold the GIL and stall the workers being profiled
+        raise HTTPException(
+            status_code=400, detail=f"interval must be at least {MIN_PROFILE_INTERVAL}s"
+        )
+
+    profiler = get_profiler()
+    if profiler.active:
+        raise HTTPException(status_code=409, detail="A profile is already running")
+    sampler = await profiler.run(
+        min(seconds, settings.profile_max_seconds), messages, interval
+    )
+    return PlainTextResponse(
+        sampler.collapsed(), headers={"X-Profile-Samples": str(sampler.samples)}
+    )
+
+
 if __name__ == "__main__":
     import uvicorn
     
@@ -1,18 +1,35 @@
 # Created automatically by Cursor AI (2024-12-19)
 
+import importlib
+from typing import Any
+
 from .base import BaseWorker
-from .probe_worker import ProbeWorker
-from .asr_worker import ASRWorker
-from .diarization_worker import DiarizationWorker
-from .segmentation_worker import SegmentationWorker
-from .summarization_worker import SummarizationWorker
-from .quote_worker import QuoteWorker
-from .highlight_worker import HighlightWorker
-from .clip_worker import ClipWorker
-from .export_worker import ExportWorker
-from .search_worker import SearchWorker
-from .sync_worker import SyncWorker
-from .quality_metrics_worker import QualityMetricsWorker
+
+# Worker classes are imported on first access, so a node only pays for the
+# workers (and ML dependencies) of the roles it runs.
+_WORKER_MODULES = {
+    "ProbeWorker": ".probe_worker",
+    "ASRWorker": ".asr_worker",
+    "DiarizationWorker": ".diarization_worker",
+    "SegmentationWorker": ".segmentation_worker",
+    "SummarizationWorker": ".summarization_worker",
+    "QuoteWorker": ".quote_worker",
+    "HighlightWorker": ".highlight_worker",
+    "ClipWorker": ".clip_worker",
+    "ExportWorker": ".export_worker",
+    "SearchWorker": ".search_worker",
+    "SyncWorker": ".sync_worker",
+    "QualityMetricsWorker": ".quality_metrics_worker",
+    "PipelineWorker": ".pipeline_worker",
+}
+
+
+def __getattr__(name: str) -> Any:
+    module = _WORKER_MODULES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(module, __name__), name)
+
 
 __all__ = [
     "BaseWorker",
@@ -28,4 +45,5 @@ __all__ = [
     "SearchWorker",
     "SyncWorker",
     "QualityMetricsWorker",
+    "PipelineWorker",
 ]
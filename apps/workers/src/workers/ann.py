@@ -0,0 +1,192 @@
+# Created automatically by Cursor AI (2026-10-18)
+
+import math
+from typing import Optional, Tuple, Union
+
+import numpy as np
+
+# Rows encoded per step when assigning codes, to bound the distance matrix
+_ENCODE_ROWS = 16384
+
+
+def kmeans(
+    x: np.ndarray,
+    k: int,
+    iterations: int = 10,
+    spherical: bool = False,
+    seed: int = 0,
+) -> np.ndarray:
+    """Lloyd's k-means on the rows of ``x``; returns ``k`` float32 centroids.
+
+    ``spherical`` assigns by inner product and keeps centroids unit length,
+    which suits normalized embeddings. Empty clusters are re-seeded from
+    random rows.
+    """
+    rng = np.random.default_rng(seed)
+    x = np.asarray(x, dtype=np.float32)
+    centroids = x[rng.choice(len(x), size=k, replace=len(x) < k)].copy()
+    for _ in range(iterations):
+        assign = _assign(x, centroids, spherical)
+        # Per-cluster sums as a one-hot matrix product, which runs in BLAS
+        members = np.zeros((k, len(x)), dtype=np.float32)
+        members[assign, np.arange(len(x))] = 1.0
+        counts = members.sum(axis=1)
+        sums = members @ x
+        empty = counts == 0
+        centroids = sums / np.maximum(counts, 1)[:, None]
+        if empty.any():
+            centroids[empty] = x[rng.choice(len(x), size=int(empty.sum()))]
+        if spherical:
+            centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+    return centroids
+
+
+def _assign(x: np.ndarray, centroids: np.ndarray, spherical: bool) -> np.ndarray:
+    if spherical:
+        return np.argmax(x @ centroids.T, axis=1)
+    # argmin |x - c|^2 = argmin |c|^2 - 2 x.c
+    return np.argmin((centroids * centroids).sum(axis=1) - 2 * (x @ centroids.T), axis=1)
+
+
+class ExactIndex:
+    """Brute-force inner-product search; the reference for recall."""
+
+    def __init__(self, vectors: np.ndarray):
+        self.vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    @property
+    def nbytes(self) -> int:
+        return self.vectors.nbytes
+
+    def search(self, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Row ids and scores of the ``k`` rows with the largest ``row . query``."""
+        scores = self.vectors @ np.asarray(query, dtype=np.float32)
+        return _top_k(scores, np.arange(len(scores)), k)
+
+
+class IVFPQIndex:
+    """Inverted-file index with product-quantized residuals (IVF-PQ).
+
+    Rows are clustered into ``nlist`` lists by spherical k-means. A query
+    scans the ``nprobe`` lists whose centroids score highest, ranks their rows
+    by an approximate score (centroid score plus a table lookup per PQ
+    subspace), then re-ranks the best ``rerank`` times ``k`` of them exactly
+    against float16 copies of the rows.
+
+    Scores are inner products, i.e. cosine similarity for unit vectors.
+    """
+
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        nlist: Optional[int] = None,
+        subspaces: int = 48,
+        nprobe: int = 16,
+        rerank: int = 16,
+        train_rows: int = 20000,
+        codebook_rows: int = 8192,
+        seed: int = 0,
+    ):
+        x = np.ascontiguousarray(vectors, dtype=np.float32)
+        n, dimensions = x.shape
+        self.nlist = nlist or max(1, int(math.sqrt(n)))
+        self.nprobe = nprobe
+        self.rerank = rerank
+        # Largest subspace count up to ``subspaces`` that divides the width
+        self.subspaces = max(m for m in range(1, subspaces + 1) if dimensions % m == 0)
+
+        rng = np.random.default_rng(seed)
+        sample = x[rng.choice(n, size=min(n, train_rows), replace=False)]
+        self.centroids = kmeans(sample, self.nlist, spherical=True, seed=seed)
+        assign = _assign(x, self.centroids, spherical=True)
+
+        # Codebooks for the residuals: (subspaces, 256, sub_width)
+        pq_sample = sample[:codebook_rows]
+        residuals = self._split(pq_sample - self.centroids[_assign(pq_sample, self.centroids, True)])
+        self.codebooks = np.stack([
+            kmeans(residuals[m], min(256, len(pq_sample)), iterations=6, seed=seed + m)
+            for m in range(self.subspaces)
+        ])
+
+        # Store rows grouped by list so each list is one contiguous slice
+        order = np.argsort(assign, kind="stable")
+        self.ids = order.astype(np.int64)
+        self.lists = assign[order].astype(np.int32)
+        self.offsets = np.searchsorted(self.lists, np.arange(self.nlist + 1)).astype(np.int64)
+        self.vectors = x[order].astype(np.float16)
+        self.codes = np.empty((n, self.subspaces), dtype=np.uint8)
+        for lo in range(0, n, _ENCODE_ROWS):
+            rows = order[lo:lo + _ENCODE_ROWS]
+            residual = self._split(x[rows] - self.centroids[assign[rows]])
+            for m in range(self.subspaces):
+                self.codes[lo:lo + len(rows), m] = _assign(residual[m], self.codebooks[m], False)
+
+    def _split(self, rows: np.ndarray) -> np.ndarray:
+        # (rows, width) -> contiguous (subspaces, rows, sub_width); strided
+        # subspace views would miss the BLAS fast path in matmul
+        return np.ascontiguousarray(
+            rows.reshape(len(rows), self.subspaces, -1).transpose(1, 0, 2)
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(
+            a.nbytes
+            for a in (self.centroids, self.codebooks, self.ids, self.lists, self.offsets, self.vectors, self.codes)
+        )
+
+    def search(
+        self, query: np.ndarray, k: int, nprobe: Optional[int] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Row ids and scores of (approximately) the ``k`` best rows."""
+        query = np.asarray(query, dtype=np.float32)
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+        coarse = self.centroids @ query
+        probe = np.argpartition(-coarse, nprobe - 1)[:nprobe]
+        candidates = np.concatenate(
+            [np.arange(self.offsets[l], self.offsets[l + 1]) for l in probe]
+        )
+        if len(candidates) == 0:
+            return np.zeros(0, np.int64), np.zeros(0, np.float32)
+
+        # query . residual, looked up per subspace: table[m, code]
+        table = np.einsum(
+            "mcw,mw->mc", self.codebooks, query.reshape(self.subspaces, -1)
+        )
+        approx = coarse[self.lists[candidates]] + table[
+            np.arange(self.subspaces), self.codes[candidates]
+        ].sum(axis=1)
+
+        shortlist = candidates
+        if len(candidates) > k * self.rerank:
+            top = np.argpartition(-approx, k * self.rerank - 1)[:k * self.rerank]
+            shortlist = candidates[top]
+        exact = self.vectors[shortlist].astype(np.float32) @ query
+        return _top_k(exact, self.ids[shortlist], k)
+
+
+def build_index(
+    vectors: np.ndarray, exact_below: int = 20000, nprobe: int = 16
+) -> Union[ExactIndex, IVFPQIndex]:
+    """IVF-PQ for large collections; smaller ones (a video, most projects) search exactly.
+
+    Below ``exact_below`` rows a full scan takes a few milliseconds, less
+    than the seconds spent training the quantizers would ever win back.
+    """
+    if len(vectors) < exact_below:
+        return ExactIndex(vectors)
+    return IVFPQIndex(vectors, nprobe=nprobe)
+
+
+def _top_k(scores: np.ndarray, ids: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    if len(scores) > k:
+        top = np.argpartition(-scores, k - 1)[:k]
+        scores, ids = scores[top], ids[top]
+    order = np.argsort(-scores, kind="stable")
+    return ids[order], scores[order]
@@ -1,21 +1,76 @@
 # Created automatically by Cursor AI (2024-12-19)
 
+import asyncio
 import logging
-from typing import Any, Dict, Optional
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Sequence, Tuple
 
-import whisperx
-from workers.base import BaseWorker
+import numpy as np
+
+from workers.audio import (
+    SAMPLE_RATE,
+    open_pcm,
+    plan_pcm_windows,
+    plan_shards,
+)
+from workers.audio_cache import get_audio_cache
+from workers.base import ASR_POOL, CPU_POOL, TRANSIENT_ERRORS, BaseWorker, get_execution_pools
+from workers.config import get_settings
+from workers.models import ModelKey, get_model_registry
+from workers.profiling import span
+from workers.stitching import (
+    extract_words,
+    merge_shards,
+    shift_segments,
+    stitch_words,
+)
+from workers.transcript import Transcript
 
 logger = logging.getLogger(__name__)
 
+# Transcription modes, selected per message via "mode" or by ASR_MODE.
+BATCH_MODE = "batch"  # whole file in one pool call
+STREAM_MODE = "stream"  # sequential windows, partial results as they finish
+SHARDED_MODE = "sharded"  # overlapping shards in parallel, merged at the end
+
+# Warm-up retries start this many seconds apart and back off to the maximum
+WARMUP_RETRY_SECONDS = 5.0
+WARMUP_MAX_RETRY_SECONDS = 300.0
+
 
 class ASRWorker(BaseWorker):
     """Worker for Automatic Speech Recognition using WhisperX."""
 
+    # One transcription at a time; the model saturates the device on its own.
+    concurrency = 1
+
+    cache_file_fields = ("audio_path",)
+
     def __init__(self, nats_client):
         super().__init__(nats_client)
-        self.model = None
-        self.device = "cuda"  # Will be configurable
+        settings = get_settings()
+        self.model_name = settings.whisperx_model
+        self.device = settings.whisperx_device
+        self.compute_type = settings.whisperx_compute_type
+        self.warmup_languages = tuple(settings.whisperx_warmup_languages)
+        self.models_ready = False
+        self.mode = settings.asr_mode
+        self.shard_seconds = settings.asr_shard_seconds
+        self.shard_overlap_seconds = settings.asr_shard_overlap_seconds
+        self.shard_parallelism = max(1, settings.asr_shard_parallelism)
+        self.window_seconds = settings.asr_window_seconds
+        self.max_window_seconds = settings.asr_max_window_seconds
+        self.lookahead = settings.asr_stream_lookahead
+
+        # Every ASR pool process preloads the common languages when it starts
+        get_execution_pools().add_initializer(
+            ASR_POOL,
+            warm_up_models,
+            self.model_name,
+            self.device,
+            self.compute_type,
+            self.warmup_languages,
+        )
 
     @property
     def subject(self) -> str:
@@ -25,24 +80,76 @@ class ASRWorker(BaseWorker):
     def worker_name(self) -> str:
         return "ASRWorker"
 
+    @property
+    def cache_version(self) -> Optional[str]:
+        # The mode changes window boundaries, and with them the output
+        return f"whisperx:{self.model_name}:{self.compute_type}:{self.mode}"
+
+    async def start(self) -> None:
+        """Start the worker, warming up models in the background."""
+        warm_up = asyncio.create_task(self._warm_up())
+        try:
+            await super().start()
+        finally:
+            warm_up.cancel()
+
+    def is_ready(self) -> bool:
+        """Ready once subscribed and the models are loaded in the pool."""
+        return super().is_ready() and self.models_ready
+
+    async def _warm_up(self) -> None:
+        """Load the models in the ASR pool before the first job, retrying until it works.
+
+        ``/ready`` stays red until this succeeds, so a failure (a model
+        download timing out, the GPU still being claimed) is retried with
+        exponential backoff rather than leaving the worker unready for good.
+        """
+        delay = WARMUP_RETRY_SECONDS
+        while True:
+            try:
+                await self.run_in_pool(
+                    ASR_POOL,
+                    warm_up_models,
+                    self.model_name,
+                    self.device,
+                    self.compute_type,
+                    self.warmup_languages,
+                )
+            except Exception as e:
+                logger.error(f"Error warming up ASR models, retrying in {delay:g}s: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, WARMUP_MAX_RETRY_SECONDS)
+            else:
+                self.models_ready = True
+                logger.info(f"ASR models warmed up for {list(self.warmup_languages)}")
+                return
+
     async def process_message(self, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Process ASR request."""
         try:
             video_id = data.get("video_id")
             audio_path = data.get("audio_path")
             language = data.get("language", "en")
+            mode = data.get("mode", self.mode)
             
             if not video_id or not audio_path:
                 raise ValueError("Missing video_id or audio_path")
             
             logger.info(f"Starting ASR for video {video_id}")
             
-            # Load model if not loaded
-            if self.model is None:
-                await self._load_model()
-            
             # Perform transcription
-            transcript = await self._transcribe_audio(audio_path, language)
+            if mode == STREAM_MODE:
+                transcript = await self._transcribe_streaming(
+                    video_id, audio_path, language
+                )
+            elif mode == SHARDED_MODE:
+                transcript = await self._transcribe_sharded(
+                    video_id, audio_path, language
+                )
+            elif mode == BATCH_MODE:
+                transcript = await self._transcribe_audio(audio_path, language)
+            else:
+                raise ValueError(f"Unknown ASR mode: {mode}")
             
             result = {
                 "video_id": video_id,
@@ -53,60 +160,304 @@ class ASRWorker(BaseWorker):
             logger.info(f"Completed ASR for video {video_id}")
             return result
             
+        except TRANSIENT_ERRORS:
+            raise
         except Exception as e:
             logger.error(f"Error in ASR processing: {e}")
             await self.publish_error(str(e), data)
             return None
 
-    async def _load_model(self) -> None:
-        """Load WhisperX model."""
+    async def _transcribe_audio(self, audio_path: str, language: str) -> Transcript:
+        """Transcribe audio on the ASR pool so the event loop stays responsive."""
+        async with get_audio_cache().lease(audio_path) as pcm_path:
+            return await self.run_in_pool(
+                ASR_POOL,
+                transcribe_audio,
+                pcm_path,
+                language,
+                self.model_name,
+                self.device,
+                self.compute_type,
+            )
+
+
+    async def _transcribe_streaming(
+        self, video_id: str, audio_path: str, language: str
+    ) -> Transcript:
+        """Transcribe VAD-bounded windows, publishing each as a partial result.
+
+        Partials go to ``media.asr.partial`` in timeline order. ``word_offset``
+        is the index of the partial's first word in the final transcript, so
+        consumers can apply them incrementally.
+        """
+        async with get_audio_cache().lease(audio_path) as pcm_path:
+            with self.span("plan_windows"):
+                windows = await self.run_in_pool(
+                    CPU_POOL,
+                    plan_pcm_windows,
+                    pcm_path,
+                    SAMPLE_RATE,
+                    self.window_seconds,
+                    self.max_window_seconds,
+                )
+            logger.info(f"Streaming ASR for video {video_id} in {len(windows)} windows")
+
+            words: List[Dict[str, Any]] = []
+            segments: List[Dict[str, Any]] = []
+            confidences: List[float] = []
+            emitted_until: Optional[float] = None
+
+            async for index, window in self._stream_windows(pcm_path, windows, language):
+                with self.span("stitch"):
+                    batch = stitch_words(window["words"], emitted_until)
+                if batch:
+                    emitted_until = batch[-1]["end"]
+                start, end = windows[index]
+                with self.span("publish_partial"):
+                    await self.publish_partial({
+                        "video_id": video_id,
+                        "window": index,
+                        "windows": len(windows),
+                        "start": start / SAMPLE_RATE,
+                        "end": end / SAMPLE_RATE,
+                        "word_offset": len(words),
+                        "words": batch,
+                        "language": language,
+                        "final": index == len(windows) - 1,
+                    })
+                words.extend(batch)
+                segments.extend(window["segments"])
+                confidences.append(window["confidence"])
+
+        with self.span("build_transcript"):
+            return Transcript.from_words(
+                words,
+                language=language,
+                segments=segments,
+                confidence=float(np.mean(confidences)) if confidences else 0.0,
+            )
+
+    async def _transcribe_sharded(
+        self, video_id: str, audio_path: str, language: str
+    ) -> Transcript:
+        """Transcribe overlapping shards on the ASR pool and merge them.
+
+        At most ``asr_shard_parallelism`` shards are in flight at once, so a
+        long video queues on the ASR pool instead of flooding it; shards are
+        merged by ``merge_shards`` once all of them are done.
+        """
+        slots = asyncio.Semaphore(self.shard_parallelism)
+
+        async def transcribe_shard(pcm_path: str, start: int, end: int) -> Dict[str, Any]:
+            async with slots:
+                return await self.run_in_pool(
+                    ASR_POOL,
+                    transcribe_window,
+                    pcm_path,
+                    start,
+                    end,
+                    language,
+                    self.model_name,
+                    self.device,
+                    self.compute_type,
+                )
+
+        async with get_audio_cache().lease(audio_path) as pcm_path:
+            total = len(open_pcm(pcm_path))
+            shards = plan_shards(
+                total, SAMPLE_RATE, self.shard_seconds, self.shard_overlap_seconds
+            )
+            logger.info(f"Sharded ASR for video {video_id} across {len(shards)} shards")
+
+            results = await asyncio.gather(*(
+                transcribe_shard(pcm_path, start, end) for start, end in shards
+            ))
+
+        with self.span("merge_shards"):
+            merged = merge_shards([
+                {**result, "start": start / SAMPLE_RATE, "end": end / SAMPLE_RATE}
+                for (start, end), result in zip(shards, results)
+            ])
+        confidences = [result["confidence"] for result in results]
+        with self.span("build_transcript"):
+            return Transcript.from_words(
+                merged["words"],
+                language=language,
+                segments=merged["segments"],
+                confidence=float(np.mean(confidences)) if confidences else 0.0,
+            )
+
+    async def _stream_windows(
+        self, pcm_path: str, windows: List[Tuple[int, int]], language: str
+    ) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+        """Yield aligned windows in order with ``lookahead`` windows prefetched."""
+        pending: Deque[Tuple[int, "asyncio.Future[Dict[str, Any]]"]] = deque()
+        upcoming = iter(enumerate(windows))
+
+        def submit_next() -> None:
+            item = next(upcoming, None)
+            if item is None:
+                return
+            index, (start, end) = item
+            future = asyncio.ensure_future(self.run_in_pool(
+                ASR_POOL,
+                transcribe_window,
+                pcm_path,
+                start,
+                end,
+                language,
+                self.model_name,
+                self.device,
+                self.compute_type,
+            ))
+            pending.append((index, future))
+
+        for _ in range(self.lookahead + 1):
+            submit_next()
         try:
-            logger.info("Loading WhisperX model...")
-            self.model = whisperx.load_model("large-v2", self.device)
-            logger.info("WhisperX model loaded successfully")
-        except Exception as e:
-            logger.error(f"Error loading WhisperX model: {e}")
-            raise
+            while pending:
+                index, future = pending.popleft()
+                window = await future
+                submit_next()
+                yield index, window
+        finally:
+            for _, future in pending:
+                future.cancel()
 
-    async def _transcribe_audio(self, audio_path: str, language: str) -> Dict[str, Any]:
-        """Transcribe audio using WhisperX."""
+
+# The functions below run inside ASR pool processes. Models are cached in each
+# process's ModelRegistry, so only the first job per language pays for loading.
+
+
+def _whisperx() -> Any:
+    """Import WhisperX, and with it torch, on first use in a pool process."""
+    import whisperx
+
+    return whisperx
+
+
+def _load_model(model_name: str, device: str, compute_type: str) -> Any:
+    """Load (or reuse) the WhisperX transcription model."""
+    key = ModelKey(model_name, "", device, compute_type)
+    try:
+        with span("load_model"):
+            return get_model_registry().get(
+                key,
+                lambda: _whisperx().load_model(model_name, device, compute_type=compute_type),
+            )
+    except Exception as e:
+        logger.error(f"Error loading WhisperX model: {e}")
+        raise
+
+
+def _load_align_model(language: str, device: str) -> Any:
+    """Load (or reuse) the wav2vec2 alignment model and metadata for a language."""
+    key = ModelKey("align", language, device, "")
+    with span("load_align_model"):
+        return get_model_registry().get(
+            key,
+            lambda: _whisperx().load_align_model(language_code=language, device=device),
+        )
+
+
+def warm_up_models(
+    model_name: str, device: str, compute_type: str, languages: Sequence[str]
+) -> None:
+    """Preload the transcription model and alignment models for ``languages``."""
+    _load_model(model_name, device, compute_type)
+    for language in languages:
         try:
-            # Transcribe audio
-            result = self.model.transcribe(audio_path, language=language)
-            
-            # Align timestamps
-            model_a, metadata = whisperx.load_align_model(
-                language_code=language, device=self.device
+            _load_align_model(language, device)
+        except Exception as e:
+            logger.error(f"Error preloading alignment model for {language}: {e}")
+
+
+def transcribe_audio(
+    pcm_path: str,
+    language: str,
+    model_name: str,
+    device: str,
+    compute_type: str,
+) -> Transcript:
+    """Transcribe a whole PCM artifact using WhisperX."""
+    try:
+        with span("read_audio"):
+            audio = np.ascontiguousarray(open_pcm(pcm_path)[:])
+        model = _load_model(model_name, device, compute_type)
+
+        # Transcribe audio
+        with span("transcribe"):
+            result = model.transcribe(audio, language=language)
+
+        # Align timestamps
+        model_a, metadata = _load_align_model(language, device)
+        with span("align"):
+            result = _whisperx().align(
+                result["segments"],
+                model_a,
+                metadata,
+                audio,
+                device,
+                return_char_alignments=False,
             )
-            result = whisperx.align(
+
+        # Extract words with timestamps
+        with span("extract_words"):
+            words = extract_words(result["segments"])
+
+        with span("build_transcript"):
+            return Transcript.from_words(
+                words,
+                language=language,
+                segments=result["segments"],
+                confidence=result.get("confidence", 0.0),
+            )
+
+    except Exception as e:
+        logger.error(f"Error transcribing audio: {e}")
+        raise
+
+
+def transcribe_window(
+    pcm_path: str,
+    start: int,
+    end: int,
+    language: str,
+    model_name: str,
+    device: str,
+    compute_type: str,
+) -> Dict[str, Any]:
+    """Transcribe and align one window of a PCM artifact.
+
+    Only the window's samples are read from the memory map, and all timestamps
+    are returned on the full-file timeline.
+    """
+    try:
+        with span("read_window"):
+            audio = np.ascontiguousarray(open_pcm(pcm_path)[start:end])
+        offset = start / SAMPLE_RATE
+        model = _load_model(model_name, device, compute_type)
+
+        with span("transcribe"):
+            result = model.transcribe(audio, language=language)
+        model_a, metadata = _load_align_model(language, device)
+        with span("align"):
+            result = _whisperx().align(
                 result["segments"],
                 model_a,
                 metadata,
-                audio_path,
-                self.device,
+                audio,
+                device,
                 return_char_alignments=False,
             )
-            
-            # Extract words with timestamps
-            words = []
-            for segment in result["segments"]:
-                for word in segment.get("words", []):
-                    words.append({
-                        "text": word["word"],
-                        "start": word["start"],
-                        "end": word["end"],
-                        "confidence": word.get("score", 0.0),
-                    })
-            
-            transcript = {
-                "words": words,
-                "segments": result["segments"],
-                "language": language,
+
+        with span("extract_words"):
+            return {
+                "words": extract_words(result["segments"], offset),
+                "segments": shift_segments(result["segments"], offset),
                 "confidence": result.get("confidence", 0.0),
             }
-            
-            return transcript
-            
-        except Exception as e:
-            logger.error(f"Error transcribing audio: {e}")
-            raise
+
+    except Exception as e:
+        logger.error(f"Error transcribing window {start}:{end}: {e}")
+        raise
@@ -0,0 +1,238 @@
+# Created automatically by Cursor AI (2026-10-18)
+
+import logging
+import os
+import struct
+import subprocess
+import tempfile
+from typing import List, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+
+
+# Decoded audio artifacts are a fixed-size header followed by mono PCM
+# samples: magic, format version, sample dtype code, sample rate, samples.
+ARTIFACT_MAGIC = b"WKRPCM\0\0"
+ARTIFACT_VERSION = 1
+ARTIFACT_HEADER = struct.Struct("<8sHHIQ")
+# Samples start here; a multiple of every sample size, so the map is aligned
+HEADER_BYTES = 64
+SAMPLE_DTYPES = {"float32": (1, np.float32, "f32le"), "int16": (2, np.int16, "s16le")}
+_DTYPE_NAMES = {code: name for name, (code, _, _) in SAMPLE_DTYPES.items()}
+
+
+def _header(dtype: str, sample_rate: int, samples: int) -> bytes:
+    code = SAMPLE_DTYPES[dtype][0]
+    header = ARTIFACT_HEADER.pack(ARTIFACT_MAGIC, ARTIFACT_VERSION, code, sample_rate, samples)
+    return header.ljust(HEADER_BYTES, b"\0")
+
+
+def decode_to_pcm(
+    media_path: str, pcm_path: str, sample_rate: int = SAMPLE_RATE, dtype: str = "float32"
+) -> str:
+    """Decode any ffmpeg-readable input to a mono PCM artifact on disk.
+
+    ffmpeg writes the samples straight into the file after the header, so the
+    caller never holds the decoded audio in memory. The artifact appears
+    under ``pcm_path`` only once complete.
+    """
+    sample_format = SAMPLE_DTYPES[dtype][2]
+    cmd = [
+        "ffmpeg",
+        "-nostdin",
+        "-loglevel", "error",
+        "-threads", "0",
+        "-i", media_path,
+        "-vn",
+        "-f", sample_format,
+        "-ac", "1",
+        "-acodec", f"pcm_{sample_format}",
+        "-ar", str(sample_rate),
+        "pipe:1",
+    ]
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(pcm_path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w+b") as f:
+            f.write(_header(dtype, sample_rate, 0))
+            f.flush()
+            process = subprocess.run(cmd, stdout=f, stderr=subprocess.PIPE)
+            if process.returncode != 0:
+                stderr = process.stderr.decode(errors="replace")[-500:]
+                raise RuntimeError(f"Failed to decode audio from {media_path}: {stderr}")
+            itemsize = np.dtype(SAMPLE_DTYPES[dtype][1]).itemsize
+            samples = (os.fstat(f.fileno()).st_size - HEADER_BYTES) // itemsize
+            f.seek(0)
+            f.write(_header(dtype, sample_rate, samples))
+        os.replace(tmp_path, pcm_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return pcm_path
+
+
+def write_pcm(
+    samples: np.ndarray, pcm_path: str, sample_rate: int = SAMPLE_RATE, dtype: str = "float32"
+) -> str:
+    """Write float samples in ``[-1, 1]`` as a PCM artifact."""
+    if dtype == "int16":
+        samples = np.clip(np.round(samples * 32767), -32768, 32767)
+    data = np.ascontiguousarray(samples, dtype=SAMPLE_DTYPES[dtype][1])
+    tmp_path = f"{pcm_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_header(dtype, sample_rate, len(data)))
+        f.write(data.tobytes())
+    os.replace(tmp_path, pcm_path)
+    return pcm_path
+
+
+class PCMArtifact:
+    """Read-only, memory-mapped view of a PCM artifact.
+
+    Indexing with a slice returns float32 samples in ``[-1, 1]``: a view of
+    the map when the artifact stores float32, otherwise a converted copy of
+    just that slice. ``samples`` is the raw map.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            magic, version, code, sample_rate, count = ARTIFACT_HEADER.unpack(
+                f.read(ARTIFACT_HEADER.size)
+            )
+        if magic != ARTIFACT_MAGIC or version != ARTIFACT_VERSION or code not in _DTYPE_NAMES:
+            raise ValueError(f"Not a PCM artifact: {path}")
+        self.path = path
+        self.dtype = _DTYPE_NAMES[code]
+        self.sample_rate = sample_rate
+        numpy_dtype = SAMPLE_DTYPES[self.dtype][1]
+        self.samples = (
+            np.memmap(path, dtype=numpy_dtype, mode="r", offset=HEADER_BYTES, shape=(count,))
+            if count
+            else np.zeros(0, dtype=numpy_dtype)
+        )
+
+    def __len__(self) -> int:
+        return len(self.samples)
+
+    @property
+    def duration(self) -> float:
+        return len(self) / self.sample_rate
+
+    def __getitem__(self, index: slice) -> np.ndarray:
+        window = self.samples[index]
+        if self.dtype == "int16":
+            return window.astype(np.float32) / 32768.0
+        return window
+
+    def seconds(self, start: float, end: float) -> np.ndarray:
+        """Samples between two times, as float32."""
+        return self[int(start * self.sample_rate):int(end * self.sample_rate)]
+
+
+def open_pcm(pcm_path: str) -> PCMArtifact:
+    """Memory-map a PCM artifact written by ``decode_to_pcm``."""
+    return PCMArtifact(pcm_path)
+
+
+def frame_rms(
+    audio: np.ndarray, frame_length: int, chunk_frames: int = 4096
+) -> np.ndarray:
+    """RMS energy per non-overlapping frame, computed chunk by chunk.
+
+    Chunking keeps the float64 temporaries small for memory-mapped inputs that
+    span hours of audio.
+    """
+    n_frames = len(audio) // frame_length
+    rms = np.empty(n_frames, dtype=np.float32)
+    for first in range(0, n_frames, chunk_frames):
+        last = min(first + chunk_frames, n_frames)
+        frames = np.asarray(
+            audio[first * frame_length:last * frame_length], dtype=np.float32
+        ).reshape(last - first, frame_length)
+        rms[first:last] = np.sqrt(np.mean(np.square(frames, dtype=np.float64), axis=1))
+    return rms
+
+
+def plan_windows(
+    audio: np.ndarray,
+    sample_rate: int = SAMPLE_RATE,
+    target_seconds: float = 30.0,
+    max_seconds: float = 45.0,
+    frame_ms: float = 30.0,
+    smooth_ms: float = 300.0,
+) -> List[Tuple[int, int]]:
+    """Split audio into contiguous windows that end in the quietest spot.
+
+    Each window is at least half of ``target_seconds`` and at most
+    ``max_seconds`` long. The cut goes at the minimum of the smoothed frame
+    energy in that range, which in speech is almost always a pause between
+    words, so no word straddles two windows. Returns (start, end) sample
+    offsets covering the whole input.
+    """
+    total = len(audio)
+    if total == 0:
+        return []
+    max_samples = int(max_seconds * sample_rate)
+    if total <= max_samples:
+        return [(0, total)]
+
+    frame_length = max(int(sample_rate * frame_ms / 1000), 1)
+    energy = frame_rms(audio, frame_length)
+    smooth = max(int(smooth_ms / frame_ms), 1)
+    if smooth > 1 and len(energy) >= smooth:
+        energy = np.convolve(energy, np.ones(smooth) / smooth, mode="same")
+
+    min_frames = max(int(target_seconds * 0.5 * sample_rate) // frame_length, 1)
+    max_frames = max(max_samples // frame_length, min_frames + 1)
+
+    windows = []
+    cursor = 0  # in frames
+    while (total - cursor * frame_length) > max_samples:
+        region = energy[cursor + min_frames:cursor + max_frames]
+        cut = cursor + min_frames + int(np.argmin(region))
+        windows.append((cursor * frame_length, cut * frame_length))
+        cursor = cut
+    windows.append((cursor * frame_length, total))
+    return windows
+
+
+def plan_shards(
+    total_samples: int,
+    sample_rate: int = SAMPLE_RATE,
+    shard_seconds: float = 600.0,
+    overlap_seconds: float = 5.0,
+) -> List[Tuple[int, int]]:
+    """Split ``total_samples`` into fixed-size shards that overlap their neighbours.
+
+    Consecutive shards share ``overlap_seconds`` of audio so that words cut off
+    at one shard's edge appear whole in the next; ``merge_shards`` removes the
+    duplicates afterwards.
+    """
+    shard = int(shard_seconds * sample_rate)
+    overlap = int(overlap_seconds * sample_rate)
+    if shard <= overlap:
+        raise ValueError("Shard length must exceed the overlap")
+    if total_samples <= shard:
+        return [(0, total_samples)] if total_samples else []
+
+    shards = []
+    start = 0
+    while True:
+        end = min(start + shard, total_samples)
+        shards.append((start, end))
+        if end == total_samples:
+            return shards
+        start = end - overlap
+
+
+def plan_pcm_windows(
+    pcm_path: str,
+    sample_rate: int = SAMPLE_RATE,
+    target_seconds: float = 30.0,
+    max_seconds: float = 45.0,
+) -> List[Tuple[int, int]]:
+    """``plan_windows`` over a PCM artifact; picklable for the CPU pool."""
+    return plan_windows(open_pcm(pcm_path), sample_rate, target_seconds, max_seconds)
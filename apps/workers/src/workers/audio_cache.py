@@ -0,0 +1,167 @@
+# Created automatically by Cursor AI (2026-10-18)
+
+import hashlib
+import logging
+import os
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict
+
+from workers.audio import SAMPLE_RATE, decode_to_pcm
+from workers.base import SingleFlight, run_io
+from workers.config import get_settings
+from workers.profiling import span
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_SUFFIX = ".pcm"
+# Partial decodes older than this are left over from a crash, not in progress
+STALE_SECONDS = 24 * 3600
+
+
+class AudioCache:
+    """Node-local cache of decoded audio artifacts, shared by every consumer.
+
+    The first worker to ask for a source file decodes it once to a PCM
+    artifact (``decode_to_pcm``); concurrent requests for the same file wait
+    for that decode, and later ones reuse the artifact. Workers hold a lease
+    while they read, and hand the artifact's path to pool processes, which
+    memory-map it and read slices without copying.
+
+    Artifacts are keyed by the source's path, size and mtime, so a replaced
+    file is decoded again. When the cache holds more than ``max_bytes``,
+    unleased artifacts are deleted least recently used first; leased ones
+    are never deleted, so the budget can be exceeded while they are in use.
+    Deleting a file another process still has mapped is safe on POSIX, as
+    the mapping keeps its pages.
+    """
+
+    def __init__(
+        self, root: str, max_bytes: int, sample_rate: int = SAMPLE_RATE, dtype: str = "float32"
+    ):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.sample_rate = sample_rate
+        self.dtype = dtype
+        os.makedirs(root, exist_ok=True)
+        # key -> size, least recently used first
+        self._sizes: "OrderedDict[str, int]" = OrderedDict()
+        self._leases: Dict[str, int] = {}
+        self._decodes: SingleFlight[None] = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        entries = []
+        for name in os.listdir(root):
+            path = os.path.join(root, name)
+            if name.endswith(ARTIFACT_SUFFIX):
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, name[:-len(ARTIFACT_SUFFIX)], stat.st_size))
+            elif name.endswith(".tmp") and os.stat(path).st_mtime < time.time() - STALE_SECONDS:
+                # Left by a decode that did not finish
+                os.unlink(path)
+        for _, key, size in sorted(entries):
+            self._sizes[key] = size
+        self._bytes = sum(self._sizes.values())
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, f"{key}{ARTIFACT_SUFFIX}")
+
+    async def key_for(self, source_path: str) -> str:
+        stat = await run_io(os.stat, source_path)
+        material = (
+            f"{os.path.abspath(source_path)}\0{stat.st_size}\0{stat.st_mtime_ns}\0"
+            f"{self.sample_rate}\0{self.dtype}"
+        )
+        return hashlib.sha256(material.encode()).hexdigest()[:32]
+
+    async def acquire(self, source_path: str) -> str:
+        """Path of the artifact for ``source_path``, decoding it on a miss.
+
+        The artifact stays on disk until ``release`` is called as many times.
+        """
+        key = await self.key_for(source_path)
+        # Leased before any await, so no eviction can slip in between
+        self._leases[key] = self._leases.get(key, 0) + 1
+        try:
+            if key in self._sizes:
+                self.hits += 1
+                self._sizes.move_to_end(key)
+            else:
+                if key in self._decodes:
+                    self.coalesced += 1
+                else:
+                    self.misses += 1
+                await self._decodes.run(key, lambda: self._decode(key, source_path))
+        except BaseException:
+            self._unlease(key)
+            raise
+        return self._path(key)
+
+    def release(self, pcm_path: str) -> None:
+        """End a lease taken by ``acquire``."""
+        key = os.path.basename(pcm_path)[:-len(ARTIFACT_SUFFIX)]
+        self._unlease(key)
+        self._evict()
+
+    @asynccontextmanager
+    async def lease(self, source_path: str) -> AsyncIterator[str]:
+        """``acquire`` and ``release`` around a block (``async with cache.lease(path)``)."""
+        pcm_path = await self.acquire(source_path)
+        try:
+            yield pcm_path
+        finally:
+            self.release(pcm_path)
+
+    async def _decode(self, key: str, source_path: str) -> None:
+        with span("decode_audio"):
+            await run_io(decode_to_pcm, source_path, self._path(key), self.sample_rate, self.dtype)
+        size = os.path.getsize(self._path(key))
+        self._sizes[key] = size
+        self._bytes += size
+        self._evict()
+
+    def _unlease(self, key: str) -> None:
+        count = self._leases.get(key, 0) - 1
+        if count > 0:
+            self._leases[key] = count
+        else:
+            self._leases.pop(key, None)
+
+    def _evict(self) -> None:
+        for key in list(self._sizes):
+            if self._bytes <= self.max_bytes:
+                return
+            if key in self._leases:
+                continue
+            self._bytes -= self._sizes.pop(key)
+            self.evictions += 1
+            try:
+                os.unlink(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._sizes),
+            "bytes": self._bytes,
+            "leased": len(self._leases),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+        }
+
+
+@lru_cache()
+def get_audio_cache() -> AudioCache:
+    """Get the process-wide audio artifact cache."""
+    settings = get_settings()
+    return AudioCache(
+        settings.audio_cache_path,
+        settings.audio_cache_max_bytes,
+        dtype=settings.audio_cache_dtype,
+    )
@@ -1,24 +1,460 @@
 # Created automatically by Cursor AI (2024-12-19)
 
 import asyncio
-import json
+import functools
 import logging
+import multiprocessing
+import time
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    ContextManager,
+    Dict,
+    Generic,
+    Hashable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+)
 
+from nats.errors import TimeoutError as NATSTimeoutError
+from nats.js import JetStreamContext
+
+from workers.config import get_settings
+from workers.metrics import (
+    FAILED,
+    LOOP_LAG,
+    OK,
+    PAYLOAD_SIZE,
+    PROCESSING_TIME,
+    QUEUE_WAIT,
+    REJECTED,
+    track_worker,
+)
 from workers.nats_client import NATSClient
+from workers.profiling import (
+    call_with_spans,
+    collect_spans,
+    get_profiler,
+    merge_spans,
+    span,
+)
+from workers.transcript import Transcript
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# Executor pools a blocking step can be offloaded to.
+IO_POOL = "io"  # threads, for subprocesses and blocking I/O (ffprobe, ffmpeg, boto3)
+CPU_POOL = "cpu"  # processes, for CPU/model-bound work that would hold the GIL
+ASR_POOL = "asr"  # processes holding the WhisperX models, kept apart from CPU_POOL
+QUERY_POOL = "query"  # processes encoding search queries, never behind bulk encoding
+
+# Request field echoed into the result, so callers can match results to requests.
+CORRELATION_FIELD = "correlation_id"
+
+
+class RetryableError(Exception):
+    """A failure worth retrying later, e.g. a dependency that is briefly down."""
+
+
+# Failures a worker lets propagate, so the message is redelivered with
+# backoff instead of being reported as an error right away.
+TRANSIENT_ERRORS = (RetryableError, ConnectionError, TimeoutError, asyncio.TimeoutError)
+
+
+class ExecutionPools:
+    """Shared executors that keep blocking work off the event loop.
+
+    The thread pool serves I/O-bound calls that release the GIL while they wait.
+    The process pools serve CPU and model-bound calls; anything submitted to
+    them must be a picklable module-level function with picklable arguments.
+    ``ASR_POOL`` is separate from ``CPU_POOL`` so the transcription models are
+    loaded only in its few processes, not in every CPU pool process;
+    ``QUERY_POOL`` keeps interactive query encoding from queueing behind bulk
+    embedding jobs. Pools are created on first use so nodes that never
+    offload pay nothing.
+    """
+
+    def __init__(
+        self,
+        io_workers: int,
+        cpu_workers: int,
+        start_method: str = "spawn",
+        asr_workers: int = 1,
+        query_workers: int = 1,
+    ):
+        self.start_method = start_method
+        self.sizes: Dict[str, int] = {
+            IO_POOL: io_workers,
+            CPU_POOL: cpu_workers,
+            ASR_POOL: asr_workers,
+            QUERY_POOL: query_workers,
+        }
+        self._executors: Dict[str, Executor] = {}
+        self._initializers: Dict[str, List[Tuple[Callable[..., Any], Tuple[Any, ...]]]] = {
+            pool: [] for pool in self.sizes if pool != IO_POOL
+        }
+        self.submitted: Dict[str, int] = {pool: 0 for pool in self.sizes}
+        self.active: Dict[str, int] = {pool: 0 for pool in self.sizes}
+
+    def add_initializer(self, pool: str, fn: Callable[..., Any], *args: Any) -> None:
+        """Run ``fn(*args)`` in every process of ``pool`` when it starts.
+
+        Used to preload models; must be registered before the pool is first used.
+        """
+        if pool not in self._initializers:
+            raise ValueError(f"Not a process pool: {pool}")
+        if pool in self._executors:
+            logger.warning(f"{pool} pool already started, initializer {fn.__name__} ignored")
+            return
+        self._initializers[pool].append((fn, args))
+
+    def executor(self, pool: str) -> Executor:
+        """Return (creating if needed) the executor behind ``pool``."""
+        if pool not in self.sizes:
+            raise ValueError(f"Unknown execution pool: {pool}")
+        executor = self._executors.get(pool)
+        if executor is None:
+            if pool == IO_POOL:
+                executor = ThreadPoolExecutor(
+                    max_workers=self.sizes[pool], thread_name_prefix="worker-io"
+                )
+            else:
+                # spawn avoids inheriting CUDA contexts and locks from the parent
+                executor = ProcessPoolExecutor(
+                    max_workers=self.sizes[pool],
+                    mp_context=multiprocessing.get_context(self.start_method),
+                    initializer=_run_initializers,
+                    initargs=(tuple(self._initializers[pool]),),
+                )
+            self._executors[pool] = executor
+        return executor
+
+    async def run(self, pool: str, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run ``fn(*args, **kwargs)`` on ``pool`` and await its result."""
+        executor = self.executor(pool)
+        loop = asyncio.get_running_loop()
+        self.submitted[pool] += 1
+        self.active[pool] += 1
+        try:
+            return await loop.run_in_executor(
+                executor, functools.partial(fn, *args, **kwargs)
+            )
+        finally:
+            self.active[pool] -= 1
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Submitted and currently running call counts per pool."""
+        return {
+            pool: {
+                "size": size,
+                "submitted": self.submitted[pool],
+                "active": self.active[pool],
+            }
+            for pool, size in self.sizes.items()
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Shut down any executors that were started."""
+        executors, self._executors = self._executors, {}
+        for executor in executors.values():
+            executor.shutdown(wait=wait)
+
+
+def _run_initializers(
+    initializers: Tuple[Tuple[Callable[..., Any], Tuple[Any, ...]], ...]
+) -> None:
+    # A raising initializer would mark the whole pool as broken, so log instead.
+    for fn, args in initializers:
+        try:
+            fn(*args)
+        except Exception as e:
+            logger.error(f"Pool initializer {fn.__name__} failed: {e}")
+
+
+@functools.lru_cache()
+def get_execution_pools() -> ExecutionPools:
+    """Get the process-wide execution pools."""
+    settings = get_settings()
+    return ExecutionPools(
+        io_workers=settings.io_pool_size,
+        cpu_workers=settings.cpu_pool_size,
+        start_method=settings.cpu_pool_start_method,
+        asr_workers=settings.asr_pool_size,
+        query_workers=settings.query_pool_size,
+    )
+
+
+async def run_io(fn: Callable[..., T], *args: Any) -> T:
+    """Run a blocking call on the shared ``IO_POOL``, outside any worker."""
+    return await get_execution_pools().run(IO_POOL, fn, *args)
+
+
+class SingleFlight(Generic[T]):
+    """Concurrent calls for the same key share the one already in flight.
+
+    The first caller for a key runs the call; callers arriving while it runs
+    wait for its outcome instead of running it again. They wait through a
+    shield, so a cancelled waiter never cancels the shared call. If the
+    caller running it is cancelled, the others get ``interrupted(key)``, by
+    default a ``RetryableError``, rather than a cancellation of their own.
+    """
+
+    def __init__(self, interrupted: Optional[Callable[[Hashable], BaseException]] = None):
+        self.interrupted = interrupted or (
+            lambda key: RetryableError(f"Shared call for {key} was cancelled")
+        )
+        self._calls: Dict[Hashable, "asyncio.Future[T]"] = {}
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def run(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        """Result of ``call()``, or of the call for ``key`` already in flight."""
+        inflight = self._calls.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        future: "asyncio.Future[T]" = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        try:
+            result = await call()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                future.set_exception(self.interrupted(key))
+            else:
+                future.set_exception(e)
+            # Retrieve the exception so an unawaited future does not warn
+            future.exception()
+            raise
+        finally:
+            del self._calls[key]
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes up from a fixed-interval sleep.
+
+    Sustained lag means something is running blocking code on the loop.
+    """
+
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self.last = 0.0
+        self.max = 0.0
+        self.total = 0.0
+        self.samples = 0
+        self.sampled_at: Optional[float] = None  # time.monotonic() of the last sample
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start sampling in the background."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop sampling."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self.record(loop.time() - started - self.interval)
+
+    def record(self, lag: float) -> None:
+        """Record a single lag sample in seconds."""
+        lag = max(lag, 0.0)
+        LOOP_LAG.observe(lag)
+        self.sampled_at = time.monotonic()
+        self.last = lag
+        self.max = max(self.max, lag)
+        self.total += lag
+        self.samples += 1
+
+    def stalled(self, max_age: float) -> bool:
+        """Whether no sample has been taken for ``max_age`` seconds.
+
+        A stall means the loop has been blocked since then, or the monitor
+        was never started or has died.
+        """
+        if self.sampled_at is None:
+            return self._task is None or self._task.done()
+        return time.monotonic() - self.sampled_at > max_age
+
+    def stats(self) -> Dict[str, float]:
+        """Lag statistics in seconds."""
+        return {
+            "last": self.last,
+            "max": self.max,
+            "mean": self.total / self.samples if self.samples else 0.0,
+            "samples": self.samples,
+        }
+
+
+class WorkerScheduler:
+    """Semaphore-bounded pool of in-flight message handlers.
+
+    Up to ``limit`` jobs run concurrently; up to ``max_pending`` more wait for a
+    free slot. Anything beyond that is rejected so the caller can hand the
+    message back to NATS instead of buffering it in memory.
+    """
+
+    def __init__(
+        self,
+        limit: int,
+        max_pending: int,
+        wait_observer: Optional[Callable[[float], None]] = None,
+    ):
+        if limit < 1:
+            raise ValueError("Concurrency limit must be at least 1")
+        if max_pending < 0:
+            raise ValueError("max_pending must not be negative")
+        self.limit = limit
+        self.max_pending = max_pending
+        self.in_flight = 0
+        self.queued = 0
+        self.rejected = 0
+        self.completed = 0
+        # Called with each job's queue wait in seconds
+        self.wait_observer = wait_observer
+        self._semaphore = asyncio.Semaphore(limit)
+        self._slot_freed = asyncio.Event()
+        self._tasks: Set[asyncio.Task] = set()
+
+    @property
+    def free_slots(self) -> int:
+        """Number of jobs that could start right now without waiting."""
+        return max(self.limit - self.in_flight - self.queued, 0)
+
+    def submit(self, job: Callable[[], Awaitable[None]]) -> bool:
+        """Schedule a job. Returns False if the worker is saturated."""
+        if self.in_flight + self.queued >= self.limit + self.max_pending:
+            self.rejected += 1
+            return False
+
+        self.queued += 1
+        task = asyncio.create_task(self._run(job, time.monotonic()))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return True
+
+    async def _run(self, job: Callable[[], Awaitable[None]], submitted: float) -> None:
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queued -= 1
+        if self.wait_observer is not None:
+            self.wait_observer(time.monotonic() - submitted)
+
+        self.in_flight += 1
+        try:
+            await job()
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+            self._semaphore.release()
+            self._slot_freed.set()
+
+    async def wait_for_slot(self) -> None:
+        """Wait until at least one job could start without queueing."""
+        while not self.free_slots:
+            self._slot_freed.clear()
+            await self._slot_freed.wait()
+
+    async def drain(self, timeout: Optional[float] = None) -> None:
+        """Wait for scheduled jobs to finish, cancelling them after ``timeout``."""
+        if not self._tasks:
+            return
+        tasks = list(self._tasks)
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    def stats(self) -> Dict[str, int]:
+        """Current scheduler counters."""
+        return {
+            "limit": self.limit,
+            "max_pending": self.max_pending,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "completed": self.completed,
+        }
+
+
+def _is_jetstream(msg: Any) -> bool:
+    """Whether ``msg`` came from JetStream and can be acked or redelivered."""
+    reply = getattr(msg, "reply", None)
+    return bool(reply) and reply.startswith("$JS.ACK")
+
+
+# workers.blobstore and workers.result_cache build on the helpers above, so
+# they are imported on first use rather than with this module.
+def _claim_check() -> Any:
+    from workers.blobstore import get_claim_check
+
+    return get_claim_check()
+
+
+def _result_cache() -> Any:
+    from workers.result_cache import get_result_cache
+
+    return get_result_cache()
+
 
 class BaseWorker(ABC):
     """Base class for all workers."""
 
-    def __init__(self, nats_client: NATSClient):
+    # Per-class default for concurrent process_message calls. None falls back
+    # to Settings.worker_concurrency; WORKER_CONCURRENCY_OVERRIDES wins over both.
+    concurrency: Optional[int] = None
+
+    # Request fields holding local file paths; the result cache keys them by
+    # file content rather than by path.
+    cache_file_fields: Tuple[str, ...] = ()
+
+    def __init__(
+        self,
+        nats_client: NATSClient,
+        concurrency: Optional[int] = None,
+        max_pending: Optional[int] = None,
+    ):
         self.nats_client = nats_client
         self.running = False
         self.subscription = None
 
+        settings = get_settings()
+        if concurrency is None:
+            concurrency = settings.worker_concurrency_overrides.get(
+                self.worker_name, self.concurrency
+            )
+        if concurrency is None:
+            concurrency = settings.worker_concurrency
+        if max_pending is None:
+            max_pending = settings.worker_max_pending
+        self.scheduler = WorkerScheduler(
+            concurrency, max_pending, QUEUE_WAIT.labels(self.worker_name).observe
+        )
+        track_worker(self)
+
     @property
     @abstractmethod
     def subject(self) -> str:
@@ -31,20 +467,35 @@ class BaseWorker(ABC):
         """Worker name for logging."""
         pass
 
+    @property
+    def cache_version(self) -> Optional[str]:
+        """Version of the model/code behind this worker's results.
+
+        Workers whose results depend only on their request return a version
+        string to have results cached; bump it whenever outputs change. None
+        (the default) disables caching, e.g. for workers with side effects.
+        """
+        return None
+
+    def is_ready(self) -> bool:
+        """Whether the worker is subscribed and able to take messages."""
+        return self.running and self.subscription is not None
+
+    @property
+    def durable_name(self) -> str:
+        """JetStream consumer name shared by every replica of this worker."""
+        return self.worker_name
+
     async def start(self) -> None:
         """Start the worker."""
         self.running = True
         logger.info(f"Starting {self.worker_name} worker")
         
         try:
-            self.subscription = await self.nats_client.subscribe(
-                self.subject, self._message_handler
-            )
-            logger.info(f"{self.worker_name} worker started, listening on {self.subject}")
-            
-            # Keep the worker running
-            while self.running:
-                await asyncio.sleep(1)
+            if get_settings().jetstream_enabled:
+                await self._consume_pull()
+            else:
+                await self._consume_push()
                 
         except Exception as e:
             logger.error(f"Error in {self.worker_name} worker: {e}")
@@ -52,33 +503,245 @@ class BaseWorker(ABC):
         finally:
             await self.stop()
 
+    async def _consume_pull(self) -> None:
+        """Fetch from a durable JetStream consumer, only as much as we can run.
+
+        Each fetch asks for at most the number of free scheduler slots, so
+        messages this replica cannot start yet stay in the stream for others.
+        """
+        settings = get_settings()
+        self.subscription = await self.nats_client.pull_subscribe(
+            self.subject,
+            durable=self.durable_name,
+            stream=settings.jetstream_stream,
+            ack_wait=settings.jetstream_ack_wait,
+            max_deliver=settings.max_retries + 1,
+        )
+        logger.info(f"{self.worker_name} worker started, pulling from {self.subject}")
+
+        while self.running:
+            if not self.scheduler.free_slots:
+                await self.scheduler.wait_for_slot()
+                continue
+            batch = min(self.scheduler.free_slots, settings.jetstream_fetch_batch)
+            try:
+                msgs = await self.subscription.fetch(
+                    batch=batch, timeout=settings.jetstream_fetch_timeout
+                )
+            except NATSTimeoutError:
+                continue
+            for msg in msgs:
+                self.scheduler.submit(lambda msg=msg: self._handle_message(msg))
+
+    async def _consume_push(self) -> None:
+        """Core NATS push subscription, for deployments without JetStream."""
+        self.subscription = await self.nats_client.subscribe(
+            self.subject, self._message_handler
+        )
+        logger.info(f"{self.worker_name} worker started, listening on {self.subject}")
+        
+        # Keep the worker running
+        while self.running:
+            await asyncio.sleep(1)
+
     async def stop(self) -> None:
         """Stop the worker."""
         self.running = False
         if self.subscription:
-            await self.subscription.drain()
+            if isinstance(self.subscription, JetStreamContext.PullSubscription):
+                await self.subscription.unsubscribe()
+            else:
+                await self.subscription.drain()
+            self.subscription = None
+        await self.scheduler.drain(timeout=get_settings().worker_drain_timeout)
         logger.info(f"{self.worker_name} worker stopped")
 
+    async def resolve(self, value: Any) -> Any:
+        """Fetch a claim-checked message field; inline values pass through."""
+        return await _claim_check().resolve(value)
+
+    async def resolve_transcript(self, value: Any) -> Optional[Transcript]:
+        """Resolve a transcript field into a columnar ``Transcript``.
+
+        Accepts claim-check references as well as legacy inline word dicts.
+        """
+        return Transcript.coerce(await self.resolve(value))
+
+    async def run_in_pool(
+        self, pool: str, fn: Callable[..., T], *args: Any, **kwargs: Any
+    ) -> T:
+        """Run a blocking step on the shared ``IO_POOL`` or ``CPU_POOL``.
+
+        Spans recorded inside ``fn`` are added to the current message's.
+        """
+        result, timings = await get_execution_pools().run(
+            pool, call_with_spans, fn, *args, **kwargs
+        )
+        merge_spans(timings)
+        return result
+
+    def span(self, name: str) -> ContextManager[None]:
+        """Time a step of the current message (``with self.span("align"):``).
+
+        Totals per span go into the result's ``timings`` and the
+        ``worker_span_seconds`` metric.
+        """
+        return span(name)
+
+    def stats(self) -> Dict[str, Any]:
+        """Scheduler and result cache counters for this worker."""
+        stats = {"worker": self.worker_name, **self.scheduler.stats()}
+        if self.cache_version is not None and get_settings().result_cache_enabled:
+            stats["cache"] = _result_cache().stats(self.worker_name)
+        return stats
+
     async def _message_handler(self, msg) -> None:
-        """Handle incoming NATS messages."""
+        """Hand incoming NATS messages to the scheduler."""
+        if self.scheduler.submit(lambda: self._handle_message(msg)):
+            return
+
+        REJECTED.labels(self.worker_name).inc()
+        logger.warning(
+            f"{self.worker_name} saturated "
+            f"({self.scheduler.in_flight} in flight, {self.scheduler.queued} queued), "
+            "rejecting message"
+        )
+        if not _is_jetstream(msg):
+            return
         try:
-            data = json.loads(msg.data.decode())
-            logger.info(f"{self.worker_name} received message: {data.get('id', 'unknown')}")
-            
-            # Process the message
-            result = await self.process_message(data)
-            
-            # Acknowledge the message
-            await msg.ack()
-            
-            # Publish result if needed
-            if result:
-                await self.publish_result(result)
-                
+            await msg.nak(delay=get_settings().retry_delay)
         except Exception as e:
+            logger.error(f"Error rejecting message in {self.worker_name}: {e}")
+
+    async def _handle_message(self, msg) -> None:
+        """Process a single NATS message.
+
+        The message is acked only once its result is published, so a crash
+        or publish failure before then leads to a redelivery.
+        ``TRANSIENT_ERRORS`` (which workers let through) are retried; once
+        retries run out they are published as errors. Anything else, such
+        as a payload that does not decode, is terminated right away.
+        """
+        heartbeat = asyncio.create_task(self._heartbeat(msg)) if _is_jetstream(msg) else None
+        started = time.monotonic()
+        outcome = FAILED
+        data = None
+        try:
+            with collect_spans(self.worker_name) as timings:
+                PAYLOAD_SIZE.labels(self.worker_name, "in").observe(len(msg.data))
+                with span("decode"):
+                    data = self.nats_client.decode(msg)
+                logger.info(f"{self.worker_name} received message: {data.get('id', 'unknown')}")
+                
+                # Process the message
+                result = await self._process_cached(data)
+                
+                # Publish result if needed
+                if result:
+                    result = {
+                        **result,
+                        "timings": {name: round(t, 4) for name, t in timings.items()},
+                    }
+                    if CORRELATION_FIELD in data:
+                        result.setdefault(CORRELATION_FIELD, data[CORRELATION_FIELD])
+                    with span("publish"):
+                        await self.publish_result(result)
+                
+                # Acknowledge the message
+                if _is_jetstream(msg):
+                    await msg.ack()
+                if result:
+                    outcome = OK
+                
+        except TRANSIENT_ERRORS as e:
             logger.error(f"Error processing message in {self.worker_name}: {e}")
-            # Negative acknowledgment - message will be redelivered
-            await msg.nak()
+            if not await self._retry_later(msg) and isinstance(data, dict):
+                await self.publish_error(str(e), data)
+        except Exception as e:
+            # A malformed payload or a bug fails the same way on every delivery
+            logger.exception(
+                f"Unrecoverable error processing message in {self.worker_name}: {e}"
+            )
+            await self._terminate(msg)
+            if isinstance(data, dict):
+                await self.publish_error(str(e), data)
+        finally:
+            if heartbeat:
+                heartbeat.cancel()
+            PROCESSING_TIME.labels(self.worker_name, outcome).observe(
+                time.monotonic() - started
+            )
+            get_profiler().message_done()
+
+    async def _process_cached(self, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """``process_message``, served from the result cache when possible."""
+        version = self.cache_version
+        if version is None or not get_settings().result_cache_enabled:
+            return await self.process_message(data)
+
+        cache = _result_cache()
+        try:
+            key = await cache.key_for(
+                self.worker_name, version, data, self.cache_file_fields
+            )
+        except Exception as e:
+            # e.g. a missing input file; let process_message report it
+            logger.warning(f"{self.worker_name} cannot cache this request: {e}")
+            return await self.process_message(data)
+
+        async def compute() -> Optional[Dict[str, Any]]:
+            result = await self.process_message(data)
+            return await _claim_check().offload(result) if result else None
+
+        result = await cache.get_or_compute(self.worker_name, key, compute)
+        if result and "video_id" in result:
+            result = {**result, "video_id": data.get("video_id")}
+        return result
+
+    async def _heartbeat(self, msg) -> None:
+        """Extend the ack deadline while a long job (e.g. ASR) is still running."""
+        interval = get_settings().jetstream_ack_wait / 3
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await msg.in_progress()
+            except Exception as e:
+                logger.warning(f"Error extending ack wait in {self.worker_name}: {e}")
+
+    async def _terminate(self, msg) -> None:
+        """Stop JetStream from redelivering a message that can never succeed."""
+        if not _is_jetstream(msg):
+            return
+        try:
+            await msg.term()
+        except Exception as e:
+            logger.error(f"Error terminating message in {self.worker_name}: {e}")
+
+    async def _retry_later(self, msg) -> bool:
+        """Nak with exponential backoff, or terminate once retries run out.
+
+        Returns whether the message will be delivered again.
+        """
+        if not _is_jetstream(msg):
+            return False  # core NATS cannot redeliver
+        settings = get_settings()
+        try:
+            attempt = msg.metadata.num_delivered
+            if attempt > settings.max_retries:
+                logger.error(
+                    f"{self.worker_name} giving up on message after {attempt} deliveries"
+                )
+                await msg.term()
+                return False
+            delay = min(
+                settings.retry_delay * 2 ** (attempt - 1), settings.retry_max_delay
+            )
+            # Negative acknowledgment - message will be redelivered after the delay
+            await msg.nak(delay=delay)
+        except Exception as e:
+            # Still unacked, so JetStream redelivers it once ack_wait runs out
+            logger.error(f"Error scheduling redelivery in {self.worker_name}: {e}")
+        return True
 
     @abstractmethod
     async def process_message(self, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
@@ -88,13 +751,21 @@ class BaseWorker(ABC):
     async def publish_result(self, result: Dict[str, Any]) -> None:
         """Publish processing result to NATS."""
         try:
-            await self.nats_client.publish(
-                f"{self.subject}.result",
-                json.dumps(result).encode()
-            )
+            result = await _claim_check().offload(result)
+            size = await self.nats_client.publish_message(f"{self.subject}.result", result)
+            PAYLOAD_SIZE.labels(self.worker_name, "out").observe(size)
             logger.info(f"{self.worker_name} published result: {result.get('id', 'unknown')}")
         except Exception as e:
             logger.error(f"Error publishing result from {self.worker_name}: {e}")
+            raise
+
+    async def publish_partial(self, partial: Dict[str, Any]) -> None:
+        """Publish an incremental result to NATS ahead of the final one."""
+        try:
+            partial = await _claim_check().offload(partial)
+            await self.nats_client.publish_message(f"{self.subject}.partial", partial)
+        except Exception as e:
+            logger.error(f"Error publishing partial result from {self.worker_name}: {e}")
 
     async def publish_error(self, error: str, original_data: Dict[str, Any]) -> None:
         """Publish error to NATS."""
@@ -104,10 +775,7 @@ class BaseWorker(ABC):
                 "original_data": original_data,
                 "worker": self.worker_name,
             }
-            await self.nats_client.publish(
-                f"{self.subject}.error",
-                json.dumps(error_data).encode()
-            )
+            await self.nats_client.publish_message(f"{self.subject}.error", error_data)
             logger.error(f"{self.worker_name} published error: {error}")
         except Exception as e:
             logger.error(f"Error publishing error from {self.worker_name}: {e}")
@@ -0,0 +1,246 @@
+# Created automatically by Cursor AI (2026-10-18)
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+from workers.base import SingleFlight, run_io
+from workers.config import get_settings
+from workers.transcript import Transcript
+
+logger = logging.getLogger(__name__)
+
+
+# Key marking a message field that was replaced by a claim-check reference.
+BLOB_REF = "$blob"
+
+# Blob payload types; JSON unless the reference says otherwise.
+JSON_BLOB = "json"
+TRANSCRIPT_BLOB = "transcript"
+
+
+class BlobStore(ABC):
+    """Content-addressed storage for payloads too large to send over NATS.
+
+    Implementations are blocking; ``ClaimCheck`` calls them on the IO pool.
+    """
+
+    @abstractmethod
+    def put(self, key: str, data: bytes) -> None:
+        """Store ``data`` under ``key``. Storing an existing key is a no-op."""
+
+    @abstractmethod
+    def get(self, key: str) -> bytes:
+        """Return the bytes stored under ``key``."""
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        """Whether ``key`` has been stored."""
+
+
+class LocalBlobStore(BlobStore):
+    """Filesystem blob store for development and single-node deployments."""
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key)
+
+    def put(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp file first so readers never see a partial blob
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+    def get(self, key: str) -> bytes:
+        with open(self._path(key), "rb") as f:
+            return f.read()
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+
+class S3BlobStore(BlobStore):
+    """Blob store backed by the S3/R2 bucket from settings."""
+
+    def __init__(
+        self,
+        bucket: str,
+        prefix: str,
+        endpoint: str,
+        region: str,
+        access_key_id: str,
+        secret_access_key: str,
+    ):
+        import boto3  # only needed on nodes that actually use S3
+
+        self.bucket = bucket
+        self.prefix = prefix
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint,
+            region_name=region,
+            aws_access_key_id=access_key_id,
+            aws_secret_access_key=secret_access_key,
+        )
+
+    def put(self, key: str, data: bytes) -> None:
+        if self.exists(key):
+            return
+        self.client.put_object(Bucket=self.bucket, Key=self.prefix + key, Body=data)
+
+    def get(self, key: str) -> bytes:
+        response = self.client.get_object(Bucket=self.bucket, Key=self.prefix + key)
+        return response["Body"].read()
+
+    def exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self.prefix + key)
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+
+def is_blob_ref(value: Any) -> bool:
+    """Whether ``value`` is a claim-check reference."""
+    return isinstance(value, dict) and BLOB_REF in value
+
+
+class ClaimCheck:
+    """Swaps large message fields for blob references and back.
+
+    ``offload`` stores every top-level field whose JSON encoding exceeds
+    ``threshold`` bytes and replaces it with ``{"$blob": <sha256>, "size": n}``.
+    ``Transcript`` fields are always stored, in their binary form, since they
+    cannot travel as JSON.
+    ``resolve`` fetches a reference on demand. Blobs are content-addressed, so
+    resolved values are cached by key and concurrent resolves of the same key
+    share a single fetch. Cached values are shared between messages, so callers
+    must treat them as read-only.
+    """
+
+    def __init__(self, store: BlobStore, threshold: int, cache_bytes: int):
+        self.store = store
+        self.threshold = threshold
+        self.cache_bytes = cache_bytes
+        self.hits = 0
+        self.misses = 0
+        self._cache: "OrderedDict[str, Tuple[Any, int]]" = OrderedDict()
+        self._cached_bytes = 0
+        self._loads: SingleFlight[Any] = SingleFlight()
+
+    async def offload(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """Return a copy of ``message`` with large fields replaced by references."""
+        offloaded = dict(message)
+        for field, value in message.items():
+            if value is None or is_blob_ref(value):
+                continue
+            if isinstance(value, Transcript):
+                blob_type = TRANSCRIPT_BLOB
+                data = value.to_bytes()
+            else:
+                blob_type = JSON_BLOB
+                data = json.dumps(value).encode()
+                if len(data) <= self.threshold:
+                    continue
+            key = hashlib.sha256(data).hexdigest()
+            await run_io(self.store.put, key, data)
+            self._remember(key, value, len(data))
+            offloaded[field] = {BLOB_REF: key, "size": len(data), "type": blob_type}
+        return offloaded
+
+    async def resolve(self, value: Any) -> Any:
+        """Return the stored value for a reference; other values pass through."""
+        if not is_blob_ref(value):
+            return value
+        key = value[BLOB_REF]
+
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return cached[0]
+
+        if key not in self._loads:
+            self.misses += 1
+        return await self._loads.run(key, lambda: self._load(key, value.get("type", JSON_BLOB)))
+
+    async def _load(self, key: str, blob_type: str) -> Any:
+        data = await run_io(self.store.get, key)
+        if blob_type == TRANSCRIPT_BLOB:
+            resolved = Transcript.from_bytes(data)
+        else:
+            resolved = json.loads(data)
+        self._remember(key, resolved, len(data))
+        return resolved
+
+    def _remember(self, key: str, value: Any, size: int) -> None:
+        if size > self.cache_bytes:
+            return
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return
+        self._cache[key] = (value, size)
+        self._cached_bytes += size
+        while self._cached_bytes > self.cache_bytes:
+            _, (_, evicted) = self._cache.popitem(last=False)
+            self._cached_bytes -= evicted
+
+    def stats(self) -> Dict[str, int]:
+        """Resolve cache counters."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "cached_blobs": len(self._cache),
+            "cached_bytes": self._cached_bytes,
+        }
+
+
+def create_blob_store(backend: Optional[str] = None) -> BlobStore:
+    """Build the blob store selected by ``BLOB_STORE`` (``s3`` or ``local``)."""
+    settings = get_settings()
+    backend = backend or settings.blob_store
+    if backend == "local":
+        return LocalBlobStore(settings.blob_store_path)
+    if backend == "s3":
+        return S3BlobStore(
+            bucket=settings.s3_bucket_name,
+            prefix=settings.blob_store_prefix,
+            endpoint=settings.s3_endpoint,
+            region=settings.s3_region,
+            access_key_id=settings.s3_access_key_id,
+            secret_access_key=settings.s3_secret_access_key,
+        )
+    raise ValueError(f"Unknown blob store backend: {backend}")
+
+
+@lru_cache()
+def get_claim_check() -> ClaimCheck:
+    """Get the process-wide claim-check layer."""
+    settings = get_settings()
+    return ClaimCheck(
+        create_blob_store(),
+        threshold=settings.claim_check_threshold_bytes,
+        cache_bytes=settings.blob_cache_bytes,
+    )
@@ -3,7 +3,7 @@
 import logging
 from typing import Any, Dict, Optional
 
-from workers.base import BaseWorker
+from workers.base import TRANSIENT_ERRORS, BaseWorker
 
 logger = logging.getLogger(__name__)
 
@@ -11,6 +11,9 @@ logger = logging.getLogger(__name__)
 class ClipWorker(BaseWorker):
     """Worker for generating video clips."""
 
+    # Each render runs a full ffmpeg encode.
+    concurrency = 2
+
     @property
     def subject(self) -> str:
         return "media.clips"
@@ -51,6 +54,8 @@ class ClipWorker(BaseWorker):
             logger.info(f"Completed clip generation for video {video_id}")
             return result
             
+        except TRANSIENT_ERRORS:
+            raise
         except Exception as e:
             logger.error(f"Error in clip generation: {e}")
             await self.publish_error(str(e), data)
@@ -0,0 +1,131 @@
+# Created automatically by Cursor AI (2026-10-18)
+
+import json
+import logging
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional speedup
+    msgpack = None
+
+# NATS headers used to negotiate the wire format. Producers label every
+# message with CONTENT_TYPE_HEADER; requesters may ask for a reply format with
+# ACCEPT_HEADER. Messages without a header are JSON, as sent by older workers.
+CONTENT_TYPE_HEADER = "Content-Type"
+ACCEPT_HEADER = "Accept"
+
+JSON_CONTENT_TYPE = "application/json"
+MSGPACK_CONTENT_TYPE = "application/msgpack"
+
+
+class Codec(ABC):
+    """Encodes message dicts to bytes and back."""
+
+    name: str
+    content_type: str
+
+    @abstractmethod
+    def encode(self, data: Any) -> bytes:
+        """Serialize ``data``."""
+
+    @abstractmethod
+    def decode(self, payload: bytes) -> Any:
+        """Deserialize ``payload``."""
+
+
+class JSONCodec(Codec):
+    """Standard library JSON; always available."""
+
+    name = "json"
+    content_type = JSON_CONTENT_TYPE
+
+    def encode(self, data: Any) -> bytes:
+        return json.dumps(data, default=_to_builtin).encode()
+
+    def decode(self, payload: bytes) -> Any:
+        return json.loads(payload)
+
+
+class OrjsonCodec(Codec):
+    """orjson: same wire format as JSONCodec, several times faster."""
+
+    name = "orjson"
+    content_type = JSON_CONTENT_TYPE
+
+    def encode(self, data: Any) -> bytes:
+        return orjson.dumps(
+            data, default=_to_builtin, option=orjson.OPT_SERIALIZE_NUMPY
+        )
+
+    def decode(self, payload: bytes) -> Any:
+        return orjson.loads(payload)
+
+
+class MsgpackCodec(Codec):
+    """MessagePack: smaller payloads, binary-safe, needs a msgpack-aware consumer."""
+
+    name = "msgpack"
+    content_type = MSGPACK_CONTENT_TYPE
+
+    def encode(self, data: Any) -> bytes:
+        return msgpack.packb(data, default=_to_builtin, use_bin_type=True)
+
+    def decode(self, payload: bytes) -> Any:
+        return msgpack.unpackb(payload, raw=False)
+
+
+def _to_builtin(value: Any) -> Any:
+    # numpy scalars and arrays show up in WhisperX segments
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not serializable")
+
+
+@lru_cache()
+def available_codecs() -> Dict[str, Codec]:
+    """Codecs whose libraries are installed, by name."""
+    codecs: Dict[str, Codec] = {"json": JSONCodec()}
+    if orjson is not None:
+        codecs["orjson"] = OrjsonCodec()
+    if msgpack is not None:
+        codecs["msgpack"] = MsgpackCodec()
+    return codecs
+
+
+def get_codec(name: str) -> Codec:
+    """Codec by name, falling back to the fastest available JSON codec."""
+    codecs = available_codecs()
+    if name in codecs:
+        return codecs[name]
+    fallback = codecs.get("orjson", codecs["json"])
+    logger.warning(f"Codec {name} unavailable, using {fallback.name}")
+    return fallback
+
+
+def codec_for_content_type(content_type: Optional[str], preferred: Codec) -> Codec:
+    """Pick the decoder for a message's ``Content-Type`` header.
+
+    ``preferred`` is used when it speaks the same format, so JSON messages are
+    decoded with orjson whenever it is installed.
+    """
+    content_type = content_type or JSON_CONTENT_TYPE
+    if preferred.content_type == content_type:
+        return preferred
+    for codec in sorted(
+        available_codecs().values(), key=lambda c: c.name != "orjson"
+    ):
+        if codec.content_type == content_type:
+            return codec
+    raise ValueError(f"Unsupported message content type: {content_type}")
@@ -2,7 +2,7 @@
 
 import os
 from functools import lru_cache
-from typing import Optional
+from typing import Dict, List, Optional
 
 from pydantic import Field
 from pydantic_settings import BaseSettings
@@ -13,11 +13,28 @@ class Settings(BaseSettings):
     
     # Database
     database_url: str = Field(..., env="DATABASE_URL")
+    database_pool_size: int = Field(10, env="DATABASE_POOL_SIZE")
     
     # NATS
     nats_url: str = Field("nats://localhost:4222", env="NATS_URL")
     nats_cluster_id: str = Field("ai-video-summarizer", env="NATS_CLUSTER_ID")
     nats_client_id: str = Field("worker", env="NATS_CLIENT_ID")
+    # Wire codec for published messages: json, orjson or msgpack. orjson keeps
+    # the JSON format; switch to msgpack once every consumer understands it.
+    message_codec: str = Field("orjson", env="MESSAGE_CODEC")
+
+    # JetStream durable pull consumers
+    jetstream_enabled: bool = Field(True, env="JETSTREAM_ENABLED")
+    jetstream_stream: str = Field("MEDIA", env="JETSTREAM_STREAM")
+    # Job subjects only: results, errors and request/reply queries
+    # (media.<stage>.<kind>) stay on core NATS
+    jetstream_subjects: List[str] = Field(
+        default_factory=lambda: ["media.*"], env="JETSTREAM_SUBJECTS"
+    )
+    jetstream_max_age: float = Field(7 * 24 * 3600, env="JETSTREAM_MAX_AGE")
+    jetstream_ack_wait: float = Field(60.0, env="JETSTREAM_ACK_WAIT")
+    jetstream_fetch_batch: int = Field(16, env="JETSTREAM_FETCH_BATCH")
+    jetstream_fetch_timeout: float = Field(5.0, env="JETSTREAM_FETCH_TIMEOUT")
     
     # S3/Storage
     s3_endpoint: str = Field(..., env="S3_ENDPOINT")
@@ -25,24 +42,172 @@ class Settings(BaseSettings):
     s3_access_key_id: str = Field(..., env="S3_ACCESS_KEY_ID")
     s3_secret_access_key: str = Field(..., env="S3_SECRET_ACCESS_KEY")
     s3_bucket_name: str = Field(..., env="S3_BUCKET_NAME")
+
+    # Claim-check blob store for large message payloads
+    blob_store: str = Field("s3", env="BLOB_STORE")  # s3 or local
+    blob_store_path: str = Field("/tmp/worker-blobs", env="BLOB_STORE_PATH")
+    blob_store_prefix: str = Field("blobs/", env="BLOB_STORE_PREFIX")
+    claim_check_threshold_bytes: int = Field(64 * 1024, env="CLAIM_CHECK_THRESHOLD_BYTES")
+    blob_cache_bytes: int = Field(256 * 1024 * 1024, env="BLOB_CACHE_BYTES")
     
     # Redis
     redis_url: str = Field("redis://localhost:6379", env="REDIS_URL")
     redis_password: Optional[str] = Field(None, env="REDIS_PASSWORD")
     
+    # Result cache
+    result_cache_enabled: bool = Field(True, env="RESULT_CACHE_ENABLED")
+    result_cache_redis: bool = Field(True, env="RESULT_CACHE_REDIS")
+    result_cache_path: str = Field("/tmp/worker-result-cache", env="RESULT_CACHE_PATH")
+    result_cache_ttl: float = Field(7 * 24 * 3600, env="RESULT_CACHE_TTL")
+    result_cache_max_bytes: int = Field(1024 * 1024 * 1024, env="RESULT_CACHE_MAX_BYTES")
+    result_cache_lock_timeout: float = Field(600.0, env="RESULT_CACHE_LOCK_TIMEOUT")
+    
     # AI/ML Settings
     whisperx_model: str = Field("large-v2", env="WHISPERX_MODEL")
     whisperx_device: str = Field("cuda", env="WHISPERX_DEVICE")
     whisperx_compute_type: str = Field("float16", env="WHISPERX_COMPUTE_TYPE")
+    whisperx_warmup_languages: List[str] = Field(
+        default_factory=lambda: ["en"], env="WHISPERX_WARMUP_LANGUAGES"
+    )
+    ml_memory_budget_mb: float = Field(8192, env="ML_MEMORY_BUDGET_MB")
+    asr_mode: str = Field("stream", env="ASR_MODE")  # batch, stream or sharded
+    asr_window_seconds: float = Field(30.0, env="ASR_WINDOW_SECONDS")
+    asr_max_window_seconds: float = Field(45.0, env="ASR_MAX_WINDOW_SECONDS")
+    asr_stream_lookahead: int = Field(1, env="ASR_STREAM_LOOKAHEAD")
+    asr_shard_seconds: float = Field(600.0, env="ASR_SHARD_SECONDS")
+    asr_shard_overlap_seconds: float = Field(5.0, env="ASR_SHARD_OVERLAP_SECONDS")
+    # Shards of one video transcribed at once; raise with ASR_POOL_SIZE
+    asr_shard_parallelism: int = Field(1, env="ASR_SHARD_PARALLELISM")
+    # Decoded audio shared by ASR, diarization and the audio features on a node
+    audio_cache_path: str = Field("/tmp/worker-audio-cache", env="AUDIO_CACHE_PATH")
+    audio_cache_max_bytes: int = Field(8 * 1024 * 1024 * 1024, env="AUDIO_CACHE_MAX_BYTES")
+    # float32, or int16 at half the disk and page cache per hour of audio
+    audio_cache_dtype: str = Field("float32", env="AUDIO_CACHE_DTYPE")
+    # Diarization: one embedding per window of speech, every step seconds
+    diarization_window_seconds: float = Field(1.5, env="DIARIZATION_WINDOW_SECONDS")
+    diarization_step_seconds: float = Field(0.75, env="DIARIZATION_STEP_SECONDS")
+    # Clusters less similar than this (cosine) are different speakers
+    diarization_threshold: float = Field(0.4, env="DIARIZATION_THRESHOLD")
+    # Longer files are reduced to this many k-means centroids before clustering
+    diarization_max_cluster_items: int = Field(1000, env="DIARIZATION_MAX_CLUSTER_ITEMS")
+    diarization_batch_windows: int = Field(64, env="DIARIZATION_BATCH_WINDOWS")
+    embedding_model: str = Field(
+        "sentence-transformers/all-mpnet-base-v2", env="EMBEDDING_MODEL"
+    )
+    embedding_device: str = Field("cpu", env="EMBEDDING_DEVICE")
+    embedding_window_words: int = Field(120, env="EMBEDDING_WINDOW_WORDS")
+    embedding_overlap_words: int = Field(30, env="EMBEDDING_OVERLAP_WORDS")
+    # Padded tokens per encoder batch; batches of short chunks get wider
+    embedding_batch_tokens: int = Field(8192, env="EMBEDDING_BATCH_TOKENS")
+    embedding_max_batch: int = Field(64, env="EMBEDDING_MAX_BATCH")
+    embedding_cache_enabled: bool = Field(True, env="EMBEDDING_CACHE_ENABLED")
+    embedding_cache_path: str = Field("/tmp/worker-embedding-cache", env="EMBEDDING_CACHE_PATH")
+    # 768 float16 dimensions make each entry 1.5 KB on disk
+    embedding_cache_max_entries: int = Field(200_000, env="EMBEDDING_CACHE_MAX_ENTRIES")
+    embedding_cache_redis: bool = Field(False, env="EMBEDDING_CACHE_REDIS")
+    embedding_cache_ttl: float = Field(30 * 24 * 3600, env="EMBEDDING_CACHE_TTL")
+    # In-memory indexes answering media.search.query
+    search_index_max_bytes: int = Field(512 * 1024 * 1024, env="SEARCH_INDEX_MAX_BYTES")
+    search_index_ttl: float = Field(600.0, env="SEARCH_INDEX_TTL")
+    # Scopes with fewer segments are searched exactly rather than with IVF-PQ
+    search_index_exact_below: int = Field(20000, env="SEARCH_INDEX_EXACT_BELOW")
+    search_index_nprobe: int = Field(16, env="SEARCH_INDEX_NPROBE")
+    # BM25 index fused with the vector hits; kept on local disk per replica
+    lexical_index_path: str = Field("/tmp/worker-lexical-index", env="LEXICAL_INDEX_PATH")
+    lexical_index_max_segments: int = Field(10, env="LEXICAL_INDEX_MAX_SEGMENTS")
+    # k in the reciprocal rank fusion score 1 / (k + rank)
+    search_rrf_k: int = Field(60, env="SEARCH_RRF_K")
+
+    # Segmentation: scene cuts on a downscaled, subsampled decode of the video
+    scene_sample_stride: float = Field(0.25, env="SCENE_SAMPLE_STRIDE")
+    scene_frame_width: int = Field(128, env="SCENE_FRAME_WIDTH")
+    scene_frame_height: int = Field(72, env="SCENE_FRAME_HEIGHT")
+    # Frame difference score in [0, 1] that reads as a cut
+    scene_threshold: float = Field(0.3, env="SCENE_THRESHOLD")
+    scene_min_seconds: float = Field(1.0, env="SCENE_MIN_SECONDS")
+    scene_batch_frames: int = Field(64, env="SCENE_BATCH_FRAMES")
+    # Topic shifts: TextTiling over embedded transcript windows (EMBEDDING_MODEL)
+    topic_window_words: int = Field(120, env="TOPIC_WINDOW_WORDS")
+    topic_stride_words: int = Field(20, env="TOPIC_STRIDE_WORDS")
+    # Windows embedded per page of the streaming pass
+    topic_batch_windows: int = Field(256, env="TOPIC_BATCH_WINDOWS")
+    # Depth above the mean, in standard deviations, that marks a topic shift
+    topic_cutoff: float = Field(0.5, env="TOPIC_CUTOFF")
+    # Chapters are at least this long; without a transcript, scenes are merged to it
+    chapter_min_seconds: float = Field(60.0, env="CHAPTER_MIN_SECONDS")
+    # Topic boundaries move onto a scene cut this close
+    chapter_snap_seconds: float = Field(10.0, env="CHAPTER_SNAP_SECONDS")
+
+    # Highlights: windows scored on keyphrases (EMBEDDING_MODEL), audio and chapters
+    highlight_count: int = Field(10, env="HIGHLIGHT_COUNT")
+    highlight_window_seconds: float = Field(30.0, env="HIGHLIGHT_WINDOW_SECONDS")
+    # Windows start on this grid, which is also the resolution of every feature
+    highlight_hop_seconds: float = Field(5.0, env="HIGHLIGHT_HOP_SECONDS")
+    # Candidate phrases embedded per video, and how many of them count as keyphrases
+    highlight_max_candidates: int = Field(2000, env="HIGHLIGHT_MAX_CANDIDATES")
+    highlight_keyphrases: int = Field(20, env="HIGHLIGHT_KEYPHRASES")
+    highlight_batch_phrases: int = Field(512, env="HIGHLIGHT_BATCH_PHRASES")
+    # Level above the surrounding 30 s that reads as laughter or applause
+    highlight_spike_db: float = Field(8.0, env="HIGHLIGHT_SPIKE_DB")
     
+    # Summarization: map-reduce over transcript sections
+    summarization_backend: str = Field("extractive", env="SUMMARIZATION_BACKEND")
+    summarization_section_words: int = Field(1500, env="SUMMARIZATION_SECTION_WORDS")
+    summarization_section_summary_words: int = Field(150, env="SUMMARIZATION_SECTION_SUMMARY_WORDS")
+    # Summaries combined per reduce call
+    summarization_fan_in: int = Field(8, env="SUMMARIZATION_FAN_IN")
+    # Backend calls in flight per worker process
+    summarization_concurrency: int = Field(8, env="SUMMARIZATION_CONCURRENCY")
+
     # API Keys
     openai_api_key: Optional[str] = Field(None, env="OPENAI_API_KEY")
     anthropic_api_key: Optional[str] = Field(None, env="ANTHROPIC_API_KEY")
+
+    # LLM client shared by LLM-backed workers; limits apply per provider
+    llm_provider: str = Field("anthropic", env="LLM_PROVIDER")
+    openai_base_url: str = Field("https://api.openai.com", env="OPENAI_BASE_URL")
+    openai_model: str = Field("gpt-4o-mini", env="OPENAI_MODEL")
+    anthropic_base_url: str = Field("https://api.anthropic.com", env="ANTHROPIC_BASE_URL")
+    anthropic_model: str = Field("claude-3-5-haiku-latest", env="ANTHROPIC_MODEL")
+    llm_requests_per_minute: float = Field(500, env="LLM_REQUESTS_PER_MINUTE")
+    llm_tokens_per_minute: float = Field(200_000, env="LLM_TOKENS_PER_MINUTE")
+    # Adaptive concurrency starts here and backs off when throttled
+    llm_initial_concurrency: int = Field(4, env="LLM_INITIAL_CONCURRENCY")
+    llm_max_concurrency: int = Field(32, env="LLM_MAX_CONCURRENCY")
+    llm_max_connections: int = Field(32, env="LLM_MAX_CONNECTIONS")
+    llm_timeout: float = Field(60.0, env="LLM_TIMEOUT")
+    llm_max_retries: int = Field(4, env="LLM_MAX_RETRIES")
+    # Per-video token counts in Redis, so every replica sees the total
+    llm_usage_redis: bool = Field(True, env="LLM_USAGE_REDIS")
+    llm_usage_ttl: float = Field(7 * 24 * 3600, env="LLM_USAGE_TTL")
     
     # Worker Settings
+    # Roles this node runs: asr, text, media, io, or all (see workers.roles)
+    worker_roles: List[str] = Field(default_factory=lambda: ["all"], env="WORKER_ROLES")
     worker_concurrency: int = Field(4, env="WORKER_CONCURRENCY")
+    worker_concurrency_overrides: Dict[str, int] = Field(
+        default_factory=dict, env="WORKER_CONCURRENCY_OVERRIDES"
+    )
+    worker_max_pending: int = Field(16, env="WORKER_MAX_PENDING")
+    worker_drain_timeout: float = Field(30.0, env="WORKER_DRAIN_TIMEOUT")
+    io_pool_size: int = Field(8, env="IO_POOL_SIZE")
+    cpu_pool_size: int = Field(2, env="CPU_POOL_SIZE")
+    # Processes holding the WhisperX models; each loads its own copy
+    asr_pool_size: int = Field(1, env="ASR_POOL_SIZE")
+    # Processes encoding search queries, each with the embedding model preloaded
+    query_pool_size: int = Field(1, env="QUERY_POOL_SIZE")
+    cpu_pool_start_method: str = Field("spawn", env="CPU_POOL_START_METHOD")
+    loop_lag_interval: float = Field(0.5, env="LOOP_LAG_INTERVAL")
+    # /ready fails above this loop lag; /live fails once the loop stalls this long
+    ready_max_loop_lag: float = Field(1.0, env="READY_MAX_LOOP_LAG")
+    live_max_loop_stall: float = Field(30.0, env="LIVE_MAX_LOOP_STALL")
+    # /admin/profile is disabled unless ADMIN_TOKEN is set; requests send it as X-Admin-Token
+    admin_token: Optional[str] = Field(None, env="ADMIN_TOKEN")
+    profile_max_seconds: float = Field(300.0, env="PROFILE_MAX_SECONDS")
     max_retries: int = Field(3, env="MAX_RETRIES")
-    retry_delay: int = Field(5, env="RETRY_DELAY")
+    retry_delay: float = Field(5, env="RETRY_DELAY")
+    retry_max_delay: float = Field(300, env="RETRY_MAX_DELAY")
+    pipeline_stage_timeout: float = Field(3 * 3600, env="PIPELINE_STAGE_TIMEOUT")
     
     # Logging
     log_level: str = Field("INFO", env="LOG_LEVEL")
@@ -0,0 +1,39 @@
+# Created automatically by Cursor AI (2026-10-18)
+
+import logging
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Iterator
+
+from workers.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache()
+def get_db_pool() -> Any:
+    """Get the process-wide PostgreSQL connection pool.
+
+    Connections are blocking; use them from the IO pool. psycopg2 is imported
+    here so roles that never touch the database do not load it.
+    """
+    from psycopg2.pool import ThreadedConnectionPool
+
+    settings = get_settings()
+    logger.info(f"Opening database pool with up to {settings.database_pool_size} connections")
+    return ThreadedConnectionPool(1, settings.database_pool_size, settings.database_url)
+
+
+@contextmanager
+def connection() -> Iterator[Any]:
+    """Borrow a pooled connection for one transaction.
+
+    Commits when the block exits cleanly and rolls back otherwise.
+    """
+    pool = get_db_pool()
+    conn = pool.getconn()
+    try:
+        with conn:
+            yield conn
+    finally:
+        pool.putconn(conn)
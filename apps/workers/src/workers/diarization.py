@@ -0,0 +1,358 @@
+# Created automatically by Cursor AI (2026-10-18)
+
+import logging
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from workers.audio import SAMPLE_RATE, frame_rms, open_pcm
+from workers.transcript import NO_SPEAKER, Transcript
+
+logger = logging.getLogger(__name__)
+
+# Names the embedding and clustering method; part of the worker's cache version
+DIARIZATION_VERSION = "logmel-ahc:1"
+
+# Log-mel analysis for speaker embeddings: 25 ms frames every 10 ms
+FRAME_SECONDS = 0.025
+HOP_SECONDS = 0.010
+N_FFT = 512
+N_MELS = 40
+
+
+def detect_speech(
+    audio: np.ndarray,
+    sample_rate: int = SAMPLE_RATE,
+    frame_ms: float = 30.0,
+    margin_db: float = 12.0,
+    min_speech: float = 0.3,
+    min_silence: float = 0.3,
+) -> np.ndarray:
+    """Energy VAD: ``(n, 2)`` start/end seconds of speech regions.
+
+    A frame is speech when it is ``margin_db`` above the noise floor (the
+    10th percentile of frame level), or, in audio with little silence, no
+    more than ``margin_db`` below the loud frames. Pauses shorter than
+    ``min_silence`` are bridged and regions shorter than ``min_speech``
+    dropped.
+    """
+    frame_length = max(int(sample_rate * frame_ms / 1000), 1)
+    rms = frame_rms(audio, frame_length)
+    if not len(rms):
+        return np.zeros((0, 2))
+    level = 20 * np.log10(rms + 1e-10)
+    threshold = min(np.percentile(level, 10) + margin_db, np.percentile(level, 95) - margin_db)
+    speech = np.concatenate([[False], level > threshold, [False]])
+    edges = np.flatnonzero(np.diff(speech.astype(np.int8)))
+    starts, ends = edges[::2], edges[1::2]
+
+    frame_seconds = frame_length / sample_rate
+    keep = (starts[1:] - ends[:-1]) * frame_seconds >= min_silence
+    starts = starts[np.concatenate([[True], keep])]
+    ends = ends[np.concatenate([keep, [True]])]
+    long_enough = (ends - starts) * frame_seconds >= min_speech
+    return np.stack([starts[long_enough], ends[long_enough]], axis=1) * frame_seconds
+
+
+def embedding_windows(
+    speech: np.ndarray, window: float, step: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Windows to embed within speech regions, and the span each one owns.
+
+    Regions longer than ``window`` get a window every ``step`` seconds, the
+    last one flush with the region's end. A window owns the time from the
+    midpoint with its predecessor to the midpoint with its successor, so
+    owned spans tile the speech without overlap. Both are ``(n, 2)`` seconds.
+    """
+    windows, owned = [], []
+    for start, end in speech:
+        if end - start <= window:
+            starts = np.array([start])
+        else:
+            starts = np.arange(start, end - window, step)
+            starts = np.append(starts, end - window)
+        ends = np.minimum(starts + window, end)
+        centres = (starts + ends) / 2
+        bounds = np.concatenate([[start], (centres[1:] + centres[:-1]) / 2, [end]])
+        windows.append(np.stack([starts, ends], axis=1))
+        owned.append(np.stack([bounds[:-1], bounds[1:]], axis=1))
+    if not windows:
+        return np.zeros((0, 2)), np.zeros((0, 2))
+    return np.concatenate(windows), np.concatenate(owned)
+
+
+@lru_cache()
+def mel_filterbank(sample_rate: int, n_fft: int = N_FFT, n_mels: int = N_MELS) -> np.ndarray:
+    """Triangular mel filters as an ``(n_fft // 2 + 1, n_mels)`` matrix."""
+    def to_mel(hz):
+        return 2595.0 * np.log10(1.0 + hz / 700.0)
+
+    def to_hz(mel):
+        return 700.0 * (10 ** (mel / 2595.0) - 1.0)
+
+    points = to_hz(np.linspace(to_mel(20.0), to_mel(sample_rate / 2), n_mels + 2))
+    bins = np.fft.rfftfreq(n_fft, 1.0 / sample_rate)
+    lower, centre, upper = points[:-2, None], points[1:-1, None], points[2:, None]
+    rising = (bins[None, :] - lower) / (centre - lower)
+    falling = (upper - bins[None, :]) / (upper - centre)
+    return np.maximum(0.0, np.minimum(rising, falling)).T.astype(np.float32)
+
+
+def speaker_embeddings(
+    audio: np.ndarray,
+    windows: np.ndarray,
+    sample_rate: int = SAMPLE_RATE,
+    batch: int = 64,
+) -> np.ndarray:
+    """Log-mel statistics embedding of each window, ``batch`` windows at a time.
+
+    Every window of a batch is read at the longest window's length, framed
+    with a strided view, and run through one FFT and one filterbank product;
+    frames past a window's own end are masked out of its mean and standard
+    deviation. Returns ``(n, 2 * N_MELS)`` float32.
+    """
+    frame = int(FRAME_SECONDS * sample_rate)
+    hop = int(HOP_SECONDS * sample_rate)
+    filters = mel_filterbank(sample_rate)
+    taper = np.hanning(frame).astype(np.float32)
+    bounds = np.round(windows * sample_rate).astype(np.int64)
+    length = max(int((bounds[:, 1] - bounds[:, 0]).max(initial=0)), frame)
+    frames_per_window = (length - frame) // hop + 1
+    embeddings = np.zeros((len(windows), 2 * N_MELS), dtype=np.float32)
+
+    for lo in range(0, len(windows), batch):
+        starts, ends = bounds[lo:lo + batch, 0], bounds[lo:lo + batch, 1]
+        samples = np.zeros((len(starts), length), dtype=np.float32)
+        for row, (start, end) in enumerate(zip(starts, ends)):
+            samples[row, :end - start] = audio[start:end]
+        framed = sliding_window_view(samples, frame, axis=1)[:, ::hop][:, :frames_per_window]
+        power = np.abs(np.fft.rfft(framed * taper, n=N_FFT)) ** 2
+        logmel = np.log(power.astype(np.float32) @ filters + 1e-6)
+
+        valid = np.maximum((ends - starts - frame) // hop + 1, 1)
+        mask = (np.arange(frames_per_window)[None, :] < valid[:, None])[..., None]
+        mean = (logmel * mask).sum(axis=1) / valid[:, None]
+        var = (((logmel - mean[:, None]) ** 2) * mask).sum(axis=1) / valid[:, None]
+        embeddings[lo:lo + batch] = np.concatenate([mean, np.sqrt(var)], axis=1)
+    return embeddings
+
+
+def _normalize(embeddings: np.ndarray) -> np.ndarray:
+    # Centre on the file's mean so what is common to every speaker (room,
+    # microphone) cancels out of the cosine similarities
+    centred = embeddings - embeddings.mean(axis=0)
+    return centred / np.maximum(np.linalg.norm(centred, axis=1, keepdims=True), 1e-12)
+
+
+def agglomerate(
+    vectors: np.ndarray,
+    weights: np.ndarray,
+    threshold: float,
+    num_clusters: Optional[int] = None,
+) -> np.ndarray:
+    """Average-linkage clustering of unit vectors by cosine similarity.
+
+    Merges the most similar pair until ``num_clusters`` remain or, without
+    one, until no pair is more similar than ``threshold``. Each merge
+    updates one row of the similarity matrix with the Lance-Williams
+    formula, so memory is one ``m x m`` float32 matrix. ``weights`` count
+    the items each vector stands for. Returns a cluster index per vector.
+    """
+    m = len(vectors)
+    if m == 0:
+        return np.zeros(0, dtype=np.int64)
+    similarity = (vectors @ vectors.T).astype(np.float32)
+    np.fill_diagonal(similarity, -np.inf)
+    sizes = weights.astype(np.float64).copy()
+    cluster = np.arange(m)
+    remaining = m
+    target = num_clusters or 1
+    while remaining > target:
+        flat = int(np.argmax(similarity))
+        a, b = divmod(flat, m)
+        if num_clusters is None and similarity[a, b] < threshold:
+            break
+        merged = (sizes[a] * similarity[a] + sizes[b] * similarity[b]) / (sizes[a] + sizes[b])
+        similarity[a] = merged
+        similarity[:, a] = merged
+        similarity[a, a] = -np.inf
+        similarity[b] = -np.inf
+        similarity[:, b] = -np.inf
+        sizes[a] += sizes[b]
+        cluster[cluster == b] = a
+        remaining -= 1
+    return cluster
+
+
+def spherical_kmeans(
+    vectors: np.ndarray, k: int, iterations: int = 10, chunk: int = 4096
+) -> Tuple[np.ndarray, np.ndarray]:
+    """``k`` unit centroids and each vector's centroid, assigning in chunks.
+
+    Centroids start at evenly spaced vectors, which for windows in time
+    order spreads them over the whole file.
+    """
+    centroids = vectors[np.linspace(0, len(vectors) - 1, k).astype(np.int64)].copy()
+    assignment = np.zeros(len(vectors), dtype=np.int64)
+    for _ in range(iterations):
+        for lo in range(0, len(vectors), chunk):
+            assignment[lo:lo + chunk] = np.argmax(vectors[lo:lo + chunk] @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        # An emptied centroid stays where it was
+        centroids = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centroids)
+    return centroids, assignment
+
+
+def cluster_speakers(
+    embeddings: np.ndarray,
+    threshold: float,
+    num_speakers: Optional[int] = None,
+    max_items: int = 1000,
+) -> np.ndarray:
+    """Speaker index per embedding, numbered in order of first appearance.
+
+    Up to ``max_items`` embeddings are clustered directly. Longer files are
+    first reduced to ``max_items`` k-means centroids, which are clustered
+    weighted by their sizes, so the similarity matrix never exceeds
+    ``max_items`` squared whatever the file's length.
+    """
+    if not len(embeddings):
+        return np.zeros(0, dtype=np.int64)
+    vectors = _normalize(embeddings.astype(np.float32))
+    if len(vectors) > max_items:
+        centroids, assignment = spherical_kmeans(vectors, max_items)
+        weights = np.bincount(assignment, minlength=max_items)
+        used = np.flatnonzero(weights)
+        clusters = agglomerate(centroids[used], weights[used], threshold, num_speakers)
+        remap = np.zeros(max_items, dtype=np.int64)
+        remap[used] = clusters
+        clusters = remap[assignment]
+    else:
+        clusters = agglomerate(vectors, np.ones(len(vectors)), threshold, num_speakers)
+    _, first, labels = np.unique(clusters, return_index=True, return_inverse=True)
+    order = np.argsort(np.argsort(first))
+    return order[labels]
+
+
+def speaker_turns(owned: np.ndarray, labels: np.ndarray) -> np.ndarray:
+    """Merge contiguous owned spans of one speaker: ``(n, 3)`` start, end, speaker."""
+    if not len(owned):
+        return np.zeros((0, 3))
+    breaks = np.flatnonzero(
+        (labels[1:] != labels[:-1]) | (owned[1:, 0] > owned[:-1, 1] + 1e-6)
+    ) + 1
+    first = np.concatenate([[0], breaks])
+    last = np.concatenate([breaks - 1, [len(owned) - 1]])
+    return np.stack([owned[first, 0], owned[last, 1], labels[first]], axis=1)
+
+
+def assign_speakers(
+    word_starts: np.ndarray,
+    word_ends: np.ndarray,
+    turn_starts: np.ndarray,
+    turn_ends: np.ndarray,
+    turn_speakers: np.ndarray,
+) -> np.ndarray:
+    """Speaker of each word: the turn it overlaps most, else the nearest.
+
+    Words and turns are both sorted and turns do not overlap, so one merge
+    of the two sequences (``searchsorted``) finds the first turn ending
+    after each word starts; that turn and the next are the ones a word can
+    overlap most. Runs in O((words + turns) log turns) with no per-word
+    Python. Returns ``NO_SPEAKER`` for every word when there are no turns.
+    """
+    if not len(turn_starts):
+        return np.full(len(word_starts), NO_SPEAKER, dtype=np.int16)
+    last = len(turn_starts) - 1
+    first = np.minimum(np.searchsorted(turn_ends, word_starts, side="right"), last)
+    second = np.minimum(first + 1, last)
+
+    def overlap(turn):
+        return np.minimum(word_ends, turn_ends[turn]) - np.maximum(word_starts, turn_starts[turn])
+
+    def distance(turn):
+        return np.maximum(turn_starts[turn] - word_ends, word_starts - turn_ends[turn])
+
+    previous = np.maximum(first - 1, 0)
+    best = np.where(overlap(second) > overlap(first), second, first)
+    # Words in a gap between turns go to whichever side is closer
+    gap = overlap(best) <= 0
+    nearer = np.where(distance(previous) < distance(first), previous, first)
+    best = np.where(gap, nearer, best)
+    return turn_speakers[best].astype(np.int16)
+
+
+def label_transcript(transcript: Transcript, turns: List[Dict[str, Any]]) -> Transcript:
+    """A copy of ``transcript`` with every word's speaker set from ``turns``."""
+    speakers = sorted({turn["speaker"] for turn in turns}, key=lambda s: int(s.rsplit("_", 1)[1]))
+    index = {speaker: i for i, speaker in enumerate(speakers)}
+    turn_starts = np.array([turn["start"] for turn in turns], dtype=np.float64)
+    turn_ends = np.array([turn["end"] for turn in turns], dtype=np.float64)
+    turn_speakers = np.array([index[turn["speaker"]] for turn in turns], dtype=np.int16)
+    speaker_ids = assign_speakers(
+        transcript.starts, transcript.ends, turn_starts, turn_ends, turn_speakers
+    )
+    return Transcript(
+        transcript.starts,
+        transcript.ends,
+        transcript.confidences,
+        speaker_ids,
+        transcript.text_buffer,
+        transcript.text_offsets,
+        speakers,
+        transcript.segment_offsets,
+        transcript.language,
+        transcript.confidence,
+    )
+
+
+def diarize(
+    audio: np.ndarray,
+    sample_rate: int,
+    window: float,
+    step: float,
+    threshold: float,
+    num_speakers: Optional[int] = None,
+    max_items: int = 1000,
+    batch: int = 64,
+) -> Dict[str, Any]:
+    """Speaker turns of an audio signal: VAD, embeddings, clustering, merging."""
+    speech = detect_speech(audio, sample_rate)
+    windows, owned = embedding_windows(speech, window, step)
+    embeddings = speaker_embeddings(audio, windows, sample_rate, batch)
+    labels = cluster_speakers(embeddings, threshold, num_speakers, max_items)
+    turns = speaker_turns(owned, labels)
+    return {
+        "turns": [
+            {"speaker": f"speaker_{int(speaker)}", "start": round(float(start), 3), "end": round(float(end), 3)}
+            for start, end, speaker in turns
+        ],
+        "num_speakers": int(labels.max()) + 1 if len(labels) else 0,
+        "speech_seconds": round(float((speech[:, 1] - speech[:, 0]).sum()), 3),
+        "windows": len(windows),
+    }
+
+
+def diarize_pcm(
+    pcm_path: str,
+    window: float,
+    step: float,
+    threshold: float,
+    num_speakers: Optional[int] = None,
+    max_items: int = 1000,
+    batch: int = 64,
+) -> Dict[str, Any]:
+    """CPU pool entry point: ``diarize`` over a PCM artifact."""
+    audio = open_pcm(pcm_path)
+    result = diarize(
+        audio, audio.sample_rate, window, step, threshold, num_speakers, max_items, batch
+    )
+    logger.info(
+        f"Diarized {result['speech_seconds']:.0f}s of speech in {result['windows']} windows: "
+        f"{result['num_speakers']} speakers, {len(result['turns'])} turns"
+    )
+    return result
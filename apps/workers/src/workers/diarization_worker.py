@@ -3,7 +3,10 @@
 import logging
 from typing import Any, Dict, Optional
 
-from workers.base import BaseWorker
+from workers.audio_cache import get_audio_cache
+from workers.base import CPU_POOL, TRANSIENT_ERRORS, BaseWorker
+from workers.config import get_settings
+from workers.diarization import DIARIZATION_VERSION, diarize_pcm, label_transcript
 
 logger = logging.getLogger(__name__)
 
@@ -11,6 +14,17 @@ logger = logging.getLogger(__name__)
 class DiarizationWorker(BaseWorker):
     """Worker for speaker diarization."""
 
+    cache_file_fields = ("audio_path",)
+
+    def __init__(self, nats_client):
+        super().__init__(nats_client)
+        settings = get_settings()
+        self.window_seconds = settings.diarization_window_seconds
+        self.step_seconds = settings.diarization_step_seconds
+        self.threshold = settings.diarization_threshold
+        self.max_cluster_items = settings.diarization_max_cluster_items
+        self.batch_windows = settings.diarization_batch_windows
+
     @property
     def subject(self) -> str:
         return "media.diarization"
@@ -19,36 +33,62 @@ class DiarizationWorker(BaseWorker):
     def worker_name(self) -> str:
         return "DiarizationWorker"
 
+    @property
+    def cache_version(self) -> Optional[str]:
+        return (
+            f"{DIARIZATION_VERSION}:{self.window_seconds}:{self.step_seconds}:"
+            f"{self.threshold}:{self.max_cluster_items}"
+        )
+
     async def process_message(self, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """Process diarization request."""
+        """Process diarization request.
+
+        ``num_speakers`` fixes the number of speakers when it is known. A
+        ``transcript``, if given, comes back with each word's speaker set.
+        """
         try:
             video_id = data.get("video_id")
             audio_path = data.get("audio_path")
-            
+            transcript = await self.resolve_transcript(data.get("transcript"))
+
             if not video_id or not audio_path:
                 raise ValueError("Missing video_id or audio_path")
-            
+
             logger.info(f"Starting diarization for video {video_id}")
-            
-            # TODO: Implement speaker diarization using pyannote.audio
-            # For now, return placeholder result
-            speakers = [
-                {
-                    "speaker": "speaker_0",
-                    "start": 0.0,
-                    "end": 30.0,
-                }
-            ]
-            
+
+            async with get_audio_cache().lease(audio_path) as pcm_path:
+                with self.span("diarize"):
+                    diarized = await self.run_in_pool(
+                        CPU_POOL,
+                        diarize_pcm,
+                        pcm_path,
+                        self.window_seconds,
+                        self.step_seconds,
+                        self.threshold,
+                        data.get("num_speakers"),
+                        self.max_cluster_items,
+                        self.batch_windows,
+                    )
+
             result = {
                 "video_id": video_id,
-                "speakers": speakers,
+                "speakers": diarized["turns"],
+                "num_speakers": diarized["num_speakers"],
+                "speech_seconds": diarized["speech_seconds"],
                 "status": "completed",
             }
-            
-            logger.info(f"Completed diarization for video {video_id}")
+            if transcript is not None:
+                with self.span("assign_speakers"):
+                    result["transcript"] = label_transcript(transcript, diarized["turns"])
+
+            logger.info(
+                f"Completed diarization for video {video_id}: "
+                f"{diarized['num_speakers']} speakers, {len(diarized['turns'])} turns"
+            )
             return result
-            
+
+        except TRANSIENT_ERRORS:
+            raise
         except Exception as e:
             logger.error(f"Error in diarization processing: {e}")
             await self.publish_error(str(e), data)
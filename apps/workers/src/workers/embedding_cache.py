@@ -0,0 +1,247 @@
+# Created automatically by Cursor AI (2026-10-18)
+
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import redis.asyncio as aioredis
+
+from workers.base import run_io
+from workers.config import get_settings
+from workers.embeddings import EMBEDDING_DIMENSIONS, normalize_text
+
+logger = logging.getLogger(__name__)
+
+KEY_BYTES = 16
+
+# One record per slot of the vector file: which key it holds (all zero when
+# free) and a logical clock of its last use, for LRU order across restarts.
+INDEX_DTYPE = np.dtype([("key", np.uint8, (KEY_BYTES,)), ("used", "<i8")])
+
+
+class DiskEmbeddingCache:
+    """Local tier: a memory-mapped float16 matrix plus a slot index.
+
+    ``vectors.f16`` holds ``max_entries`` rows of ``dimensions`` halves and
+    ``index.bin`` records the key held by each row. A put that needs room
+    reuses the least recently used row. The row's key is cleared before the
+    vector is overwritten and set after, so a crash in between loses the entry
+    rather than pairing a key with the wrong vector. Writes reach the files
+    through the page cache, so a worker crash loses nothing that was put.
+
+    Methods are blocking; ``EmbeddingCache`` calls them on the IO pool.
+    """
+
+    def __init__(self, root: str, dimensions: int, max_entries: int):
+        self.root = root
+        self.dimensions = dimensions
+        self.max_entries = max_entries
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        vectors_path = os.path.join(root, "vectors.f16")
+        index_path = os.path.join(root, "index.bin")
+        vectors_bytes = max_entries * dimensions * 2
+        index_bytes = max_entries * INDEX_DTYPE.itemsize
+        reuse = (
+            os.path.exists(vectors_path)
+            and os.path.getsize(vectors_path) == vectors_bytes
+            and os.path.exists(index_path)
+            and os.path.getsize(index_path) == index_bytes
+        )
+        if not reuse:
+            logger.info(f"Creating embedding cache at {root} for {max_entries} entries")
+        mode = "r+" if reuse else "w+"
+        self.vectors = np.memmap(
+            vectors_path, dtype=np.float16, mode=mode, shape=(max_entries, dimensions)
+        )
+        self.index = np.memmap(index_path, dtype=INDEX_DTYPE, mode=mode, shape=(max_entries,))
+
+        # key -> slot, least recently used first
+        self._slots: "OrderedDict[bytes, int]" = OrderedDict()
+        occupied = np.flatnonzero(self.index["key"].any(axis=1))
+        for slot in occupied[np.argsort(self.index["used"][occupied], kind="stable")]:
+            self._slots[self.index["key"][slot].tobytes()] = int(slot)
+        self._free: List[int] = sorted(
+            set(range(max_entries)) - set(self._slots.values()), reverse=True
+        )
+        self._clock = int(self.index["used"].max()) if max_entries else 0
+
+    def get_many(self, keys: Sequence[bytes]) -> Dict[bytes, np.ndarray]:
+        found = {}
+        with self._lock:
+            for key in keys:
+                slot = self._slots.get(key)
+                if slot is None:
+                    continue
+                self._slots.move_to_end(key)
+                self._touch(slot)
+                found[key] = self.vectors[slot].astype(np.float32)
+        return found
+
+    def put_many(self, items: Dict[bytes, np.ndarray]) -> None:
+        with self._lock:
+            for key, vector in items.items():
+                slot = self._slots.pop(key, None)
+                if slot is None:
+                    slot = self._free.pop() if self._free else self._evict()
+                self.index["key"][slot] = 0
+                self.vectors[slot] = vector
+                self.index["key"][slot] = np.frombuffer(key, dtype=np.uint8)
+                self._touch(slot)
+                self._slots[key] = slot
+
+    def _evict(self) -> int:
+        _, slot = self._slots.popitem(last=False)
+        return slot
+
+    def _touch(self, slot: int) -> None:
+        self._clock += 1
+        self.index["used"][slot] = self._clock
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._slots), "capacity": self.max_entries}
+
+
+class RedisEmbeddingCache:
+    """Shared tier: one float16 blob per key, expiring after ``ttl``.
+
+    Any Redis error is logged and treated as a miss.
+    """
+
+    def __init__(self, client: Any, ttl: float, prefix: str = "embedding-cache:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    async def get_many(self, keys: Sequence[bytes]) -> Dict[bytes, np.ndarray]:
+        if not keys:
+            return {}
+        try:
+            values = await self.client.mget([self.prefix + key.hex() for key in keys])
+        except Exception as e:
+            logger.warning(f"Embedding cache read from Redis failed: {e}")
+            return {}
+        return {
+            key: np.frombuffer(value, dtype=np.float16).astype(np.float32)
+            for key, value in zip(keys, values)
+            if value is not None
+        }
+
+    async def put_many(self, items: Dict[bytes, np.ndarray]) -> None:
+        if not items:
+            return
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                for key, vector in items.items():
+                    pipe.set(
+                        self.prefix + key.hex(),
+                        vector.astype(np.float16).tobytes(),
+                        ex=max(int(self.ttl), 1),
+                    )
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Embedding cache write to Redis failed: {e}")
+
+
+class EmbeddingCache:
+    """Caches embeddings by model and normalized text.
+
+    Keys hash the model id and ``normalize_text(text)``, so windows repeated
+    across videos (intros, sponsor reads) or unchanged by a transcript edit
+    are encoded once. Vectors are kept as float16, which is well within the
+    precision cosine search needs for unit-length embeddings.
+    """
+
+    def __init__(self, disk: Optional[DiskEmbeddingCache], redis: Optional[RedisEmbeddingCache]):
+        self.disk = disk
+        self.redis = redis
+        self.hits = 0
+        self.misses = 0
+        self.deduplicated = 0
+
+    @staticmethod
+    def key_for(model_id: str, text: str) -> bytes:
+        material = f"{model_id}\0{normalize_text(text)}".encode()
+        return hashlib.blake2b(material, digest_size=KEY_BYTES).digest()
+
+    async def get_many(self, keys: Sequence[bytes]) -> Dict[bytes, np.ndarray]:
+        """Cached vectors for ``keys`` from the fastest tier that has them."""
+        found: Dict[bytes, np.ndarray] = {}
+        if self.disk is not None:
+            found = await run_io(self.disk.get_many, keys)
+        if self.redis is not None and len(found) < len(keys):
+            shared = await self.redis.get_many([key for key in keys if key not in found])
+            if shared and self.disk is not None:
+                await run_io(self.disk.put_many, shared)
+            found.update(shared)
+        return found
+
+    async def put_many(self, items: Dict[bytes, np.ndarray]) -> None:
+        """Store vectors in every tier."""
+        if self.disk is not None:
+            await run_io(self.disk.put_many, items)
+        if self.redis is not None:
+            await self.redis.put_many(items)
+
+    async def embed(
+        self,
+        model_id: str,
+        texts: Sequence[str],
+        encode: Callable[[List[str]], Awaitable[np.ndarray]],
+    ) -> np.ndarray:
+        """Embeddings of ``texts``, calling ``encode`` only for uncached ones.
+
+        Texts that normalize alike are encoded once per call.
+        """
+        keys = [self.key_for(model_id, text) for text in texts]
+        unique: Dict[bytes, str] = {}
+        for key, text in zip(keys, texts):
+            unique.setdefault(key, text)
+        self.deduplicated += len(keys) - len(unique)
+
+        found = await self.get_many(list(unique))
+        missing = [key for key in unique if key not in found]
+        self.hits += len(found)
+        self.misses += len(missing)
+        if missing:
+            computed = dict(zip(missing, await encode([unique[key] for key in missing])))
+            await self.put_many(computed)
+            found.update(computed)
+
+        if not keys:
+            return np.zeros((0, EMBEDDING_DIMENSIONS), dtype=np.float32)
+        return np.stack([found[key] for key in keys]).astype(np.float32, copy=False)
+
+    def stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {
+            "hits": self.hits,
+            "misses": self.misses,
+            "deduplicated": self.deduplicated,
+        }
+        if self.disk is not None:
+            stats["disk"] = self.disk.stats()
+        return stats
+
+
+@lru_cache()
+def get_embedding_cache() -> EmbeddingCache:
+    """Get the process-wide embedding cache."""
+    settings = get_settings()
+    redis_tier = None
+    if settings.embedding_cache_redis:
+        client = aioredis.from_url(settings.redis_url, password=settings.redis_password)
+        redis_tier = RedisEmbeddingCache(client, settings.embedding_cache_ttl)
+    return EmbeddingCache(
+        DiskEmbeddingCache(
+            settings.embedding_cache_path,
+            EMBEDDING_DIMENSIONS,
+            settings.embedding_cache_max_entries,
+        ),
+        redis_tier,
+    )
@@ -0,0 +1,212 @@
+# Created automatically by Cursor AI (2026-10-18)
+
+import io
+import math
+import unicodedata
+import zlib
+from typing import Any, Iterator, List, NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+from workers.db import connection
+from workers.models import ModelKey, get_model_registry
+from workers.profiling import span
+from workers.transcript import Transcript
+
+# Width of embeddings.embedding in database/schema.sql
+EMBEDDING_DIMENSIONS = 768
+
+# all-mpnet-base-v2 and similar 768-dimension encoders hold ~420 MB of weights
+DEFAULT_MODEL_SIZE_MB = 420
+
+COPY_EMBEDDINGS = (
+    "COPY embeddings (video_id, text, embedding, start_time, end_time) FROM STDIN"
+)
+
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+class Chunk(NamedTuple):
+    """A window of transcript text to embed, with its time span in seconds."""
+
+    text: str
+    start: float
+    end: float
+
+
+def chunk_transcript(
+    transcript: Transcript, window_words: int, overlap_words: int
+) -> List[Chunk]:
+    """Split a transcript into overlapping windows of about ``window_words`` words.
+
+    Window boundaries are content-defined: a window starts after a word pair
+    whose hash hits a fixed pattern, within bounds on the window length. An
+    edit therefore only moves the boundaries around it, and re-indexing an
+    edited transcript finds every other window unchanged in the embedding
+    cache. Each window also takes the next ``overlap_words`` words, so a
+    passage cut by a boundary is still whole in one of the two windows.
+    """
+    if overlap_words >= window_words:
+        raise ValueError("overlap_words must be smaller than window_words")
+    n = len(transcript)
+    stride = window_words - overlap_words
+    chunks = []
+    for lo, hi in _content_blocks(transcript, stride):
+        hi = min(hi + overlap_words, n)
+        text = transcript.join(lo, hi)
+        if text:
+            chunks.append(Chunk(text, float(transcript.starts[lo]), float(transcript.ends[hi - 1])))
+    return chunks
+
+
+def _content_blocks(transcript: Transcript, stride: int) -> Iterator[Tuple[int, int]]:
+    # Blocks average ``stride`` words: at least half of it, at most one and a
+    # half, with a cut after any word whose pair fingerprint is 0 mod divisor.
+    min_words = max(stride // 2, 1)
+    max_words = max(stride + stride // 2, min_words)
+    divisor = max(stride - min_words, 1)
+    n = len(transcript)
+    lo = 0
+    previous = b""
+    for i in range(n):
+        word = normalize_text(transcript.word_text(i)).encode()
+        length = i - lo + 1
+        if length >= max_words or (
+            length >= min_words and zlib.crc32(previous + b" " + word) % divisor == 0
+        ):
+            yield lo, i + 1
+            lo = i + 1
+        previous = word
+    if lo < n:
+        yield lo, n
+
+
+def normalize_text(text: str) -> str:
+    """Case- and whitespace-insensitive form of ``text`` used for cache keys."""
+    return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+
+def plan_batches(
+    lengths: Sequence[int], max_tokens: int, max_batch: int
+) -> List[List[int]]:
+    """Group item indexes into batches of similar length.
+
+    Items are taken longest first, and a batch closes once padding every item
+    to the batch's longest would exceed ``max_tokens`` or it holds
+    ``max_batch`` items. Short chunks thus run in wide batches and long ones
+    in narrow batches, and little compute is spent on padding.
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i], reverse=True)
+    batches: List[List[int]] = []
+    batch: List[int] = []
+    width = 0
+    for i in order:
+        width = width or lengths[i]
+        if batch and ((len(batch) + 1) * width > max_tokens or len(batch) == max_batch):
+            batches.append(batch)
+            batch, width = [], lengths[i]
+        batch.append(i)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def encode_with(
+    model: Any, texts: Sequence[str], max_tokens: int, max_batch: int
+) -> np.ndarray:
+    """Embed ``texts`` with a SentenceTransformer using length-bucketed batches.
+
+    Returns unit-length float32 vectors in input order.
+    """
+    vectors = np.zeros((len(texts), EMBEDDING_DIMENSIONS), dtype=np.float32)
+    if not texts:
+        return vectors
+    with span("tokenize"):
+        lengths = [
+            len(ids)
+            for ids in model.tokenizer(
+                list(texts), truncation=True, max_length=model.max_seq_length
+            )["input_ids"]
+        ]
+    for batch in plan_batches(lengths, max_tokens, max_batch):
+        with span("encode"):
+            encoded = model.encode(
+                [texts[i] for i in batch],
+                batch_size=len(batch),
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+                show_progress_bar=False,
+            )
+        if encoded.shape[1] != EMBEDDING_DIMENSIONS:
+            raise ValueError(
+                f"Embedding model returned {encoded.shape[1]} dimensions, "
+                f"the embeddings table stores {EMBEDDING_DIMENSIONS}"
+            )
+        vectors[batch] = encoded
+    return vectors
+
+
+def whole_seconds(chunk: Chunk) -> Tuple[int, int]:
+    """A chunk's span in whole seconds, widened so ``end > start``."""
+    start = max(int(math.floor(chunk.start)), 0)
+    return start, max(int(math.ceil(chunk.end)), start + 1)
+
+
+def copy_rows(video_id: str, chunks: Sequence[Chunk], vectors: np.ndarray) -> Iterator[str]:
+    """Rows for ``COPY_EMBEDDINGS`` in PostgreSQL's text format.
+
+    Times are whole seconds as in the schema, widened where needed so every
+    row keeps ``end_time > start_time``.
+    """
+    vector_format = "[" + ",".join(["%.7g"] * vectors.shape[1]) + "]"
+    for chunk, vector in zip(chunks, vectors):
+        start, end = whole_seconds(chunk)
+        text = chunk.text.translate(_COPY_ESCAPES)
+        yield f"{video_id}\t{text}\t{vector_format % tuple(vector.tolist())}\t{start}\t{end}\n"
+
+
+# The functions below run in pool processes/threads.
+
+
+def _sentence_transformers() -> Any:
+    """Import sentence-transformers, and with it torch, on first use."""
+    import sentence_transformers
+
+    return sentence_transformers
+
+
+def _load_model(model_name: str, device: str) -> Any:
+    key = ModelKey(model_name, "", device, "")
+    with span("load_model"):
+        return get_model_registry().get(
+            key,
+            lambda: _sentence_transformers().SentenceTransformer(model_name, device=device),
+            size_mb=DEFAULT_MODEL_SIZE_MB,
+        )
+
+
+def warm_up_encoder(model_name: str, device: str) -> None:
+    """Query pool initializer: load the model before the first query arrives."""
+    _load_model(model_name, device)
+
+
+def encode_texts(
+    texts: Sequence[str], model_name: str, device: str, max_tokens: int, max_batch: int
+) -> np.ndarray:
+    """CPU pool entry point: embed ``texts`` with a cached model."""
+    return encode_with(_load_model(model_name, device), texts, max_tokens, max_batch)
+
+
+def store_embeddings(video_id: str, chunks: Sequence[Chunk], vectors: np.ndarray) -> int:
+    """IO pool entry point: replace a video's embeddings in one COPY.
+
+    Earlier rows for the video are deleted in the same transaction, so a
+    redelivered message leaves exactly one set behind.
+    """
+    buffer = io.StringIO()
+    buffer.writelines(copy_rows(video_id, chunks, vectors))
+    buffer.seek(0)
+    with connection() as conn, conn.cursor() as cursor:
+        cursor.execute("DELETE FROM embeddings WHERE video_id = %s", (video_id,))
+        cursor.copy_expert(COPY_EMBEDDINGS, buffer)
+    return len(chunks)
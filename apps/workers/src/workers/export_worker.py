@@ -3,7 +3,7 @@
 import logging
 from typing import Any, Dict, Optional
 
-from workers.base import BaseWorker
+from workers.base import TRANSIENT_ERRORS, BaseWorker
 
 logger = logging.getLogger(__name__)
 
@@ -11,6 +11,9 @@ logger = logging.getLogger(__name__)
 class ExportWorker(BaseWorker):
     """Worker for generating exports (SRT, VTT, PDF, etc.)."""
 
+    # Exports are small and mostly waiting on storage.
+    concurrency = 16
+
     @property
     def subject(self) -> str:
         return "media.exports"
@@ -25,7 +28,7 @@ class ExportWorker(BaseWorker):
             video_id = data.get("video_id")
             export_type = data.get("type")  # transcript, chapters, summary, highlights
             export_format = data.get("format")  # srt, vtt, md, pdf, json
-            content = data.get("content")
+            content = await self.resolve(data.get("content"))
             
             if not video_id or not export_type or not export_format:
                 raise ValueError("Missing video_id, type, or format")
@@ -46,6 +49,8 @@ class ExportWorker(BaseWorker):
             logger.info(f"Completed export generation for video {video_id}")
             return result
             
+        except TRANSIENT_ERRORS:
+            raise
         except Exception as e:
             logger.error(f"Error in export generation: {e}")
             await self.publish_error(str(e), data)
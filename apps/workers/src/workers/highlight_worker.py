@@ -1,9 +1,31 @@
 # Created automatically by Cursor AI (2024-12-19)
 
 import logging
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
-from workers.base import BaseWorker
+import numpy as np
+
+from workers.audio_cache import get_audio_cache
+from workers.base import CPU_POOL, TRANSIENT_ERRORS, BaseWorker
+from workers.config import get_settings
+from workers.embedding_cache import get_embedding_cache
+from workers.embeddings import EMBEDDING_DIMENSIONS, chunk_transcript, encode_texts
+from workers.highlights import (
+    HIGHLIGHTS_VERSION,
+    Candidates,
+    audio_features,
+    candidate_phrases,
+    chapter_proximity,
+    describe_highlights,
+    fit_bins,
+    keyphrase_density,
+    keyphrase_weights,
+    score_windows,
+    select_windows,
+    speech_rate,
+    timeline_bins,
+)
+from workers.transcript import Transcript
 
 logger = logging.getLogger(__name__)
 
@@ -11,6 +33,17 @@ logger = logging.getLogger(__name__)
 class HighlightWorker(BaseWorker):
     """Worker for generating video highlights."""
 
+    cache_file_fields = ("audio_path",)
+
+    def __init__(self, nats_client):
+        super().__init__(nats_client)
+        settings = get_settings()
+        self.model_name = settings.embedding_model
+        self.device = settings.embedding_device
+        self.batch_tokens = settings.embedding_batch_tokens
+        self.max_batch = settings.embedding_max_batch
+        self.cache_enabled = settings.embedding_cache_enabled
+
     @property
     def subject(self) -> str:
         return "media.highlights"
@@ -19,40 +52,133 @@ class HighlightWorker(BaseWorker):
     def worker_name(self) -> str:
         return "HighlightWorker"
 
+    @property
+    def cache_version(self) -> Optional[str]:
+        settings = get_settings()
+        return (
+            f"{HIGHLIGHTS_VERSION}:{self.model_name}:{settings.embedding_window_words}:"
+            f"{settings.embedding_overlap_words}:{settings.highlight_count}:"
+            f"{settings.highlight_window_seconds}:{settings.highlight_hop_seconds}:"
+            f"{settings.highlight_max_candidates}:{settings.highlight_keyphrases}:"
+            f"{settings.highlight_spike_db}"
+        )
+
     async def process_message(self, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """Process highlight generation request."""
+        """Process highlight generation request.
+
+        Every feature is computed once over the whole timeline, in bins of
+        ``highlight_hop_seconds``; windows are then scored and picked with
+        array operations. ``audio_path`` is optional: without it the
+        loudness and reaction features are left out.
+        """
         try:
             video_id = data.get("video_id")
-            transcript = data.get("transcript")
-            chapters = data.get("chapters")
-            
-            if not video_id or not transcript:
+            audio_path = data.get("audio_path")
+            transcript = await self.resolve_transcript(data.get("transcript"))
+            chapters = await self.resolve(data.get("chapters")) or []
+
+            if not video_id or transcript is None:
                 raise ValueError("Missing video_id or transcript")
-            
+
             logger.info(f"Starting highlight generation for video {video_id}")
-            
-            # TODO: Implement highlight detection using KeyBERT and heuristics
-            highlights = [
-                {
-                    "title": "Key Moment 1",
-                    "description": "An important highlight from the video",
-                    "start": 300,
-                    "end": 330,
-                    "score": 0.95,
-                    "tags": ["important", "key-moment"],
-                }
-            ]
-            
+
+            settings = get_settings()
+            hop = settings.highlight_hop_seconds
+            window_bins = max(int(round(settings.highlight_window_seconds / hop)), 1)
+            n_bins = timeline_bins(transcript.duration, hop)
+
+            with self.span("keyphrases"):
+                candidates = await self.run_in_pool(
+                    CPU_POOL, candidate_phrases, transcript, 3, settings.highlight_max_candidates
+                )
+                weights = await self.keyphrase_weights(transcript, candidates)
+            features = {
+                "keyphrases": keyphrase_density(transcript, candidates, weights, hop, n_bins),
+                "speech_rate": speech_rate(transcript, hop, n_bins),
+                "chapter_start": chapter_proximity(
+                    [chapter["start"] for chapter in chapters],
+                    hop,
+                    n_bins,
+                    settings.highlight_window_seconds,
+                ),
+            }
+            if audio_path:
+                async with get_audio_cache().lease(audio_path) as pcm_path:
+                    with self.span("audio_features"):
+                        audio = await self.run_in_pool(
+                            CPU_POOL,
+                            audio_features,
+                            pcm_path,
+                            hop,
+                            spike_db=settings.highlight_spike_db,
+                        )
+                features.update({name: fit_bins(values, n_bins) for name, values in audio.items()})
+
+            highlights = []
+            if len(transcript):
+                with self.span("select"):
+                    scored = score_windows(features, window_bins)
+                    chosen = select_windows(scored["score"], window_bins, settings.highlight_count)
+                    highlights = describe_highlights(
+                        transcript, candidates, weights, scored, chosen, hop, window_bins
+                    )
+
             result = {
                 "video_id": video_id,
                 "highlights": highlights,
                 "status": "completed",
             }
-            
-            logger.info(f"Completed highlight generation for video {video_id}")
+
+            logger.info(
+                f"Completed highlight generation for video {video_id}: "
+                f"{len(highlights)} highlights from {len(candidates.phrases)} candidate phrases"
+            )
             return result
-            
+
+        except TRANSIENT_ERRORS:
+            raise
         except Exception as e:
             logger.error(f"Error in highlight generation: {e}")
             await self.publish_error(str(e), data)
             return None
+
+    async def keyphrase_weights(self, transcript: Transcript, candidates: Candidates) -> np.ndarray:
+        """KeyBERT relevance of the candidate phrases to the whole transcript.
+
+        The document is embedded as the same chunks the search worker
+        indexes, so with the embedding cache on they are usually free.
+        Candidates are embedded a page at a time.
+        """
+        settings = get_settings()
+        if not candidates.phrases:
+            return np.zeros(0, dtype=np.float32)
+        chunks = chunk_transcript(
+            transcript, settings.embedding_window_words, settings.embedding_overlap_words
+        )
+        doc_vectors = await self.embed([chunk.text for chunk in chunks])
+        page = settings.highlight_batch_phrases
+        phrase_vectors = [
+            await self.embed(candidates.phrases[i:i + page])
+            for i in range(0, len(candidates.phrases), page)
+        ]
+        return keyphrase_weights(
+            doc_vectors, np.concatenate(phrase_vectors), settings.highlight_keyphrases
+        )
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        async def encode(batch: List[str]) -> np.ndarray:
+            return await self.run_in_pool(
+                CPU_POOL,
+                encode_texts,
+                batch,
+                self.model_name,
+                self.device,
+                self.batch_tokens,
+                self.max_batch,
+            )
+
+        if not texts:
+            return np.zeros((0, EMBEDDING_DIMENSIONS), dtype=np.float32)
+        if self.cache_enabled:
+            return await get_embedding_cache().embed(self.model_name, texts, encode)
+        return await encode(texts)
@@ -0,0 +1,289 @@
+# Created automatically by Cursor AI (2026-10-18)
+
+import heapq
+import logging
+import math
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from workers.audio import frame_rms, open_pcm
+from workers.lexical import tokenize
+from workers.summarization import STOPWORDS
+from workers.transcript import Transcript
+
+logger = logging.getLogger(__name__)
+
+HIGHLIGHTS_VERSION = "features:1"
+
+# Weight of each feature's z-score in a window's score
+FEATURE_WEIGHTS = {
+    "keyphrases": 1.0,
+    "reactions": 0.8,
+    "loudness": 0.5,
+    "speech_rate": 0.3,
+    "chapter_start": 0.3,
+}
+
+# A window with a feature this many standard deviations above the mean is tagged with it
+TAG_ZSCORE = 1.0
+FEATURE_TAGS = {"reactions": "audience-reaction", "loudness": "loud", "speech_rate": "fast-paced"}
+
+DESCRIPTION_WORDS = 30
+
+
+class Candidates(NamedTuple):
+    """Keyphrase candidates and where each occurs in the transcript.
+
+    ``words[j]`` is the index of the first word of occurrence ``j`` and
+    ``phrase_ids[j]`` the phrase it is, sorted by word index.
+    """
+
+    phrases: List[str]
+    words: np.ndarray
+    phrase_ids: np.ndarray
+
+
+def candidate_phrases(transcript: Transcript, max_words: int = 3, max_candidates: int = 2000) -> Candidates:
+    """Word n-grams that could be keyphrases, as KeyBERT chooses them.
+
+    A candidate is one to ``max_words`` consecutive words that starts and
+    ends on a content word. The ``max_candidates`` most frequent are kept,
+    so the embedding cost is bounded however long the transcript is.
+    """
+    tokens = []
+    for i in range(len(transcript)):
+        found = tokenize(transcript.word_text(i))
+        tokens.append(found[0] if found else "")
+    content = [len(t) > 2 and t not in STOPWORDS and not t.isdigit() for t in tokens]
+
+    occurrences: Dict[str, List[int]] = {}
+    for i, token in enumerate(tokens):
+        if not content[i]:
+            continue
+        for n in range(1, max_words + 1):
+            last = i + n - 1
+            if last >= len(tokens) or not tokens[last]:
+                break
+            if content[last]:
+                occurrences.setdefault(" ".join(tokens[i:last + 1]), []).append(i)
+
+    # Most frequent first; dicts keep first-occurrence order among equals
+    phrases = sorted(occurrences, key=lambda p: -len(occurrences[p]))[:max_candidates]
+    if not phrases:
+        return Candidates([], np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+    words = np.concatenate([occurrences[p] for p in phrases]).astype(np.int64)
+    phrase_ids = np.repeat(np.arange(len(phrases)), [len(occurrences[p]) for p in phrases])
+    order = np.argsort(words, kind="stable")
+    return Candidates(phrases, words[order], phrase_ids[order])
+
+
+def _unit(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=-1, keepdims=True), 1e-12)
+
+
+def keyphrase_weights(doc_vectors: np.ndarray, phrase_vectors: np.ndarray, top_n: int) -> np.ndarray:
+    """KeyBERT relevance of each candidate, zero outside the ``top_n``.
+
+    The document vector is the mean of its chunks' unit embeddings, since a
+    long transcript does not fit the encoder in one piece. Relevance is
+    the cosine similarity of a phrase to it, floored at zero.
+    """
+    weights = np.zeros(len(phrase_vectors), dtype=np.float32)
+    if not len(phrase_vectors) or not len(doc_vectors):
+        return weights
+    document = _unit(_unit(doc_vectors).mean(axis=0))
+    relevance = np.maximum(_unit(phrase_vectors) @ document, 0.0)
+    top = np.argsort(-relevance, kind="stable")[:top_n]
+    weights[top] = relevance[top]
+    return weights
+
+
+def timeline_bins(duration: float, hop_seconds: float) -> int:
+    return max(int(math.ceil(duration / hop_seconds)), 1)
+
+
+def _bin_of(times: np.ndarray, hop_seconds: float, n_bins: int) -> np.ndarray:
+    return np.clip((np.asarray(times) // hop_seconds).astype(np.int64), 0, n_bins - 1)
+
+
+def keyphrase_density(
+    transcript: Transcript, candidates: Candidates, weights: np.ndarray, hop_seconds: float, n_bins: int
+) -> np.ndarray:
+    """Summed relevance of the keyphrases spoken in each bin."""
+    if not len(candidates.words):
+        return np.zeros(n_bins)
+    bins = _bin_of(transcript.starts[candidates.words], hop_seconds, n_bins)
+    return np.bincount(bins, weights=weights[candidates.phrase_ids], minlength=n_bins)
+
+
+def speech_rate(transcript: Transcript, hop_seconds: float, n_bins: int) -> np.ndarray:
+    """Words per second in each bin, from the aligned word timings."""
+    if not len(transcript):
+        return np.zeros(n_bins)
+    bins = _bin_of(transcript.starts, hop_seconds, n_bins)
+    return np.bincount(bins, minlength=n_bins) / hop_seconds
+
+
+def chapter_proximity(
+    chapter_starts: Sequence[float], hop_seconds: float, n_bins: int, scale_seconds: float
+) -> np.ndarray:
+    """How close each bin is to the start of a chapter, decaying from 1."""
+    starts = np.sort(np.asarray([s for s in chapter_starts if s > 0], dtype=np.float64))
+    if not len(starts):
+        return np.zeros(n_bins)
+    centres = (np.arange(n_bins) + 0.5) * hop_seconds
+    right = np.searchsorted(starts, centres)
+    after = np.abs(starts[np.minimum(right, len(starts) - 1)] - centres)
+    before = np.abs(centres - starts[np.maximum(right - 1, 0)])
+    return np.exp(-np.minimum(after, before) / scale_seconds)
+
+
+def _moving_mean(values: np.ndarray, width: int) -> np.ndarray:
+    """Centred running mean, shorter at the edges, via one cumulative sum."""
+    width = max(min(width, len(values)), 1)
+    total = np.concatenate([[0.0], np.cumsum(values, dtype=np.float64)])
+    index = np.arange(len(values))
+    lo = np.maximum(index - width // 2, 0)
+    hi = np.minimum(index - width // 2 + width, len(values))
+    return (total[hi] - total[lo]) / (hi - lo)
+
+
+def audio_features(
+    pcm_path: str,
+    hop_seconds: float,
+    frame_seconds: float = 0.05,
+    baseline_seconds: float = 30.0,
+    spike_db: float = 8.0,
+) -> Dict[str, np.ndarray]:
+    """Loudness and energy spikes per bin of a PCM artifact, in one pass.
+
+    ``loudness`` is the mean frame level in dB. ``reactions`` is the share
+    of a bin's frames at least ``spike_db`` above the running level of the
+    ``baseline_seconds`` around them: laughter and applause are sustained
+    bursts well above the speech they interrupt, so they fill bins that
+    an isolated plosive or door slam barely touches.
+    """
+    audio = open_pcm(pcm_path)
+    frame_length = max(int(frame_seconds * audio.sample_rate), 1)
+    n_bins = timeline_bins(audio.duration, hop_seconds)
+    level = 20 * np.log10(frame_rms(audio, frame_length).astype(np.float64) + 1e-6)
+    if not len(level):
+        return {"loudness": np.zeros(n_bins), "reactions": np.zeros(n_bins)}
+
+    baseline = _moving_mean(level, int(baseline_seconds / (frame_length / audio.sample_rate)))
+    spikes = level > baseline + spike_db
+    bins = _bin_of(np.arange(len(level)) * frame_length / audio.sample_rate, hop_seconds, n_bins)
+    frames = np.maximum(np.bincount(bins, minlength=n_bins), 1)
+    return {
+        "loudness": np.bincount(bins, weights=level, minlength=n_bins) / frames,
+        "reactions": np.bincount(bins, weights=spikes, minlength=n_bins) / frames,
+    }
+
+
+def fit_bins(values: Optional[np.ndarray], n_bins: int) -> np.ndarray:
+    """``values`` cut or zero-padded to ``n_bins``, for audio slightly off the transcript."""
+    fitted = np.zeros(n_bins)
+    if values is not None:
+        fitted[:min(len(values), n_bins)] = values[:n_bins]
+    return fitted
+
+
+def window_means(values: np.ndarray, window_bins: int) -> np.ndarray:
+    """Mean of every run of ``window_bins`` consecutive bins."""
+    window_bins = max(min(window_bins, len(values)), 1)
+    total = np.concatenate([[0.0], np.cumsum(values, dtype=np.float64)])
+    return (total[window_bins:] - total[:-window_bins]) / window_bins
+
+
+def zscore(values: np.ndarray) -> np.ndarray:
+    std = values.std()
+    if std < 1e-12:
+        return np.zeros_like(values, dtype=np.float64)
+    return (values - values.mean()) / std
+
+
+def score_windows(
+    features: Mapping[str, np.ndarray], window_bins: int, weights: Mapping[str, float] = FEATURE_WEIGHTS
+) -> Dict[str, np.ndarray]:
+    """Z-scores of every feature over every window, and their weighted sum as ``score``.
+
+    Features are standardized over the whole video, so the weights trade
+    off comparable units and a feature that never varies adds nothing.
+    """
+    scored = {name: zscore(window_means(values, window_bins)) for name, values in features.items()}
+    scored["score"] = sum(weights.get(name, 0.0) * z for name, z in scored.items())
+    return scored
+
+
+def select_windows(scores: np.ndarray, window_bins: int, k: int) -> List[int]:
+    """Best ``k`` windows of which no two overlap, best first.
+
+    Greedy non-maximum suppression: windows come off a max-heap by score,
+    and taking one suppresses every window sharing a bin with it. The
+    suppressed ones are skipped as they surface rather than removed.
+    """
+    heap = list(zip((-scores).tolist(), range(len(scores))))
+    heapq.heapify(heap)
+    suppressed = np.zeros(len(scores), dtype=bool)
+    chosen: List[int] = []
+    while heap and len(chosen) < k:
+        _, i = heapq.heappop(heap)
+        if suppressed[i]:
+            continue
+        chosen.append(i)
+        suppressed[max(i - window_bins + 1, 0):i + window_bins] = True
+    return chosen
+
+
+def describe_highlights(
+    transcript: Transcript,
+    candidates: Candidates,
+    weights: np.ndarray,
+    scored: Mapping[str, np.ndarray],
+    chosen: Sequence[int],
+    hop_seconds: float,
+    window_bins: int,
+) -> List[Dict[str, Any]]:
+    """Highlight records for the chosen windows, snapped to word boundaries.
+
+    A highlight is titled by the most relevant keyphrase said in it and
+    tagged with its top keyphrases and any feature it stands out on.
+    ``score`` is the window's score scaled to [0, 1] over the video.
+    """
+    scores = scored["score"]
+    low, high = float(scores.min()), float(scores.max())
+    duration = transcript.duration
+    highlights = []
+    for rank, i in enumerate(chosen, 1):
+        start = i * hop_seconds
+        end = min(start + window_bins * hop_seconds, max(duration, start))
+        words = transcript.index_range(start, end)
+        if words.stop > words.start:
+            start, end = float(transcript.starts[words.start]), float(transcript.ends[words.stop - 1])
+
+        lo, hi = np.searchsorted(candidates.words, [words.start, words.stop])
+        said = np.unique(candidates.phrase_ids[lo:hi])
+        said = said[weights[said] > 0]
+        keyphrases = [candidates.phrases[p] for p in said[np.argsort(-weights[said], kind="stable")]]
+        tags = keyphrases[:3] + [
+            tag for name, tag in FEATURE_TAGS.items()
+            if name in scored and scored[name][i] >= TAG_ZSCORE
+        ]
+
+        description = transcript.join(words.start, min(words.start + DESCRIPTION_WORDS, words.stop))
+        if words.stop - words.start > DESCRIPTION_WORDS:
+            description += " ..."
+        highlights.append({
+            "title": keyphrases[0].capitalize() if keyphrases else f"Highlight {rank}",
+            "description": description,
+            "start": start,
+            "end": end,
+            "score": round((float(scores[i]) - low) / (high - low), 4) if high > low else 1.0,
+            "tags": tags,
+            "features": {
+                name: round(float(values[i]), 3) for name, values in scored.items() if name != "score"
+            },
+        })
+    return highlights
@@ -0,0 +1,453 @@
+# Created automatically by Cursor AI (2026-10-18)
+
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Collection, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from workers.config import get_settings
+from workers.embeddings import Chunk, normalize_text, whole_seconds
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# BM25 parameters (the usual defaults)
+K1 = 1.2
+B = 0.75
+
+_ARRAYS = (
+    "terms",
+    "offsets",
+    "deltas",
+    "tfs",
+    "doc_videos",
+    "doc_starts",
+    "doc_ends",
+    "doc_lengths",
+    "text",
+    "text_offsets",
+)
+
+
+class LexicalDoc(NamedTuple):
+    """A transcript window as indexed: its text and whole-second span."""
+
+    text: str
+    start: int
+    end: int
+
+
+def tokenize(text: str) -> List[str]:
+    """Case-folded word tokens; names and jargon are kept as written."""
+    return TOKEN_PATTERN.findall(normalize_text(text))
+
+
+@lru_cache(maxsize=1 << 20)
+def term_id(term: str) -> int:
+    """64-bit hash standing in for ``term`` in posting lists."""
+    return int.from_bytes(hashlib.blake2b(term.encode(), digest_size=8).digest(), "little")
+
+
+def content_version(texts: Sequence[str]) -> str:
+    """Fingerprint of a video's windows; a changed transcript changes it."""
+    digest = hashlib.blake2b(digest_size=16)
+    for text in texts:
+        digest.update(text.encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class LexicalSegment:
+    """Immutable inverted index over the windows of some videos.
+
+    Each array is an ``.npy`` file opened memory-mapped. ``terms`` holds the
+    sorted term ids; the postings of ``terms[i]`` are
+    ``offsets[i]:offsets[i + 1]`` of ``deltas`` (document ids, each stored as
+    the gap from the previous one, uint32) and ``tfs`` (term counts, uint16).
+    Per-document arrays give the video (an index into ``videos``), span,
+    token count and text.
+
+    ``live`` marks documents whose video has not been re-indexed into a
+    newer segment since.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.name = os.path.basename(path)
+        with open(os.path.join(path, "videos.json")) as f:
+            self.videos: List[str] = json.load(f)
+        for name in _ARRAYS:
+            setattr(self, name, np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r"))
+        # Sized once: a merged-away segment's directory is removed while
+        # searches that took it before the merge may still hold it
+        self.nbytes = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+        self.set_live(np.ones(len(self.videos), dtype=bool))
+
+    def __len__(self) -> int:
+        return len(self.doc_videos)
+
+    def set_live(self, video_live: np.ndarray) -> None:
+        """Mark which of ``videos`` are current."""
+        self.video_live = video_live
+        self.live = video_live[self.doc_videos] if len(self) else np.zeros(0, dtype=bool)
+        self.live_count = int(self.live.sum())
+        self.live_length = int(self.doc_lengths[self.live].sum())
+
+    def postings(self, term: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Document ids and counts of ``term`` in this segment."""
+        i = int(np.searchsorted(self.terms, term))
+        if i == len(self.terms) or self.terms[i] != term:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.uint16)
+        lo, hi = int(self.offsets[i]), int(self.offsets[i + 1])
+        return np.cumsum(self.deltas[lo:hi], dtype=np.int64), np.asarray(self.tfs[lo:hi])
+
+    def text_of(self, doc: int) -> str:
+        lo, hi = int(self.text_offsets[doc]), int(self.text_offsets[doc + 1])
+        return self.text[lo:hi].tobytes().decode()
+
+    def decode_all(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Every posting as parallel (term, document, count) arrays."""
+        counts = np.diff(self.offsets)
+        sums = np.cumsum(self.deltas, dtype=np.int64)
+        # Undo the running sum at each list boundary
+        before = np.concatenate([[0], sums])[self.offsets[:-1]]
+        docs = sums - np.repeat(before, counts)
+        return np.repeat(np.asarray(self.terms), counts), docs, np.asarray(self.tfs)
+
+    @classmethod
+    def build(
+        cls, path: str, docs_by_video: Dict[str, Sequence[LexicalDoc]]
+    ) -> "LexicalSegment":
+        """Tokenize and index new documents into a segment at ``path``."""
+        videos = list(docs_by_video)
+        doc_videos, starts, ends, lengths, texts = [], [], [], [], []
+        term_ids: List[int] = []
+        term_docs: List[int] = []
+        term_counts: List[int] = []
+        for v, video in enumerate(videos):
+            for doc in docs_by_video[video]:
+                tokens = tokenize(doc.text)
+                counts = Counter(tokens)
+                d = len(texts)
+                term_ids.extend(term_id(t) for t in counts)
+                term_docs.extend([d] * len(counts))
+                term_counts.extend(counts.values())
+                doc_videos.append(v)
+                starts.append(doc.start)
+                ends.append(doc.end)
+                lengths.append(len(tokens))
+                texts.append(doc.text.encode())
+        text_offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+        np.cumsum([len(t) for t in texts], out=text_offsets[1:])
+        return cls._write(
+            path,
+            videos,
+            np.array(term_ids, dtype=np.uint64),
+            np.array(term_docs, dtype=np.int64),
+            np.minimum(np.array(term_counts, dtype=np.int64), np.iinfo(np.uint16).max),
+            np.array(doc_videos, dtype=np.int32),
+            np.array(starts, dtype=np.int32),
+            np.array(ends, dtype=np.int32),
+            np.array(lengths, dtype=np.int32),
+            np.frombuffer(b"".join(texts), dtype=np.uint8),
+            text_offsets,
+        )
+
+    @classmethod
+    def merge(cls, path: str, segments: Sequence["LexicalSegment"]) -> "LexicalSegment":
+        """Write the live documents of ``segments`` into one segment."""
+        videos: List[str] = []
+        parts: Dict[str, List[np.ndarray]] = {name: [] for name in (
+            "terms", "docs", "tfs", "doc_videos", "doc_starts", "doc_ends", "doc_lengths",
+        )}
+        texts: List[bytes] = []
+        first_doc = 0
+        for segment in segments:
+            # New ids: live documents renumbered in order after earlier segments
+            renumber = np.cumsum(segment.live) - 1 + first_doc
+            video_ids = np.cumsum(segment.video_live) - 1 + len(videos)
+            videos.extend(v for v, live in zip(segment.videos, segment.video_live) if live)
+
+            terms, docs, tfs = segment.decode_all()
+            keep = segment.live[docs]
+            parts["terms"].append(terms[keep])
+            parts["docs"].append(renumber[docs[keep]])
+            parts["tfs"].append(tfs[keep])
+            live = np.flatnonzero(segment.live)
+            parts["doc_videos"].append(video_ids[segment.doc_videos[live]])
+            for name in ("doc_starts", "doc_ends", "doc_lengths"):
+                parts[name].append(np.asarray(getattr(segment, name))[live])
+            texts.extend(segment.text[segment.text_offsets[d]:segment.text_offsets[d + 1]].tobytes() for d in live)
+            first_doc += len(live)
+
+        joined = {name: np.concatenate(arrays) if arrays else np.zeros(0) for name, arrays in parts.items()}
+        text_offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+        np.cumsum([len(t) for t in texts], out=text_offsets[1:])
+        return cls._write(
+            path,
+            videos,
+            joined["terms"].astype(np.uint64),
+            joined["docs"].astype(np.int64),
+            joined["tfs"].astype(np.int64),
+            joined["doc_videos"].astype(np.int32),
+            joined["doc_starts"].astype(np.int32),
+            joined["doc_ends"].astype(np.int32),
+            joined["doc_lengths"].astype(np.int32),
+            np.frombuffer(b"".join(texts), dtype=np.uint8),
+            text_offsets,
+        )
+
+    @classmethod
+    def _write(
+        cls,
+        path: str,
+        videos: List[str],
+        terms: np.ndarray,
+        docs: np.ndarray,
+        tfs: np.ndarray,
+        doc_videos: np.ndarray,
+        doc_starts: np.ndarray,
+        doc_ends: np.ndarray,
+        doc_lengths: np.ndarray,
+        text: np.ndarray,
+        text_offsets: np.ndarray,
+    ) -> "LexicalSegment":
+        # Group postings by term; documents stay ascending within a term
+        # because the sort is stable and postings arrive in document order
+        order = np.argsort(terms, kind="stable")
+        terms, docs, tfs = terms[order], docs[order], tfs[order]
+        unique_terms, starts = np.unique(terms, return_index=True)
+        offsets = np.append(starts, len(terms)).astype(np.int64)
+        deltas = docs.copy()
+        deltas[1:] -= docs[:-1]
+        deltas[starts] = docs[starts]
+
+        arrays = {
+            "terms": unique_terms.astype(np.uint64),
+            "offsets": offsets,
+            "deltas": deltas.astype(np.uint32),
+            "tfs": tfs.astype(np.uint16),
+            "doc_videos": doc_videos,
+            "doc_starts": doc_starts,
+            "doc_ends": doc_ends,
+            "doc_lengths": doc_lengths,
+            "text": text,
+            "text_offsets": text_offsets,
+        }
+        # Written under a temporary name so a crash never leaves half a segment
+        tmp_path = tempfile.mkdtemp(dir=os.path.dirname(path), prefix=".tmp-")
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp_path, f"{name}.npy"), array)
+        with open(os.path.join(tmp_path, "videos.json"), "w") as f:
+            json.dump(videos, f)
+        os.rename(tmp_path, path)
+        return cls(path)
+
+
+class LexicalIndex:
+    """Persistent BM25 index over transcript windows, updated per video.
+
+    Like a log-structured index, every update writes a new segment holding
+    the updated videos, and the manifest records which segment holds each
+    video's current windows; older copies become dead documents. Once there
+    are more than ``max_segments`` segments the smallest half is merged,
+    dropping dead documents, so merge work stays logarithmic per document.
+
+    Methods are blocking; call them on the IO pool.
+    """
+
+    def __init__(self, root: str, max_segments: int = 10):
+        self.root = root
+        self.max_segments = max_segments
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        manifest_path = os.path.join(root, "manifest.json")
+        manifest: Dict[str, Any] = {"next": 0, "segments": [], "videos": {}}
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+        self._next = manifest["next"]
+        # video_id -> [segment name, content version]
+        self._videos: Dict[str, List[str]] = manifest["videos"]
+        self._segments = [LexicalSegment(os.path.join(root, name)) for name in manifest["segments"]]
+        self._refresh_live(self._segments)
+        self._remove_unlisted()
+
+    def version(self, video_id: str) -> Optional[str]:
+        """Content version of the indexed copy of ``video_id``, if any."""
+        entry = self._videos.get(video_id)
+        return entry[1] if entry else None
+
+    def add_videos(self, videos: Dict[str, Tuple[str, Sequence[LexicalDoc]]]) -> None:
+        """Index (or re-index) videos: ``{video_id: (version, docs)}``."""
+        if not videos:
+            return
+        with self._lock:
+            segment = LexicalSegment.build(
+                self._new_segment_path(), {video: docs for video, (_, docs) in videos.items()}
+            )
+            for video, (version, _) in videos.items():
+                self._videos[video] = [segment.name, version]
+            self._segments.append(segment)
+            self._refresh_live(self._segments)
+            if len(self._segments) > self.max_segments:
+                self._merge_smallest()
+            self._save_manifest()
+
+    def sync(self, docs_by_video: Dict[str, Sequence[LexicalDoc]]) -> int:
+        """Index the videos whose windows differ from the indexed copy.
+
+        Returns how many videos were (re-)indexed.
+        """
+        stale = {}
+        for video, docs in docs_by_video.items():
+            version = content_version([doc.text for doc in docs])
+            if self.version(video) != version:
+                stale[video] = (version, docs)
+        self.add_videos(stale)
+        return len(stale)
+
+    def search(
+        self, query: str, k: int, videos: Optional[Collection[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """BM25 top ``k`` windows for ``query``, optionally within ``videos``.
+
+        Document frequencies and lengths are those of the whole index, so a
+        window scores the same whichever scope it is found in.
+        """
+        terms = sorted({term_id(t) for t in tokenize(query)})
+        with self._lock:
+            segments = list(self._segments)
+        n_docs = sum(s.live_count for s in segments)
+        if not terms or not n_docs:
+            return []
+        average_length = sum(s.live_length for s in segments) / n_docs
+
+        postings: List[List[Tuple[np.ndarray, np.ndarray]]] = []
+        frequencies = np.zeros(len(terms))
+        for segment in segments:
+            found = []
+            for t, term in enumerate(terms):
+                docs, tfs = segment.postings(term)
+                keep = segment.live[docs]
+                docs, tfs = docs[keep], tfs[keep]
+                frequencies[t] += len(docs)
+                found.append((docs, tfs))
+            postings.append(found)
+        idf = np.log1p((n_docs - frequencies + 0.5) / (frequencies + 0.5))
+
+        candidates: List[Tuple[float, int, int]] = []
+        for segment, found in zip(segments, postings):
+            allowed = None
+            if videos is not None:
+                allowed = np.fromiter((v in videos for v in segment.videos), bool, len(segment.videos))
+            all_docs, all_scores = [], []
+            for t, (docs, tfs) in enumerate(found):
+                if allowed is not None:
+                    keep = allowed[segment.doc_videos[docs]]
+                    docs, tfs = docs[keep], tfs[keep]
+                if not len(docs):
+                    continue
+                tfs = tfs.astype(np.float64)
+                norm = K1 * (1 - B + B * segment.doc_lengths[docs] / average_length)
+                all_docs.append(docs)
+                all_scores.append(idf[t] * tfs * (K1 + 1) / (tfs + norm))
+            if not all_docs:
+                continue
+            docs, inverse = np.unique(np.concatenate(all_docs), return_inverse=True)
+            scores = np.bincount(inverse, weights=np.concatenate(all_scores))
+            top = np.argsort(-scores, kind="stable")[:k]
+            candidates.extend((float(scores[i]), id(segment), int(docs[i])) for i in top)
+
+        by_id = {id(segment): segment for segment in segments}
+        hits = []
+        for score, segment_id, doc in sorted(candidates, key=lambda c: -c[0])[:k]:
+            segment = by_id[segment_id]
+            hits.append({
+                "video_id": segment.videos[segment.doc_videos[doc]],
+                "text": segment.text_of(doc),
+                "start_time": int(segment.doc_starts[doc]),
+                "end_time": int(segment.doc_ends[doc]),
+                "score": round(score, 4),
+            })
+        return hits
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            segments = list(self._segments)
+        return {
+            "videos": len(self._videos),
+            "segments": len(segments),
+            "documents": sum(s.live_count for s in segments),
+            "bytes": sum(s.nbytes for s in segments),
+        }
+
+    def _merge_smallest(self) -> None:
+        segments = sorted(self._segments, key=lambda s: s.live_count)
+        merging = segments[:max(2, len(segments) // 2)]
+        merged = LexicalSegment.merge(self._new_segment_path(), merging)
+        for video in merged.videos:
+            self._videos[video][0] = merged.name
+        names = {s.name for s in merging}
+        self._segments = [s for s in self._segments if s.name not in names] + [merged]
+        self._refresh_live(self._segments)
+        logger.info(f"Merged {len(merging)} lexical segments into {merged.name}")
+
+    def _refresh_live(self, segments: Sequence[LexicalSegment]) -> None:
+        for segment in segments:
+            segment.set_live(np.fromiter(
+                (self._videos.get(v, [None])[0] == segment.name for v in segment.videos),
+                bool,
+                len(segment.videos),
+            ))
+        # Segments with nothing live left are deleted
+        self._segments = [s for s in segments if s.live_count or s.video_live.any()]
+
+    def _new_segment_path(self) -> str:
+        name = f"segment-{self._next:08d}"
+        self._next += 1
+        return os.path.join(self.root, name)
+
+    def _save_manifest(self) -> None:
+        manifest = {
+            "next": self._next,
+            "segments": [s.name for s in self._segments],
+            "videos": self._videos,
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, os.path.join(self.root, "manifest.json"))
+        self._remove_unlisted()
+
+    def _remove_unlisted(self) -> None:
+        # Merged-away segments and leftovers of interrupted writes; readers
+        # still holding their memory maps keep working until they let go
+        listed = {s.name for s in self._segments}
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if os.path.isdir(path) and name not in listed:
+                shutil.rmtree(path, ignore_errors=True)
+
+
+def index_chunks(video_id: str, chunks: Sequence[Chunk]) -> int:
+    """IO pool entry point: bring one video's windows up to date."""
+    docs = [LexicalDoc(chunk.text, *whole_seconds(chunk)) for chunk in chunks]
+    return get_lexical_index().sync({video_id: docs})
+
+
+@lru_cache()
+def get_lexical_index() -> LexicalIndex:
+    """Get the process-wide lexical index."""
+    settings = get_settings()
+    return LexicalIndex(settings.lexical_index_path, settings.lexical_index_max_segments)
@@ -0,0 +1,524 @@
+# Created automatically by Cursor AI (2026-10-18)
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Dict, Iterator, NamedTuple, Optional, Sequence, Tuple
+
+import httpx
+import redis.asyncio as aioredis
+
+from workers.base import RetryableError, SingleFlight
+from workers.config import get_settings
+from workers.metrics import LLM_LATENCY, LLM_REQUESTS, LLM_TOKENS
+
+logger = logging.getLogger(__name__)
+
+# Video that LLM calls made by the current task are charged to
+_charged_video: ContextVar[Optional[str]] = ContextVar("llm_charged_video", default=None)
+
+
+@contextmanager
+def charge_to(video_id: Optional[str]) -> Iterator[None]:
+    """Charge LLM tokens spent inside the block (and its tasks) to ``video_id``."""
+    token = _charged_video.set(video_id)
+    try:
+        yield
+    finally:
+        _charged_video.reset(token)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (four characters a token) for rate budgeting."""
+    return len(text) // 4 + 1
+
+
+class LLMResponse(NamedTuple):
+    text: str
+    provider: str
+    model: str
+    prompt_tokens: int
+    completion_tokens: int
+    # Prompt tokens served from the provider's prefix cache
+    cached_tokens: int = 0
+
+
+class LLMError(Exception):
+    """An LLM call failed for good: a client error, or retries ran out."""
+
+
+class LLMInterrupted(LLMError, RetryableError):
+    """A shared call was cancelled by the caller that made it; worth retrying."""
+
+
+class Provider(ABC):
+    """Request and response format of one LLM API."""
+
+    name = ""
+
+    def __init__(self, base_url: str, api_key: str, model: str):
+        self.base_url = base_url
+        self.api_key = api_key
+        self.model = model
+
+    @abstractmethod
+    def request(
+        self, prefix: str, prompt: str, model: str, max_tokens: int, temperature: float
+    ) -> Tuple[str, Dict[str, str], Dict[str, Any]]:
+        """Path, headers and JSON body of a completion call."""
+
+    @abstractmethod
+    def parse(self, model: str, body: Dict[str, Any]) -> LLMResponse:
+        """Completion text and token usage from a response body."""
+
+
+class OpenAIProvider(Provider):
+    """Chat Completions API. Long shared prompt prefixes are cached by the
+    provider automatically, as long as they come first, so the prefix is
+    sent as the leading system message."""
+
+    name = "openai"
+
+    def request(self, prefix, prompt, model, max_tokens, temperature):
+        messages = [{"role": "user", "content": prompt}]
+        if prefix:
+            messages.insert(0, {"role": "system", "content": prefix})
+        body = {
+            "model": model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+        }
+        return "/v1/chat/completions", {"Authorization": f"Bearer {self.api_key}"}, body
+
+    def parse(self, model, body):
+        usage = body.get("usage") or {}
+        details = usage.get("prompt_tokens_details") or {}
+        return LLMResponse(
+            body["choices"][0]["message"]["content"] or "",
+            self.name,
+            body.get("model", model),
+            int(usage.get("prompt_tokens", 0)),
+            int(usage.get("completion_tokens", 0)),
+            int(details.get("cached_tokens", 0) or 0),
+        )
+
+
+class AnthropicProvider(Provider):
+    """Messages API. The prefix goes in the system prompt marked with a
+    cache breakpoint, so repeated prefixes are read from the prompt cache."""
+
+    name = "anthropic"
+    api_version = "2023-06-01"
+
+    def request(self, prefix, prompt, model, max_tokens, temperature):
+        body: Dict[str, Any] = {
+            "model": model,
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+        }
+        if prefix:
+            body["system"] = [
+                {"type": "text", "text": prefix, "cache_control": {"type": "ephemeral"}}
+            ]
+        headers = {"x-api-key": self.api_key, "anthropic-version": self.api_version}
+        return "/v1/messages", headers, body
+
+    def parse(self, model, body):
+        usage = body.get("usage") or {}
+        cached = int(usage.get("cache_read_input_tokens", 0) or 0)
+        # input_tokens excludes the prompt tokens read from or written to the cache
+        prompt_tokens = (
+            int(usage.get("input_tokens", 0))
+            + cached
+            + int(usage.get("cache_creation_input_tokens", 0) or 0)
+        )
+        text = "".join(block.get("text", "") for block in body.get("content", []) if block.get("type") == "text")
+        return LLMResponse(
+            text,
+            self.name,
+            body.get("model", model),
+            prompt_tokens,
+            int(usage.get("output_tokens", 0)),
+            cached,
+        )
+
+
+class TokenBucket:
+    """Async token bucket refilled at ``per_minute`` a minute.
+
+    Waiters are served in order. ``adjust`` settles an estimate once the
+    real cost is known; the balance may go negative, which delays later
+    callers. ``pause`` holds every caller, e.g. on a provider's Retry-After.
+    """
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float) -> None:
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                wait = self.paused_until - time.monotonic()
+                if wait <= 0:
+                    if self.tokens >= amount:
+                        self.tokens -= amount
+                        return
+                    wait = (amount - self.tokens) / self.rate
+                await asyncio.sleep(wait)
+
+    def adjust(self, amount: float) -> None:
+        """Take ``amount`` more (or give back, if negative)."""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+    def pause(self, seconds: float) -> None:
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+class AdaptiveLimiter:
+    """Concurrency limit found by additive increase, multiplicative decrease.
+
+    Each success raises the limit by ``1 / limit`` (one step per round of
+    calls); each throttled or failed call halves it. The limit settles just
+    below where the provider starts pushing back.
+    """
+
+    def __init__(self, initial: int, maximum: int, minimum: int = 1):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = float(max(minimum, min(initial, maximum)))
+        self.active = 0
+        self._changed = asyncio.Condition()
+
+    async def __aenter__(self) -> None:
+        async with self._changed:
+            await self._changed.wait_for(lambda: self.active < int(self.limit))
+            self.active += 1
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        async with self._changed:
+            self.active -= 1
+            self._changed.notify_all()
+
+    def succeeded(self) -> None:
+        self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+
+    def throttled(self) -> None:
+        self.limit = max(self.minimum, self.limit / 2)
+
+
+class TokenLedger:
+    """Token usage per video, summed across workers.
+
+    Counts are kept in process, and in a Redis hash per video when a client
+    is given, so a video's total includes calls made on other replicas.
+    Redis errors are logged and the local counts used instead.
+    """
+
+    KINDS = ("prompt_tokens", "completion_tokens", "cached_tokens")
+
+    def __init__(self, redis: Any = None, ttl: float = 7 * 24 * 3600, max_videos: int = 10000):
+        self.redis = redis
+        self.ttl = ttl
+        self.max_videos = max_videos
+        self._usage: "OrderedDict[str, Dict[str, int]]" = OrderedDict()
+
+    async def record(self, video_id: str, response: LLMResponse) -> None:
+        usage = self._usage.pop(video_id, None) or dict.fromkeys(self.KINDS, 0)
+        for kind in self.KINDS:
+            usage[kind] += getattr(response, kind)
+        self._usage[video_id] = usage
+        while len(self._usage) > self.max_videos:
+            self._usage.popitem(last=False)
+        if self.redis is None:
+            return
+        try:
+            pipe = self.redis.pipeline()
+            key = self._key(video_id)
+            for kind in self.KINDS:
+                pipe.hincrby(key, kind, getattr(response, kind))
+            pipe.expire(key, int(self.ttl))
+            await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Token ledger write failed for {video_id}: {e}")
+
+    async def usage(self, video_id: str) -> Dict[str, int]:
+        """Tokens charged to ``video_id``, with ``total`` = prompt + completion."""
+        usage = dict(self._usage.get(video_id) or dict.fromkeys(self.KINDS, 0))
+        if self.redis is not None:
+            try:
+                shared = await self.redis.hgetall(self._key(video_id))
+                if shared:
+                    usage = {kind: int(shared.get(kind.encode(), 0)) for kind in self.KINDS}
+            except Exception as e:
+                logger.warning(f"Token ledger read failed for {video_id}: {e}")
+        usage["total"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        return usage
+
+    @staticmethod
+    def _key(video_id: str) -> str:
+        return f"llm-usage:{video_id}"
+
+
+class _ProviderState:
+    def __init__(
+        self,
+        provider: Provider,
+        client: httpx.AsyncClient,
+        requests_per_minute: float,
+        tokens_per_minute: float,
+        limiter: AdaptiveLimiter,
+    ):
+        self.provider = provider
+        self.client = client
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.limiter = limiter
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "model": self.provider.model,
+            "concurrency_limit": round(self.limiter.limit, 2),
+            "active": self.limiter.active,
+            "calls": self.calls,
+            "retries": self.retries,
+            "failures": self.failures,
+        }
+
+
+class LLMClient:
+    """Shared async client for every LLM-backed worker in the process.
+
+    Per provider it keeps one pooled HTTP client, token buckets for the
+    request and token rate limits, and an adaptive concurrency limit.
+    Throttling (429) and server errors are retried with backoff, honouring
+    Retry-After, which also pauses the provider's buckets for every caller.
+    Identical prompts in flight at once are sent once and share the reply.
+    Usage is exported as metrics and charged to the video set with
+    ``charge_to``.
+    """
+
+    def __init__(
+        self,
+        providers: Sequence[Provider],
+        default_provider: str,
+        requests_per_minute: float = 500,
+        tokens_per_minute: float = 200_000,
+        initial_concurrency: int = 4,
+        max_concurrency: int = 32,
+        max_connections: int = 32,
+        timeout: float = 60.0,
+        max_retries: int = 4,
+        backoff: float = 1.0,
+        ledger: Optional[TokenLedger] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.default_provider = default_provider
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.ledger = ledger or TokenLedger()
+        self.coalesced = 0
+        # Followers of a cancelled call can retry; they were not cancelled
+        self._calls: SingleFlight[LLMResponse] = SingleFlight(
+            lambda key: LLMInterrupted("Shared LLM call was cancelled")
+        )
+        self._providers: Dict[str, _ProviderState] = {}
+        for provider in providers:
+            client = httpx.AsyncClient(
+                base_url=provider.base_url,
+                timeout=timeout,
+                limits=httpx.Limits(
+                    max_connections=max_connections, max_keepalive_connections=max_connections
+                ),
+                transport=transport,
+            )
+            self._providers[provider.name] = _ProviderState(
+                provider,
+                client,
+                requests_per_minute,
+                tokens_per_minute,
+                AdaptiveLimiter(initial_concurrency, max_concurrency),
+            )
+
+    async def complete(
+        self,
+        prompt: str,
+        prefix: str = "",
+        max_tokens: int = 512,
+        temperature: float = 0.0,
+        provider: Optional[str] = None,
+        model: Optional[str] = None,
+    ) -> LLMResponse:
+        """Complete ``prompt``.
+
+        ``prefix`` holds instructions shared between calls; it is sent where
+        the provider's prompt cache can reuse it. A call identical to one
+        already in flight waits for that one instead of being sent again.
+        Every caller is charged the full usage to its own video, as each
+        would have spent it alone; the ledger counts what videos cost, not
+        what the provider billed.
+        """
+        name = provider or self.default_provider
+        state = self._providers.get(name)
+        if state is None:
+            raise LLMError(f"LLM provider {name} is not configured")
+        model = model or state.provider.model
+        material = json.dumps([name, model, prefix, prompt, max_tokens, temperature])
+        key = hashlib.sha256(material.encode()).hexdigest()
+
+        if key in self._calls:
+            self.coalesced += 1
+        response = await self._calls.run(
+            key, lambda: self._call(state, prefix, prompt, model, max_tokens, temperature)
+        )
+
+        video_id = _charged_video.get()
+        if video_id:
+            await self.ledger.record(video_id, response)
+        return response
+
+    async def _call(
+        self,
+        state: _ProviderState,
+        prefix: str,
+        prompt: str,
+        model: str,
+        max_tokens: int,
+        temperature: float,
+    ) -> LLMResponse:
+        name = state.provider.name
+        path, headers, body = state.provider.request(prefix, prompt, model, max_tokens, temperature)
+        estimate = estimate_tokens(prefix) + estimate_tokens(prompt) + max_tokens
+        error = ""
+        for attempt in range(self.max_retries + 1):
+            await state.requests.acquire(1)
+            await state.tokens.acquire(estimate)
+            retry_after: Optional[float] = None
+            async with state.limiter:
+                state.calls += 1
+                started = time.perf_counter()
+                try:
+                    reply = await state.client.post(path, headers=headers, json=body)
+                except httpx.TransportError as e:
+                    error = f"{type(e).__name__}: {e}"
+                else:
+                    if reply.status_code == 429 or reply.status_code >= 500:
+                        error = f"HTTP {reply.status_code}"
+                        retry_after = _retry_after(reply)
+                    elif reply.status_code >= 400:
+                        state.failures += 1
+                        LLM_REQUESTS.labels(name, "failed").inc()
+                        raise LLMError(f"{name} returned {reply.status_code}: {reply.text[:200]}")
+                    else:
+                        response = state.provider.parse(model, reply.json())
+                        LLM_LATENCY.labels(name).observe(time.perf_counter() - started)
+                        state.limiter.succeeded()
+                        state.tokens.adjust(
+                            response.prompt_tokens + response.completion_tokens - estimate
+                        )
+                        _count_tokens(response)
+                        LLM_REQUESTS.labels(name, "ok").inc()
+                        return response
+
+            # Throttled or failed: the provider did not bill this attempt
+            state.limiter.throttled()
+            state.tokens.adjust(-estimate)
+            delay = retry_after if retry_after is not None else min(self.backoff * 2 ** attempt, 30.0)
+            if retry_after is not None:
+                state.requests.pause(delay)
+                state.tokens.pause(delay)
+            if attempt < self.max_retries:
+                state.retries += 1
+                LLM_REQUESTS.labels(name, "retried").inc()
+                logger.warning(f"{name} call failed ({error}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+        state.failures += 1
+        LLM_REQUESTS.labels(name, "failed").inc()
+        raise LLMError(f"{name} failed after {self.max_retries + 1} attempts: {error}")
+
+    async def aclose(self) -> None:
+        for state in self._providers.values():
+            await state.client.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "coalesced": self.coalesced,
+            "providers": {name: state.stats() for name, state in self._providers.items()},
+        }
+
+
+def _retry_after(reply: httpx.Response) -> Optional[float]:
+    try:
+        return max(0.0, float(reply.headers["retry-after"]))
+    except (KeyError, ValueError):
+        return None
+
+
+def _count_tokens(response: LLMResponse) -> None:
+    labels = (response.provider, response.model)
+    LLM_TOKENS.labels(*labels, "prompt").inc(response.prompt_tokens)
+    LLM_TOKENS.labels(*labels, "completion").inc(response.completion_tokens)
+    LLM_TOKENS.labels(*labels, "cached").inc(response.cached_tokens)
+
+
+@lru_cache()
+def get_token_ledger() -> TokenLedger:
+    """Get the process-wide token ledger."""
+    settings = get_settings()
+    redis_client = None
+    if settings.llm_usage_redis:
+        redis_client = aioredis.from_url(settings.redis_url, password=settings.redis_password)
+    return TokenLedger(redis_client, settings.llm_usage_ttl)
+
+
+@lru_cache()
+def get_llm_client() -> LLMClient:
+    """Get the process-wide LLM client, with every provider that has a key."""
+    settings = get_settings()
+    providers = []
+    if settings.openai_api_key:
+        providers.append(
+            OpenAIProvider(settings.openai_base_url, settings.openai_api_key, settings.openai_model)
+        )
+    if settings.anthropic_api_key:
+        providers.append(
+            AnthropicProvider(
+                settings.anthropic_base_url, settings.anthropic_api_key, settings.anthropic_model
+            )
+        )
+    return LLMClient(
+        providers,
+        settings.llm_provider,
+        requests_per_minute=settings.llm_requests_per_minute,
+        tokens_per_minute=settings.llm_tokens_per_minute,
+        initial_concurrency=settings.llm_initial_concurrency,
+        max_concurrency=settings.llm_max_concurrency,
+        max_connections=settings.llm_max_connections,
+        timeout=settings.llm_timeout,
+        max_retries=settings.llm_max_retries,
+        ledger=get_token_ledger(),
+    )
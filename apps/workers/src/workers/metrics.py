@@ -0,0 +1,83 @@
+# Created automatically by Cursor AI (2026-10-18)
+
+from typing import TYPE_CHECKING, Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+if TYPE_CHECKING:
+    from workers.base import BaseWorker
+
+# Message outcomes for PROCESSING_TIME.
+OK = "ok"
+FAILED = "failed"
+
+QUEUE_WAIT = Histogram(
+    "worker_queue_wait_seconds",
+    "Time a message waited for a free worker slot",
+    ["worker"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300),
+)
+PROCESSING_TIME = Histogram(
+    "worker_processing_seconds",
+    "Time spent handling a message, by outcome",
+    ["worker", "outcome"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 900, 1800, 3600),
+)
+PAYLOAD_SIZE = Histogram(
+    "worker_payload_bytes",
+    "Encoded size of messages received (in) and results published (out)",
+    ["worker", "direction"],
+    buckets=tuple(2 ** exponent for exponent in range(8, 25, 2)),
+)
+REJECTED = Counter(
+    "worker_rejected_total",
+    "Messages handed back to NATS because the worker was saturated",
+    ["worker"],
+)
+IN_FLIGHT = Gauge("worker_in_flight", "Messages being processed", ["worker"])
+QUEUED = Gauge("worker_queued", "Messages waiting for a free slot", ["worker"])
+CONCURRENCY = Gauge("worker_concurrency_limit", "Concurrent messages allowed", ["worker"])
+READY = Gauge("worker_ready", "1 when the worker is subscribed and warmed up", ["worker"])
+LOOP_LAG = Histogram(
+    "event_loop_lag_seconds",
+    "How late the event loop woke up from a fixed-interval sleep",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+
+LLM_REQUESTS = Counter(
+    "llm_requests_total",
+    "LLM API calls by provider and outcome (ok, retried, failed)",
+    ["provider", "outcome"],
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total",
+    "Tokens billed by LLM providers; cached prompt tokens are also counted as prompt",
+    ["provider", "model", "kind"],
+)
+LLM_LATENCY = Histogram(
+    "llm_request_seconds",
+    "Latency of successful LLM API calls",
+    ["provider"],
+    buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+)
+
+RESULT_CACHE_REQUESTS = Counter(
+    "result_cache_requests_total",
+    "Result cache lookups by worker and outcome (hits, misses, coalesced)",
+    ["worker", "outcome"],
+)
+
+
+def track_worker(worker: "BaseWorker") -> None:
+    """Export a worker's scheduler state and readiness as gauges."""
+    name = worker.worker_name
+    scheduler = worker.scheduler
+    IN_FLIGHT.labels(name).set_function(lambda: scheduler.in_flight)
+    QUEUED.labels(name).set_function(lambda: scheduler.queued)
+    CONCURRENCY.labels(name).set_function(lambda: scheduler.limit)
+    READY.labels(name).set_function(lambda: float(worker.is_ready()))
+
+
+def render() -> Tuple[bytes, str]:
+    """Current metrics in the Prometheus text format, with its content type."""
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,154 @@
+# Created automatically by Cursor AI (2026-10-18)
+
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+from workers.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Rough resident sizes used when a model does not expose torch parameters.
+DEFAULT_MODEL_SIZES_MB: Dict[str, float] = {
+    "tiny": 75,
+    "base": 145,
+    "small": 470,
+    "medium": 1500,
+    "large-v1": 3000,
+    "large-v2": 3000,
+    "large-v3": 3000,
+    "align": 400,
+}
+
+
+class ModelKey(NamedTuple):
+    """Identifies a loaded model instance."""
+
+    name: str
+    language: str
+    device: str
+    compute_type: str
+
+
+@dataclass
+class _Entry:
+    model: Any
+    size_mb: float
+
+
+def estimate_size_mb(model: Any, default: float) -> float:
+    """Estimate a model's memory footprint from its torch parameters."""
+    candidates = model if isinstance(model, tuple) else (model,)
+    total = 0
+    for candidate in candidates:
+        parameters = getattr(candidate, "parameters", None)
+        if not callable(parameters):
+            continue
+        try:
+            total += sum(p.numel() * p.element_size() for p in parameters())
+        except Exception:
+            continue
+    return total / (1024 * 1024) if total else default
+
+
+class ModelRegistry:
+    """LRU cache of loaded models bounded by an approximate memory budget.
+
+    The most recently loaded model is never evicted, so a single model larger
+    than the budget still loads; it just pushes everything else out.
+    """
+
+    def __init__(self, memory_budget_mb: float):
+        self.memory_budget_mb = memory_budget_mb
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[ModelKey, _Entry]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    @property
+    def used_mb(self) -> float:
+        """Estimated memory held by cached models."""
+        return sum(entry.size_mb for entry in self._entries.values())
+
+    def get(
+        self,
+        key: ModelKey,
+        loader: Callable[[], Any],
+        size_mb: Optional[float] = None,
+    ) -> Any:
+        """Return the model for ``key``, loading it with ``loader`` on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.model
+
+            self.misses += 1
+            logger.info(f"Loading model {key}")
+            model = loader()
+            default = size_mb if size_mb is not None else _default_size(key.name)
+            entry = _Entry(model=model, size_mb=estimate_size_mb(model, default))
+            self._entries[key] = entry
+            self._evict(keep=key)
+            return model
+
+    def __contains__(self, key: ModelKey) -> bool:
+        return key in self._entries
+
+    def evict(self, key: ModelKey) -> bool:
+        """Drop a model from the cache. Returns True if it was present."""
+        with self._lock:
+            return self._entries.pop(key, None) is not None
+
+    def clear(self) -> None:
+        """Drop all cached models."""
+        with self._lock:
+            self._entries.clear()
+
+    def _evict(self, keep: ModelKey) -> None:
+        evicted = False
+        while self.used_mb > self.memory_budget_mb and len(self._entries) > 1:
+            oldest = next(iter(self._entries))
+            if oldest == keep:
+                break
+            entry = self._entries.pop(oldest)
+            self.evictions += 1
+            evicted = True
+            logger.info(f"Evicted model {oldest} ({entry.size_mb:.0f} MB)")
+        if evicted:
+            _release_device_memory()
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache counters and the keys currently loaded."""
+        return {
+            "models": [list(key) for key in self._entries],
+            "used_mb": round(self.used_mb, 1),
+            "budget_mb": self.memory_budget_mb,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+def _default_size(name: str) -> float:
+    return DEFAULT_MODEL_SIZES_MB.get(name, DEFAULT_MODEL_SIZES_MB["large-v2"])
+
+
+def _release_device_memory() -> None:
+    try:
+        import torch
+    except ImportError:
+        return
+    if torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+
+@lru_cache()
+def get_model_registry() -> ModelRegistry:
+    """Get the per-process model registry."""
+    return ModelRegistry(get_settings().ml_memory_budget_mb)
@@ -1,10 +1,23 @@
 # Created automatically by Cursor AI (2024-12-19)
 
-import json
 import logging
-from typing import Any, Callable, Dict
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import nats
+from nats.aio.msg import Msg
+from nats.aio.subscription import Subscription
+from nats.js import JetStreamContext
+from nats.js.api import AckPolicy, ConsumerConfig
+from nats.js.errors import NotFoundError
+
+from workers.codec import (
+    ACCEPT_HEADER,
+    CONTENT_TYPE_HEADER,
+    JSON_CONTENT_TYPE,
+    Codec,
+    codec_for_content_type,
+    get_codec,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -12,57 +25,169 @@ logger = logging.getLogger(__name__)
 class NATSClient:
     """NATS client wrapper for workers."""
 
-    def __init__(self, url: str):
+    def __init__(self, url: str, codec: str = "orjson"):
         self.url = url
         self.nc = None
+        self.js: Optional[JetStreamContext] = None
+        self.codec: Codec = get_codec(codec)
 
     async def connect(self) -> None:
         """Connect to NATS server."""
         try:
             self.nc = await nats.connect(self.url)
+            self.js = self.nc.jetstream()
             logger.info(f"Connected to NATS at {self.url}")
         except Exception as e:
             logger.error(f"Failed to connect to NATS: {e}")
             raise
 
+    @property
+    def is_connected(self) -> bool:
+        """Whether the connection to NATS is currently up."""
+        return self.nc is not None and self.nc.is_connected
+
     async def close(self) -> None:
         """Close NATS connection."""
         if self.nc:
             await self.nc.close()
             logger.info("NATS connection closed")
 
-    async def subscribe(self, subject: str, callback: Callable) -> nats.Subscription:
-        """Subscribe to a NATS subject."""
+    async def subscribe(self, subject: str, callback: Callable, queue: str = "") -> Subscription:
+        """Subscribe to a NATS subject; subscribers sharing ``queue`` split messages."""
         if not self.nc:
             raise RuntimeError("NATS client not connected")
         
-        subscription = await self.nc.subscribe(subject, cb=callback)
+        subscription = await self.nc.subscribe(subject, queue=queue, cb=callback)
         logger.info(f"Subscribed to {subject}")
         return subscription
 
-    async def publish(self, subject: str, payload: bytes) -> None:
+    async def ensure_stream(
+        self, name: str, subjects: List[str], max_age: Optional[float] = None
+    ) -> None:
+        """Create the JetStream stream that captures ``subjects``, or update its subjects."""
+        if not self.js:
+            raise RuntimeError("NATS client not connected")
+
+        try:
+            info = await self.js.stream_info(name)
+        except NotFoundError:
+            await self.js.add_stream(name=name, subjects=subjects, max_age=max_age)
+            logger.info(f"Created JetStream stream {name} for {subjects}")
+            return
+
+        if sorted(info.config.subjects or []) != sorted(subjects):
+            info.config.subjects = subjects
+            await self.js.update_stream(info.config)
+            logger.info(f"Updated JetStream stream {name} to capture {subjects}")
+
+    async def pull_subscribe(
+        self,
+        subject: str,
+        durable: str,
+        stream: Optional[str] = None,
+        ack_wait: Optional[float] = None,
+        max_deliver: Optional[int] = None,
+    ) -> JetStreamContext.PullSubscription:
+        """Bind to (creating if needed) a durable pull consumer on ``subject``.
+
+        Consumers use explicit acks; replicas sharing ``durable`` split the work.
+        """
+        if not self.js:
+            raise RuntimeError("NATS client not connected")
+
+        config = ConsumerConfig(
+            durable_name=durable,
+            ack_policy=AckPolicy.EXPLICIT,
+            ack_wait=ack_wait,
+            max_deliver=max_deliver,
+            filter_subject=subject,
+        )
+        subscription = await self.js.pull_subscribe(
+            subject, durable=durable, stream=stream, config=config
+        )
+        logger.info(f"Pull subscribed to {subject} as {durable}")
+        return subscription
+
+    async def publish(
+        self, subject: str, payload: bytes, headers: Optional[Dict[str, str]] = None
+    ) -> None:
         """Publish a message to NATS."""
         if not self.nc:
             raise RuntimeError("NATS client not connected")
         
-        await self.nc.publish(subject, payload)
+        await self.nc.publish(subject, payload, headers=headers)
         logger.debug(f"Published message to {subject}")
 
+    def encode(
+        self, data: Any, codec: Optional[Codec] = None
+    ) -> Tuple[bytes, Dict[str, str]]:
+        """Encode ``data`` with the configured codec; returns (payload, headers)."""
+        codec = codec or self.codec
+        return codec.encode(data), {CONTENT_TYPE_HEADER: codec.content_type}
+
+    def decode(self, msg: Msg) -> Any:
+        """Decode a message according to its Content-Type header (JSON if absent)."""
+        headers = msg.headers or {}
+        codec = codec_for_content_type(headers.get(CONTENT_TYPE_HEADER), self.codec)
+        return codec.decode(msg.data)
+
+    def reply_codec(self, msg: Msg) -> Codec:
+        """Codec to answer ``msg`` with: what it accepts, else what it was sent in."""
+        headers = msg.headers or {}
+        content_type = headers.get(ACCEPT_HEADER) or headers.get(CONTENT_TYPE_HEADER)
+        try:
+            return codec_for_content_type(content_type, self.codec)
+        except ValueError:
+            return codec_for_content_type(None, self.codec)
+
+    async def publish_message(self, subject: str, data: Any) -> int:
+        """Publish data encoded with the configured codec; returns the payload size."""
+        payload, headers = self.encode(data)
+        await self.publish(subject, payload, headers)
+        return len(payload)
+
+    async def respond(self, msg: Msg, data: Any) -> None:
+        """Answer a request in the codec its sender accepts."""
+        payload, headers = self.encode(data, self.reply_codec(msg))
+        await self.publish(msg.reply, payload, headers)
+
+    @property
+    def json_codec(self) -> Codec:
+        """The fastest JSON codec, for peers that only speak JSON."""
+        return codec_for_content_type(JSON_CONTENT_TYPE, self.codec)
+
     async def publish_json(self, subject: str, data: Dict[str, Any]) -> None:
-        """Publish JSON data to NATS."""
-        payload = json.dumps(data).encode()
-        await self.publish(subject, payload)
+        """Publish data as JSON whatever the configured codec."""
+        payload, headers = self.encode(data, self.json_codec)
+        await self.publish(subject, payload, headers)
 
-    async def request(self, subject: str, payload: bytes, timeout: float = 5.0) -> bytes:
+    async def request(
+        self,
+        subject: str,
+        payload: bytes,
+        timeout: float = 5.0,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Msg:
         """Send a request and wait for response."""
         if not self.nc:
             raise RuntimeError("NATS client not connected")
         
-        response = await self.nc.request(subject, payload, timeout=timeout)
-        return response.data
+        return await self.nc.request(subject, payload, timeout=timeout, headers=headers)
+
+    async def request_message(self, subject: str, data: Any, timeout: float = 5.0) -> Any:
+        """Send a request in the configured codec and decode whatever comes back."""
+        payload, headers = self.encode(data)
+        headers[ACCEPT_HEADER] = self.codec.content_type
+        response = await self.request(subject, payload, timeout, headers)
+        return self.decode(response)
 
     async def request_json(self, subject: str, data: Dict[str, Any], timeout: float = 5.0) -> Dict[str, Any]:
-        """Send a JSON request and wait for response."""
-        payload = json.dumps(data).encode()
-        response_data = await self.request(subject, payload, timeout)
-        return json.loads(response_data.decode())
+        """Send a JSON request asking for a JSON reply.
+
+        The reply is decoded by its Content-Type, so a responder that
+        ignores Accept and answers in msgpack is still understood.
+        """
+        payload, headers = self.encode(data, self.json_codec)
+        headers[ACCEPT_HEADER] = JSON_CONTENT_TYPE
+        response = await self.request(subject, payload, timeout, headers)
+        return self.decode(response)
@@ -0,0 +1,277 @@
+# Created automatically by Cursor AI (2026-10-18)
+
+import asyncio
+import logging
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, NamedTuple, Sequence, Tuple
+
+from workers.base import CORRELATION_FIELD
+from workers.blobstore import get_claim_check
+from workers.diarization import label_transcript
+from workers.nats_client import NATSClient
+from workers.transcript import Transcript
+
+logger = logging.getLogger(__name__)
+
+COMPLETED = "completed"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+
+class Stage(NamedTuple):
+    """One node of a pipeline DAG.
+
+    ``inputs`` are ``(upstream stage, result field)`` pairs; each field of the
+    upstream result is forwarded under the same name, and the stage waits for
+    every upstream stage it names. A failed upstream stage listed in
+    ``optional`` does not block this one; its fields are forwarded as None.
+    ``params`` are copied from the pipeline request when present.
+
+    A stage without a ``subject`` is not sent to a worker: the pipeline runs
+    the local step of the same name itself.
+    """
+
+    name: str
+    subject: str
+    inputs: Tuple[Tuple[str, str], ...] = ()
+    params: Tuple[str, ...] = ()
+    optional: Tuple[str, ...] = ()
+
+    @property
+    def requires(self) -> Tuple[str, ...]:
+        """Upstream stages, in declaration order."""
+        return tuple(dict.fromkeys(stage for stage, _ in self.inputs))
+
+
+# Per-video pipeline: probe, ASR and diarization start together. Once both
+# ASR and diarization finish, the speakers step labels the transcript's words
+# with their speakers, and everything reading the transcript starts on that;
+# if diarization fails the transcript goes on unlabelled. Highlights also
+# wait for the chapters from segmentation.
+VIDEO_PIPELINE: Tuple[Stage, ...] = (
+    Stage("probe", "media.probe", params=("video_path",)),
+    Stage("asr", "media.asr", params=("audio_path", "language")),
+    Stage("diarization", "media.diarization", params=("audio_path",)),
+    Stage(
+        "speakers",
+        "",
+        inputs=(("asr", "transcript"), ("diarization", "speakers")),
+        optional=("diarization",),
+    ),
+    Stage(
+        "segmentation",
+        "media.segmentation",
+        inputs=(("speakers", "transcript"),),
+        params=("video_path",),
+    ),
+    Stage("summarization", "media.summarization", inputs=(("speakers", "transcript"),)),
+    Stage("quotes", "media.quotes", inputs=(("speakers", "transcript"),)),
+    Stage("search", "media.search", inputs=(("speakers", "transcript"),)),
+    Stage(
+        "highlights",
+        "media.highlights",
+        inputs=(("speakers", "transcript"), ("segmentation", "chapters")),
+        params=("audio_path",),
+    ),
+)
+
+Dispatch = Callable[[Stage, Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+class StageError(Exception):
+    """A stage's worker reported an error instead of a result."""
+
+
+async def label_speakers(stage: Stage, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Local step: the ASR transcript with each word's speaker from the diarization turns.
+
+    Without turns (diarization failed) the transcript reference is passed
+    on untouched. The labelled transcript is offloaded like a worker result.
+    """
+    claim_check = get_claim_check()
+    turns = await claim_check.resolve(payload.get("speakers"))
+    if turns is None:
+        return {"video_id": payload["video_id"], "transcript": payload.get("transcript")}
+    transcript = Transcript.coerce(await claim_check.resolve(payload.get("transcript")))
+    if transcript is None:
+        raise StageError("Missing transcript")
+    return await claim_check.offload(
+        {"video_id": payload["video_id"], "transcript": label_transcript(transcript, turns)}
+    )
+
+
+# Steps the pipeline runs itself, for stages without a subject
+LOCAL_STEPS: Dict[str, Dispatch] = {"speakers": label_speakers}
+
+
+def topological_order(stages: Sequence[Stage]) -> List[Stage]:
+    """Order ``stages`` so each comes after its inputs.
+
+    Stages whose inputs are ready at the same time keep their declaration
+    order. Raises ValueError for duplicate names, unknown inputs or cycles.
+    """
+    by_name: Dict[str, Stage] = {}
+    for stage in stages:
+        if stage.name in by_name:
+            raise ValueError(f"Duplicate pipeline stage: {stage.name}")
+        by_name[stage.name] = stage
+    for stage in stages:
+        for upstream in stage.requires:
+            if upstream not in by_name:
+                raise ValueError(f"Stage {stage.name} depends on unknown stage {upstream}")
+
+    remaining = {stage.name: set(stage.requires) for stage in stages}
+    order: List[Stage] = []
+    while remaining:
+        ready = [name for name, upstream in remaining.items() if not upstream]
+        if not ready:
+            raise ValueError(f"Pipeline has a cycle through {sorted(remaining)}")
+        for name in ready:
+            del remaining[name]
+            order.append(by_name[name])
+        for upstream in remaining.values():
+            upstream.difference_update(ready)
+    return order
+
+
+class Pipeline:
+    """Runs a stage DAG for one video, each stage as soon as its inputs exist.
+
+    Stages are sent through ``dispatch``, which returns the stage's result;
+    stages without a subject run their step from ``steps`` instead. A
+    failed stage does not stop independent branches; stages downstream of it
+    are skipped. The returned report has the status, start offset and
+    duration of every stage.
+    """
+
+    def __init__(
+        self, stages: Sequence[Stage] = VIDEO_PIPELINE, steps: Mapping[str, Dispatch] = LOCAL_STEPS
+    ):
+        self.stages = topological_order(stages)
+        self.steps = steps
+        for stage in self.stages:
+            if not stage.subject and stage.name not in steps:
+                raise ValueError(f"Stage {stage.name} has no subject and no local step")
+
+    async def run(
+        self, video_id: str, params: Dict[str, Any], dispatch: Dispatch
+    ) -> Dict[str, Any]:
+        """Run every stage for ``video_id`` and return the timing report."""
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        results: Dict[str, Dict[str, Any]] = {}
+        report: Dict[str, Dict[str, Any]] = {}
+        tasks: Dict[str, "asyncio.Task[None]"] = {}
+
+        async def run_stage(stage: Stage) -> None:
+            await asyncio.gather(*(tasks[upstream] for upstream in stage.requires))
+            blocked_by = [
+                upstream for upstream in stage.requires
+                if report[upstream]["status"] != COMPLETED and upstream not in stage.optional
+            ]
+            if blocked_by:
+                report[stage.name] = {"status": SKIPPED, "blocked_by": blocked_by}
+                return
+
+            payload = {"video_id": video_id}
+            payload.update({field: params[field] for field in stage.params if field in params})
+            for upstream, field in stage.inputs:
+                payload[field] = results.get(upstream, {}).get(field)
+
+            begin = loop.time()
+            try:
+                run = dispatch if stage.subject else self.steps[stage.name]
+                results[stage.name] = await run(stage, payload)
+                entry: Dict[str, Any] = {"status": COMPLETED}
+            except Exception as e:
+                logger.error(f"Stage {stage.name} failed for video {video_id}: {e}")
+                entry = {"status": FAILED, "error": str(e)}
+            entry["started_at"] = round(begin - started, 3)
+            entry["duration"] = round(loop.time() - begin, 3)
+            report[stage.name] = entry
+
+        # Stages are created in topological order, so upstream tasks exist
+        for stage in self.stages:
+            tasks[stage.name] = asyncio.create_task(run_stage(stage))
+        try:
+            await asyncio.gather(*tasks.values())
+        finally:
+            for task in tasks.values():
+                task.cancel()
+
+        failed = any(report[stage.name]["status"] != COMPLETED for stage in self.stages)
+        return {
+            "video_id": video_id,
+            "status": FAILED if failed else COMPLETED,
+            "duration": round(loop.time() - started, 3),
+            "stages": {stage.name: report[stage.name] for stage in self.stages},
+        }
+
+
+class StageDispatcher:
+    """Sends stage requests over NATS and waits for the matching result.
+
+    Each request carries a fresh correlation id, which workers echo in their
+    ``.result`` message and which ``.error`` messages carry in
+    ``original_data``, so concurrent runs for the same video never mix up.
+    """
+
+    def __init__(self, nats_client: NATSClient, timeout: float):
+        self.nats_client = nats_client
+        self.timeout = timeout
+        self._pending: Dict[str, "asyncio.Future[Dict[str, Any]]"] = {}
+        self._subscriptions: List[Any] = []
+
+    async def start(self, stages: Sequence[Stage]) -> None:
+        """Listen for results and errors of ``stages``."""
+        for stage in stages:
+            if not stage.subject:
+                continue
+            for suffix in ("result", "error"):
+                subscription = await self.nats_client.subscribe(
+                    f"{stage.subject}.{suffix}", self._on_message
+                )
+                self._subscriptions.append(subscription)
+
+    async def stop(self) -> None:
+        """Stop listening; pending dispatches time out."""
+        subscriptions, self._subscriptions = self._subscriptions, []
+        for subscription in subscriptions:
+            if subscription:
+                await subscription.unsubscribe()
+
+    async def dispatch(self, stage: Stage, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Publish ``payload`` to the stage's subject and return its result."""
+        correlation_id = uuid.uuid4().hex
+        future: "asyncio.Future[Dict[str, Any]]" = asyncio.get_running_loop().create_future()
+        self._pending[correlation_id] = future
+        try:
+            await self.nats_client.publish_message(
+                stage.subject, {**payload, CORRELATION_FIELD: correlation_id}
+            )
+            return await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            raise StageError(f"No result from {stage.subject} within {self.timeout}s")
+        finally:
+            self._pending.pop(correlation_id, None)
+
+    async def _on_message(self, msg) -> None:
+        try:
+            data = self.nats_client.decode(msg)
+        except Exception as e:
+            logger.error(f"Undecodable stage message on {msg.subject}: {e}")
+            return
+
+        if msg.subject.endswith(".error"):
+            original = data.get("original_data") or {}
+            future = self._pending.get(original.get(CORRELATION_FIELD))
+            if future and not future.done():
+                future.set_exception(StageError(data.get("error", "unknown error")))
+        else:
+            future = self._pending.get(data.get(CORRELATION_FIELD))
+            if future and not future.done():
+                future.set_result(data)
+
+    def pending(self) -> int:
+        """Number of stage requests awaiting a result."""
+        return len(self._pending)
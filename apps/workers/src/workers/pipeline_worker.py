@@ -0,0 +1,98 @@
+# Created automatically by Cursor AI (2026-10-18)
+
+import logging
+from typing import Any, Dict, Optional
+
+from workers.base import TRANSIENT_ERRORS, BaseWorker
+from workers.config import get_settings
+from workers.nats_client import NATSClient
+from workers.pipeline import VIDEO_PIPELINE, Pipeline, StageDispatcher
+
+logger = logging.getLogger(__name__)
+
+
+class PipelineWorker(BaseWorker):
+    """Worker that drives the per-video processing DAG.
+
+    A single ``media.pipeline`` request (``video_id``, ``video_path``,
+    ``audio_path`` and optionally ``language``) runs every stage of
+    ``VIDEO_PIPELINE``, chaining results such as the ASR transcript into the
+    stages that need them. The result reports each stage's status and timing.
+    """
+
+    # Runs are mostly waiting on other workers
+    concurrency = 32
+
+    def __init__(
+        self,
+        nats_client: NATSClient,
+        pipeline: Optional[Pipeline] = None,
+        concurrency: Optional[int] = None,
+        max_pending: Optional[int] = None,
+    ):
+        super().__init__(nats_client, concurrency, max_pending)
+        self.pipeline = pipeline or Pipeline(VIDEO_PIPELINE)
+        self.dispatcher = StageDispatcher(
+            nats_client, get_settings().pipeline_stage_timeout
+        )
+        self.stage_runs: Dict[str, int] = {}
+        self.stage_seconds: Dict[str, float] = {}
+
+    @property
+    def subject(self) -> str:
+        return "media.pipeline"
+
+    @property
+    def worker_name(self) -> str:
+        return "PipelineWorker"
+
+    async def start(self) -> None:
+        """Listen for stage results, then start taking pipeline requests."""
+        await self.dispatcher.start(self.pipeline.stages)
+        await super().start()
+
+    async def stop(self) -> None:
+        """Stop the worker and its stage result subscriptions."""
+        await super().stop()
+        await self.dispatcher.stop()
+
+    async def process_message(self, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Run the pipeline for one video."""
+        try:
+            video_id = data.get("video_id")
+
+            if not video_id:
+                raise ValueError("Missing video_id")
+
+            logger.info(f"Starting pipeline for video {video_id}")
+
+            result = await self.pipeline.run(video_id, data, self.dispatcher.dispatch)
+            self._record_timings(result)
+
+            logger.info(
+                f"Pipeline for video {video_id} {result['status']} in {result['duration']}s"
+            )
+            return result
+
+        except TRANSIENT_ERRORS:
+            raise
+        except Exception as e:
+            logger.error(f"Error in pipeline processing: {e}")
+            await self.publish_error(str(e), data)
+            return None
+
+    def _record_timings(self, result: Dict[str, Any]) -> None:
+        for name, stage in result["stages"].items():
+            if "duration" in stage:
+                self.stage_runs[name] = self.stage_runs.get(name, 0) + 1
+                self.stage_seconds[name] = self.stage_seconds.get(name, 0.0) + stage["duration"]
+
+    def stats(self) -> Dict[str, Any]:
+        """Scheduler counters plus mean duration per stage."""
+        stats = super().stats()
+        stats["pending_stages"] = self.dispatcher.pending()
+        stats["stage_mean_seconds"] = {
+            name: round(self.stage_seconds[name] / runs, 3)
+            for name, runs in self.stage_runs.items()
+        }
+        return stats
@@ -4,7 +4,7 @@ import logging
 from typing import Any, Dict, Optional
 
 import ffmpeg
-from workers.base import BaseWorker
+from workers.base import IO_POOL, TRANSIENT_ERRORS, BaseWorker
 
 logger = logging.getLogger(__name__)
 
@@ -12,6 +12,8 @@ logger = logging.getLogger(__name__)
 class ProbeWorker(BaseWorker):
     """Worker for extracting video metadata using ffprobe."""
 
+    cache_file_fields = ("video_path",)
+
     @property
     def subject(self) -> str:
         return "media.probe"
@@ -20,6 +22,10 @@ class ProbeWorker(BaseWorker):
     def worker_name(self) -> str:
         return "ProbeWorker"
 
+    @property
+    def cache_version(self) -> Optional[str]:
+        return "ffprobe:1"
+
     async def process_message(self, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Process video probe request."""
         try:
@@ -43,6 +49,8 @@ class ProbeWorker(BaseWorker):
             logger.info(f"Completed probing video {video_id}")
             return result
             
+        except TRANSIENT_ERRORS:
+            raise
         except Exception as e:
             logger.error(f"Error probing video: {e}")
             await self.publish_error(str(e), data)
@@ -51,8 +59,9 @@ class ProbeWorker(BaseWorker):
     async def _extract_metadata(self, video_path: str) -> Dict[str, Any]:
         """Extract video metadata using ffprobe."""
         try:
-            # Get video stream information
-            probe = ffmpeg.probe(video_path)
+            # Get video stream information (ffprobe is a blocking subprocess)
+            with self.span("ffprobe"):
+                probe = await self.run_in_pool(IO_POOL, ffmpeg.probe, video_path)
             
             # Extract video stream
             video_stream = None
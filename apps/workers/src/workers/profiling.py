@@ -0,0 +1,185 @@
+# Created automatically by Cursor AI (2026-10-18)
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from prometheus_client import Histogram
+
+logger = logging.getLogger(__name__)
+
+SPAN_TIME = Histogram(
+    "worker_span_seconds",
+    "Time spent in a named step of a worker's message handling",
+    ["worker", "span"],
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 900, 1800),
+)
+
+# Span totals for the message being handled, and the worker handling it.
+_spans: ContextVar[Optional[Dict[str, float]]] = ContextVar("spans", default=None)
+_worker: ContextVar[str] = ContextVar("span_worker", default="")
+
+
+@contextmanager
+def collect_spans(worker: str = "") -> Iterator[Dict[str, float]]:
+    """Collect the spans recorded inside the block into the yielded dict."""
+    timings: Dict[str, float] = {}
+    spans_token = _spans.set(timings)
+    worker_token = _worker.set(worker)
+    try:
+        yield timings
+    finally:
+        _spans.reset(spans_token)
+        _worker.reset(worker_token)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Time a step of the current message.
+
+    Durations of repeated spans add up, so a span around each window of a
+    streaming transcription reports the total. Outside a message (warm-up,
+    tests) a span costs two clock reads.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        timings = _spans.get()
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + elapsed
+            worker = _worker.get()
+            if worker:
+                SPAN_TIME.labels(worker, name).observe(elapsed)
+
+
+def merge_spans(timings: Dict[str, float]) -> None:
+    """Add spans recorded elsewhere (e.g. in a pool process) to the current message."""
+    current = _spans.get()
+    if current is None:
+        return
+    worker = _worker.get()
+    for name, elapsed in timings.items():
+        current[name] = current.get(name, 0.0) + elapsed
+        if worker:
+            SPAN_TIME.labels(worker, name).observe(elapsed)
+
+
+def call_with_spans(
+    fn: Callable[..., Any], *args: Any, **kwargs: Any
+) -> Tuple[Any, Dict[str, float]]:
+    """Run ``fn`` in a pool thread or process; return its result and its spans."""
+    with collect_spans() as timings:
+        result = fn(*args, **kwargs)
+    return result, timings
+
+
+class StackSampler:
+    """Samples every thread's Python stack on a background thread.
+
+    Stacks are folded into the ``frame;frame;frame count`` format read by
+    flamegraph.pl, speedscope and inferno. Only this process is sampled, i.e.
+    the event loop and IO pool threads; CPU pool processes are not.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples = 0
+        self.stacks: "Counter[str]" = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(
+                        f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+                    )
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.stacks[";".join(s.replace(";", ":") for s in reversed(stack))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        """Folded stacks, one ``stack count`` line each, most frequent first."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class Profiler:
+    """On-demand statistical profiler.
+
+    Nothing is sampled until ``run`` is called; while idle the only cost is
+    ``message_done`` checking a single attribute per message.
+    """
+
+    def __init__(self):
+        self._sampler: Optional[StackSampler] = None
+        self._remaining: Optional[int] = None
+        self._done: Optional[asyncio.Event] = None
+
+    @property
+    def active(self) -> bool:
+        return self._sampler is not None
+
+    async def run(
+        self, seconds: float, messages: Optional[int] = None, interval: float = 0.005
+    ) -> StackSampler:
+        """Sample for ``seconds``, or until ``messages`` more messages finish."""
+        if self._sampler is not None:
+            raise RuntimeError("A profile is already running")
+        sampler = StackSampler(interval)
+        self._sampler = sampler
+        self._remaining = messages
+        self._done = asyncio.Event()
+        sampler.start()
+        logger.info(f"Profiling for up to {seconds}s / {messages or 'any number of'} messages")
+        try:
+            await asyncio.wait_for(self._done.wait(), seconds)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            # Joining the sampler thread takes at most one interval
+            sampler.stop()
+            self._sampler = None
+            self._remaining = None
+        return sampler
+
+    def message_done(self) -> None:
+        """Count a finished message towards the active profile's limit."""
+        if self._remaining is None:
+            return
+        self._remaining -= 1
+        if self._remaining <= 0:
+            self._done.set()
+
+
+@lru_cache()
+def get_profiler() -> Profiler:
+    """Get the process-wide profiler."""
+    return Profiler()
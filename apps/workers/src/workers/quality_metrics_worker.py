@@ -3,7 +3,8 @@
 import logging
 from typing import Any, Dict, Optional
 
-from workers.base import BaseWorker
+from workers.base import TRANSIENT_ERRORS, BaseWorker
+from workers.llm import get_token_ledger
 
 logger = logging.getLogger(__name__)
 
@@ -23,21 +24,23 @@ class QualityMetricsWorker(BaseWorker):
         """Process quality metrics calculation."""
         try:
             video_id = data.get("video_id")
-            transcript = data.get("transcript")
+            transcript = await self.resolve_transcript(data.get("transcript"))
             original_audio = data.get("original_audio")
             
-            if not video_id or not transcript:
+            if not video_id or transcript is None:
                 raise ValueError("Missing video_id or transcript")
             
             logger.info(f"Starting quality metrics calculation for video {video_id}")
             
             # TODO: Implement quality metrics calculation
-            # TODO: WER proxy, coverage score, token counting
-            
+            # TODO: WER proxy, coverage score
+            usage = await get_token_ledger().usage(video_id)
+
             metrics = {
                 "wer_proxy": 0.05,
                 "coverage_score": 0.95,
-                "tokens_used": 1500,
+                "tokens_used": usage["total"],
+                "token_usage": usage,
                 "processing_time": 120.5,
             }
             
@@ -50,6 +53,8 @@ class QualityMetricsWorker(BaseWorker):
             logger.info(f"Completed quality metrics calculation for video {video_id}")
             return result
             
+        except TRANSIENT_ERRORS:
+            raise
         except Exception as e:
             logger.error(f"Error in quality metrics calculation: {e}")
             await self.publish_error(str(e), data)
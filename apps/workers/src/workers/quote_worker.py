@@ -3,7 +3,7 @@
 import logging
 from typing import Any, Dict, Optional
 
-from workers.base import BaseWorker
+from workers.base import TRANSIENT_ERRORS, BaseWorker
 
 logger = logging.getLogger(__name__)
 
@@ -50,6 +50,8 @@ class QuoteWorker(BaseWorker):
             logger.info(f"Completed quote extraction for video {video_id}")
             return result
             
+        except TRANSIENT_ERRORS:
+            raise
         except Exception as e:
             logger.error(f"Error in quote extraction: {e}")
             await self.publish_error(str(e), data)
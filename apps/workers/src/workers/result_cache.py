@@ -0,0 +1,377 @@
+# Created automatically by Cursor AI (2026-10-18)
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, Optional, Sequence, Tuple
+
+import redis.asyncio as aioredis
+
+from workers.base import SingleFlight, run_io
+from workers.config import get_settings
+from workers.metrics import RESULT_CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+# Request fields that identify the caller rather than the work; a re-upload
+# has a new video_id but the same content, so they stay out of the key.
+IGNORED_FIELDS = frozenset({"video_id", "correlation_id"})
+
+# File digests remembered by (path, size, mtime); least recently used go first
+MAX_FILE_DIGESTS = 4096
+
+_RELEASE_LOCK = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+_EXTEND_LOCK = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("pexpire", KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+class DiskResultCache:
+    """Local tier: one JSON file per key, expired by TTL, evicted LRU by size.
+
+    Methods are blocking; ``ResultCache`` calls them on the IO pool.
+    """
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        # key -> size, least recently used first
+        self._sizes: "OrderedDict[str, int]" = OrderedDict()
+        entries = []
+        for name in os.listdir(root):
+            if name.endswith(".json"):
+                stat = os.stat(os.path.join(root, name))
+                entries.append((stat.st_mtime, name[:-5], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._sizes[key] = size
+        self._bytes = sum(self._sizes.values())
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(key), "rb") as f:
+                entry = json.loads(f.read())
+        except (FileNotFoundError, ValueError):
+            return None
+        if entry["expires"] < time.time():
+            self._remove(key)
+            return None
+        with self._lock:
+            if key in self._sizes:
+                self._sizes.move_to_end(key)
+        return entry["value"]
+
+    def put(self, key: str, value: Dict[str, Any], ttl: float) -> None:
+        data = json.dumps({"expires": time.time() + ttl, "value": value}).encode()
+        if len(data) > self.max_bytes:
+            return
+        # Write to a temp file first so readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(key))
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+        with self._lock:
+            self._bytes += len(data) - self._sizes.pop(key, 0)
+            self._sizes[key] = len(data)
+            evicted = []
+            while self._bytes > self.max_bytes:
+                old_key, size = self._sizes.popitem(last=False)
+                self._bytes -= size
+                evicted.append(old_key)
+        for old_key in evicted:
+            self._unlink(old_key)
+
+    def _remove(self, key: str) -> None:
+        with self._lock:
+            self._bytes -= self._sizes.pop(key, 0)
+        self._unlink(key)
+
+    def _unlink(self, key: str) -> None:
+        try:
+            os.unlink(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._sizes), "bytes": self._bytes}
+
+
+class RedisResultCache:
+    """Shared tier: results and compute locks in Redis.
+
+    Entries expire after ``ttl``; size-based eviction is left to the server's
+    ``maxmemory-policy`` (``allkeys-lru`` or ``volatile-lru``). Any Redis
+    error is logged and treated as a miss, so an outage only costs cache hits.
+    """
+
+    def __init__(self, client: Any, ttl: float, prefix: str = "result-cache:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            data = await self.client.get(self.prefix + key)
+        except Exception as e:
+            logger.warning(f"Result cache read from Redis failed: {e}")
+            return None
+        return json.loads(data) if data is not None else None
+
+    async def put(self, key: str, value: Dict[str, Any]) -> None:
+        try:
+            await self.client.set(
+                self.prefix + key, json.dumps(value), ex=max(int(self.ttl), 1)
+            )
+        except Exception as e:
+            logger.warning(f"Result cache write to Redis failed: {e}")
+
+    async def acquire(self, key: str, timeout: float) -> Optional[str]:
+        """Take the compute lock for ``key``; returns its token, or None if held.
+
+        If Redis is unreachable the lock is treated as acquired.
+        """
+        token = uuid.uuid4().hex
+        try:
+            acquired = await self.client.set(
+                f"{self.prefix}lock:{key}", token, nx=True, px=int(timeout * 1000)
+            )
+        except Exception as e:
+            logger.warning(f"Result cache lock in Redis failed: {e}")
+            return token
+        return token if acquired else None
+
+    async def extend(self, key: str, token: str, timeout: float) -> None:
+        try:
+            await self.client.eval(
+                _EXTEND_LOCK, 1, f"{self.prefix}lock:{key}", token, int(timeout * 1000)
+            )
+        except Exception as e:
+            logger.warning(f"Result cache lock renewal in Redis failed: {e}")
+
+    async def release(self, key: str, token: str) -> None:
+        try:
+            await self.client.eval(_RELEASE_LOCK, 1, f"{self.prefix}lock:{key}", token)
+        except Exception as e:
+            logger.warning(f"Result cache unlock in Redis failed: {e}")
+
+    async def locked(self, key: str) -> bool:
+        try:
+            return bool(await self.client.exists(f"{self.prefix}lock:{key}"))
+        except Exception:
+            return False
+
+
+class ResultCache:
+    """Caches stage results by the content of their inputs.
+
+    Keys hash the stage name, a version naming the model or code that
+    produced the result, and the request parameters, with local file paths
+    replaced by the SHA-256 of the file. Lookups try the local disk tier, then
+    Redis. Identical requests compute once: concurrent callers in this process
+    share one future, and replicas wait on a Redis lock held (and renewed) by
+    whichever started first.
+
+    Cached values are the claim-checked (JSON-safe) form of a result.
+    """
+
+    def __init__(
+        self,
+        disk: Optional[DiskResultCache],
+        redis: Optional[RedisResultCache],
+        ttl: float,
+        lock_timeout: float = 600.0,
+        poll_interval: float = 0.5,
+        max_digests: int = MAX_FILE_DIGESTS,
+    ):
+        self.disk = disk
+        self.redis = redis
+        self.ttl = ttl
+        self.lock_timeout = lock_timeout
+        self.poll_interval = poll_interval
+        self._counters: Dict[str, Dict[str, int]] = {}
+        self._computing: SingleFlight[Optional[Dict[str, Any]]] = SingleFlight()
+        self.max_digests = max_digests
+        self._digests: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+
+    async def key_for(
+        self,
+        stage: str,
+        version: str,
+        data: Dict[str, Any],
+        file_fields: Sequence[str] = (),
+    ) -> str:
+        """Cache key of a request to ``stage``."""
+        params: Dict[str, Any] = {}
+        for field, value in data.items():
+            if field in IGNORED_FIELDS:
+                continue
+            if field in file_fields and value:
+                value = {"sha256": await self.file_digest(value)}
+            params[field] = value
+        material = json.dumps([stage, version, params], sort_keys=True, default=str)
+        return hashlib.sha256(material.encode()).hexdigest()
+
+    async def file_digest(self, path: str) -> str:
+        """SHA-256 of a file, remembered while its size and mtime are unchanged."""
+        stat = await run_io(os.stat, path)
+        memo = (path, stat.st_size, stat.st_mtime_ns)
+        digest = self._digests.get(memo)
+        if digest is not None:
+            self._digests.move_to_end(memo)
+            return digest
+        digest = await run_io(_sha256_file, path)
+        self._digests[memo] = digest
+        while len(self._digests) > self.max_digests:
+            self._digests.popitem(last=False)
+        return digest
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached value for ``key`` from the fastest tier that has it."""
+        if self.disk is not None:
+            value = await run_io(self.disk.get, key)
+            if value is not None:
+                return value
+        if self.redis is not None:
+            value = await self.redis.get(key)
+            if value is not None:
+                if self.disk is not None:
+                    await run_io(self.disk.put, key, value, self.ttl)
+                return value
+        return None
+
+    async def put(self, key: str, value: Dict[str, Any]) -> None:
+        """Store ``value`` in every tier."""
+        if self.disk is not None:
+            await run_io(self.disk.put, key, value, self.ttl)
+        if self.redis is not None:
+            await self.redis.put(key, value)
+
+    async def get_or_compute(
+        self,
+        stage: str,
+        key: str,
+        compute: Callable[[], Awaitable[Optional[Dict[str, Any]]]],
+    ) -> Optional[Dict[str, Any]]:
+        """Return the cached result for ``key``, computing it at most once.
+
+        A None result (the stage failed) is not cached.
+        """
+        counters = self._counters.setdefault(
+            stage, {"hits": 0, "misses": 0, "coalesced": 0}
+        )
+        value = await self.get(key)
+        if value is not None:
+            _count(counters, stage, "hits")
+            return value
+
+        async def compute_once() -> Optional[Dict[str, Any]]:
+            value, computed = await self._compute_once(key, compute)
+            _count(counters, stage, "misses" if computed else "coalesced")
+            return value
+
+        if key in self._computing:
+            _count(counters, stage, "coalesced")
+        return await self._computing.run(key, compute_once)
+
+    async def _compute_once(
+        self, key: str, compute: Callable[[], Awaitable[Optional[Dict[str, Any]]]]
+    ) -> Tuple[Optional[Dict[str, Any]], bool]:
+        token = None
+        if self.redis is not None:
+            while True:
+                token = await self.redis.acquire(key, self.lock_timeout)
+                if token is not None:
+                    break
+                # Another replica is computing; use its result once stored
+                while await self.redis.locked(key):
+                    await asyncio.sleep(self.poll_interval)
+                value = await self.get(key)
+                if value is not None:
+                    return value, False
+                # It failed or its lock expired: try to compute ourselves
+
+            value = await self.redis.get(key)
+            if value is not None:
+                await self.redis.release(key, token)
+                return value, False
+
+        renew = asyncio.create_task(self._renew_lock(key, token)) if token else None
+        try:
+            value = await compute()
+            if value is not None:
+                await self.put(key, value)
+            return value, True
+        finally:
+            if renew:
+                renew.cancel()
+                await self.redis.release(key, token)
+
+    async def _renew_lock(self, key: str, token: str) -> None:
+        while True:
+            await asyncio.sleep(self.lock_timeout / 3)
+            await self.redis.extend(key, token, self.lock_timeout)
+
+    def stats(self, stage: Optional[str] = None) -> Dict[str, Any]:
+        """Hit/miss counters, for one stage or all of them."""
+        if stage is not None:
+            return dict(self._counters.get(stage, {"hits": 0, "misses": 0, "coalesced": 0}))
+        stats: Dict[str, Any] = {"stages": {k: dict(v) for k, v in self._counters.items()}}
+        if self.disk is not None:
+            stats["disk"] = self.disk.stats()
+        return stats
+
+
+def _count(counters: Dict[str, int], stage: str, outcome: str) -> None:
+    counters[outcome] += 1
+    RESULT_CACHE_REQUESTS.labels(stage, outcome).inc()
+
+
+def _sha256_file(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@lru_cache()
+def get_result_cache() -> ResultCache:
+    """Get the process-wide result cache."""
+    settings = get_settings()
+    redis_tier = None
+    if settings.result_cache_redis:
+        client = aioredis.from_url(settings.redis_url, password=settings.redis_password)
+        redis_tier = RedisResultCache(client, settings.result_cache_ttl)
+    return ResultCache(
+        DiskResultCache(settings.result_cache_path, settings.result_cache_max_bytes),
+        redis_tier,
+        ttl=settings.result_cache_ttl,
+        lock_timeout=settings.result_cache_lock_timeout,
+    )
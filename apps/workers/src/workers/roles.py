@@ -0,0 +1,61 @@
+# Created automatically by Cursor AI (2026-10-18)
+
+import logging
+from typing import Dict, List, Sequence, Tuple, Type
+
+import workers
+from workers.base import BaseWorker
+from workers.nats_client import NATSClient
+
+logger = logging.getLogger(__name__)
+
+# Selects every role.
+ALL_ROLES = "all"
+
+# Workers started by each WORKER_ROLES entry. Only "asr" needs WhisperX and
+# torch, so the other roles run on small pods that start in about a second.
+ROLE_WORKERS: Dict[str, Tuple[str, ...]] = {
+    "asr": ("ASRWorker", "DiarizationWorker"),
+    "text": (
+        "SegmentationWorker",
+        "SummarizationWorker",
+        "QuoteWorker",
+        "HighlightWorker",
+        "SearchWorker",
+        "QualityMetricsWorker",
+    ),
+    "media": ("ProbeWorker", "ClipWorker"),
+    "io": ("ExportWorker", "SyncWorker", "PipelineWorker"),
+}
+
+
+def resolve_roles(roles: Sequence[str]) -> List[str]:
+    """Expand ``all`` and reject unknown role names."""
+    resolved: List[str] = []
+    for role in roles:
+        role = role.strip().lower()
+        if role == ALL_ROLES:
+            candidates = list(ROLE_WORKERS)
+        elif role in ROLE_WORKERS:
+            candidates = [role]
+        else:
+            raise ValueError(
+                f"Unknown worker role {role!r}; expected one of {sorted(ROLE_WORKERS)} or {ALL_ROLES!r}"
+            )
+        resolved.extend(r for r in candidates if r not in resolved)
+    return resolved
+
+
+def worker_classes(roles: Sequence[str]) -> List[Type[BaseWorker]]:
+    """Import the worker classes for ``roles``, and only those."""
+    names = []
+    for role in resolve_roles(roles):
+        names.extend(name for name in ROLE_WORKERS[role] if name not in names)
+    return [getattr(workers, name) for name in names]
+
+
+def create_workers(roles: Sequence[str], nats_client: NATSClient) -> List[BaseWorker]:
+    """Instantiate the workers for ``roles``."""
+    instances = [worker_class(nats_client) for worker_class in worker_classes(roles)]
+    logger.info(f"Roles {resolve_roles(roles)}: {[w.worker_name for w in instances]}")
+    return instances
@@ -0,0 +1,239 @@
+# Created automatically by Cursor AI (2026-10-18)
+
+import logging
+import subprocess
+import tempfile
+from collections import deque
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Histogram bins per RGB channel: the top four bits of each value
+HISTOGRAM_BINS = 16
+_BIN_SHIFT = 4
+# BT.601 luma weights
+_LUMA = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+
+class SceneCut(NamedTuple):
+    time: float
+    score: float
+
+
+def read_frames(
+    video_path: str,
+    stride: float,
+    width: int,
+    height: int,
+    batch: int = 64,
+) -> Iterator[np.ndarray]:
+    """Decode a video as batches of small RGB frames, one every ``stride`` seconds.
+
+    ffmpeg samples and downscales the video and writes raw frames to a pipe,
+    which is read a batch at a time into a reused buffer, so memory stays
+    at one batch whatever the video's length or resolution. Each yielded
+    ``(frames, height, width, 3)`` uint8 array is only valid until the next
+    one is requested. ffmpeg's stderr goes to a temporary file rather than
+    a second pipe, which it could fill and block on while we wait on stdout.
+    """
+    cmd = [
+        "ffmpeg",
+        "-nostdin",
+        "-loglevel", "error",
+        "-threads", "0",
+        "-i", video_path,
+        "-an", "-sn",
+        "-vf", f"fps={1.0 / stride},scale={width}:{height}:flags=fast_bilinear",
+        "-f", "rawvideo",
+        "-pix_fmt", "rgb24",
+        "pipe:1",
+    ]
+    frame_bytes = width * height * 3
+    buffer = bytearray(frame_bytes * batch)
+    view = memoryview(buffer)
+    stderr_file = tempfile.TemporaryFile()
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr_file)
+    try:
+        while True:
+            filled = 0
+            while filled < len(buffer):
+                read = process.stdout.readinto(view[filled:])
+                if not read:
+                    break
+                filled += read
+            frames = filled // frame_bytes
+            if frames:
+                yield np.frombuffer(buffer, dtype=np.uint8, count=frames * frame_bytes).reshape(
+                    frames, height, width, 3
+                )
+            if filled < len(buffer):
+                break
+        if process.wait() != 0:
+            raise RuntimeError(f"Failed to decode frames from {video_path}: {_tail(stderr_file)}")
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+        stderr_file.close()
+
+
+def _tail(f: Any, size: int = 500) -> str:
+    """The last ``size`` bytes written to ``f``, as text."""
+    f.seek(0, 2)
+    f.seek(max(f.tell() - size, 0))
+    return f.read().decode(errors="replace")
+
+
+def frame_features(frames: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Normalized RGB histograms ``(n, 3 * HISTOGRAM_BINS)`` and luma planes.
+
+    The histograms of a whole batch come from one ``bincount``: each pixel's
+    bin is offset by its frame and channel so the counts land in separate
+    rows.
+    """
+    n = len(frames)
+    pixels = frames.shape[1] * frames.shape[2]
+    bins = (frames >> _BIN_SHIFT).reshape(n, pixels, 3).astype(np.int64)
+    bins += np.arange(3) * HISTOGRAM_BINS
+    bins += (np.arange(n) * 3 * HISTOGRAM_BINS)[:, None, None]
+    histograms = np.bincount(bins.ravel(), minlength=n * 3 * HISTOGRAM_BINS)
+    histograms = histograms.reshape(n, 3 * HISTOGRAM_BINS).astype(np.float32) / pixels
+    luma = frames.astype(np.float32) @ _LUMA
+    return histograms, luma
+
+
+class SceneCutDetector:
+    """Streaming shot-boundary detector over batches of sampled frames.
+
+    Consecutive frames are scored by the mean of two differences in
+    ``[0, 1]``: half the L1 distance between their colour histograms,
+    averaged over the channels, and the mean absolute luma difference. A
+    hard cut changes both at once; camera motion mostly moves the second.
+
+    A frame starts a new scene when its score reaches ``threshold`` and is
+    ``ratio`` times the mean score of the ``window`` frames before it, which
+    keeps fast action from reading as a string of cuts, and when the current
+    scene is at least ``min_scene_seconds`` long. Only the last frame and
+    the recent scores are carried between batches.
+    """
+
+    def __init__(
+        self,
+        stride: float,
+        threshold: float = 0.3,
+        min_scene_seconds: float = 1.0,
+        window: int = 8,
+        ratio: float = 2.5,
+    ):
+        self.stride = stride
+        self.threshold = threshold
+        self.min_scene_seconds = min_scene_seconds
+        self.window = window
+        self.ratio = ratio
+        self.frames = 0
+        self._last: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._recent: "deque[float]" = deque(maxlen=window)
+        self._last_cut = 0.0
+
+    @property
+    def duration(self) -> float:
+        """Seconds of video seen so far."""
+        return self.frames * self.stride
+
+    def push(self, frames: np.ndarray) -> List[SceneCut]:
+        """Score a batch of ``(n, height, width, 3)`` frames; returns its cuts."""
+        if not len(frames):
+            return []
+        histograms, luma = frame_features(frames)
+        first = self.frames
+        self.frames += len(frames)
+        if self._last is not None:
+            histograms = np.concatenate([self._last[0], histograms])
+            luma = np.concatenate([self._last[1], luma])
+            first -= 1
+        self._last = (histograms[-1:], luma[-1:])
+        if len(histograms) < 2:
+            return []
+
+        # Score of frame i against frame i - 1, for every pair in the batch
+        hist_diff = 0.5 * np.abs(np.diff(histograms, axis=0)).sum(axis=1) / 3
+        luma_diff = np.abs(np.diff(luma, axis=0)).mean(axis=(1, 2)) / 255
+        scores = 0.5 * (hist_diff + luma_diff)
+
+        # Mean of the ``window`` scores before each one, carried across batches
+        history = np.concatenate([np.array(self._recent, dtype=np.float64), scores])
+        sums = np.concatenate([[0.0], np.cumsum(history)])
+        ends = np.arange(len(self._recent), len(history))
+        starts = np.maximum(ends - self.window, 0)
+        counts = np.maximum(ends - starts, 1)
+        baseline = (sums[ends] - sums[starts]) / counts
+        self._recent.extend(scores[-self.window:].tolist())
+
+        candidates = np.flatnonzero(
+            (scores >= self.threshold) & (scores >= self.ratio * baseline)
+        )
+        cuts = []
+        for i in candidates:
+            time = (first + 1 + int(i)) * self.stride
+            if time - self._last_cut >= self.min_scene_seconds:
+                cuts.append(SceneCut(round(time, 3), round(float(scores[i]), 4)))
+                self._last_cut = time
+        return cuts
+
+
+def iter_scene_cuts(
+    batches: Iterable[np.ndarray], detector: SceneCutDetector
+) -> Iterator[SceneCut]:
+    """Cuts from a stream of frame batches, as soon as each batch is scored."""
+    for frames in batches:
+        yield from detector.push(frames)
+
+
+def detect_scenes(
+    video_path: str,
+    stride: float,
+    width: int,
+    height: int,
+    threshold: float,
+    min_scene_seconds: float,
+    batch: int = 64,
+) -> Dict[str, Any]:
+    """CPU pool entry point: scene cuts and duration of a video file."""
+    detector = SceneCutDetector(stride, threshold, min_scene_seconds)
+    cuts = list(iter_scene_cuts(read_frames(video_path, stride, width, height, batch), detector))
+    logger.info(f"Found {len(cuts)} scene cuts in {detector.frames} frames of {video_path}")
+    return {
+        "cuts": [cut._asdict() for cut in cuts],
+        "duration": detector.duration,
+        "frames": detector.frames,
+    }
+
+
+def scenes_from_cuts(cuts: List[Dict[str, float]], duration: float) -> List[Dict[str, float]]:
+    """Contiguous ``start``/``end`` scenes between cut times."""
+    bounds = [0.0] + [cut["time"] for cut in cuts] + [duration]
+    return [
+        {"start": start, "end": end}
+        for start, end in zip(bounds, bounds[1:])
+        if end > start
+    ]
+
+
+def merge_scenes(scenes: List[Dict[str, float]], min_seconds: float) -> List[Dict[str, float]]:
+    """Merge consecutive scenes until each spans at least ``min_seconds``.
+
+    A short tail is folded into the scene before it.
+    """
+    merged: List[Dict[str, float]] = []
+    for scene in scenes:
+        if merged and merged[-1]["end"] - merged[-1]["start"] < min_seconds:
+            merged[-1]["end"] = scene["end"]
+        else:
+            merged.append(dict(scene))
+    if len(merged) > 1 and merged[-1]["end"] - merged[-1]["start"] < min_seconds:
+        last = merged.pop()
+        merged[-1]["end"] = last["end"]
+    return merged
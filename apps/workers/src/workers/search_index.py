@@ -0,0 +1,297 @@
+# Created automatically by Cursor AI (2026-10-18)
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, List, NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+from workers.ann import build_index
+from workers.base import CPU_POOL, IO_POOL, get_execution_pools
+from workers.config import get_settings
+from workers.db import connection
+from workers.embeddings import EMBEDDING_DIMENSIONS
+from workers.lexical import LexicalDoc
+
+logger = logging.getLogger(__name__)
+
+# Index scopes: one video's segments, or every video in a project
+VIDEO_SCOPE = "video"
+PROJECT_SCOPE = "project"
+
+_SCOPE_QUERIES = {
+    VIDEO_SCOPE: (
+        "SELECT video_id::text, text, embedding::text, start_time, end_time "
+        "FROM embeddings WHERE video_id = %s ORDER BY start_time"
+    ),
+    PROJECT_SCOPE: (
+        "SELECT e.video_id::text, e.text, e.embedding::text, e.start_time, e.end_time "
+        "FROM embeddings e JOIN videos v ON v.id = e.video_id "
+        "WHERE v.project_id = %s ORDER BY e.video_id, e.start_time"
+    ),
+}
+
+
+class ScopeKey(NamedTuple):
+    scope: str
+    id: str
+
+
+class SegmentIndex:
+    """ANN index over transcript segments, answering with time-coded hits."""
+
+    def __init__(
+        self,
+        video_ids: Sequence[str],
+        texts: Sequence[str],
+        starts: np.ndarray,
+        ends: np.ndarray,
+        vectors: np.ndarray,
+        exact_below: int,
+        nprobe: int,
+    ):
+        self.video_ids = list(video_ids)
+        self.texts = list(texts)
+        self.starts = starts
+        self.ends = ends
+        self.videos = frozenset(self.video_ids)
+        self.index = build_index(vectors, exact_below, nprobe)
+        self.loaded_at = time.monotonic()
+        # Set by SearchWorker once these videos are in the lexical index
+        self.lexical_synced = False
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    @property
+    def nbytes(self) -> int:
+        # Text is counted at one byte per character, close enough for an LRU budget
+        return self.index.nbytes + sum(len(t) for t in self.texts) + self.starts.nbytes * 2
+
+    def lexical_docs(self) -> Dict[str, List[LexicalDoc]]:
+        """The indexed segments per video, as ``LexicalIndex.sync`` takes them."""
+        docs_by_video: Dict[str, List[LexicalDoc]] = {}
+        for video_id, text, start, end in zip(
+            self.video_ids, self.texts, self.starts, self.ends
+        ):
+            docs_by_video.setdefault(video_id, []).append(
+                LexicalDoc(text, int(start), int(end))
+            )
+        return docs_by_video
+
+    def search(self, query: np.ndarray, k: int) -> List[Dict[str, Any]]:
+        """The ``k`` segments closest to ``query``, best first."""
+        if not len(self):
+            return []
+        ids, scores = self.index.search(query, k)
+        return [
+            {
+                "video_id": self.video_ids[i],
+                "text": self.texts[i],
+                "start_time": int(self.starts[i]),
+                "end_time": int(self.ends[i]),
+                "score": round(float(score), 4),
+            }
+            for i, score in zip(ids, scores)
+        ]
+
+
+class ScopeRows(NamedTuple):
+    """A scope's segments as read from the database, ready to index."""
+
+    video_ids: List[str]
+    texts: List[str]
+    starts: np.ndarray
+    ends: np.ndarray
+    vectors: np.ndarray
+
+
+def read_scope(key: ScopeKey) -> ScopeRows:
+    """IO pool entry point: read a scope's segments and their embeddings."""
+    with connection() as conn, conn.cursor() as cursor:
+        cursor.execute(_SCOPE_QUERIES[key.scope], (key.id,))
+        rows = cursor.fetchall()
+
+    vectors = np.zeros((len(rows), EMBEDDING_DIMENSIONS), dtype=np.float32)
+    for i, row in enumerate(rows):
+        # pgvector's text form is "[x,y,...]"
+        vectors[i] = np.fromstring(row[2][1:-1], sep=",", dtype=np.float32)
+    return ScopeRows(
+        [row[0] for row in rows],
+        [row[1] for row in rows],
+        np.array([row[3] for row in rows], dtype=np.int32),
+        np.array([row[4] for row in rows], dtype=np.int32),
+        vectors,
+    )
+
+
+def build_segment_index(rows: ScopeRows, exact_below: int, nprobe: int) -> SegmentIndex:
+    """CPU pool entry point: index a scope's segments, training IVF-PQ if it is large."""
+    return SegmentIndex(*rows, exact_below, nprobe)
+
+
+async def load_index(key: ScopeKey, exact_below: int, nprobe: int) -> SegmentIndex:
+    """Read a scope on the IO pool, then index it on the CPU pool.
+
+    Training the IVF-PQ quantizers is seconds of k-means; on the IO pool
+    it would hold the GIL against every other I/O call in the process.
+    """
+    pools = get_execution_pools()
+    rows = await pools.run(IO_POOL, read_scope, key)
+    return await pools.run(CPU_POOL, build_segment_index, rows, exact_below, nprobe)
+
+
+class SearchIndexCache:
+    """In-memory segment indexes, loaded on first query and evicted LRU.
+
+    The cache is bounded by the indexes' approximate size. Entries older than
+    ``ttl`` are reloaded, which bounds how stale another replica's view of a
+    re-indexed video can get; re-indexing on this replica drops them at once.
+    Concurrent queries for a scope that is not loaded yet share one load.
+
+    Every invalidation bumps a generation counter and records it against
+    the video. A load that started before a later invalidation of one of
+    its videos still answers the queries waiting on it, but is not kept.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float, exact_below: int, nprobe: int):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.exact_below = exact_below
+        self.nprobe = nprobe
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._indexes: "OrderedDict[ScopeKey, SegmentIndex]" = OrderedDict()
+        self._loading: Dict[ScopeKey, "asyncio.Future[SegmentIndex]"] = {}
+        self._pending = 0
+        self._generation = 0
+        self._invalidated: Dict[str, int] = {}
+
+    async def get(self, scope: str, scope_id: str) -> SegmentIndex:
+        """The index for a video or project, loading it if needed."""
+        if scope not in _SCOPE_QUERIES:
+            raise ValueError(f"Unknown search scope: {scope}")
+        key = ScopeKey(scope, scope_id)
+        index = self._indexes.get(key)
+        if index is not None and time.monotonic() - index.loaded_at < self.ttl:
+            self._indexes.move_to_end(key)
+            self.hits += 1
+            return index
+
+        loading = self._loading.get(key)
+        if loading is not None:
+            return await asyncio.shield(loading)
+
+        self.misses += 1
+        started = self._generation
+        loading = asyncio.ensure_future(load_index(key, self.exact_below, self.nprobe))
+        self._loading[key] = loading
+        self._pending += 1
+        try:
+            index = await asyncio.shield(loading)
+            if self._invalidated_since(started, key, index):
+                logger.info(f"Discarded {scope} search index {scope_id}: invalidated while loading")
+            else:
+                logger.info(f"Loaded {scope} search index {scope_id}: {len(index)} segments")
+                self._put(key, index)
+        finally:
+            if self._loading.get(key) is loading:
+                del self._loading[key]
+            self._pending -= 1
+            if not self._pending:
+                # No load can predate what is recorded so far
+                self._invalidated.clear()
+        return index
+
+    def _invalidated_since(self, generation: int, key: ScopeKey, index: SegmentIndex) -> bool:
+        videos = set(index.videos)
+        if key.scope == VIDEO_SCOPE:
+            videos.add(key.id)
+        return any(self._invalidated.get(video, 0) > generation for video in videos)
+
+    def _put(self, key: ScopeKey, index: SegmentIndex) -> None:
+        self._indexes.pop(key, None)
+        self._indexes[key] = index
+        while self.used_bytes > self.max_bytes and len(self._indexes) > 1:
+            self._indexes.popitem(last=False)
+            self.evictions += 1
+
+    @property
+    def used_bytes(self) -> int:
+        return sum(index.nbytes for index in self._indexes.values())
+
+    def invalidate_video(self, video_id: str) -> None:
+        """Drop every index that contains ``video_id``'s segments.
+
+        Loads already in flight are not kept once they finish, and a load
+        of the video itself is detached so the next query starts afresh.
+        """
+        self._generation += 1
+        if self._pending:
+            self._invalidated[video_id] = self._generation
+        self._loading.pop(ScopeKey(VIDEO_SCOPE, video_id), None)
+        stale = [
+            key
+            for key, index in self._indexes.items()
+            if key == (VIDEO_SCOPE, video_id) or video_id in index.videos
+        ]
+        for key in stale:
+            del self._indexes[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "indexes": len(self._indexes),
+            "bytes": self.used_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+def reciprocal_rank_fusion(
+    rankings: Dict[str, Sequence[Dict[str, Any]]], k: int = 60
+) -> List[Dict[str, Any]]:
+    """Merge ranked hit lists, scoring each hit by the sum of ``1 / (k + rank)``.
+
+    Only ranks are used, so BM25 and cosine scores never have to be put on
+    one scale. Hits for the same window (video and start time) are merged;
+    ``ranks`` records where each source placed them.
+    """
+    fused: Dict[Tuple[str, int], Dict[str, Any]] = {}
+    for source, ranking in rankings.items():
+        for rank, hit in enumerate(ranking, 1):
+            key = (hit["video_id"], hit["start_time"])
+            entry = fused.get(key)
+            if entry is None:
+                entry = fused[key] = {**hit, "score": 0.0, "ranks": {}}
+            entry["score"] += 1.0 / (k + rank)
+            entry["ranks"][source] = rank
+    hits = sorted(fused.values(), key=lambda hit: -hit["score"])
+    for hit in hits:
+        hit["score"] = round(hit["score"], 6)
+    return hits
+
+
+def scope_of(data: Dict[str, Any]) -> Tuple[str, str]:
+    """The scope a query names: ``project_id`` if given, else ``video_id``."""
+    if data.get("project_id"):
+        return PROJECT_SCOPE, str(data["project_id"])
+    if data.get("video_id"):
+        return VIDEO_SCOPE, str(data["video_id"])
+    raise ValueError("Missing video_id or project_id")
+
+
+@lru_cache()
+def get_search_indexes() -> SearchIndexCache:
+    """Get the process-wide search index cache."""
+    settings = get_settings()
+    return SearchIndexCache(
+        settings.search_index_max_bytes,
+        settings.search_index_ttl,
+        settings.search_index_exact_below,
+        settings.search_index_nprobe,
+    )
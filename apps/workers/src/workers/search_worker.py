@@ -1,16 +1,69 @@
 # Created automatically by Cursor AI (2024-12-19)
 
+import asyncio
 import logging
-from typing import Any, Dict, Optional
+import time
+from typing import Any, Dict, List, Optional, Set
 
-from workers.base import BaseWorker
+import numpy as np
+
+from workers.base import (
+    CPU_POOL,
+    IO_POOL,
+    QUERY_POOL,
+    TRANSIENT_ERRORS,
+    BaseWorker,
+    get_execution_pools,
+)
+from workers.config import get_settings
+from workers.embedding_cache import get_embedding_cache
+from workers.embeddings import (
+    chunk_transcript,
+    encode_texts,
+    store_embeddings,
+    warm_up_encoder,
+)
+from workers.lexical import get_lexical_index, index_chunks
+from workers.search_index import (
+    SegmentIndex,
+    get_search_indexes,
+    reciprocal_rank_fusion,
+    scope_of,
+)
 
 logger = logging.getLogger(__name__)
 
+# Request/reply subject for semantic queries over indexed videos
+QUERY_SUBJECT = "media.search.query"
+MAX_HITS = 100
+SEARCH_MODES = ("hybrid", "vector", "lexical")
+# Hits taken from each ranking before fusion
+FUSION_CANDIDATES = 50
+
 
 class SearchWorker(BaseWorker):
     """Worker for semantic search and embeddings."""
 
+    def __init__(self, nats_client):
+        super().__init__(nats_client)
+        settings = get_settings()
+        self.model_name = settings.embedding_model
+        self.device = settings.embedding_device
+        self.window_words = settings.embedding_window_words
+        self.overlap_words = settings.embedding_overlap_words
+        self.batch_tokens = settings.embedding_batch_tokens
+        self.max_batch = settings.embedding_max_batch
+        self.cache_enabled = settings.embedding_cache_enabled
+        self.rrf_k = settings.search_rrf_k
+        self.query_subscription = None
+        self._queries: Set["asyncio.Task[None]"] = set()
+
+        # Queries are encoded on their own pool so they never wait behind
+        # a bulk indexing batch on the CPU pool
+        get_execution_pools().add_initializer(
+            QUERY_POOL, warm_up_encoder, self.model_name, self.device
+        )
+
     @property
     def subject(self) -> str:
         return "media.search"
@@ -19,30 +72,178 @@ class SearchWorker(BaseWorker):
     def worker_name(self) -> str:
         return "SearchWorker"
 
+    async def start(self) -> None:
+        """Answer queries alongside the indexing jobs."""
+        # A queue group so each query is answered by one replica
+        self.query_subscription = await self.nats_client.subscribe(
+            QUERY_SUBJECT, self._query_handler, queue=self.worker_name
+        )
+        await super().start()
+
+    async def stop(self) -> None:
+        if self.query_subscription:
+            await self.query_subscription.drain()
+            self.query_subscription = None
+        await super().stop()
+
     async def process_message(self, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Process search indexing request."""
         try:
             video_id = data.get("video_id")
-            transcript = data.get("transcript")
-            
-            if not video_id or not transcript:
+            transcript = await self.resolve_transcript(data.get("transcript"))
+
+            if not video_id or transcript is None:
                 raise ValueError("Missing video_id or transcript")
-            
+
             logger.info(f"Starting search indexing for video {video_id}")
-            
-            # TODO: Implement semantic search using SBERT and pgvector
-            # TODO: Generate embeddings for transcript segments
-            
+
+            with self.span("chunk"):
+                chunks = chunk_transcript(transcript, self.window_words, self.overlap_words)
+
+            texts = [chunk.text for chunk in chunks]
+            encoded = 0
+
+            async def encode(batch: List[str]) -> np.ndarray:
+                nonlocal encoded
+                encoded += len(batch)
+                return await self.run_in_pool(
+                    CPU_POOL,
+                    encode_texts,
+                    batch,
+                    self.model_name,
+                    self.device,
+                    self.batch_tokens,
+                    self.max_batch,
+                )
+
+            if self.cache_enabled:
+                vectors = await get_embedding_cache().embed(self.model_name, texts, encode)
+            else:
+                vectors = await encode(texts)
+
+            with self.span("bulk_load"):
+                count = await self.run_in_pool(IO_POOL, store_embeddings, video_id, chunks, vectors)
+            with self.span("lexical_index"):
+                await self.run_in_pool(IO_POOL, index_chunks, video_id, chunks)
+            get_search_indexes().invalidate_video(video_id)
+
             result = {
                 "video_id": video_id,
-                "embeddings_count": 100,
+                "embeddings_count": count,
+                "encoded_count": encoded,
+                "model": self.model_name,
                 "status": "completed",
             }
-            
-            logger.info(f"Completed search indexing for video {video_id}")
+
+            logger.info(
+                f"Completed search indexing for video {video_id}: "
+                f"{count} chunks, {encoded} encoded"
+            )
             return result
-            
+
+        except TRANSIENT_ERRORS:
+            raise
         except Exception as e:
             logger.error(f"Error in search indexing: {e}")
             await self.publish_error(str(e), data)
             return None
+
+    async def _query_handler(self, msg) -> None:
+        # Answer concurrently; the subscription delivers one message at a time
+        task = asyncio.create_task(self._answer_query(msg))
+        self._queries.add(task)
+        task.add_done_callback(self._queries.discard)
+
+    async def _answer_query(self, msg) -> None:
+        started = time.perf_counter()
+        try:
+            response = await self.search(self.nats_client.decode(msg))
+        except Exception as e:
+            logger.error(f"Error in search query: {e}")
+            response = {"error": str(e)}
+        response["took_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        try:
+            await self.nats_client.respond(msg, response)
+        except Exception as e:
+            logger.error(f"Error answering search query: {e}")
+
+    async def search(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Segments matching ``data["query"]``.
+
+        The query names a ``video_id`` or a ``project_id``; ``k`` (default 10)
+        bounds the hits, which carry the segment's text, video and times.
+        ``mode`` is ``hybrid`` (default: BM25 and vector hits merged by
+        reciprocal rank fusion), ``vector`` or ``lexical``.
+        """
+        query = data.get("query")
+        if not query:
+            raise ValueError("Missing query")
+        scope, scope_id = scope_of(data)
+        k = max(1, min(int(data.get("k", 10)), MAX_HITS))
+        mode = data.get("mode", "hybrid")
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode: {mode}")
+
+        # Encode the query while the index loads, if it is not loaded yet
+        index_loading = self._scope_index(scope, scope_id, lexical=mode != "vector")
+        if mode == "lexical":
+            index = await index_loading
+        else:
+            vectors, index = await asyncio.gather(
+                self.run_in_pool(
+                    QUERY_POOL,
+                    encode_texts,
+                    [query],
+                    self.model_name,
+                    self.device,
+                    self.batch_tokens,
+                    self.max_batch,
+                ),
+                index_loading,
+            )
+
+        if mode == "vector":
+            hits = index.search(vectors[0], k)
+        else:
+            candidates = k if mode == "lexical" else max(k, FUSION_CANDIDATES)
+            lexical_hits = await self.run_in_pool(
+                IO_POOL, get_lexical_index().search, query, candidates, index.videos
+            )
+            if mode == "lexical":
+                hits = lexical_hits
+            else:
+                hits = reciprocal_rank_fusion(
+                    {"vector": index.search(vectors[0], candidates), "lexical": lexical_hits},
+                    self.rrf_k,
+                )[:k]
+        return {
+            "query": query,
+            "scope": scope,
+            "scope_id": scope_id,
+            "mode": mode,
+            "hits": hits,
+        }
+
+    async def _scope_index(self, scope: str, scope_id: str, lexical: bool) -> SegmentIndex:
+        """The scope's segment index; with ``lexical``, its videos are synced first.
+
+        Videos indexed by another replica, or re-indexed since, reach this
+        replica's lexical index here, once per loaded index.
+        """
+        index = await get_search_indexes().get(scope, scope_id)
+        if lexical and not index.lexical_synced:
+            with self.span("lexical_sync"):
+                await self.run_in_pool(
+                    IO_POOL, get_lexical_index().sync, index.lexical_docs()
+                )
+            index.lexical_synced = True
+        return index
+
+    def stats(self) -> Dict[str, Any]:
+        """Worker stats plus embedding cache and search index counters."""
+        stats = super().stats()
+        if self.cache_enabled:
+            stats["embedding_cache"] = get_embedding_cache().stats()
+        stats["search_indexes"] = get_search_indexes().stats()
+        stats["lexical_index"] = get_lexical_index().stats()
+        return stats
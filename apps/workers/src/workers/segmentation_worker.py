@@ -1,9 +1,18 @@
 # Created automatically by Cursor AI (2024-12-19)
 
 import logging
-from typing import Any, Dict, Optional
+from itertools import islice
+from typing import Any, Dict, List, Optional
 
-from workers.base import BaseWorker
+import numpy as np
+
+from workers.base import CPU_POOL, TRANSIENT_ERRORS, BaseWorker
+from workers.config import get_settings
+from workers.embedding_cache import get_embedding_cache
+from workers.embeddings import encode_texts
+from workers.scenes import detect_scenes, merge_scenes, scenes_from_cuts
+from workers.topics import TopicBoundary, TopicSegmenter, fuse_chapters, topic_windows
+from workers.transcript import Transcript
 
 logger = logging.getLogger(__name__)
 
@@ -11,6 +20,17 @@ logger = logging.getLogger(__name__)
 class SegmentationWorker(BaseWorker):
     """Worker for video segmentation and chapter detection."""
 
+    cache_file_fields = ("video_path",)
+
+    def __init__(self, nats_client):
+        super().__init__(nats_client)
+        settings = get_settings()
+        self.model_name = settings.embedding_model
+        self.device = settings.embedding_device
+        self.batch_tokens = settings.embedding_batch_tokens
+        self.max_batch = settings.embedding_max_batch
+        self.cache_enabled = settings.embedding_cache_enabled
+
     @property
     def subject(self) -> str:
         return "media.segmentation"
@@ -19,52 +39,114 @@ class SegmentationWorker(BaseWorker):
     def worker_name(self) -> str:
         return "SegmentationWorker"
 
+    @property
+    def cache_version(self) -> Optional[str]:
+        settings = get_settings()
+        return (
+            f"scenes:1:{settings.scene_sample_stride}:{settings.scene_frame_width}x"
+            f"{settings.scene_frame_height}:{settings.scene_threshold}:"
+            f"{settings.scene_min_seconds}:texttiling:1:{self.model_name}:"
+            f"{settings.topic_window_words}:{settings.topic_stride_words}:"
+            f"{settings.topic_cutoff}:{settings.chapter_min_seconds}:"
+            f"{settings.chapter_snap_seconds}"
+        )
+
     async def process_message(self, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Process segmentation request."""
         try:
             video_id = data.get("video_id")
             video_path = data.get("video_path")
-            transcript = data.get("transcript")
+            transcript = await self.resolve_transcript(data.get("transcript"))
             
             if not video_id or not video_path:
                 raise ValueError("Missing video_id or video_path")
             
             logger.info(f"Starting segmentation for video {video_id}")
             
-            # TODO: Implement scene detection using PySceneDetect
-            # TODO: Implement semantic segmentation using SBERT
-            # For now, return placeholder result
+            settings = get_settings()
+            with self.span("scene_cuts"):
+                detected = await self.run_in_pool(
+                    CPU_POOL,
+                    detect_scenes,
+                    video_path,
+                    settings.scene_sample_stride,
+                    settings.scene_frame_width,
+                    settings.scene_frame_height,
+                    settings.scene_threshold,
+                    settings.scene_min_seconds,
+                    settings.scene_batch_frames,
+                )
+            scenes = scenes_from_cuts(detected["cuts"], detected["duration"])
+
+            if transcript is not None and len(transcript) > settings.topic_window_words:
+                with self.span("topics"):
+                    boundaries = await self.topic_boundaries(transcript)
+                chapters = fuse_chapters(
+                    boundaries,
+                    detected["cuts"],
+                    max(detected["duration"], transcript.duration),
+                    settings.chapter_snap_seconds,
+                    settings.chapter_min_seconds,
+                )
+            else:
+                # Too little speech to find topics in: group the scenes
+                chapters = merge_scenes(scenes, settings.chapter_min_seconds)
             chapters = [
-                {
-                    "title": "Introduction",
-                    "start": 0,
-                    "end": 300,
-                    "confidence": 0.9,
-                },
-                {
-                    "title": "Main Content",
-                    "start": 300,
-                    "end": 1800,
-                    "confidence": 0.8,
-                },
-                {
-                    "title": "Conclusion",
-                    "start": 1800,
-                    "end": 2100,
-                    "confidence": 0.9,
-                },
+                {"title": f"Chapter {i}", **chapter} for i, chapter in enumerate(chapters, 1)
             ]
             
             result = {
                 "video_id": video_id,
                 "chapters": chapters,
+                "scenes": scenes,
+                "scene_cuts": detected["cuts"],
                 "status": "completed",
             }
             
-            logger.info(f"Completed segmentation for video {video_id}")
+            logger.info(
+                f"Completed segmentation for video {video_id}: "
+                f"{len(scenes)} scenes, {len(chapters)} chapters"
+            )
             return result
             
+        except TRANSIENT_ERRORS:
+            raise
         except Exception as e:
             logger.error(f"Error in segmentation processing: {e}")
             await self.publish_error(str(e), data)
             return None
+
+    async def topic_boundaries(self, transcript: Transcript) -> List[TopicBoundary]:
+        """Topic shifts in a transcript, embedding its windows a page at a time.
+
+        Only one page of windows and their vectors is held at once, so a
+        four-hour transcript needs no more memory than a short one beyond a
+        float per gap.
+        """
+        settings = get_settings()
+        segmenter = TopicSegmenter(
+            settings.topic_window_words, settings.topic_stride_words, cutoff=settings.topic_cutoff
+        )
+        windows = topic_windows(transcript, settings.topic_window_words, settings.topic_stride_words)
+
+        async def encode(batch: List[str]) -> np.ndarray:
+            return await self.run_in_pool(
+                CPU_POOL,
+                encode_texts,
+                batch,
+                self.model_name,
+                self.device,
+                self.batch_tokens,
+                self.max_batch,
+            )
+
+        while True:
+            texts = [window.text for window in islice(windows, settings.topic_batch_windows)]
+            if not texts:
+                break
+            if self.cache_enabled:
+                vectors = await get_embedding_cache().embed(self.model_name, texts, encode)
+            else:
+                vectors = await encode(texts)
+            segmenter.push(vectors)
+        return segmenter.boundaries(transcript.starts, settings.chapter_min_seconds)
@@ -0,0 +1,136 @@
+# Created automatically by Cursor AI (2026-10-18)
+
+import re
+from typing import Any, Dict, List, Optional, Sequence
+
+Word = Dict[str, Any]
+
+# Words ending this close to a boundary are treated as already emitted.
+BOUNDARY_TOLERANCE = 0.02
+
+
+def extract_words(segments: List[Dict[str, Any]], offset: float = 0.0) -> List[Word]:
+    """Flatten aligned WhisperX segments into word dicts, shifted by ``offset``.
+
+    Words the aligner could not time (no ``start``/``end``) are skipped.
+    """
+    words = []
+    for segment in segments:
+        for word in segment.get("words", []):
+            if "start" not in word or "end" not in word:
+                continue
+            words.append({
+                "text": word["word"],
+                "start": word["start"] + offset,
+                "end": word["end"] + offset,
+                "confidence": word.get("score", 0.0),
+            })
+    return words
+
+
+def shift_segments(segments: List[Dict[str, Any]], offset: float) -> List[Dict[str, Any]]:
+    """Return copies of ``segments`` (and their words) moved by ``offset`` seconds."""
+    if not offset:
+        return segments
+    shifted = []
+    for segment in segments:
+        segment = dict(segment)
+        for field in ("start", "end"):
+            if segment.get(field) is not None:
+                segment[field] = segment[field] + offset
+        if "words" in segment:
+            segment["words"] = [
+                {
+                    **word,
+                    **{
+                        field: word[field] + offset
+                        for field in ("start", "end")
+                        if word.get(field) is not None
+                    },
+                }
+                for word in segment["words"]
+            ]
+        shifted.append(segment)
+    return shifted
+
+
+def stitch_words(words: List[Word], emitted_until: Optional[float]) -> List[Word]:
+    """Apply boundary-stitching rules to a window's words.
+
+    - words that end at or before ``emitted_until`` were already emitted by the
+      previous window and are dropped;
+    - a word that starts before ``emitted_until`` is clamped to start there, so
+      the merged timeline stays monotonic.
+
+    ``emitted_until`` is None for the first window.
+    """
+    if emitted_until is None:
+        return list(words)
+    stitched = []
+    for word in words:
+        if word["end"] <= emitted_until + BOUNDARY_TOLERANCE:
+            continue
+        if word["start"] < emitted_until:
+            word = {**word, "start": emitted_until}
+        stitched.append(word)
+    return stitched
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"[^\w']+", "", text.lower())
+
+
+def _center(item: Dict[str, Any]) -> float:
+    return (item["start"] + item["end"]) / 2
+
+
+def merge_shards(shards: Sequence[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """Merge transcripts of overlapping shards into one timeline.
+
+    Each shard is ``{"start", "end", "words", "segments"}`` with all times
+    already on the global timeline. Between two neighbours the overlap is cut
+    at its midpoint, and a shard contributes the words whose centre lies
+    before its cut, so each spoken word comes from the shard where it sits
+    furthest from an edge. The next shard resumes after the last word already
+    taken rather than exactly at the cut, so a word whose copies land on
+    opposite sides of the cut is neither lost nor doubled; if the same word
+    still appears twice at the junction the later copy is dropped. Finally
+    ``stitch_words`` keeps the timeline monotonic.
+
+    The result depends only on the shard contents, not on the order shards
+    finished in.
+    """
+    ordered = sorted(shards, key=lambda shard: (shard["start"], shard["end"]))
+    cuts = [
+        (following["start"] + current["end"]) / 2
+        if following["start"] < current["end"]
+        else following["start"]
+        for current, following in zip(ordered, ordered[1:])
+    ]
+    bounds = list(zip([float("-inf")] + cuts, cuts + [float("inf")]))
+
+    words: List[Word] = []
+    segments: List[Dict[str, Any]] = []
+    emitted_until: Optional[float] = None
+    for shard, (lower, upper) in zip(ordered, bounds):
+        resume = _center(words[-1]) if words else float("-inf")
+        kept = [w for w in shard["words"] if resume < _center(w) < upper]
+        if words and kept:
+            last, first = words[-1], kept[0]
+            if (
+                _normalize(last["text"]) == _normalize(first["text"])
+                and first["start"] < last["end"]
+            ):
+                kept = kept[1:]
+        kept = stitch_words(kept, emitted_until)
+        if kept:
+            emitted_until = kept[-1]["end"]
+        words.extend(kept)
+        segments.extend(
+            s for s in shard.get("segments", [])
+            if s.get("start") is not None
+            and s.get("end") is not None
+            and lower <= _center(s) < upper
+        )
+
+    return {"words": words, "segments": segments}
@@ -0,0 +1,309 @@
+# Created automatically by Cursor AI (2026-10-18)
+
+import asyncio
+import logging
+import re
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from workers.base import CPU_POOL, get_execution_pools
+from workers.config import get_settings
+from workers.lexical import tokenize
+from workers.llm import get_llm_client
+from workers.result_cache import ResultCache
+from workers.transcript import Transcript
+
+logger = logging.getLogger(__name__)
+
+# Result cache stage for section and intermediate summaries; they do not
+# depend on the requested summary type, so every type shares them
+SECTION_STAGE = "summarization.section"
+SECTION_STYLE = "section"
+
+# Target length in words of the final summary, per requested type
+SUMMARY_WORDS = {"executive": 150, "detailed": 600, "bullets": 200}
+
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")
+# Unpunctuated ASR runs are cut into pseudo-sentences of this many words
+MAX_SENTENCE_WORDS = 40
+
+STOPWORDS = frozenset(
+    "a about all also an and any are as at be because been but by can could did do does for "
+    "from had has have he her here him his how i if in into is it its just like me more my "
+    "no not now of on one only or our out over really she so some than that the their them "
+    "then there these they this those to uh um up us very was we were what when where which "
+    "who will with would yeah you your".split()
+)
+
+
+def split_sentences(text: str) -> List[str]:
+    """Sentences of ``text``, with overlong ones cut into shorter runs."""
+    sentences = []
+    for part in _SENTENCE_BOUNDARY.split(text.strip()):
+        words = part.split()
+        for i in range(0, len(words), MAX_SENTENCE_WORDS):
+            sentences.append(" ".join(words[i:i + MAX_SENTENCE_WORDS]))
+    return sentences
+
+
+def textrank(
+    sentences: Sequence[str], damping: float = 0.85, iterations: int = 50, tolerance: float = 1e-6
+) -> np.ndarray:
+    """TextRank centrality of each sentence.
+
+    Sentences are linked by content-word overlap normalized by their
+    lengths (Mihalcea & Tarau, 2004), and scored by PageRank over that graph.
+    """
+    n = len(sentences)
+    if n == 0:
+        return np.zeros(0)
+    vocabulary: Dict[str, int] = {}
+    rows, cols = [], []
+    for i, sentence in enumerate(sentences):
+        for term in set(tokenize(sentence)) - STOPWORDS:
+            rows.append(i)
+            cols.append(vocabulary.setdefault(term, len(vocabulary)))
+    terms = np.zeros((n, max(len(vocabulary), 1)), dtype=np.float32)
+    terms[rows, cols] = 1.0
+
+    lengths = np.log(terms.sum(axis=1) + 1.0)
+    overlap = terms @ terms.T
+    np.fill_diagonal(overlap, 0.0)
+    similarity = overlap / np.maximum(lengths[:, None] + lengths[None, :], 1e-9)
+
+    out = similarity.sum(axis=1)
+    transition = similarity / np.where(out > 0, out, 1.0)[:, None]
+    dangling = out == 0
+    scores = np.full(n, 1.0 / n)
+    for _ in range(iterations):
+        # Sentences sharing no words with any other spread their rank evenly
+        updated = (1 - damping) / n + damping * (transition.T @ scores + scores[dangling].sum() / n)
+        converged = np.abs(updated - scores).sum() < tolerance
+        scores = updated
+        if converged:
+            break
+    return scores
+
+
+def extract_summary(text: str, style: str, max_words: int) -> str:
+    """Extractive summary: the most central sentences within ``max_words``.
+
+    Sentences keep their original order. The ``bullets`` style returns one
+    ``- `` line per sentence; every other style returns prose. Runs in the
+    CPU pool.
+    """
+    sentences = split_sentences(text)
+    if not sentences:
+        return ""
+    scores = textrank(sentences)
+    chosen: List[int] = []
+    used = 0
+    for i in np.argsort(-scores, kind="stable"):
+        words = len(sentences[i].split())
+        if chosen and used + words > max_words:
+            continue
+        chosen.append(int(i))
+        used += words
+        if used >= max_words:
+            break
+    picked = [sentences[i] for i in sorted(chosen)]
+    if style == "bullets":
+        return "\n".join(f"- {sentence}" for sentence in picked)
+    return " ".join(picked)
+
+
+class SummaryBackend(ABC):
+    """Turns text into a summary of a given style and length."""
+
+    @property
+    @abstractmethod
+    def version(self) -> str:
+        """Names the model or algorithm; part of every cache key."""
+
+    @abstractmethod
+    async def summarize(self, text: str, style: str, max_words: int) -> str:
+        """Summarize ``text`` in about ``max_words`` words.
+
+        ``style`` is ``section`` for the map and intermediate reduce passes,
+        otherwise the requested summary type.
+        """
+
+
+class ExtractiveBackend(SummaryBackend):
+    """Local TextRank backend: deterministic, offline, and free."""
+
+    @property
+    def version(self) -> str:
+        return "textrank:1"
+
+    async def summarize(self, text: str, style: str, max_words: int) -> str:
+        return await get_execution_pools().run(CPU_POOL, extract_summary, text, style, max_words)
+
+
+# Instructions per style; they lead every prompt, so the provider's
+# prompt cache serves them after the first call
+_INSTRUCTIONS = {
+    SECTION_STYLE: (
+        "Summarize this part of a video transcript in at most {words} words. Keep names, "
+        "numbers and decisions. Reply with the summary only."
+    ),
+    "executive": (
+        "These are summaries of consecutive parts of one video. Write an executive summary "
+        "of the whole video in at most {words} words. Reply with the summary only."
+    ),
+    "detailed": (
+        "These are summaries of consecutive parts of one video. Write a detailed summary of "
+        "the whole video in at most {words} words, following its order. Reply with the "
+        "summary only."
+    ),
+    "bullets": (
+        "These are summaries of consecutive parts of one video. List its key points as "
+        "bullets starting with \"- \", at most {words} words in all. Reply with the list only."
+    ),
+}
+
+
+class LLMBackend(SummaryBackend):
+    """Abstractive backend on the shared LLM client."""
+
+    def __init__(self, provider: Optional[str] = None, model: Optional[str] = None):
+        settings = get_settings()
+        self.provider = provider or settings.llm_provider
+        self.model = model or getattr(settings, f"{self.provider}_model")
+
+    @property
+    def version(self) -> str:
+        return f"llm:{self.provider}:{self.model}:1"
+
+    async def summarize(self, text: str, style: str, max_words: int) -> str:
+        response = await get_llm_client().complete(
+            text,
+            prefix=_INSTRUCTIONS[style].format(words=max_words),
+            # About 1.3 tokens a word, with room to spare
+            max_tokens=2 * max_words,
+            provider=self.provider,
+            model=self.model,
+        )
+        return response.text.strip()
+
+
+# Backends selectable with SUMMARIZATION_BACKEND
+BACKENDS = {"extractive": ExtractiveBackend, "llm": LLMBackend}
+
+
+def plan_sections(
+    transcript: Transcript,
+    max_words: int,
+    chapters: Optional[Sequence[Dict[str, Any]]] = None,
+) -> List[Transcript]:
+    """Cut a transcript into sections of at most ``max_words`` words.
+
+    Chapters (``start``/``end`` dicts) are kept apart when given. Sections
+    are packed from whole transcript segments where they fit.
+    """
+    parts = [transcript.slice(c["start"], c["end"]) for c in chapters] if chapters else [transcript]
+    sections = []
+    for part in parts:
+        lo = hi = 0
+        for r in part.segment_ranges():
+            if r.stop - lo > max_words and hi > lo:
+                sections.append(part[lo:hi])
+                lo = hi
+            while r.stop - lo > max_words:
+                sections.append(part[lo:lo + max_words])
+                lo += max_words
+            hi = r.stop
+        if hi > lo:
+            sections.append(part[lo:hi])
+    return sections
+
+
+class MapReduceSummarizer:
+    """Hierarchical map-reduce summarization over a pluggable backend.
+
+    The map pass summarizes every section concurrently. Reduce passes then
+    summarize groups of ``fan_in`` consecutive summaries until they fit in
+    one section, and a last call writes the requested summary type, so
+    latency grows with the tree's depth rather than the transcript's
+    length. At most ``concurrency`` backend calls run at once.
+
+    Section and intermediate summaries do not depend on the summary type and
+    are kept in the result cache, so asking for another type of an already
+    summarized video costs one backend call.
+    """
+
+    def __init__(
+        self,
+        backend: SummaryBackend,
+        cache: Optional[ResultCache],
+        section_words: int = 1500,
+        section_summary_words: int = 150,
+        fan_in: int = 8,
+        concurrency: int = 8,
+    ):
+        self.backend = backend
+        self.cache = cache
+        self.section_words = section_words
+        self.section_summary_words = section_summary_words
+        self.fan_in = max(2, fan_in)
+        self._slots = asyncio.Semaphore(concurrency)
+
+    async def summarize(
+        self,
+        transcript: Transcript,
+        summary_type: str,
+        chapters: Optional[Sequence[Dict[str, Any]]] = None,
+    ) -> Dict[str, Any]:
+        """Summary of ``transcript`` plus the per-section summaries."""
+        if summary_type not in SUMMARY_WORDS:
+            raise ValueError(f"Unknown summary type: {summary_type}")
+        sections = [s for s in plan_sections(transcript, self.section_words, chapters) if len(s)]
+        summaries = await asyncio.gather(
+            *(self._section_summary(s.join()) for s in sections)
+        )
+        section_results = [
+            {"start": float(s.starts[0]), "end": float(s.ends[-1]), "summary": summary}
+            for s, summary in zip(sections, summaries)
+        ]
+
+        levels = 1
+        level = [s for s in summaries if s]
+        while len(level) > 1 and sum(len(s.split()) for s in level) > self.section_words:
+            groups = [level[i:i + self.fan_in] for i in range(0, len(level), self.fan_in)]
+            level = list(await asyncio.gather(
+                *(self._section_summary("\n".join(group)) for group in groups)
+            ))
+            levels += 1
+
+        content = ""
+        if level:
+            async with self._slots:
+                content = await self.backend.summarize(
+                    "\n".join(level), summary_type, SUMMARY_WORDS[summary_type]
+                )
+        return {"content": content, "sections": section_results, "levels": levels}
+
+    async def _section_summary(self, text: str) -> str:
+        async def compute() -> Dict[str, Any]:
+            async with self._slots:
+                summary = await self.backend.summarize(text, SECTION_STYLE, self.section_summary_words)
+            return {"summary": summary}
+
+        if self.cache is None:
+            return (await compute())["summary"]
+        params = {"text": text, "max_words": self.section_summary_words}
+        key = await self.cache.key_for(SECTION_STAGE, self.backend.version, params)
+        value = await self.cache.get_or_compute(SECTION_STAGE, key, compute)
+        return value["summary"]
+
+
+@lru_cache()
+def get_summary_backend() -> SummaryBackend:
+    """Get the process-wide summary backend named by the settings."""
+    name = get_settings().summarization_backend
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown summarization backend: {name}")
+    return BACKENDS[name]()
@@ -3,7 +3,11 @@
 import logging
 from typing import Any, Dict, Optional
 
-from workers.base import BaseWorker
+from workers.base import TRANSIENT_ERRORS, BaseWorker
+from workers.config import get_settings
+from workers.llm import charge_to
+from workers.result_cache import get_result_cache
+from workers.summarization import SECTION_STAGE, MapReduceSummarizer, get_summary_backend
 
 logger = logging.getLogger(__name__)
 
@@ -11,6 +15,18 @@ logger = logging.getLogger(__name__)
 class SummarizationWorker(BaseWorker):
     """Worker for generating video summaries."""
 
+    def __init__(self, nats_client):
+        super().__init__(nats_client)
+        settings = get_settings()
+        self.summarizer = MapReduceSummarizer(
+            get_summary_backend(),
+            get_result_cache() if settings.result_cache_enabled else None,
+            section_words=settings.summarization_section_words,
+            section_summary_words=settings.summarization_section_summary_words,
+            fan_in=settings.summarization_fan_in,
+            concurrency=settings.summarization_concurrency,
+        )
+
     @property
     def subject(self) -> str:
         return "media.summarization"
@@ -19,32 +35,53 @@ class SummarizationWorker(BaseWorker):
     def worker_name(self) -> str:
         return "SummarizationWorker"
 
+    @property
+    def cache_version(self) -> Optional[str]:
+        return f"mapreduce:1:{self.summarizer.backend.version}"
+
     async def process_message(self, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Process summarization request."""
         try:
             video_id = data.get("video_id")
-            transcript = data.get("transcript")
+            transcript = await self.resolve_transcript(data.get("transcript"))
             summary_type = data.get("type", "executive")
-            
-            if not video_id or not transcript:
+
+            if not video_id or transcript is None:
                 raise ValueError("Missing video_id or transcript")
-            
+
             logger.info(f"Starting summarization for video {video_id}")
-            
-            # TODO: Implement LLM-based summarization
-            summary = f"This is a {summary_type} summary for video {video_id}."
-            
+
+            with self.span("summarize"), charge_to(video_id):
+                summary = await self.summarizer.summarize(
+                    transcript, summary_type, data.get("chapters")
+                )
+
             result = {
                 "video_id": video_id,
                 "type": summary_type,
-                "content": summary,
+                "content": summary["content"],
+                "sections": summary["sections"],
+                "levels": summary["levels"],
+                "backend": self.summarizer.backend.version,
                 "status": "completed",
             }
-            
-            logger.info(f"Completed summarization for video {video_id}")
+
+            logger.info(
+                f"Completed summarization for video {video_id}: "
+                f"{len(summary['sections'])} sections, {summary['levels']} levels"
+            )
             return result
-            
+
+        except TRANSIENT_ERRORS:
+            raise
         except Exception as e:
             logger.error(f"Error in summarization processing: {e}")
             await self.publish_error(str(e), data)
             return None
+
+    def stats(self) -> Dict[str, Any]:
+        """Worker stats plus section summary cache counters."""
+        stats = super().stats()
+        if self.summarizer.cache is not None:
+            stats["section_cache"] = self.summarizer.cache.stats(SECTION_STAGE)
+        return stats
@@ -3,7 +3,7 @@
 import logging
 from typing import Any, Dict, Optional
 
-from workers.base import BaseWorker
+from workers.base import TRANSIENT_ERRORS, BaseWorker
 
 logger = logging.getLogger(__name__)
 
@@ -24,7 +24,7 @@ class SyncWorker(BaseWorker):
         try:
             video_id = data.get("video_id")
             sync_target = data.get("target")  # youtube, notion, google_docs
-            content = data.get("content")
+            content = await self.resolve(data.get("content"))
             
             if not video_id or not sync_target or not content:
                 raise ValueError("Missing video_id, target, or content")
@@ -44,6 +44,8 @@ class SyncWorker(BaseWorker):
             logger.info(f"Completed sync to {sync_target} for video {video_id}")
             return result
             
+        except TRANSIENT_ERRORS:
+            raise
         except Exception as e:
             logger.error(f"Error in sync: {e}")
             await self.publish_error(str(e), data)
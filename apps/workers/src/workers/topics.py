@@ -0,0 +1,180 @@
+# Created automatically by Cursor AI (2026-10-18)
+
+import logging
+from typing import Any, Dict, Iterator, List, NamedTuple, Sequence
+
+import numpy as np
+
+from workers.embeddings import Chunk
+from workers.transcript import Transcript
+
+logger = logging.getLogger(__name__)
+
+
+class TopicBoundary(NamedTuple):
+    time: float
+    depth: float
+
+
+def topic_windows(transcript: Transcript, window_words: int, stride_words: int) -> Iterator[Chunk]:
+    """Windows of ``window_words`` words starting every ``stride_words`` words.
+
+    Windows near the end are cut short by the transcript's last word.
+    """
+    n = len(transcript)
+    for lo in range(0, n, stride_words):
+        hi = min(lo + window_words, n)
+        yield Chunk(transcript.join(lo, hi), float(transcript.starts[lo]), float(transcript.ends[hi - 1]))
+
+
+def depth_scores(similarities: np.ndarray) -> np.ndarray:
+    """TextTiling depth of every gap: how far it sits below the peaks around it.
+
+    From each gap, the similarity is climbed left and right while it keeps
+    rising (Hearst, 1997). A gap's climb ends at the nearest index whose
+    neighbour on that side is lower, so both peaks come from running
+    max/min over those stopping points rather than a walk per gap.
+    """
+    n = len(similarities)
+    if n == 0:
+        return np.zeros(0)
+    index = np.arange(n)
+    stops_left = np.ones(n, dtype=bool)
+    stops_left[1:] = similarities[:-1] < similarities[1:]
+    stops_right = np.ones(n, dtype=bool)
+    stops_right[:-1] = similarities[1:] < similarities[:-1]
+    left = np.maximum.accumulate(np.where(stops_left, index, 0))
+    right = np.minimum.accumulate(np.where(stops_right, index, n - 1)[::-1])[::-1]
+    return (similarities[left] - similarities) + (similarities[right] - similarities)
+
+
+class TopicSegmenter:
+    """Streaming TextTiling over embedded transcript windows.
+
+    Window ``j`` starts at word ``j * stride_words``; the gap at the start of
+    window ``j + k``, where ``k = window_words // stride_words``, is scored by
+    the cosine similarity of window ``j`` (the text just before the gap) and
+    window ``j + k`` (the text just after it). Embeddings are pushed a page at
+    a time and only the last ``k`` are kept, so memory holds one page of
+    vectors plus one float per gap, and no window is compared with more than
+    one other.
+    """
+
+    def __init__(self, window_words: int, stride_words: int, smoothing: int = 3, cutoff: float = 0.5):
+        self.window_words = window_words
+        self.stride_words = stride_words
+        self.lag = max(window_words // stride_words, 1)
+        self.smoothing = smoothing
+        self.cutoff = cutoff
+        self.windows = 0
+        self._carry = np.zeros((0, 0), dtype=np.float32)
+        self._similarities: List[np.ndarray] = []
+
+    def push(self, vectors: np.ndarray) -> None:
+        """Add the embeddings of the next windows, in order."""
+        if not len(vectors):
+            return
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.maximum(norms, 1e-12)
+        self.windows += len(vectors)
+        window = np.concatenate([self._carry, vectors]) if len(self._carry) else vectors
+        if len(window) > self.lag:
+            # Row-wise dot products of every (j, j + k) pair in one pass
+            self._similarities.append(np.einsum("ij,ij->i", window[:-self.lag], window[self.lag:]))
+        self._carry = window[-self.lag:]
+
+    @property
+    def similarities(self) -> np.ndarray:
+        """Similarity across each gap so far, smoothed by a moving average."""
+        raw = np.concatenate(self._similarities) if self._similarities else np.zeros(0, np.float32)
+        if self.smoothing <= 1 or len(raw) < self.smoothing:
+            return raw
+        kernel = np.ones(self.smoothing) / self.smoothing
+        padded = np.pad(raw, self.smoothing // 2, mode="edge")
+        return np.convolve(padded, kernel, mode="valid")[:len(raw)]
+
+    def boundaries(self, starts: np.ndarray, min_seconds: float) -> List[TopicBoundary]:
+        """Topic shifts at least ``min_seconds`` apart, at word start times.
+
+        A gap is a candidate when it is a local maximum of depth and deeper
+        than the mean of those maxima by ``cutoff`` standard deviations. Of
+        candidates closer than ``min_seconds``, one left-to-right sweep keeps
+        the deeper.
+        """
+        similarities = self.similarities
+        if len(similarities) < 3:
+            return []
+        depth = depth_scores(similarities)
+        peaks = np.zeros(len(depth), dtype=bool)
+        peaks[1:-1] = (depth[1:-1] >= depth[:-2]) & (depth[1:-1] > depth[2:])
+        if not peaks.any():
+            return []
+        valleys = depth[peaks]
+        peaks &= depth > valleys.mean() + self.cutoff * valleys.std()
+        # Each gap falls before the first word of the window after it
+        gap_words = (np.arange(len(similarities)) + self.lag) * self.stride_words
+        times = starts[gap_words].astype(np.float64)
+
+        kept: List[TopicBoundary] = []
+        for i in np.flatnonzero(peaks):
+            boundary = TopicBoundary(float(times[i]), float(depth[i]))
+            if boundary.time < min_seconds:
+                continue
+            if kept and boundary.time - kept[-1].time < min_seconds:
+                if boundary.depth > kept[-1].depth:
+                    kept[-1] = boundary
+                continue
+            kept.append(boundary)
+        return kept
+
+
+def fuse_chapters(
+    boundaries: Sequence[TopicBoundary],
+    cuts: Sequence[Dict[str, float]],
+    duration: float,
+    snap_seconds: float,
+    min_seconds: float,
+) -> List[Dict[str, Any]]:
+    """Chapters between topic boundaries, moved onto nearby scene cuts.
+
+    A boundary within ``snap_seconds`` of a cut moves to the nearest one, as
+    the picture usually changes with the subject a little before or after
+    the words do. Chapters stay at least ``min_seconds`` long, the deeper
+    boundary winning a conflict. A chapter's confidence is the depth of the
+    boundary that opens it, capped at 1.
+    """
+    cut_times = np.array([cut["time"] for cut in cuts], dtype=np.float64)
+    times = np.array([b.time for b in boundaries], dtype=np.float64)
+    scene_aligned = np.zeros(len(times), dtype=bool)
+    if len(cut_times) and len(times):
+        # The cuts on either side of each boundary
+        right = np.minimum(np.searchsorted(cut_times, times), len(cut_times) - 1)
+        left = np.maximum(right - 1, 0)
+        closer_left = np.abs(cut_times[left] - times) <= np.abs(cut_times[right] - times)
+        nearest = np.where(closer_left, cut_times[left], cut_times[right])
+        scene_aligned = np.abs(nearest - times) <= snap_seconds
+        times = np.where(scene_aligned, nearest, times)
+
+    kept: List[Dict[str, Any]] = []
+    for time, boundary, aligned in zip(times, boundaries, scene_aligned):
+        if time < min_seconds or duration - time < min_seconds:
+            continue
+        candidate = {"start": float(time), "depth": boundary.depth, "scene_cut": bool(aligned)}
+        if kept and time - kept[-1]["start"] < min_seconds:
+            if candidate["depth"] > kept[-1]["depth"]:
+                kept[-1] = candidate
+            continue
+        kept.append(candidate)
+
+    starts = [{"start": 0.0, "depth": 1.0, "scene_cut": False}] + kept
+    chapters = []
+    for i, opening in enumerate(starts):
+        end = starts[i + 1]["start"] if i + 1 < len(starts) else duration
+        chapters.append({
+            "start": opening["start"],
+            "end": float(end),
+            "confidence": round(min(opening["depth"], 1.0), 3),
+            "scene_cut": opening["scene_cut"],
+        })
+    return chapters
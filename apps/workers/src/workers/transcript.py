@@ -0,0 +1,281 @@
+# Created automatically by Cursor AI (2026-10-18)
+
+import io
+import json
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+NO_SPEAKER = -1
+
+
+class Transcript:
+    """Word-level transcript stored as parallel arrays.
+
+    Word ``i`` spans ``starts[i]``..``ends[i]`` seconds, and its text is
+    ``text_buffer[text_offsets[i]:text_offsets[i + 1]]`` (UTF-8). Speakers are
+    small integer indexes into ``speakers`` (``NO_SPEAKER`` when unknown), and
+    ``segment_offsets`` holds the index of the first word of each segment.
+
+    Words are ordered by start time. Slices share the underlying arrays and
+    text buffer with their parent, so cutting a chapter out of a multi-hour
+    transcript copies nothing.
+    """
+
+    def __init__(
+        self,
+        starts: np.ndarray,
+        ends: np.ndarray,
+        confidences: np.ndarray,
+        speaker_ids: np.ndarray,
+        text_buffer: bytes,
+        text_offsets: np.ndarray,
+        speakers: Sequence[str] = (),
+        segment_offsets: Optional[np.ndarray] = None,
+        language: Optional[str] = None,
+        confidence: float = 0.0,
+    ):
+        n = len(starts)
+        if not (len(ends) == len(confidences) == len(speaker_ids) == n):
+            raise ValueError("Word arrays must have the same length")
+        if len(text_offsets) != n + 1:
+            raise ValueError("text_offsets must have one entry per word plus one")
+        self.starts = starts
+        self.ends = ends
+        self.confidences = confidences
+        self.speaker_ids = speaker_ids
+        self.text_buffer = text_buffer
+        self.text_offsets = text_offsets
+        self.speakers = list(speakers)
+        self.segment_offsets = (
+            segment_offsets if segment_offsets is not None else np.zeros(0, np.int32)
+        )
+        self.language = language
+        self.confidence = confidence
+
+    @classmethod
+    def from_words(
+        cls,
+        words: Sequence[Dict[str, Any]],
+        language: Optional[str] = None,
+        segments: Optional[Sequence[Dict[str, Any]]] = None,
+        confidence: float = 0.0,
+    ) -> "Transcript":
+        """Build a transcript from ``{"text", "start", "end", ...}`` word dicts."""
+        n = len(words)
+        starts = np.fromiter((w["start"] for w in words), np.float32, n)
+        ends = np.fromiter((w["end"] for w in words), np.float32, n)
+        confidences = np.fromiter(
+            (w.get("confidence", 0.0) or 0.0 for w in words), np.float32, n
+        )
+
+        speakers: List[str] = []
+        speaker_index: Dict[str, int] = {}
+        speaker_ids = np.full(n, NO_SPEAKER, dtype=np.int16)
+        for i, word in enumerate(words):
+            speaker = word.get("speaker")
+            if speaker is None:
+                continue
+            if speaker not in speaker_index:
+                speaker_index[speaker] = len(speakers)
+                speakers.append(speaker)
+            speaker_ids[i] = speaker_index[speaker]
+
+        encoded = [w["text"].encode() for w in words]
+        text_offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum([len(e) for e in encoded], out=text_offsets[1:])
+
+        segment_offsets = None
+        if segments:
+            segment_starts = np.array(
+                [s["start"] for s in segments if s.get("start") is not None],
+                dtype=np.float32,
+            )
+            segment_offsets = np.unique(
+                np.searchsorted(starts, segment_starts, side="left")
+            ).astype(np.int32)
+
+        return cls(
+            starts,
+            ends,
+            confidences,
+            speaker_ids,
+            b"".join(encoded),
+            text_offsets,
+            speakers,
+            segment_offsets,
+            language,
+            confidence,
+        )
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Transcript):
+            return NotImplemented
+        return (
+            self.language == other.language
+            and self.speakers == other.speakers
+            and np.array_equal(self.starts, other.starts)
+            and np.array_equal(self.ends, other.ends)
+            and np.array_equal(self.confidences, other.confidences)
+            and np.array_equal(self.speaker_ids, other.speaker_ids)
+            and np.array_equal(self.segment_offsets, other.segment_offsets)
+            and self.texts() == other.texts()
+        )
+
+    @property
+    def duration(self) -> float:
+        """End time of the last word."""
+        return float(self.ends[-1]) if len(self) else 0.0
+
+    def word_text(self, i: int) -> str:
+        """Text of word ``i``."""
+        lo, hi = self.text_offsets[i], self.text_offsets[i + 1]
+        return self.text_buffer[lo:hi].decode()
+
+    def texts(self) -> List[str]:
+        """Text of every word."""
+        return [self.word_text(i) for i in range(len(self))]
+
+    def join(self, start: int = 0, stop: Optional[int] = None) -> str:
+        """Space-joined text of words ``start``..``stop``."""
+        stop = len(self) if stop is None else stop
+        return " ".join(self.word_text(i).strip() for i in range(start, stop))
+
+    def speaker(self, i: int) -> Optional[str]:
+        """Speaker label of word ``i``, if diarized."""
+        speaker_id = int(self.speaker_ids[i])
+        return None if speaker_id == NO_SPEAKER else self.speakers[speaker_id]
+
+    def word_at(self, t: float) -> Optional[int]:
+        """Index of the word being spoken at time ``t``, or None in a pause."""
+        i = int(np.searchsorted(self.starts, t, side="right")) - 1
+        if i >= 0 and t <= self.ends[i]:
+            return i
+        return None
+
+    def index_range(self, start: float, end: float) -> slice:
+        """Word indexes whose start time falls in ``[start, end)``."""
+        lo = int(np.searchsorted(self.starts, start, side="left"))
+        hi = int(np.searchsorted(self.starts, end, side="left"))
+        return slice(lo, hi)
+
+    def slice(self, start: float, end: float) -> "Transcript":
+        """Words starting in ``[start, end)``, as a view on this transcript."""
+        return self[self.index_range(start, end)]
+
+    def __getitem__(self, index: slice) -> "Transcript":
+        if not isinstance(index, slice) or index.step not in (None, 1):
+            raise TypeError("Transcript only supports contiguous slices")
+        lo, hi, _ = index.indices(len(self))
+        hi = max(hi, lo)
+        segments = self.segment_offsets[
+            (self.segment_offsets >= lo) & (self.segment_offsets < hi)
+        ] - lo
+        return Transcript(
+            self.starts[lo:hi],
+            self.ends[lo:hi],
+            self.confidences[lo:hi],
+            self.speaker_ids[lo:hi],
+            self.text_buffer,
+            self.text_offsets[lo:hi + 1],
+            self.speakers,
+            segments.astype(np.int32),
+            self.language,
+            self.confidence,
+        )
+
+    def segment_ranges(self) -> Iterator[slice]:
+        """Word index ranges of each segment; the whole transcript if unsegmented."""
+        if len(self) == 0:
+            return
+        bounds = list(self.segment_offsets)
+        if not bounds or bounds[0] != 0:
+            bounds.insert(0, 0)
+        bounds.append(len(self))
+        for lo, hi in zip(bounds, bounds[1:]):
+            if hi > lo:
+                yield slice(int(lo), int(hi))
+
+    def segments(self) -> List[Dict[str, Any]]:
+        """Segment dicts (``start``, ``end``, ``text``) rebuilt from the words."""
+        return [
+            {
+                "start": float(self.starts[r.start]),
+                "end": float(self.ends[r.stop - 1]),
+                "text": self.join(r.start, r.stop),
+            }
+            for r in self.segment_ranges()
+        ]
+
+    def to_words(self) -> List[Dict[str, Any]]:
+        """Per-word dicts, as stored in ``transcripts.words``."""
+        words = []
+        for i in range(len(self)):
+            word = {
+                "text": self.word_text(i),
+                "start": float(self.starts[i]),
+                "end": float(self.ends[i]),
+                "confidence": float(self.confidences[i]),
+            }
+            speaker = self.speaker(i)
+            if speaker is not None:
+                word["speaker"] = speaker
+            words.append(word)
+        return words
+
+    def to_bytes(self) -> bytes:
+        """Serialize to an uncompressed ``.npz`` archive."""
+        lo, hi = int(self.text_offsets[0]), int(self.text_offsets[-1])
+        meta = {
+            "language": self.language,
+            "confidence": self.confidence,
+            "speakers": self.speakers,
+        }
+        buffer = io.BytesIO()
+        np.savez(
+            buffer,
+            starts=self.starts,
+            ends=self.ends,
+            confidences=self.confidences,
+            speaker_ids=self.speaker_ids,
+            text=np.frombuffer(self.text_buffer[lo:hi], dtype=np.uint8),
+            text_offsets=self.text_offsets - lo,
+            segment_offsets=self.segment_offsets,
+            meta=np.frombuffer(json.dumps(meta).encode(), dtype=np.uint8),
+        )
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Transcript":
+        """Load a transcript written by ``to_bytes``."""
+        with np.load(io.BytesIO(data), allow_pickle=False) as archive:
+            meta = json.loads(archive["meta"].tobytes())
+            return cls(
+                archive["starts"],
+                archive["ends"],
+                archive["confidences"],
+                archive["speaker_ids"],
+                archive["text"].tobytes(),
+                archive["text_offsets"],
+                meta["speakers"],
+                archive["segment_offsets"],
+                meta["language"],
+                meta["confidence"],
+            )
+
+    @classmethod
+    def coerce(cls, value: Any) -> Optional["Transcript"]:
+        """Accept a Transcript or a legacy ``{"words": [...]}`` transcript dict."""
+        if value is None or isinstance(value, Transcript):
+            return value
+        if isinstance(value, dict):
+            return cls.from_words(
+                value.get("words", []),
+                language=value.get("language"),
+                segments=value.get("segments"),
+                confidence=value.get("confidence", 0.0),
+            )
+        raise TypeError(f"Cannot build a Transcript from {type(value).__name__}")
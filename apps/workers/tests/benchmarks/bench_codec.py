@@ -0,0 +1,101 @@
+# Created automatically by Cursor AI (2026-10-18)
+"""Compare wire codecs on realistic worker messages.
+
+Run from apps/workers:
+
+    PYTHONPATH=src python tests/benchmarks/bench_codec.py [--words 9000]
+
+Reports median encode/decode time and payload size for every installed codec
+on three messages: an ASR partial (one window), a full ASR result with inline
+words and segments, and a small control message.
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from workers.codec import available_codecs
+
+
+def _words(n, seed=0):
+    rng = random.Random(seed)
+    vocabulary = ["the", "model", "transcribes", "speech", "into", "chapters", "and", "summaries"]
+    t, words = 0.0, []
+    for _ in range(n):
+        t += rng.uniform(0.05, 0.3)
+        duration = rng.uniform(0.1, 0.5)
+        words.append({
+            "text": rng.choice(vocabulary),
+            "start": round(t, 3),
+            "end": round(t + duration, 3),
+            "confidence": round(rng.uniform(0.5, 1.0), 4),
+        })
+        t += duration
+    return words
+
+
+def _segments(words, per_segment=12):
+    return [
+        {
+            "start": chunk[0]["start"],
+            "end": chunk[-1]["end"],
+            "text": " ".join(w["text"] for w in chunk),
+            "words": [
+                {"word": w["text"], "start": w["start"], "end": w["end"], "score": w["confidence"]}
+                for w in chunk
+            ],
+        }
+        for chunk in (words[i:i + per_segment] for i in range(0, len(words), per_segment))
+    ]
+
+
+def _messages(n_words):
+    words = _words(n_words)
+    return {
+        "control": {"video_id": "vid-123", "status": "completed", "type": "executive"},
+        "asr.partial": {
+            "video_id": "vid-123",
+            "window": 3,
+            "word_offset": 300,
+            "words": words[:100],
+            "final": False,
+        },
+        "asr.result": {
+            "video_id": "vid-123",
+            "transcript": {"words": words, "segments": _segments(words), "language": "en"},
+            "status": "completed",
+        },
+    }
+
+
+def _median_seconds(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--words", type=int, default=9000, help="words in the full transcript")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    codecs = available_codecs()
+    print(f"{'message':<12} {'codec':<8} {'bytes':>10} {'encode ms':>10} {'decode ms':>10}")
+    for name, message in _messages(args.words).items():
+        for codec in codecs.values():
+            payload = codec.encode(message)
+            encode = _median_seconds(lambda: codec.encode(message), args.repeat)
+            decode = _median_seconds(lambda: codec.decode(payload), args.repeat)
+            print(
+                f"{name:<12} {codec.name:<8} {len(payload):>10} "
+                f"{encode * 1000:>10.3f} {decode * 1000:>10.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# Created automatically by Cursor AI (2026-10-18)
+"""Measure assigning diarization speakers to transcript words.
+
+Run from apps/workers:
+
+    PYTHONPATH=src python tests/benchmarks/bench_diarization.py [--words 200000] [--speakers 4]
+
+The transcript is synthetic: words of 0.15-0.6 s with short gaps, about 25
+hours of speech at the default size, and speaker turns of 1-40 s with
+pauses between some of them. ``assign_speakers`` (one sorted merge) is
+timed over all words. The per-word loop over every turn it replaces is
+timed on ``--naive-words`` words and scaled up, since it is quadratic, and
+its answers are checked against the sweep's on those words.
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from workers.diarization import assign_speakers, label_transcript
+from workers.transcript import Transcript
+
+
+def synthetic_words(n, seed=0):
+    rng = np.random.default_rng(seed)
+    durations = rng.uniform(0.15, 0.6, n)
+    gaps = rng.exponential(0.08, n)
+    starts = np.cumsum(durations + gaps) - durations
+    return starts, starts + durations
+
+
+def synthetic_turns(total_seconds, speakers, seed=0):
+    rng = np.random.default_rng(seed)
+    starts, ends, labels = [], [], []
+    t = 0.0
+    while t < total_seconds:
+        length = rng.uniform(1.0, 40.0)
+        starts.append(t)
+        ends.append(min(t + length, total_seconds))
+        labels.append(rng.integers(speakers))
+        t += length + (rng.uniform(0.2, 2.0) if rng.random() < 0.5 else 0.0)
+    return np.array(starts), np.array(ends), np.array(labels)
+
+
+def naive_assign(word_starts, word_ends, turn_starts, turn_ends, turn_speakers):
+    speakers = []
+    for ws, we in zip(word_starts, word_ends):
+        best, best_score = 0, -np.inf
+        for i in range(len(turn_starts)):
+            overlap = min(we, turn_ends[i]) - max(ws, turn_starts[i])
+            score = overlap if overlap > 0 else -max(turn_starts[i] - we, ws - turn_ends[i])
+            if score > best_score:
+                best, best_score = i, score
+        speakers.append(turn_speakers[best])
+    return np.array(speakers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--words", type=int, default=200_000)
+    parser.add_argument("--speakers", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--naive-words", type=int, default=2_000)
+    args = parser.parse_args()
+
+    word_starts, word_ends = synthetic_words(args.words)
+    turn_starts, turn_ends, turn_speakers = synthetic_turns(word_ends[-1], args.speakers)
+    print(
+        f"{args.words:,} words over {word_ends[-1] / 3600:.1f} h, "
+        f"{len(turn_starts):,} turns of {args.speakers} speakers"
+    )
+
+    timings = []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        speakers = assign_speakers(word_starts, word_ends, turn_starts, turn_ends, turn_speakers)
+        timings.append(time.perf_counter() - started)
+    best = min(timings)
+    print(f"sweep:  {best * 1000:8.1f} ms  ({args.words / best:,.0f} words/s)")
+
+    n = min(args.naive_words, args.words)
+    started = time.perf_counter()
+    expected = naive_assign(word_starts[:n], word_ends[:n], turn_starts, turn_ends, turn_speakers)
+    naive = (time.perf_counter() - started) * args.words / n
+    agree = np.mean(expected == speakers[:n])
+    print(f"naive:  {naive * 1000:8.1f} ms  (scaled from {n:,} words; {naive / best:,.0f}x slower)")
+    print(f"agreement with the naive loop: {agree:.2%}")
+
+    words = [{"text": "word", "start": s, "end": e} for s, e in zip(word_starts, word_ends)]
+    transcript = Transcript.from_words(words)
+    turns = [
+        {"speaker": f"speaker_{int(k)}", "start": float(s), "end": float(e)}
+        for s, e, k in zip(turn_starts, turn_ends, turn_speakers)
+    ]
+    started = time.perf_counter()
+    label_transcript(transcript, turns)
+    print(f"label_transcript: {(time.perf_counter() - started) * 1000:.1f} ms including turn dicts")
+
+
+if __name__ == "__main__":
+    main()
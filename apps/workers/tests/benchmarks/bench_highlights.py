@@ -0,0 +1,95 @@
+# Created automatically by Cursor AI (2026-10-18)
+"""Measure scoring and selecting highlight windows over a long video.
+
+Run from apps/workers:
+
+    PYTHONPATH=src python tests/benchmarks/bench_highlights.py [--hours 4] [--hop 1]
+
+Features are synthetic per-bin arrays for a video of ``--hours``, and
+every window of ``--window`` seconds starting on the ``--hop`` grid is a
+candidate. The vectorized pass (``score_windows`` then ``select_windows``)
+is timed against scoring each candidate window with its own Python loop
+over the bins and picking by repeated full scans, which is how a
+per-candidate implementation ends up; that one is timed on
+``--naive-minutes`` of the video and scaled up.
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from workers.highlights import FEATURE_WEIGHTS, score_windows, select_windows
+
+
+def synthetic_features(n_bins, seed=0):
+    rng = np.random.default_rng(seed)
+    return {name: rng.gamma(2.0, 1.0, n_bins) for name in FEATURE_WEIGHTS}
+
+
+def naive_select(features, window_bins, k):
+    names = list(features)
+    n = len(next(iter(features.values()))) - window_bins + 1
+    means = {name: [] for name in names}
+    for i in range(n):
+        for name in names:
+            total = 0.0
+            for b in range(i, i + window_bins):
+                total += features[name][b]
+            means[name].append(total / window_bins)
+    scores = [0.0] * n
+    for name in names:
+        values = np.array(means[name])
+        z = (values - values.mean()) / values.std()
+        for i in range(n):
+            scores[i] += FEATURE_WEIGHTS[name] * z[i]
+    chosen = []
+    while len(chosen) < k:
+        best = None
+        for i in range(n):
+            if all(abs(i - j) >= window_bins for j in chosen) and (best is None or scores[i] > scores[best]):
+                best = i
+        if best is None:
+            break
+        chosen.append(best)
+    return chosen
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hours", type=float, default=4.0)
+    parser.add_argument("--hop", type=float, default=1.0)
+    parser.add_argument("--window", type=float, default=30.0)
+    parser.add_argument("--count", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--naive-minutes", type=float, default=20.0)
+    args = parser.parse_args()
+
+    n_bins = int(args.hours * 3600 / args.hop)
+    window_bins = int(round(args.window / args.hop))
+    features = synthetic_features(n_bins)
+    print(f"{args.hours:g} h in {n_bins:,} bins of {args.hop:g} s, {len(features)} features")
+
+    timings = []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        scored = score_windows(features, window_bins)
+        chosen = select_windows(scored["score"], window_bins, args.count)
+        timings.append(time.perf_counter() - started)
+    best = min(timings)
+    print(f"vectorized: {best * 1000:8.1f} ms")
+
+    m = min(int(args.naive_minutes * 60 / args.hop), n_bins)
+    part = {name: values[:m] for name, values in features.items()}
+    started = time.perf_counter()
+    expected = naive_select(part, window_bins, args.count)
+    naive = (time.perf_counter() - started) * n_bins / m
+    print(f"naive:      {naive * 1000:8.1f} ms  (scaled from {args.naive_minutes:g} min; {naive / best:,.0f}x slower)")
+
+    scored = score_windows(part, window_bins)
+    agree = select_windows(scored["score"], window_bins, args.count) == expected
+    print(f"same windows as the naive loop on that part: {agree}; picked {len(chosen)} over the whole video")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# Created automatically by Cursor AI (2026-10-18)
+"""Measure the BM25 lexical index: build time, size on disk and query latency.
+
+Run from apps/workers:
+
+    PYTHONPATH=src python tests/benchmarks/bench_lexical.py [--videos 10000] [--windows 20]
+
+The corpus is synthetic: each video has ``--windows`` transcript windows of
+``--words`` words drawn from a Zipf-distributed vocabulary, which matches
+the long tail of speech well enough for posting-list sizes. Videos are
+indexed ``--batch`` at a time, as scope loads backfill them, so the build
+includes segment merges. The report then times re-indexing one video into
+the full index and queries of one to three terms, over the whole corpus and
+within a 100-video project.
+"""
+
+import argparse
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from workers.lexical import LexicalDoc, LexicalIndex
+
+
+def vocabulary(size, seed=0):
+    rng = np.random.default_rng(seed)
+    letters = np.array(list("abcdefghijklmnopqrstuvwxyz"))
+    return ["".join(rng.choice(letters, rng.integers(3, 10))) for _ in range(size)]
+
+
+def synthetic_videos(n, windows, words, vocab, seed=0):
+    rng = np.random.default_rng(seed)
+    for v in range(n):
+        ids = (rng.zipf(1.2, windows * words) - 1) % len(vocab)
+        docs = [
+            LexicalDoc(" ".join(vocab[i] for i in ids[w * words:(w + 1) * words]), w * 30, w * 30 + 40)
+            for w in range(windows)
+        ]
+        yield f"video-{v:05d}", docs
+
+
+def _percentiles(timings):
+    timings = np.array(timings) * 1000
+    return f"p50 {np.percentile(timings, 50):7.2f}ms  p99 {np.percentile(timings, 99):7.2f}ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--videos", type=int, default=10000)
+    parser.add_argument("--windows", type=int, default=20)
+    parser.add_argument("--words", type=int, default=120)
+    parser.add_argument("--vocabulary", type=int, default=50000)
+    parser.add_argument("--batch", type=int, default=100)
+    parser.add_argument("--max-segments", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=300)
+    args = parser.parse_args()
+
+    vocab = vocabulary(args.vocabulary)
+    root = tempfile.mkdtemp(prefix="bench-lexical-")
+    try:
+        index = LexicalIndex(root, args.max_segments)
+        text_bytes = 0
+        batch = {}
+        start = time.perf_counter()
+        for video, docs in synthetic_videos(args.videos, args.windows, args.words, vocab):
+            text_bytes += sum(len(doc.text) for doc in docs)
+            batch[video] = docs
+            if len(batch) == args.batch:
+                index.sync(batch)
+                batch = {}
+        index.sync(batch)
+        build = time.perf_counter() - start
+        stats = index.stats()
+        print(
+            f"{args.videos} videos, {stats['documents']} windows: build {build:.1f}s "
+            f"({stats['documents'] / build:.0f} windows/s, corpus generation included)"
+        )
+        print(
+            f"index {stats['bytes'] / 2**20:.0f} MiB in {stats['segments']} segments "
+            f"({stats['bytes'] / text_bytes:.2f}x the raw text, stored text included)"
+        )
+
+        (video, docs), = synthetic_videos(1, args.windows, args.words, vocab, seed=1)
+        start = time.perf_counter()
+        index.sync({"video-00000": docs})
+        print(f"re-index one video: {(time.perf_counter() - start) * 1000:.1f}ms")
+
+        rng = np.random.default_rng(2)
+        project = {f"video-{v:05d}" for v in rng.choice(args.videos, min(100, args.videos), replace=False)}
+        for terms in (1, 2, 3):
+            # Query terms from across the frequency range, not just the head
+            queries = [
+                " ".join(vocab[i] for i in rng.integers(0, min(len(vocab), 5000), terms))
+                for _ in range(args.queries)
+            ]
+            for label, videos in (("corpus", None), ("project", project)):
+                timings = []
+                for query in queries:
+                    start = time.perf_counter()
+                    index.search(query, 50, videos)
+                    timings.append(time.perf_counter() - start)
+                print(f"{terms}-term {label:<8} {_percentiles(timings)}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
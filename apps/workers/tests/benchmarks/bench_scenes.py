@@ -0,0 +1,140 @@
+# Created automatically by Cursor AI (2026-10-18)
+"""Measure scene-cut detection: frames per second, peak RSS and cut recall.
+
+Run from apps/workers:
+
+    PYTHONPATH=src python tests/benchmarks/bench_scenes.py [--shots 40] [--shot-seconds 15]
+
+The test video is generated with ffmpeg: ``--shots`` clips of
+``--shot-seconds`` each, cycling through lavfi test sources at
+``--resolution`` and 30 fps, concatenated and encoded to H.264, so the
+true cuts are at every multiple of the shot length. Detection then runs
+the way SegmentationWorker runs it, decoding through the downscaled pipe.
+
+Without ffmpeg on the PATH the frames are generated in process instead, a
+batch at a time, which times the NumPy side of the detector alone.
+
+Peak RSS is reported for this process and for its children (ffmpeg).
+"""
+
+import argparse
+import os
+import resource
+import shutil
+import subprocess
+import tempfile
+import time
+
+import numpy as np
+
+from workers.scenes import SceneCutDetector, detect_scenes
+
+SOURCES = ["testsrc2", "mandelbrot", "smptehdbars", "cellauto", "rgbtestsrc", "life"]
+
+
+def generate_video(path, shots, shot_seconds, resolution):
+    inputs, labels = [], []
+    for i in range(shots):
+        source = SOURCES[i % len(SOURCES)]
+        inputs += ["-f", "lavfi", "-i", f"{source}=size={resolution}:rate=30:duration={shot_seconds}"]
+        labels.append(f"[{i}:v]")
+    graph = f"{''.join(labels)}concat=n={shots}:v=1:a=0,format=yuv420p[v]"
+    subprocess.run(
+        ["ffmpeg", "-y", "-loglevel", "error", *inputs, "-filter_complex", graph,
+         "-map", "[v]", "-c:v", "libx264", "-preset", "ultrafast", path],
+        check=True,
+    )
+
+
+def synthetic_batches(shots, shot_seconds, stride, width, height, batch, seed=0):
+    """Panning textured shots in distinct colours, generated a batch at a time."""
+    rng = np.random.default_rng(seed)
+    per_shot = int(round(shot_seconds / stride))
+    textures = rng.integers(0, 64, (len(SOURCES), height, width * 2, 3)).astype(np.uint8)
+    tints = rng.integers(0, 192, (len(SOURCES), 3)).astype(np.uint8)
+    total = shots * per_shot
+    for lo in range(0, total, batch):
+        frames = np.empty((min(batch, total - lo), height, width, 3), dtype=np.uint8)
+        for j in range(len(frames)):
+            shot, offset = divmod(lo + j, per_shot)
+            k = shot % len(SOURCES)
+            x = offset % width
+            frames[j] = textures[k, :, x:x + width] + tints[k]
+        yield frames
+
+
+def _peak_rss_mib(who):
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(who).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shots", type=int, default=40)
+    parser.add_argument("--shot-seconds", type=float, default=15.0)
+    parser.add_argument("--resolution", default="1280x720")
+    parser.add_argument("--stride", type=float, default=0.25)
+    parser.add_argument("--width", type=int, default=128)
+    parser.add_argument("--height", type=int, default=72)
+    parser.add_argument("--threshold", type=float, default=0.3)
+    parser.add_argument("--min-scene-seconds", type=float, default=1.0)
+    parser.add_argument("--batch", type=int, default=64)
+    args = parser.parse_args()
+
+    duration = args.shots * args.shot_seconds
+    truth = [args.shot_seconds * i for i in range(1, args.shots)]
+    print(
+        f"{args.shots} shots of {args.shot_seconds:.0f}s ({duration / 60:.1f} min), "
+        f"stride {args.stride}s, {args.width}x{args.height} frames, batches of {args.batch}"
+    )
+
+    if shutil.which("ffmpeg"):
+        workdir = tempfile.mkdtemp(prefix="bench-scenes-")
+        try:
+            path = os.path.join(workdir, "synthetic.mp4")
+            started = time.perf_counter()
+            generate_video(path, args.shots, args.shot_seconds, args.resolution)
+            print(f"generated {args.resolution} video in {time.perf_counter() - started:.1f}s")
+            encode_rss = _peak_rss_mib(resource.RUSAGE_CHILDREN)
+
+            started = time.perf_counter()
+            detected = detect_scenes(
+                path, args.stride, args.width, args.height,
+                args.threshold, args.min_scene_seconds, args.batch,
+            )
+            elapsed = time.perf_counter() - started
+            cuts = [cut["time"] for cut in detected["cuts"]]
+            frames = detected["frames"]
+            children = _peak_rss_mib(resource.RUSAGE_CHILDREN)
+            if children <= encode_rss:
+                children_note = f"<= {encode_rss:.0f} MiB (the encoder's peak)"
+            else:
+                children_note = f"{children:.0f} MiB"
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        source = "ffmpeg decode"
+    else:
+        print("ffmpeg not found: timing the detector on in-process frames")
+        detector = SceneCutDetector(args.stride, args.threshold, args.min_scene_seconds)
+        batches = synthetic_batches(
+            args.shots, args.shot_seconds, args.stride, args.width, args.height, args.batch
+        )
+        cuts, elapsed = [], 0.0
+        for frames in batches:
+            started = time.perf_counter()
+            cuts += [cut.time for cut in detector.push(frames)]
+            elapsed += time.perf_counter() - started
+        frames = detector.frames
+        children_note = "n/a"
+        source = "detector only"
+
+    found = sum(any(abs(c - t) <= args.stride for c in cuts) for t in truth)
+    print(f"{source}: {frames} frames in {elapsed:.2f}s = {frames / elapsed:,.0f} frames/s "
+          f"({duration / elapsed:,.0f}x real time)")
+    print(f"cuts: {len(cuts)} found, recall {found}/{len(truth)}, "
+          f"{len(cuts) - found} false")
+    print(f"peak RSS: {_peak_rss_mib(resource.RUSAGE_SELF):.0f} MiB self, children {children_note}")
+
+
+if __name__ == "__main__":
+    main()
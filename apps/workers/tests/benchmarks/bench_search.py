@@ -0,0 +1,76 @@
+# Created automatically by Cursor AI (2026-10-18)
+"""Compare IVF-PQ search against exact NumPy search: recall@k and latency.
+
+Run from apps/workers:
+
+    PYTHONPATH=src python tests/benchmarks/bench_search.py [--sizes 20000 100000] [--nprobe 8 16 32]
+
+Vectors are synthetic unit-length 768-dimension embeddings drawn around
+topic centres, which is how transcript windows cluster; queries are
+perturbed copies of stored rows. For each collection size the report shows
+the index build time and memory, then per-query p50/p99 latency and
+recall@k (the share of the exact top-k that the index also returns) for
+each ``nprobe``.
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from workers.ann import ExactIndex, IVFPQIndex
+from workers.embeddings import EMBEDDING_DIMENSIONS
+
+
+def clustered(n, seed, topics_per_row=0.01, spread=0.7):
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((max(int(n * topics_per_row), 1), EMBEDDING_DIMENSIONS))
+    x = centres[rng.integers(0, len(centres), n)].astype(np.float32)
+    x += spread * rng.standard_normal(x.shape).astype(np.float32)
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+
+def _latencies(search, queries):
+    results, timings = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(search(query)[0])
+        timings.append(time.perf_counter() - start)
+    return results, np.array(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20000, 100000])
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[8, 16, 32])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    for n in args.sizes:
+        vectors = clustered(n, seed=n)
+        rng = np.random.default_rng(0)
+        queries = vectors[rng.integers(0, n, args.queries)]
+        queries = queries + 0.02 * rng.standard_normal(queries.shape).astype(np.float32)
+
+        exact = ExactIndex(vectors)
+        start = time.perf_counter()
+        index = IVFPQIndex(vectors)
+        build = time.perf_counter() - start
+        print(
+            f"\n{n} vectors: build {build:.1f}s, "
+            f"{index.nbytes / 2**20:.0f} MiB vs {exact.nbytes / 2**20:.0f} MiB exact"
+        )
+
+        truth, timings = _latencies(lambda q: exact.search(q, args.k), queries)
+        print(f"{'exact':<12} p50 {np.percentile(timings, 50):7.2f}ms  "
+              f"p99 {np.percentile(timings, 99):7.2f}ms  recall@{args.k} 1.000")
+        for nprobe in args.nprobe:
+            found, timings = _latencies(lambda q: index.search(q, args.k, nprobe), queries)
+            recall = np.mean([len(set(f) & set(t)) / args.k for f, t in zip(found, truth)])
+            print(f"{'nprobe=' + str(nprobe):<12} p50 {np.percentile(timings, 50):7.2f}ms  "
+                  f"p99 {np.percentile(timings, 99):7.2f}ms  recall@{args.k} {recall:.3f}")
+
+
+if __name__ == "__main__":
+    main()
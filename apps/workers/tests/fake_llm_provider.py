@@ -0,0 +1,111 @@
+# Created automatically by Cursor AI (2026-10-18)
+"""Local stand-in for the OpenAI and Anthropic completion APIs.
+
+Tests mount ``FakeLLMProvider().app`` on an ``httpx.ASGITransport``. To
+point a worker at it instead of a real provider, run
+
+    python tests/fake_llm_provider.py --port 8089 [--latency 0.5]
+
+and set OPENAI_BASE_URL / ANTHROPIC_BASE_URL to http://localhost:8089.
+
+Replies are the first ``max_tokens`` words of the prompt; a token is a word.
+A system prompt the model saw before is reported as cached prompt tokens, the way
+the providers' prefix caches report it.
+"""
+
+import argparse
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+class FakeLLMProvider:
+    def __init__(self, latency: float = 0.0, throttle: int = 0, retry_after: str = "0"):
+        self.latency = latency
+        # The next ``throttle`` calls are answered 429 with ``retry_after``
+        self.throttle = throttle
+        self.retry_after = retry_after
+        self.requests: List[Dict[str, Any]] = []
+        self.active = 0
+        self.peak = 0
+        self._prefixes: set = set()
+        self.app = FastAPI()
+        self.app.post("/v1/chat/completions")(self._openai)
+        self.app.post("/v1/messages")(self._anthropic)
+
+    async def _openai(self, request: Request):
+        body = await request.json()
+        prefix = " ".join(m["content"] for m in body["messages"] if m["role"] == "system")
+        prompt = " ".join(m["content"] for m in body["messages"] if m["role"] == "user")
+        served = await self._serve(body, dict(request.headers), prefix, prompt)
+        if isinstance(served, JSONResponse):
+            return served
+        text, prompt_tokens, completion_tokens, cached = served
+        return {
+            "model": body["model"],
+            "choices": [{"message": {"role": "assistant", "content": text}}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "prompt_tokens_details": {"cached_tokens": cached},
+            },
+        }
+
+    async def _anthropic(self, request: Request):
+        body = await request.json()
+        prefix = " ".join(block["text"] for block in body.get("system", []))
+        prompt = " ".join(m["content"] for m in body["messages"] if m["role"] == "user")
+        served = await self._serve(body, dict(request.headers), prefix, prompt)
+        if isinstance(served, JSONResponse):
+            return served
+        text, prompt_tokens, completion_tokens, cached = served
+        return {
+            "model": body["model"],
+            "content": [{"type": "text", "text": text}],
+            "usage": {
+                "input_tokens": prompt_tokens - cached,
+                "output_tokens": completion_tokens,
+                "cache_read_input_tokens": cached,
+            },
+        }
+
+    async def _serve(
+        self, body: Dict[str, Any], headers: Dict[str, str], prefix: str, prompt: str
+    ) -> Any:
+        self.requests.append({"body": body, "headers": headers})
+        if body.get("max_tokens", 0) < 1:
+            return JSONResponse({"error": "max_tokens must be at least 1"}, status_code=400)
+        if self.throttle:
+            self.throttle -= 1
+            return JSONResponse(
+                {"error": "rate limited"}, status_code=429, headers={"retry-after": self.retry_after}
+            )
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.active -= 1
+        words = prompt.split()[:body["max_tokens"]]
+        prefix_tokens = len(prefix.split())
+        # Prompt caches are per model
+        cached = prefix_tokens if (body["model"], prefix) in self._prefixes else 0
+        if prefix:
+            self._prefixes.add((body["model"], prefix))
+        return " ".join(words), prefix_tokens + len(prompt.split()), len(words), cached
+
+
+def main(argv: Optional[Tuple[str, ...]] = None) -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args(argv)
+    uvicorn.run(FakeLLMProvider(args.latency).app, host="127.0.0.1", port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# Created automatically by Cursor AI (2026-10-18)
+
+import asyncio
+from contextlib import asynccontextmanager
+
+import numpy as np
+
+from workers import asr_worker
+from workers.asr_worker import ASRWorker, warm_up_models
+from workers.audio import SAMPLE_RATE
+from workers.base import ASR_POOL
+
+
+async def test_warm_up_retries_on_the_asr_pool_until_it_succeeds(nats_client, monkeypatch):
+    monkeypatch.setattr(asr_worker, "WARMUP_RETRY_SECONDS", 0.01)
+    worker = ASRWorker(nats_client)
+    calls = []
+
+    async def run_in_pool(pool, fn, *args):
+        calls.append((pool, fn))
+        if len(calls) < 3:
+            raise RuntimeError("CUDA out of memory")
+
+    monkeypatch.setattr(worker, "run_in_pool", run_in_pool)
+
+    await worker._warm_up()
+
+    assert worker.models_ready
+    assert calls == [(ASR_POOL, warm_up_models)] * 3
+
+
+async def test_sharded_mode_bounds_shards_in_flight_on_the_asr_pool(nats_client, monkeypatch):
+    worker = ASRWorker(nats_client)
+    worker.shard_seconds, worker.shard_overlap_seconds = 10, 1
+    worker.shard_parallelism = 2
+
+    class Cache:
+        @asynccontextmanager
+        async def lease(self, source_path):
+            yield source_path
+
+    monkeypatch.setattr(asr_worker, "get_audio_cache", Cache)
+    monkeypatch.setattr(asr_worker, "open_pcm", lambda path: np.zeros(60 * SAMPLE_RATE))
+    pools, in_flight, peak = [], 0, 0
+
+    async def run_in_pool(pool, fn, pcm_path, start, end, *args):
+        nonlocal in_flight, peak
+        pools.append(pool)
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return {"words": [], "segments": [], "confidence": 1.0}
+
+    monkeypatch.setattr(worker, "run_in_pool", run_in_pool)
+
+    await worker._transcribe_sharded("v1", "audio.wav", "en")
+
+    assert len(pools) > 2
+    assert set(pools) == {ASR_POOL}
+    assert peak == 2
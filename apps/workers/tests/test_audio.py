@@ -0,0 +1,81 @@
+# Created automatically by Cursor AI (2026-10-18)
+
+import numpy as np
+import pytest
+
+from workers.audio import HEADER_BYTES, SAMPLE_RATE, frame_rms, open_pcm, plan_windows, write_pcm
+from workers.stitching import stitch_words
+
+
+def _speech_with_pauses(seconds, pause_every, pause_seconds=0.5, seed=0):
+    rng = np.random.default_rng(seed)
+    audio = rng.normal(0, 0.3, int(seconds * SAMPLE_RATE)).astype(np.float32)
+    pauses = []
+    for start in np.arange(pause_every, seconds, pause_every):
+        lo = int(start * SAMPLE_RATE)
+        hi = int((start + pause_seconds) * SAMPLE_RATE)
+        audio[lo:hi] *= 0.001
+        pauses.append((lo, hi))
+    return audio, pauses
+
+
+def test_frame_rms_matches_direct_computation():
+    audio = np.random.default_rng(1).normal(size=48000).astype(np.float32)
+    expected = np.sqrt(np.mean(audio.reshape(-1, 480).astype(np.float64) ** 2, axis=1))
+    np.testing.assert_allclose(frame_rms(audio, 480, chunk_frames=7), expected, rtol=1e-5)
+
+
+def test_windows_cover_input_and_cut_in_pauses():
+    audio, pauses = _speech_with_pauses(200, pause_every=11)
+    windows = plan_windows(audio, target_seconds=30, max_seconds=45)
+
+    assert windows[0][0] == 0 and windows[-1][1] == len(audio)
+    for (_, end), (start, _) in zip(windows, windows[1:]):
+        assert end == start
+    for start, end in windows:
+        assert end - start <= 45 * SAMPLE_RATE
+    for _, cut in windows[:-1]:
+        assert any(lo <= cut <= hi for lo, hi in pauses)
+
+
+def test_short_audio_is_a_single_window():
+    audio = np.zeros(10 * SAMPLE_RATE, dtype=np.float32)
+    assert plan_windows(audio) == [(0, len(audio))]
+
+
+def test_stitch_drops_emitted_words_and_clamps_overlap():
+    words = [
+        {"text": "a", "start": 9.0, "end": 9.5},
+        {"text": "b", "start": 9.8, "end": 10.4},
+        {"text": "c", "start": 10.5, "end": 11.0},
+    ]
+    stitched = stitch_words(words, emitted_until=10.0)
+
+    assert [w["text"] for w in stitched] == ["b", "c"]
+    assert stitched[0]["start"] == 10.0
+    assert stitch_words(words, None) == words
+
+
+@pytest.mark.parametrize("dtype", ["float32", "int16"])
+def test_pcm_artifact_slices_are_float32_views_of_the_file(tmp_path, dtype):
+    samples = np.sin(np.linspace(0, 100, 3 * SAMPLE_RATE)).astype(np.float32) * 0.5
+    path = write_pcm(samples, str(tmp_path / "audio.pcm"), dtype=dtype)
+
+    artifact = open_pcm(path)
+    window = artifact.seconds(1.0, 1.5)
+
+    assert artifact.dtype == dtype and artifact.sample_rate == SAMPLE_RATE
+    assert len(artifact) == len(samples) and artifact.duration == 3.0
+    assert window.dtype == np.float32 and len(window) == SAMPLE_RATE // 2
+    np.testing.assert_allclose(window, samples[SAMPLE_RATE:SAMPLE_RATE * 3 // 2], atol=1e-4)
+    if dtype == "float32":
+        assert np.shares_memory(window, artifact.samples)
+    assert (tmp_path / "audio.pcm").stat().st_size == HEADER_BYTES + len(samples) * np.dtype(dtype).itemsize
+
+
+def test_raw_pcm_without_a_header_is_rejected(tmp_path):
+    path = tmp_path / "audio.f32"
+    np.zeros(1000, dtype=np.float32).tofile(path)
+
+    with pytest.raises(ValueError, match="Not a PCM artifact"):
+        open_pcm(str(path))
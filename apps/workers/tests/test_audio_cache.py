@@ -0,0 +1,104 @@
+# Created automatically by Cursor AI (2026-10-18)
+
+import asyncio
+import os
+import time
+
+import numpy as np
+import pytest
+
+from workers import audio_cache
+from workers.audio import HEADER_BYTES, open_pcm, write_pcm
+from workers.audio_cache import AudioCache
+
+SECONDS = 2
+ARTIFACT_BYTES = HEADER_BYTES + SECONDS * 16000 * 4
+
+
+@pytest.fixture
+def decodes(monkeypatch):
+    """Replace ffmpeg with a slow fake that records the files it decodes."""
+    calls = []
+
+    def decode(media_path, pcm_path, sample_rate, dtype):
+        calls.append(media_path)
+        # Slow enough for concurrent callers to overlap
+        time.sleep(0.05)
+        samples = np.full(SECONDS * sample_rate, len(calls) / 10, dtype=np.float32)
+        return write_pcm(samples, pcm_path, sample_rate, dtype)
+
+    monkeypatch.setattr(audio_cache, "decode_to_pcm", decode)
+    return calls
+
+
+def _sources(tmp_path, n):
+    paths = []
+    for i in range(n):
+        path = tmp_path / f"video-{i}.mp4"
+        path.write_bytes(b"video %d" % i)
+        paths.append(str(path))
+    return paths
+
+
+async def test_each_file_is_decoded_once_for_every_consumer(tmp_path, decodes):
+    cache = AudioCache(str(tmp_path / "cache"), max_bytes=10 * ARTIFACT_BYTES)
+    (source,) = _sources(tmp_path, 1)
+
+    paths = await asyncio.gather(*(cache.acquire(source) for _ in range(3)))
+    again = await cache.acquire(source)
+
+    assert decodes == [source] and len(set(paths + [again])) == 1
+    assert cache.stats()["coalesced"] == 2 and cache.stats()["hits"] == 1
+    assert open_pcm(again).seconds(0.0, 1.0)[0] == pytest.approx(0.1)
+    for path in paths + [again]:
+        cache.release(path)
+    assert cache.stats()["leased"] == 0
+
+
+async def test_leased_artifacts_survive_eviction(tmp_path, decodes):
+    cache = AudioCache(str(tmp_path / "cache"), max_bytes=2 * ARTIFACT_BYTES)
+    first, second, third = _sources(tmp_path, 3)
+
+    async with cache.lease(first) as first_pcm:
+        async with cache.lease(second):
+            pass
+        async with cache.lease(third):
+            # Over budget with three: the unleased second goes, the first stays
+            assert os.path.exists(first_pcm)
+            assert cache.stats()["entries"] == 2 and cache.stats()["evictions"] == 1
+
+    async with cache.lease(second):
+        pass
+    assert decodes == [first, second, third, second]
+    assert cache.stats()["bytes"] <= 2 * ARTIFACT_BYTES
+
+
+async def test_artifacts_outlive_the_process_and_changed_sources_are_decoded_again(tmp_path, decodes):
+    root = str(tmp_path / "cache")
+    (source,) = _sources(tmp_path, 1)
+    async with AudioCache(root, max_bytes=10 * ARTIFACT_BYTES).lease(source):
+        pass
+
+    restarted = AudioCache(root, max_bytes=10 * ARTIFACT_BYTES)
+    async with restarted.lease(source):
+        pass
+    with open(source, "ab") as f:
+        f.write(b" re-uploaded")
+    async with restarted.lease(source):
+        pass
+
+    assert restarted.stats()["hits"] == 1 and len(decodes) == 2
+
+
+async def test_failed_decodes_are_not_cached(tmp_path, monkeypatch):
+    def fail(media_path, pcm_path, sample_rate, dtype):
+        raise RuntimeError("Failed to decode audio")
+
+    monkeypatch.setattr(audio_cache, "decode_to_pcm", fail)
+    cache = AudioCache(str(tmp_path / "cache"), max_bytes=ARTIFACT_BYTES)
+    (source,) = _sources(tmp_path, 1)
+
+    with pytest.raises(RuntimeError):
+        await cache.acquire(source)
+
+    assert cache.stats()["entries"] == 0 and cache.stats()["leased"] == 0
@@ -0,0 +1,122 @@
+# Created automatically by Cursor AI (2026-10-18)
+
+import asyncio
+import json
+import time
+
+import pytest
+
+from workers.base import RetryableError
+from workers.blobstore import BLOB_REF, ClaimCheck, LocalBlobStore, is_blob_ref
+
+
+class CountingStore(LocalBlobStore):
+    def __init__(self, root):
+        super().__init__(root)
+        self.gets = 0
+
+    def get(self, key):
+        self.gets += 1
+        return super().get(key)
+
+
+class SlowStore(CountingStore):
+    def get(self, key):
+        time.sleep(0.1)
+        return super().get(key)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return CountingStore(str(tmp_path))
+
+
+def _transcript(n_words):
+    return {"words": [{"text": f"w{i}", "start": i, "end": i + 0.5} for i in range(n_words)]}
+
+
+async def test_offload_replaces_only_large_fields(store):
+    claim_check = ClaimCheck(store, threshold=1024, cache_bytes=1 << 20)
+    message = {"video_id": "v1", "transcript": _transcript(500), "status": "completed"}
+
+    offloaded = await claim_check.offload(message)
+
+    assert offloaded["video_id"] == "v1"
+    assert is_blob_ref(offloaded["transcript"])
+    assert len(json.dumps(offloaded)) < 200
+    assert store.exists(offloaded["transcript"][BLOB_REF])
+    assert message["transcript"] == _transcript(500)  # input untouched
+
+
+async def test_identical_payloads_share_a_blob(store):
+    claim_check = ClaimCheck(store, threshold=10, cache_bytes=1 << 20)
+    first = await claim_check.offload({"transcript": _transcript(50)})
+    second = await claim_check.offload({"transcript": _transcript(50)})
+
+    assert first == second
+
+
+async def test_resolve_fetches_once_and_caches(store):
+    producer = ClaimCheck(store, threshold=10, cache_bytes=1 << 20)
+    consumer = ClaimCheck(store, threshold=10, cache_bytes=1 << 20)
+    ref = (await producer.offload({"transcript": _transcript(50)}))["transcript"]
+
+    resolved = await asyncio.gather(*(consumer.resolve(ref) for _ in range(5)))
+    again = await consumer.resolve(ref)
+
+    assert all(value == _transcript(50) for value in resolved)
+    assert again == _transcript(50)
+    assert store.gets == 1
+    assert consumer.stats()["misses"] == 1
+
+
+async def test_cancelled_follower_does_not_cancel_the_shared_load(tmp_path):
+    store = SlowStore(str(tmp_path))
+    producer = ClaimCheck(store, threshold=10, cache_bytes=1 << 20)
+    consumer = ClaimCheck(store, threshold=10, cache_bytes=1 << 20)
+    ref = (await producer.offload({"transcript": _transcript(50)}))["transcript"]
+
+    leader = asyncio.create_task(consumer.resolve(ref))
+    await asyncio.sleep(0)
+    followers = [asyncio.create_task(consumer.resolve(ref)) for _ in range(2)]
+    await asyncio.sleep(0.01)
+    followers[0].cancel()
+
+    assert await leader == _transcript(50)
+    assert await followers[1] == _transcript(50)
+    with pytest.raises(asyncio.CancelledError):
+        await followers[0]
+    assert store.gets == 1
+
+
+async def test_cancelled_leader_releases_its_followers(tmp_path):
+    store = SlowStore(str(tmp_path))
+    producer = ClaimCheck(store, threshold=10, cache_bytes=1 << 20)
+    consumer = ClaimCheck(store, threshold=10, cache_bytes=1 << 20)
+    ref = (await producer.offload({"transcript": _transcript(50)}))["transcript"]
+
+    leader = asyncio.create_task(consumer.resolve(ref))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(consumer.resolve(ref))
+    await asyncio.sleep(0.01)
+    leader.cancel()
+
+    # The follower was not cancelled itself, so its message is retried
+    with pytest.raises(RetryableError):
+        await asyncio.wait_for(follower, timeout=1.0)
+    # Nothing is left in flight, so the next caller loads it afresh
+    assert await consumer.resolve(ref) == _transcript(50)
+
+
+async def test_inline_values_pass_through(store):
+    claim_check = ClaimCheck(store, threshold=10, cache_bytes=1 << 20)
+    assert await claim_check.resolve({"words": []}) == {"words": []}
+    assert await claim_check.resolve(None) is None
+
+
+async def test_cache_is_bounded(store):
+    claim_check = ClaimCheck(store, threshold=10, cache_bytes=5000)
+    for n in range(20, 30):
+        await claim_check.offload({"transcript": _transcript(n)})
+
+    assert claim_check.stats()["cached_bytes"] <= 5000
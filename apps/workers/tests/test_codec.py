@@ -0,0 +1,74 @@
+# Created automatically by Cursor AI (2026-10-18)
+
+import json
+
+import numpy as np
+import pytest
+
+from workers.codec import (
+    ACCEPT_HEADER,
+    CONTENT_TYPE_HEADER,
+    JSON_CONTENT_TYPE,
+    MSGPACK_CONTENT_TYPE,
+    available_codecs,
+    get_codec,
+)
+
+from conftest import FakeMsg, FakeNATSClient
+
+MESSAGE = {
+    "video_id": "v1",
+    "words": [{"text": "hi", "start": 0.5, "end": 0.75, "confidence": 0.9}],
+    "score": np.float32(0.5),
+}
+
+
+@pytest.mark.parametrize("name", sorted(available_codecs()))
+def test_codecs_round_trip(name):
+    codec = available_codecs()[name]
+    decoded = codec.decode(codec.encode(MESSAGE))
+    assert decoded["words"] == MESSAGE["words"]
+    assert decoded["score"] == 0.5
+
+
+def test_messages_without_header_are_json():
+    client = FakeNATSClient(codec="msgpack")
+    msg = FakeMsg(json.dumps({"id": "legacy"}).encode())
+    assert client.decode(msg) == {"id": "legacy"}
+
+
+async def test_publish_labels_content_type():
+    producer = FakeNATSClient(codec="msgpack")
+    consumer = FakeNATSClient(codec="json")
+    await producer.publish_message("media.test", MESSAGE)
+
+    _, payload, headers = producer.published[0]
+    assert headers[CONTENT_TYPE_HEADER] == MSGPACK_CONTENT_TYPE
+    assert consumer.decode(FakeMsg(payload, headers))["video_id"] == "v1"
+
+
+def test_reply_codec_honours_accept_header():
+    client = FakeNATSClient(codec="orjson")
+    request = FakeMsg(b"{}", {ACCEPT_HEADER: MSGPACK_CONTENT_TYPE})
+    assert client.reply_codec(request).name == "msgpack"
+    assert client.reply_codec(FakeMsg(b"{}")).content_type == "application/json"
+
+
+async def test_json_helpers_label_payloads_and_decode_any_reply(monkeypatch):
+    client = FakeNATSClient(codec="msgpack")
+    await client.publish_json("media.test", {"id": "v1"})
+
+    _, payload, headers = client.published[0]
+    assert headers[CONTENT_TYPE_HEADER] == JSON_CONTENT_TYPE
+    assert json.loads(payload) == {"id": "v1"}
+
+    sent = {}
+
+    async def request(subject, payload, timeout=5.0, headers=None):
+        sent.update(headers)
+        msgpack = get_codec("msgpack")
+        return FakeMsg(msgpack.encode({"ok": True}), {CONTENT_TYPE_HEADER: msgpack.content_type})
+
+    monkeypatch.setattr(client, "request", request)
+    assert await client.request_json("media.test.query", {"q": "hi"}) == {"ok": True}
+    assert sent[ACCEPT_HEADER] == JSON_CONTENT_TYPE
@@ -0,0 +1,146 @@
+# Created automatically by Cursor AI (2026-10-18)
+
+import numpy as np
+
+from workers import audio_cache
+from workers.audio import SAMPLE_RATE, write_pcm
+from workers.diarization import (
+    assign_speakers,
+    detect_speech,
+    diarize,
+    embedding_windows,
+    label_transcript,
+)
+from workers.diarization_worker import DiarizationWorker
+from workers.transcript import NO_SPEAKER, Transcript
+
+# Pitch and formants of three synthetic voices
+VOICES = [
+    (110, [(500, 150), (1500, 200), (2500, 300)]),
+    (210, [(800, 150), (2000, 250), (3200, 300)]),
+    (150, [(350, 120), (2300, 200), (3000, 300)]),
+]
+
+
+def _voice(seconds, pitch, formants, rng):
+    """Harmonics of a wavering pitch shaped by formant resonances, in syllables."""
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    phase = 2 * np.pi * np.cumsum(pitch * (1 + 0.03 * np.sin(2 * np.pi * 5 * t))) / SAMPLE_RATE
+    source = sum(np.sin(h * phase) / h for h in range(1, 30))
+    freqs = np.fft.rfftfreq(len(source), 1 / SAMPLE_RATE)
+    envelope = sum(np.exp(-((freqs - f) / width) ** 2) for f, width in formants)
+    voiced = np.fft.irfft(np.fft.rfft(source) * envelope, len(source))
+    voiced *= 0.6 + 0.4 * np.abs(np.sin(2 * np.pi * 3 * t))
+    return 0.3 * voiced / np.abs(voiced).max() + 0.002 * rng.standard_normal(len(t))
+
+
+def _conversation(turns, pause=0.5, seed=0):
+    """Audio of ``(voice, seconds)`` turns separated by pauses."""
+    rng = np.random.default_rng(seed)
+    parts = []
+    for voice, seconds in turns:
+        parts.append(_voice(seconds, *VOICES[voice], rng))
+        parts.append(0.002 * rng.standard_normal(int(pause * SAMPLE_RATE)))
+    return np.concatenate(parts).astype(np.float32)
+
+
+CONVERSATION = [(0, 6), (1, 4), (0, 3), (2, 5), (1, 7)]
+
+
+def test_speech_regions_and_windows_tile_them():
+    audio = _conversation([(0, 3), (1, 2)])
+
+    speech = detect_speech(audio)
+    windows, owned = embedding_windows(speech, window=1.5, step=0.75)
+
+    np.testing.assert_allclose(speech, [[0.0, 3.0], [3.51, 5.49]], atol=0.06)
+    assert (windows[:, 1] - windows[:, 0] <= 1.5 + 1e-9).all()
+    assert owned[0, 0] == speech[0, 0] and owned[-1, 1] == speech[-1, 1]
+    # Owned spans meet inside a region and never overlap
+    assert (owned[1:, 0] >= owned[:-1, 1] - 1e-9).all()
+
+
+def test_turns_follow_the_voices():
+    result = diarize(_conversation(CONVERSATION), SAMPLE_RATE, 1.5, 0.75, threshold=0.4)
+
+    assert result["num_speakers"] == 3
+    assert [turn["speaker"] for turn in result["turns"]] == [
+        "speaker_0", "speaker_1", "speaker_0", "speaker_2", "speaker_1"
+    ]
+    starts = [turn["start"] for turn in result["turns"]]
+    np.testing.assert_allclose(starts, [0.0, 6.5, 11.0, 14.5, 20.0], atol=0.1)
+
+
+def test_long_files_cluster_centroids_to_the_same_speakers():
+    audio = _conversation(CONVERSATION)
+    direct = diarize(audio, SAMPLE_RATE, 1.5, 0.75, threshold=0.4)
+
+    capped = diarize(audio, SAMPLE_RATE, 1.5, 0.75, threshold=0.4, max_items=8)
+    fixed = diarize(audio, SAMPLE_RATE, 1.5, 0.75, threshold=0.4, num_speakers=2)
+
+    assert direct["windows"] > 8
+    assert capped["turns"] == direct["turns"]
+    assert fixed["num_speakers"] == 2
+
+
+def test_words_take_the_turn_they_overlap_most():
+    turn_starts = np.array([0.0, 5.0, 9.0])
+    turn_ends = np.array([5.0, 8.0, 12.0])
+    turn_speakers = np.array([0, 1, 0])
+    words = np.array([
+        [0.5, 0.9],   # inside the first turn
+        [4.8, 5.5],   # mostly in the second
+        [4.0, 5.2],   # mostly in the first
+        [8.1, 8.3],   # in the gap, nearer the second turn
+        [8.7, 8.9],   # in the gap, nearer the third
+        [12.5, 13.0],  # after the last turn
+    ])
+
+    speakers = assign_speakers(words[:, 0], words[:, 1], turn_starts, turn_ends, turn_speakers)
+
+    assert speakers.tolist() == [0, 1, 0, 1, 0, 0]
+    assert assign_speakers(words[:, 0], words[:, 1], turn_starts[:0], turn_ends[:0], turn_speakers[:0]).tolist() == [NO_SPEAKER] * 6
+
+
+def test_label_transcript_sets_speakers_without_copying_words():
+    transcript = Transcript.from_words([
+        {"text": "hello", "start": 0.2, "end": 0.6},
+        {"text": "there", "start": 7.0, "end": 7.4},
+    ])
+    turns = [
+        {"speaker": "speaker_0", "start": 0.0, "end": 6.0},
+        {"speaker": "speaker_1", "start": 6.5, "end": 10.0},
+    ]
+
+    labelled = label_transcript(transcript, turns)
+
+    assert labelled.speakers == ["speaker_0", "speaker_1"]
+    assert [labelled.speaker(i) for i in range(2)] == ["speaker_0", "speaker_1"]
+    assert labelled.starts is transcript.starts
+
+
+async def test_worker_returns_turns_and_a_labelled_transcript(nats_client, monkeypatch, tmp_path):
+    worker = DiarizationWorker(nats_client)
+    audio = _conversation(CONVERSATION[:2])
+    source = tmp_path / "v1.wav"
+    source.write_bytes(b"RIFF")
+
+    def decode(media_path, pcm_path, sample_rate, dtype):
+        return write_pcm(audio, pcm_path, sample_rate, dtype)
+
+    async def run_in_pool(pool, fn, *args):
+        return fn(*args)
+
+    monkeypatch.setattr(audio_cache, "decode_to_pcm", decode)
+    monkeypatch.setattr(worker, "run_in_pool", run_in_pool)
+    transcript = Transcript.from_words([
+        {"text": "first", "start": 1.0, "end": 1.4},
+        {"text": "second", "start": 8.0, "end": 8.5},
+    ])
+    result = await worker.process_message(
+        {"video_id": "v1", "audio_path": str(source), "transcript": transcript}
+    )
+
+    assert result["num_speakers"] == 2
+    assert [turn["speaker"] for turn in result["speakers"]] == ["speaker_0", "speaker_1"]
+    assert [result["transcript"].speaker(i) for i in range(2)] == ["speaker_0", "speaker_1"]
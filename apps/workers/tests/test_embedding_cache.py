@@ -0,0 +1,123 @@
+# Created automatically by Cursor AI (2026-10-18)
+
+import numpy as np
+
+from workers.embedding_cache import DiskEmbeddingCache, EmbeddingCache, RedisEmbeddingCache
+from workers.embeddings import EMBEDDING_DIMENSIONS, chunk_transcript
+from workers.transcript import Transcript
+
+
+class FakeRedis:
+    """MGET and pipelined SET, as the embedding cache uses them."""
+
+    def __init__(self):
+        self.data = {}
+
+    async def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def set(self, key, value, ex=None):
+        self.commands.append((key, value))
+
+    async def execute(self):
+        self.redis.data.update(self.commands)
+
+
+def _vector(seed):
+    vector = np.random.default_rng(seed).standard_normal(EMBEDDING_DIMENSIONS).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+class CountingEncoder:
+    def __init__(self):
+        self.texts = []
+
+    async def __call__(self, texts):
+        self.texts.extend(texts)
+        return np.stack([_vector(len(t)) for t in texts])
+
+
+def test_disk_tier_evicts_lru_and_survives_restart(tmp_path):
+    disk = DiskEmbeddingCache(str(tmp_path), 4, max_entries=2)
+    a, b, c = (bytes([i]) * 16 for i in (1, 2, 3))
+    disk.put_many({a: np.ones(4), b: np.full(4, 2.0)})
+    assert set(disk.get_many([a])) == {a}  # b is now least recently used
+    disk.put_many({c: np.full(4, 3.0)})
+
+    assert set(disk.get_many([a, b, c])) == {a, c}
+
+    reopened = DiskEmbeddingCache(str(tmp_path), 4, max_entries=2)
+    assert reopened.get_many([c])[c].tolist() == [3.0] * 4
+    assert reopened.get_many([a])[a].dtype == np.float32
+    # a was read last, so a new key replaces c
+    reopened.put_many({b: np.zeros(4)})
+    assert set(reopened.get_many([a, b, c])) == {a, b}
+
+    # A different capacity starts from an empty cache
+    assert DiskEmbeddingCache(str(tmp_path), 4, max_entries=3).get_many([a, b]) == {}
+
+
+async def test_reindex_encodes_only_changed_windows(tmp_path):
+    cache = EmbeddingCache(DiskEmbeddingCache(str(tmp_path), EMBEDDING_DIMENSIONS, 1000), None)
+    words = [{"text": f"w{i % 53}", "start": i * 0.5, "end": i * 0.5 + 0.4} for i in range(3000)]
+    original = [c.text for c in chunk_transcript(Transcript.from_words(words), 40, 10)]
+    words[1500]["text"] = "edited"
+    edited = [c.text for c in chunk_transcript(Transcript.from_words(words), 40, 10)]
+
+    first = CountingEncoder()
+    await cache.embed("model", original, first)
+    second = CountingEncoder()
+    vectors = await cache.embed("model", edited, second)
+
+    assert len(first.texts) == len(set(original))
+    assert 0 < len(second.texts) <= 3
+    assert vectors.shape == (len(edited), EMBEDDING_DIMENSIONS)
+    assert np.allclose(vectors[0], _vector(len(edited[0])), atol=1e-3)
+
+
+async def test_duplicates_and_case_variants_are_encoded_once(tmp_path):
+    cache = EmbeddingCache(DiskEmbeddingCache(str(tmp_path), EMBEDDING_DIMENSIONS, 100), None)
+    encoder = CountingEncoder()
+
+    vectors = await cache.embed(
+        "model", ["Thanks for watching", "thanks  for watching", "other"], encoder
+    )
+
+    assert encoder.texts == ["Thanks for watching", "other"]
+    assert np.array_equal(vectors[0], vectors[1])
+    assert cache.stats()["deduplicated"] == 1
+    assert EmbeddingCache.key_for("a", "text") != EmbeddingCache.key_for("b", "text")
+
+
+async def test_replicas_share_embeddings_through_redis(tmp_path):
+    redis = FakeRedis()
+    replicas = [
+        EmbeddingCache(
+            DiskEmbeddingCache(str(tmp_path / str(i)), EMBEDDING_DIMENSIONS, 100),
+            RedisEmbeddingCache(redis, ttl=60),
+        )
+        for i in range(2)
+    ]
+    first, second = CountingEncoder(), CountingEncoder()
+
+    await replicas[0].embed("model", ["sponsor read"], first)
+    vectors = await replicas[1].embed("model", ["sponsor read"], second)
+
+    assert first.texts == ["sponsor read"] and second.texts == []
+    assert np.allclose(vectors[0], _vector(len("sponsor read")), atol=1e-3)
+    assert replicas[1].disk.stats()["entries"] == 1
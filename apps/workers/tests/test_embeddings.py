@@ -0,0 +1,100 @@
+# Created automatically by Cursor AI (2026-10-18)
+
+import numpy as np
+import pytest
+
+from workers.embeddings import (
+    EMBEDDING_DIMENSIONS,
+    Chunk,
+    chunk_transcript,
+    copy_rows,
+    encode_with,
+    plan_batches,
+)
+from workers.transcript import Transcript
+
+
+class FakeEncoder:
+    """SentenceTransformer stand-in that records its batches."""
+
+    max_seq_length = 384
+
+    def __init__(self):
+        self.batches = []
+
+    def tokenizer(self, texts, truncation, max_length):
+        return {"input_ids": [[0] * min(len(t.split()) + 2, max_length) for t in texts]}
+
+    def encode(self, texts, batch_size, **kwargs):
+        self.batches.append(list(texts))
+        vectors = np.zeros((len(texts), EMBEDDING_DIMENSIONS), dtype=np.float32)
+        vectors[:, 0] = [len(t.split()) for t in texts]
+        return vectors
+
+
+def _transcript(n_words, edit=None):
+    words = [
+        {"text": f"w{i % 37}", "start": i * 0.5, "end": i * 0.5 + 0.4} for i in range(n_words)
+    ]
+    if edit is not None:
+        words[edit]["text"] = "edited"
+    return Transcript.from_words(words)
+
+
+def test_chunks_overlap_and_cover_transcript():
+    transcript = _transcript(400)
+    chunks = chunk_transcript(transcript, window_words=40, overlap_words=10)
+    windows = [c.text.split() for c in chunks]
+
+    # Blocks of 15..45 words, each window extended by the 10-word overlap
+    assert all(len(w) <= 55 for w in windows)
+    assert all(len(w) >= 25 for w in windows[:-1])
+    for current, following in zip(windows, windows[1:]):
+        assert current[-10:] == following[:10]
+    assert windows[0][0] == "w0" and windows[-1][-1] == transcript.word_text(399)
+    assert chunks[0].start == 0.0
+    assert chunks[-1].end == pytest.approx(399 * 0.5 + 0.4)
+    assert chunk_transcript(_transcript(0), 10, 3) == []
+    with pytest.raises(ValueError):
+        chunk_transcript(_transcript(5), 4, 4)
+
+
+def test_edit_only_changes_nearby_chunks():
+    original = [c.text for c in chunk_transcript(_transcript(2000), 40, 10)]
+    edited = [c.text for c in chunk_transcript(_transcript(2000, edit=1000), 40, 10)]
+
+    assert len(set(edited) - set(original)) <= 3
+    assert len(original) > 40
+
+
+def test_batches_respect_token_budget():
+    lengths = [5, 100, 7, 100, 6, 50, 5, 8]
+    batches = plan_batches(lengths, max_tokens=200, max_batch=3)
+
+    assert sorted(i for batch in batches for i in batch) == list(range(len(lengths)))
+    for batch in batches:
+        assert len(batch) <= 3
+        assert len(batch) * max(lengths[i] for i in batch) <= 200
+    # Longest first, so the two 100-token chunks share a batch
+    assert sorted(batches[0]) == [1, 3]
+
+
+def test_encode_returns_vectors_in_input_order():
+    encoder = FakeEncoder()
+    texts = ["a b c d e f", "a", "a b c", "a b"]
+
+    vectors = encode_with(encoder, texts, max_tokens=16, max_batch=8)
+
+    assert vectors[:, 0].tolist() == [6, 1, 3, 2]
+    assert encoder.batches[0] == ["a b c d e f", "a b c"]
+    assert encode_with(encoder, [], 16, 8).shape == (0, EMBEDDING_DIMENSIONS)
+
+
+def test_copy_rows_escape_text_and_keep_time_order():
+    vectors = np.array([[0.5, -0.25], [1.0, 0.0]], dtype=np.float32)
+    chunks = [Chunk("tab\there\nnew \\ line", 1.2, 1.6), Chunk("plain", 4.0, 9.5)]
+
+    rows = list(copy_rows("video-1", chunks, vectors))
+
+    assert rows[0] == "video-1\ttab\\there\\nnew \\\\ line\t[0.5,-0.25]\t1\t2\n"
+    assert rows[1] == "video-1\tplain\t[1,0]\t4\t10\n"
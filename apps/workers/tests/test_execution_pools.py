@@ -0,0 +1,61 @@
+# Created automatically by Cursor AI (2026-10-18)
+
+import asyncio
+import os
+import time
+
+import pytest
+
+from workers.base import ASR_POOL, CPU_POOL, IO_POOL, ExecutionPools, LoopLagMonitor
+
+
+def _block(seconds):
+    time.sleep(seconds)
+    return os.getpid()
+
+
+@pytest.fixture
+def pools():
+    pools = ExecutionPools(io_workers=2, cpu_workers=1)
+    yield pools
+    pools.shutdown()
+
+
+async def test_io_pool_keeps_loop_responsive(pools):
+    monitor = LoopLagMonitor(interval=0.01)
+    monitor.start()
+    await pools.run(IO_POOL, _block, 0.2)
+    await monitor.stop()
+
+    assert monitor.samples > 5
+    assert monitor.max < 0.1
+    assert pools.stats()[IO_POOL]["submitted"] == 1
+
+
+async def test_cpu_pool_runs_in_another_process(pools):
+    pid = await pools.run(CPU_POOL, _block, 0)
+    assert pid != os.getpid()
+
+
+def test_initializers_are_per_process_pool(pools):
+    pools.add_initializer(ASR_POOL, _block, 0)
+
+    assert pools.stats()[ASR_POOL]["size"] == 1
+    with pytest.raises(ValueError):
+        pools.add_initializer(IO_POOL, _block, 0)
+
+
+async def test_unknown_pool(pools):
+    with pytest.raises(ValueError):
+        await pools.run("gpu", _block, 0)
+
+
+async def test_loop_lag_detects_blocking_call():
+    monitor = LoopLagMonitor(interval=0.01)
+    monitor.start()
+    await asyncio.sleep(0.02)
+    time.sleep(0.15)
+    await asyncio.sleep(0.02)
+    await monitor.stop()
+
+    assert monitor.max >= 0.1
@@ -0,0 +1,172 @@
+# Created automatically by Cursor AI (2026-10-18)
+
+import numpy as np
+import pytest
+
+from workers import audio_cache
+from workers.audio import SAMPLE_RATE, write_pcm
+from workers.highlight_worker import HighlightWorker
+from workers.highlights import (
+    audio_features,
+    candidate_phrases,
+    chapter_proximity,
+    keyphrase_weights,
+    select_windows,
+    window_means,
+)
+from workers.transcript import Transcript
+
+from conftest import hash_embed
+
+
+def _transcript(text, words_per_second=2.0):
+    words = []
+    for i, word in enumerate(text.split()):
+        t = i / words_per_second
+        words.append({"text": word, "start": t, "end": t + 0.8 / words_per_second})
+    return Transcript.from_words(words)
+
+
+def test_candidates_start_and_end_on_content_words():
+    transcript = _transcript("The rocket engine of the rocket, and the rocket engine test.")
+
+    candidates = candidate_phrases(transcript, max_words=3)
+
+    assert candidates.phrases[:2] == ["rocket", "rocket engine"]
+    assert "engine of the" not in candidates.phrases and "the rocket" not in candidates.phrases
+    assert "engine test" in candidates.phrases
+    rocket = candidates.words[candidates.phrase_ids == 0]
+    assert rocket.tolist() == [1, 5, 8]
+    assert (np.diff(candidates.words) >= 0).all()
+
+
+def test_keyphrases_are_the_candidates_closest_to_the_document():
+    doc = np.array([[1.0, 0.0, 0.0], [0.8, 0.6, 0.0]])
+    phrases = np.array([[1.0, 0.1, 0.0], [0.0, 0.0, 1.0], [0.5, 0.5, 0.0], [-1.0, 0.0, 0.0]])
+
+    weights = keyphrase_weights(doc, phrases, top_n=2)
+
+    assert weights[0] > weights[2] > 0
+    assert weights[1] == 0 and weights[3] == 0
+
+
+def test_selection_is_greedy_non_maximum_suppression():
+    rng = np.random.default_rng(0)
+    scores = rng.standard_normal(500)
+    width = 6
+
+    chosen = select_windows(scores, width, k=20)
+
+    expected, taken = [], np.zeros(len(scores), dtype=bool)
+    for i in np.argsort(-scores):
+        if not taken[max(i - width + 1, 0):i + width].any():
+            expected.append(int(i))
+            taken[i] = True
+        if len(expected) == 20:
+            break
+    assert chosen == expected
+    starts = np.sort(chosen)
+    assert (np.diff(starts) >= width).all()
+
+
+def test_window_means_and_chapter_proximity():
+    values = np.arange(6, dtype=np.float64)
+
+    np.testing.assert_allclose(window_means(values, 3), [1, 2, 3, 4])
+    proximity = chapter_proximity([0.0, 22.0], 5.0, 8, 5.0)
+
+    # The first chapter starts the video and is not a boundary
+    assert int(np.argmax(proximity)) == 4
+    assert proximity[0] < proximity[3] < proximity[4]
+
+
+def test_applause_shows_as_an_energy_spike(tmp_path):
+    rng = np.random.default_rng(0)
+    t = np.arange(60 * SAMPLE_RATE) / SAMPLE_RATE
+    audio = 0.05 * np.sin(2 * np.pi * 180 * t) * (0.6 + 0.4 * np.sin(2 * np.pi * 3 * t))
+    burst = slice(40 * SAMPLE_RATE, 44 * SAMPLE_RATE)
+    audio[burst] += 0.5 * rng.standard_normal(4 * SAMPLE_RATE)
+    path = write_pcm(audio.astype(np.float32), str(tmp_path / "audio.pcm"))
+
+    features = audio_features(path, 2.0)
+
+    assert len(features["reactions"]) == 30
+    assert set(np.flatnonzero(features["reactions"] > 0.5)) == {20, 21}
+    assert features["reactions"][:19].max() < 0.05
+    assert int(np.argmax(features["loudness"])) in (20, 21)
+
+
+async def test_worker_picks_non_overlapping_highlights(nats_client, monkeypatch, tmp_path):
+    worker = HighlightWorker(nats_client)
+    rng = np.random.default_rng(1)
+    filler = ["so", "we", "and", "it", "was", "just", "like", "the", "that", "weather"]
+    words = list(rng.choice(filler, 600))
+    # The video's subject is mentioned early, then discussed at 100-130 s;
+    # the applause is at 240 s
+    words[20:26] = ["rocket", "engine", "launch"] * 2
+    words[200:260] = ["rocket", "engine", "launch"] * 20
+    transcript = _transcript(" ".join(words))
+
+    t = np.arange(300 * SAMPLE_RATE) / SAMPLE_RATE
+    audio = 0.05 * np.sin(2 * np.pi * 180 * t)
+    audio[240 * SAMPLE_RATE:246 * SAMPLE_RATE] += 0.5 * rng.standard_normal(6 * SAMPLE_RATE)
+    source = tmp_path / "v1.wav"
+    source.write_bytes(b"RIFF")
+
+    def decode(media_path, pcm_path, sample_rate, dtype):
+        return write_pcm(audio.astype(np.float32), pcm_path, sample_rate, dtype)
+
+    async def run_in_pool(pool, fn, *args, **kwargs):
+        if fn.__name__ == "encode_texts":
+            return hash_embed(args[0])
+        return fn(*args, **kwargs)
+
+    monkeypatch.setattr(audio_cache, "decode_to_pcm", decode)
+    monkeypatch.setattr(worker, "run_in_pool", run_in_pool)
+    result = await worker.process_message({
+        "video_id": "v1",
+        "transcript": transcript,
+        "chapters": [{"title": "Chapter 1", "start": 0.0, "end": 300.0}],
+        "audio_path": str(source),
+    })
+
+    highlights = result["highlights"]
+    assert 1 < len(highlights) <= 10
+    spans = sorted((h["start"], h["end"]) for h in highlights)
+    assert all(end <= start for (_, end), (start, _) in zip(spans, spans[1:]))
+    assert [h["score"] for h in highlights] == sorted((h["score"] for h in highlights), reverse=True)
+    assert highlights[0]["score"] == 1.0
+
+    by_reason = {
+        "keyphrases": next(h for h in highlights if h["title"].startswith("Rocket")),
+        "reactions": next(h for h in highlights if "audience-reaction" in h["tags"]),
+    }
+    assert by_reason["keyphrases"]["start"] >= 95 and by_reason["keyphrases"]["end"] <= 135
+    assert by_reason["keyphrases"]["features"]["keyphrases"] > 3
+    assert by_reason["reactions"]["start"] <= 240 < by_reason["reactions"]["end"]
+
+
+async def test_worker_without_audio_scores_the_transcript(nats_client, monkeypatch):
+    worker = HighlightWorker(nats_client)
+
+    async def run_in_pool(pool, fn, *args, **kwargs):
+        if fn.__name__ == "encode_texts":
+            return hash_embed(args[0])
+        return fn(*args, **kwargs)
+
+    monkeypatch.setattr(worker, "run_in_pool", run_in_pool)
+    result = await worker.process_message(
+        {"video_id": "v1", "transcript": _transcript("short talk about gardens " * 10)}
+    )
+    empty = await worker.process_message({"video_id": "v2", "transcript": Transcript.from_words([])})
+
+    assert len(result["highlights"]) == 1
+    assert set(result["highlights"][0]["features"]) == {"keyphrases", "speech_rate", "chapter_start"}
+    assert empty["highlights"] == []
+
+
+@pytest.mark.parametrize("text", ["", "um uh the a"])
+def test_no_candidates_without_content_words(text):
+    candidates = candidate_phrases(_transcript(text))
+
+    assert candidates.phrases == [] and len(candidates.words) == 0
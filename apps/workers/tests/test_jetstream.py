@@ -0,0 +1,286 @@
+# Created automatically by Cursor AI (2026-10-18)
+
+import asyncio
+import json
+import shutil
+import socket
+import subprocess
+import time
+
+import pytest
+
+from workers.base import TRANSIENT_ERRORS, BaseWorker, RetryableError
+from workers.nats_client import NATSClient
+
+from conftest import FakeMsg
+
+NATS_SERVER = shutil.which("nats-server")
+
+
+class EchoWorker(BaseWorker):
+    concurrency = 2
+
+    def __init__(self, nats_client, fail=False, **kwargs):
+        super().__init__(nats_client, **kwargs)
+        self.fail = fail
+        self.seen = []
+        self.release = asyncio.Event()
+        self.release.set()
+
+    @property
+    def subject(self) -> str:
+        return "media.echo"
+
+    @property
+    def worker_name(self) -> str:
+        return "EchoWorker"
+
+    async def process_message(self, data):
+        self.seen.append(data["id"])
+        await self.release.wait()
+        if self.fail:
+            raise RetryableError("boom")
+        return {"id": data["id"]}
+
+
+class ReportingWorker(EchoWorker):
+    """Reports its own errors the way the media workers do."""
+
+    def __init__(self, nats_client, error, **kwargs):
+        super().__init__(nats_client, **kwargs)
+        self.error = error
+
+    async def process_message(self, data):
+        try:
+            raise self.error
+        except TRANSIENT_ERRORS:
+            raise
+        except Exception as e:
+            await self.publish_error(str(e), data)
+            return None
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def nats_url(tmp_path):
+    if NATS_SERVER is None:
+        pytest.skip("nats-server not installed")
+    port = _free_port()
+    server = subprocess.Popen(
+        [NATS_SERVER, "-js", "-a", "127.0.0.1", "-p", str(port), "-sd", str(tmp_path)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            break
+        except OSError:
+            time.sleep(0.05)
+    yield f"nats://127.0.0.1:{port}"
+    server.terminate()
+    server.wait()
+
+
+@pytest.fixture
+def jetstream_env(monkeypatch):
+    monkeypatch.setenv("JETSTREAM_ENABLED", "true")
+    monkeypatch.setenv("JETSTREAM_FETCH_TIMEOUT", "0.2")
+    monkeypatch.setenv("RETRY_DELAY", "0.05")
+    monkeypatch.setenv("MAX_RETRIES", "2")
+
+
+async def _connect(url: str) -> NATSClient:
+    client = NATSClient(url)
+    await client.connect()
+    await client.ensure_stream("MEDIA", ["media.*"])
+    return client
+
+
+async def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        await asyncio.sleep(0.02)
+
+
+async def test_messages_published_before_start_are_delivered(nats_url, jetstream_env):
+    client = await _connect(nats_url)
+    for i in range(5):
+        await client.js.publish("media.echo", json.dumps({"id": i}).encode())
+
+    worker = EchoWorker(client)
+    task = asyncio.create_task(worker.start())
+    await _wait_for(lambda: worker.scheduler.completed == 5)
+
+    assert sorted(worker.seen) == list(range(5))
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    info = await client.js.consumer_info("MEDIA", "EchoWorker")
+    assert info.num_ack_pending == 0 and info.num_pending == 0
+    await client.close()
+
+
+async def test_fetch_is_bounded_by_free_slots(nats_url, jetstream_env):
+    client = await _connect(nats_url)
+    for i in range(6):
+        await client.js.publish("media.echo", json.dumps({"id": i}).encode())
+
+    worker = EchoWorker(client)
+    worker.release.clear()
+    task = asyncio.create_task(worker.start())
+    await _wait_for(lambda: len(worker.seen) == 2)
+    await asyncio.sleep(0.5)
+
+    # Only as many messages as there are slots leave the stream
+    assert worker.scheduler.in_flight == 2
+    assert worker.scheduler.queued == 0
+    info = await client.js.consumer_info("MEDIA", "EchoWorker")
+    assert info.num_ack_pending == 2
+
+    worker.release.set()
+    await _wait_for(lambda: worker.scheduler.completed == 6)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    await client.close()
+
+
+async def test_failed_message_is_terminated_after_max_deliveries(nats_url, jetstream_env):
+    client = await _connect(nats_url)
+    await client.js.publish("media.echo", json.dumps({"id": "bad"}).encode())
+
+    worker = EchoWorker(client, fail=True)
+    task = asyncio.create_task(worker.start())
+    await _wait_for(lambda: len(worker.seen) == 3)
+    await asyncio.sleep(0.5)
+
+    # MAX_RETRIES=2: first delivery plus two redeliveries, then term
+    assert worker.seen == ["bad"] * 3
+    info = await client.js.consumer_info("MEDIA", "EchoWorker")
+    assert info.num_ack_pending == 0 and info.num_redelivered == 0
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    await client.close()
+
+
+async def test_nak_backs_off_exponentially(nats_client, monkeypatch):
+    monkeypatch.setenv("RETRY_DELAY", "2")
+    monkeypatch.setenv("RETRY_MAX_DELAY", "5")
+    monkeypatch.setenv("MAX_RETRIES", "5")
+    worker = EchoWorker(nats_client, fail=True)
+
+    delays = []
+    for attempt in range(1, 5):
+        msg = FakeMsg(json.dumps({"id": attempt}).encode(), num_delivered=attempt)
+        await worker._handle_message(msg)
+        assert msg.naked and not msg.acked
+        delays.append(msg.nak_delay)
+    assert delays == [2, 4, 5, 5]
+
+    last = FakeMsg(b'{"id": 6}', num_delivered=6)
+    await worker._handle_message(last)
+    assert last.termed and not last.naked
+
+
+async def test_result_is_published_before_the_ack(nats_client, monkeypatch):
+    worker = EchoWorker(nats_client)
+    order = []
+    msg = FakeMsg(b'{"id": "v1"}')
+    acked = msg.ack
+
+    async def publish_result(result):
+        order.append("publish")
+
+    async def ack():
+        order.append("ack")
+        await acked()
+
+    monkeypatch.setattr(worker, "publish_result", publish_result)
+    monkeypatch.setattr(msg, "ack", ack)
+    await worker._handle_message(msg)
+
+    assert order == ["publish", "ack"]
+
+
+async def test_failed_publish_is_redelivered_not_acked(nats_client, monkeypatch):
+    worker = EchoWorker(nats_client)
+
+    async def publish_message(subject, data):
+        raise ConnectionError("NATS down")
+
+    monkeypatch.setattr(nats_client, "publish_message", publish_message)
+    msg = FakeMsg(b'{"id": "v1"}')
+    await worker._handle_message(msg)
+
+    assert msg.naked and not msg.acked
+
+
+async def test_transient_errors_are_retried_and_reported_when_retries_run_out(nats_client, monkeypatch):
+    monkeypatch.setenv("MAX_RETRIES", "2")
+    worker = ReportingWorker(nats_client, RetryableError("database restarting"))
+
+    retried = FakeMsg(b'{"id": "v1"}', num_delivered=1)
+    await worker._handle_message(retried)
+    last = FakeMsg(b'{"id": "v1"}', num_delivered=3)
+    await worker._handle_message(last)
+
+    assert retried.naked and not retried.acked
+    assert last.termed
+    assert [subject for subject, _, _ in nats_client.published] == ["media.echo.error"]
+
+
+async def test_permanent_errors_are_reported_and_acked(nats_client):
+    worker = ReportingWorker(nats_client, ValueError("Missing video_id"))
+
+    msg = FakeMsg(b'{"id": "v1"}')
+    await worker._handle_message(msg)
+
+    assert msg.acked and not msg.naked
+    assert [subject for subject, _, _ in nats_client.published] == ["media.echo.error"]
+
+
+async def test_malformed_payload_is_terminated_without_retries(nats_client, caplog):
+    worker = EchoWorker(nats_client)
+
+    msg = FakeMsg(b"{not json", num_delivered=1)
+    await worker._handle_message(msg)
+
+    assert msg.termed and not msg.naked and not msg.acked
+    assert worker.seen == []
+    assert "Unrecoverable error" in caplog.text
+
+
+async def test_unexpected_errors_are_terminated_and_reported(nats_client):
+    worker = ReportingWorker(nats_client, None)
+
+    async def process_message(data):
+        raise KeyError("video_id")
+
+    worker.process_message = process_message
+    msg = FakeMsg(b'{"id": "v1"}', num_delivered=1)
+    await worker._handle_message(msg)
+
+    assert msg.termed and not msg.naked
+    assert [subject for subject, _, _ in nats_client.published] == ["media.echo.error"]
+
+
+async def test_queries_bypass_the_stream(nats_url):
+    client = NATSClient(nats_url)
+    await client.connect()
+    await client.ensure_stream("MEDIA", ["media.>"])
+    await client.ensure_stream("MEDIA", ["media.*"])
+    assert (await client.js.stream_info("MEDIA")).config.subjects == ["media.*"]
+
+    async def answer(msg):
+        await client.respond(msg, {"hits": []})
+
+    await client.subscribe("media.search.query", answer, queue="SearchWorker")
+    # Were the subject captured, the stream's PubAck would arrive first
+    assert await client.request_message("media.search.query", {"query": "q"}) == {"hits": []}
+    await client.close()
@@ -0,0 +1,125 @@
+# Created automatically by Cursor AI (2026-10-18)
+
+import json
+import os
+import shutil
+from types import SimpleNamespace
+
+import numpy as np
+
+from workers import search_index, search_worker
+from workers.lexical import LexicalDoc, LexicalIndex, LexicalSegment, tokenize
+from workers.search_index import reciprocal_rank_fusion
+from workers.search_worker import SearchWorker
+
+
+def _docs(*texts):
+    return [LexicalDoc(text, i * 10, i * 10 + 10) for i, text in enumerate(texts)]
+
+
+def test_tokenize_case_folds_and_keeps_names():
+    assert tokenize("Kubernetes' GPU-nodes, ÉTÉ!") == ["kubernetes", "gpu", "nodes", "été"]
+
+
+def test_postings_are_delta_encoded_and_memory_mapped(tmp_path):
+    segment = LexicalSegment.build(
+        str(tmp_path / "segment"),
+        {"v1": _docs("budget review", "weather"), "v2": _docs("budget budget cuts")},
+    )
+
+    assert isinstance(segment.deltas, np.memmap) and segment.deltas.dtype == np.uint32
+    docs, tfs = segment.postings(segment.terms[0])
+    assert np.all(np.diff(docs) > 0)
+    budget = [t for t in segment.terms if segment.postings(t)[0].tolist() == [0, 2]]
+    assert len(budget) == 1
+    assert segment.postings(budget[0])[1].tolist() == [1, 2]
+    assert segment.text_of(2) == "budget budget cuts"
+
+    size = segment.nbytes
+    shutil.rmtree(tmp_path / "segment")  # merged away while a search still holds it
+    assert size > 0 and segment.nbytes == size
+    assert segment.text_of(0) == "budget review"
+
+
+def test_bm25_ranks_rare_and_repeated_terms_first(tmp_path):
+    index = LexicalIndex(str(tmp_path))
+    index.sync({
+        "v1": _docs("the quarterly budget", "the weather today", "the budget the budget"),
+        "v2": _docs("the kubernetes migration", "the team offsite"),
+    })
+
+    hits = index.search("budget", 5)
+    assert [(h["video_id"], h["start_time"]) for h in hits] == [("v1", 20), ("v1", 0)]
+    assert hits[0]["text"] == "the budget the budget" and hits[0]["end_time"] == 30
+
+    assert index.search("Kubernetes budget", 1)[0]["video_id"] == "v2"  # rarer term wins
+    assert [h["video_id"] for h in index.search("the", 5, videos={"v2"})] == ["v2", "v2"]
+    assert index.search("nothing matches", 5) == []
+
+
+def test_videos_update_incrementally_and_persist(tmp_path):
+    index = LexicalIndex(str(tmp_path), max_segments=3)
+    assert index.sync({"v1": _docs("alpha beta")}) == 1
+    assert index.sync({"v1": _docs("alpha beta")}) == 0  # unchanged windows are skipped
+
+    for i in range(2, 6):
+        index.sync({f"v{i}": _docs(f"gamma {i}")})
+    index.sync({"v1": _docs("delta")})  # re-indexed: the old windows die
+
+    assert index.stats()["segments"] <= 3
+    assert index.search("alpha", 5) == []
+    assert index.search("delta", 5)[0]["video_id"] == "v1"
+
+    reopened = LexicalIndex(str(tmp_path), max_segments=3)
+    assert reopened.stats()["documents"] == 5
+    assert sorted(h["video_id"] for h in reopened.search("gamma", 10)) == ["v2", "v3", "v4", "v5"]
+    listed = set(json.load(open(tmp_path / "manifest.json"))["segments"])
+    assert {name for name in os.listdir(tmp_path) if (tmp_path / name).is_dir()} == listed
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    def hit(video, start):
+        return {"video_id": video, "start_time": start, "text": "", "end_time": start + 1, "score": 1.0}
+
+    fused = reciprocal_rank_fusion({
+        "vector": [hit("v1", 0), hit("v1", 10), hit("v2", 0)],
+        "lexical": [hit("v1", 10), hit("v2", 0)],
+    }, k=60)
+
+    assert [(h["video_id"], h["start_time"]) for h in fused] == [("v1", 10), ("v2", 0), ("v1", 0)]
+    assert fused[0]["ranks"] == {"vector": 2, "lexical": 1}
+    assert fused[0]["score"] == round(1 / 62 + 1 / 61, 6)
+
+
+async def test_hybrid_query_finds_exact_terms_the_vectors_miss(nats_client, monkeypatch):
+    texts = ["opening remarks", "the Q3 roadmap", "questions from the audience"]
+    vectors = np.eye(3, 768, dtype=np.float32)
+    index = search_index.SegmentIndex(
+        ["v1"] * 3, texts, np.array([0, 10, 20]), np.array([10, 20, 30]), vectors, 1000, 8
+    )
+
+    async def fake_load(key, exact_below, nprobe):
+        return index
+
+    monkeypatch.setattr(search_index, "load_index", fake_load)
+    worker = SearchWorker(nats_client)
+
+    async def run_inline(pool, fn, *args):
+        # The query vector points at "opening remarks"
+        return vectors[:1] if fn is search_worker.encode_texts else fn(*args)
+
+    monkeypatch.setattr(worker, "run_in_pool", run_inline)
+
+    vector = await worker.search({"query": "roadmap", "video_id": "v1", "k": 1, "mode": "vector"})
+    lexical = await worker.search({"query": "roadmap", "video_id": "v1", "k": 1, "mode": "lexical"})
+    hybrid = await worker.search({"query": "roadmap", "video_id": "v1", "k": 3})
+
+    assert vector["hits"][0]["start_time"] == 0
+    assert lexical["hits"][0]["start_time"] == 10
+    assert {h["start_time"] for h in hybrid["hits"][:2]} == {0, 10}
+    assert hybrid["hits"][0]["ranks"] == {"vector": 2, "lexical": 1}
+
+    msg = SimpleNamespace(data=json.dumps({"query": "x", "video_id": "v1", "mode": "fuzzy"}).encode(),
+                          headers=None, reply="_INBOX.q")
+    await worker._answer_query(msg)
+    assert json.loads(nats_client.published[-1][1])["error"] == "Unknown search mode: fuzzy"
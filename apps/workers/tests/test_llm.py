@@ -0,0 +1,196 @@
+# Created automatically by Cursor AI (2026-10-18)
+
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from workers import summarization
+from workers.base import TRANSIENT_ERRORS
+from workers.llm import (
+    AdaptiveLimiter,
+    AnthropicProvider,
+    LLMClient,
+    LLMError,
+    LLMInterrupted,
+    OpenAIProvider,
+    TokenBucket,
+    TokenLedger,
+    charge_to,
+    get_token_ledger,
+)
+from workers.quality_metrics_worker import QualityMetricsWorker
+from workers.transcript import Transcript
+
+from fake_llm_provider import FakeLLMProvider
+
+
+def _client(fake, **kwargs):
+    providers = [
+        OpenAIProvider("http://fake-llm", "sk-test", "gpt-test"),
+        AnthropicProvider("http://fake-llm", "ant-test", "claude-test"),
+    ]
+    kwargs.setdefault("backoff", 0.01)
+    return LLMClient(
+        providers, "anthropic", transport=httpx.ASGITransport(app=fake.app), **kwargs
+    )
+
+
+async def test_both_providers_report_usage_and_cache_the_prefix():
+    fake = FakeLLMProvider()
+    client = _client(fake)
+    prefix = "Summarize the following transcript section briefly"
+
+    for provider in ("openai", "anthropic"):
+        first = await client.complete("one two three four", prefix=prefix, max_tokens=3, provider=provider)
+        again = await client.complete("five six", prefix=prefix, max_tokens=3, provider=provider)
+        assert first.text == "one two three"
+        assert (first.prompt_tokens, first.completion_tokens, first.cached_tokens) == (10, 3, 0)
+        assert (again.prompt_tokens, again.cached_tokens) == (8, 6)
+
+    anthropic_call = fake.requests[-1]
+    assert anthropic_call["body"]["system"][0]["cache_control"] == {"type": "ephemeral"}
+    assert anthropic_call["headers"]["x-api-key"] == "ant-test"
+    assert fake.requests[0]["body"]["messages"][0] == {"role": "system", "content": prefix}
+    await client.aclose()
+
+
+async def test_identical_prompts_in_flight_are_sent_once():
+    fake = FakeLLMProvider(latency=0.05)
+    client = _client(fake)
+
+    responses = await asyncio.gather(*(client.complete("same prompt") for _ in range(5)))
+
+    assert len(fake.requests) == 1 and client.coalesced == 4
+    assert {r.text for r in responses} == {"same prompt"}
+    await client.aclose()
+
+
+async def test_shared_calls_are_charged_to_every_video():
+    fake = FakeLLMProvider(latency=0.05)
+    ledger = TokenLedger()
+    client = _client(fake, ledger=ledger)
+
+    async def charged(video_id):
+        with charge_to(video_id):
+            return await client.complete("same prompt", max_tokens=2)
+
+    await asyncio.gather(charged("v1"), charged("v2"))
+
+    assert len(fake.requests) == 1
+    assert (await ledger.usage("v1"))["total"] == (await ledger.usage("v2"))["total"] == 4
+    await client.aclose()
+
+
+async def test_followers_of_a_cancelled_call_get_a_retryable_error():
+    fake = FakeLLMProvider(latency=0.2)
+    client = _client(fake)
+
+    leader = asyncio.ensure_future(client.complete("same prompt"))
+    await asyncio.sleep(0.01)
+    follower = asyncio.ensure_future(client.complete("same prompt"))
+    await asyncio.sleep(0.01)
+    leader.cancel()
+
+    with pytest.raises(LLMInterrupted) as raised:
+        await follower
+    assert isinstance(raised.value, TRANSIENT_ERRORS)
+    assert leader.cancelled()
+    await client.aclose()
+
+
+async def test_throttling_is_retried_and_halves_concurrency():
+    fake = FakeLLMProvider(throttle=2)
+    client = _client(fake, initial_concurrency=8)
+
+    response = await client.complete("hello")
+
+    stats = client.stats()["providers"]["anthropic"]
+    assert response.text == "hello" and len(fake.requests) == 3
+    assert stats["retries"] == 2 and stats["concurrency_limit"] == pytest.approx(2.5)
+
+    fake.throttle = 10
+    impatient = _client(fake, max_retries=1)
+    with pytest.raises(LLMError, match="after 2 attempts"):
+        await impatient.complete("hello")
+    await impatient.aclose()
+
+    with pytest.raises(LLMError, match="not configured"):
+        await client.complete("hello", provider="mistral")
+    await client.aclose()
+
+
+async def test_client_errors_are_not_retried():
+    fake = FakeLLMProvider()
+    client = _client(fake)
+
+    with pytest.raises(LLMError, match="400"):
+        await client.complete("hello", max_tokens=0)
+
+    assert len(fake.requests) == 1 and client.stats()["providers"]["anthropic"]["failures"] == 1
+    await client.aclose()
+
+
+async def test_adaptive_limit_caps_calls_in_flight():
+    fake = FakeLLMProvider(latency=0.02)
+    client = _client(fake, initial_concurrency=3, max_concurrency=4)
+
+    await asyncio.gather(*(client.complete(f"prompt {i}") for i in range(20)))
+
+    assert 3 <= fake.peak <= 4
+    limiter = AdaptiveLimiter(initial=4, maximum=5)
+    limiter.succeeded()
+    assert limiter.limit == pytest.approx(4.25)
+    limiter.throttled()
+    limiter.throttled()
+    limiter.throttled()
+    limiter.throttled()
+    assert limiter.limit == 1
+    await client.aclose()
+
+
+async def test_token_bucket_spaces_out_calls():
+    bucket = TokenBucket(per_minute=1200, capacity=1)  # 20 a second
+
+    started = time.monotonic()
+    for _ in range(5):
+        await bucket.acquire(1)
+
+    assert 0.15 < time.monotonic() - started < 1.0
+    bucket.adjust(5)  # under-estimated: later callers wait longer
+    assert bucket.tokens < -3
+
+
+async def test_tokens_are_charged_to_the_video_and_reported(nats_client, monkeypatch):
+    fake = FakeLLMProvider()
+    client = _client(fake, ledger=get_token_ledger())
+
+    with charge_to("v1"):
+        await asyncio.gather(client.complete("a b c", max_tokens=2), client.complete("d e"))
+    await client.complete("not charged")
+
+    worker = QualityMetricsWorker(nats_client)
+    transcript = Transcript.from_words([{"text": "hi", "start": 0.0, "end": 0.5}])
+    result = await worker.process_message({"video_id": "v1", "transcript": transcript})
+
+    assert result["metrics"]["tokens_used"] == (3 + 2) + (2 + 2)
+    assert result["metrics"]["token_usage"]["completion_tokens"] == 4
+    assert (await TokenLedger().usage("v2"))["total"] == 0
+    await client.aclose()
+
+
+async def test_llm_summary_backend_shares_instruction_prefixes(monkeypatch):
+    fake = FakeLLMProvider()
+    client = _client(fake)
+    monkeypatch.setattr(summarization, "get_llm_client", lambda: client)
+    backend = summarization.LLMBackend("openai", "gpt-test")
+
+    first = await backend.summarize("alpha beta gamma", "section", 2)
+    await backend.summarize("delta epsilon", "section", 2)
+
+    assert first == "alpha beta gamma" and backend.version == "llm:openai:gpt-test:1"
+    assert client.stats()["providers"]["openai"]["calls"] == 2
+    assert fake.requests[0]["body"]["max_tokens"] == 4
+    assert fake.requests[0]["body"]["messages"][0]["content"] == fake.requests[1]["body"]["messages"][0]["content"]
+    await client.aclose()
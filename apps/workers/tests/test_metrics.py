@@ -0,0 +1,102 @@
+# Created automatically by Cursor AI (2026-10-18)
+
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+import main
+from workers.base import BaseWorker, LoopLagMonitor, WorkerScheduler
+
+from conftest import FakeMsg
+
+
+class EchoWorker(BaseWorker):
+    @property
+    def subject(self) -> str:
+        return "media.metrics"
+
+    @property
+    def worker_name(self) -> str:
+        return "MetricsEchoWorker"
+
+    async def process_message(self, data):
+        return {"video_id": data["video_id"], "status": "completed"}
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+async def test_scheduler_reports_queue_wait():
+    waits = []
+    scheduler = WorkerScheduler(1, 4, waits.append)
+    gate = asyncio.Event()
+
+    async def job():
+        await gate.wait()
+
+    scheduler.submit(job)
+    scheduler.submit(job)
+    await asyncio.sleep(0.02)
+    gate.set()
+    await scheduler.drain()
+
+    assert len(waits) == 2
+    assert waits[0] < 0.01 <= waits[1]
+
+
+async def test_handled_messages_are_measured(nats_client):
+    worker = EchoWorker(nats_client)
+    before = _sample("worker_processing_seconds_count", worker="MetricsEchoWorker", outcome="ok")
+    payload = json.dumps({"video_id": "v1"}).encode()
+
+    await worker._handle_message(FakeMsg(payload))
+
+    assert _sample(
+        "worker_processing_seconds_count", worker="MetricsEchoWorker", outcome="ok"
+    ) == before + 1
+    assert _sample("worker_payload_bytes_sum", worker="MetricsEchoWorker", direction="in") >= len(payload)
+    assert _sample("worker_payload_bytes_count", worker="MetricsEchoWorker", direction="out") >= 1
+    assert _sample("worker_concurrency_limit", worker="MetricsEchoWorker") == worker.scheduler.limit
+    assert _sample("worker_ready", worker="MetricsEchoWorker") == 0.0
+
+
+def test_ready_reflects_nats_workers_and_loop(nats_client):
+    worker = EchoWorker(nats_client)
+    loop_lag = LoopLagMonitor()
+    loop_lag.record(0.0)
+    main.app.state.nats_client = nats_client
+    main.app.state.workers = [worker]
+    main.app.state.loop_lag = loop_lag
+    client = TestClient(main.app)
+
+    nats_client.nc = type("Conn", (), {"is_connected": True})()
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.json()["checks"]["workers"] == {"MetricsEchoWorker": False}
+
+    worker.running, worker.subscription = True, object()
+    assert client.get("/ready").status_code == 200
+
+    loop_lag.record(5.0)
+    assert client.get("/ready").json()["checks"]["loop_lag"] is False
+
+    loop_lag.record(0.0)
+    nats_client.nc.is_connected = False
+    assert client.get("/ready").status_code == 503
+
+    assert client.get("/live").status_code == 200
+    loop_lag.sampled_at -= 3600
+    assert client.get("/live").status_code == 503
+
+
+def test_metrics_endpoint_exposes_prometheus_text(nats_client):
+    EchoWorker(nats_client)
+    response = TestClient(main.app).get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'worker_in_flight{worker="MetricsEchoWorker"}' in response.text
+    assert "event_loop_lag_seconds_bucket" in response.text
@@ -0,0 +1,44 @@
+# Created automatically by Cursor AI (2026-10-18)
+
+from workers.models import ModelKey, ModelRegistry
+
+
+def _key(language):
+    return ModelKey("align", language, "cpu", "")
+
+
+def test_registry_reuses_loaded_models():
+    registry = ModelRegistry(memory_budget_mb=1000)
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return object()
+
+    first = registry.get(_key("en"), loader, size_mb=100)
+    second = registry.get(_key("en"), loader, size_mb=100)
+
+    assert first is second
+    assert len(loads) == 1
+    assert registry.stats()["hits"] == 1
+
+
+def test_registry_evicts_least_recently_used_over_budget():
+    registry = ModelRegistry(memory_budget_mb=250)
+    registry.get(_key("en"), object, size_mb=100)
+    registry.get(_key("de"), object, size_mb=100)
+    registry.get(_key("en"), object, size_mb=100)  # refresh "en"
+    registry.get(_key("fr"), object, size_mb=100)
+
+    assert _key("de") not in registry
+    assert _key("en") in registry and _key("fr") in registry
+    assert registry.evictions == 1
+
+
+def test_registry_keeps_single_oversized_model():
+    registry = ModelRegistry(memory_budget_mb=50)
+    registry.get(_key("en"), object, size_mb=100)
+    registry.get(_key("de"), object, size_mb=100)
+
+    assert _key("de") in registry
+    assert _key("en") not in registry
@@ -0,0 +1,172 @@
+# Created automatically by Cursor AI (2026-10-18)
+
+import asyncio
+
+import pytest
+
+from workers.base import CORRELATION_FIELD
+from workers.blobstore import get_claim_check
+from workers.pipeline import (
+    COMPLETED,
+    FAILED,
+    SKIPPED,
+    VIDEO_PIPELINE,
+    Pipeline,
+    Stage,
+    StageDispatcher,
+    StageError,
+    topological_order,
+)
+from workers.transcript import Transcript
+
+from conftest import FakeMsg
+
+TRANSCRIPT_REF = {"$blob": "abc", "size": 10, "type": "transcript"}
+
+
+class FakeStages:
+    """Dispatch that records calls and overlap between stages."""
+
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.payloads = {}
+        self.running = set()
+        self.overlaps = {}
+
+    async def __call__(self, stage, payload):
+        self.payloads[stage.name] = payload
+        self.overlaps[stage.name] = set(self.running)
+        self.running.add(stage.name)
+        try:
+            await asyncio.sleep(0.05 if stage.name == "asr" else 0.01)
+            if stage.name in self.fail:
+                raise StageError("boom")
+            return {
+                "video_id": payload["video_id"],
+                "transcript": TRANSCRIPT_REF,
+                "chapters": [{"title": "Intro", "start": 0, "end": 10}],
+            }
+        finally:
+            self.running.discard(stage.name)
+
+
+def test_topological_order_rejects_bad_graphs():
+    with pytest.raises(ValueError, match="unknown stage"):
+        topological_order([Stage("a", "media.a", inputs=(("missing", "x"),))])
+    with pytest.raises(ValueError, match="cycle"):
+        topological_order([
+            Stage("a", "media.a", inputs=(("b", "x"),)),
+            Stage("b", "media.b", inputs=(("a", "y"),)),
+        ])
+    with pytest.raises(ValueError, match="Duplicate"):
+        topological_order([Stage("a", "media.a"), Stage("a", "media.b")])
+
+    order = [stage.name for stage in topological_order(VIDEO_PIPELINE)]
+    assert order.index("highlights") > order.index("segmentation") > order.index("speakers")
+    assert order.index("speakers") > max(order.index("asr"), order.index("diarization"))
+
+
+async def test_pipeline_runs_independent_stages_in_parallel():
+    dispatch = FakeStages()
+    params = {"video_path": "/v.mp4", "audio_path": "/a.wav", "language": "de"}
+    report = await Pipeline().run("v1", params, dispatch)
+
+    assert report["status"] == COMPLETED
+    assert all(stage["status"] == COMPLETED for stage in report["stages"].values())
+
+    # probe, ASR and diarization start together
+    assert dispatch.overlaps["diarization"] == {"probe", "asr"}
+    # transcript readers start together once the transcript is labelled
+    assert {"summarization", "quotes"} <= dispatch.overlaps["search"]
+    assert "asr" not in dispatch.overlaps["summarization"]
+    assert "segmentation" not in dispatch.overlaps["highlights"]
+
+    assert dispatch.payloads["asr"] == {"video_id": "v1", "audio_path": "/a.wav", "language": "de"}
+    assert dispatch.payloads["summarization"]["transcript"] == TRANSCRIPT_REF
+    assert dispatch.payloads["highlights"]["chapters"][0]["title"] == "Intro"
+    # Stages overlap, so the run is shorter than the sum of its stages
+    assert report["duration"] < sum(s["duration"] for s in report["stages"].values())
+
+
+async def test_failed_stage_skips_only_its_dependents():
+    report = await Pipeline().run("v1", {}, FakeStages(fail={"segmentation"}))
+
+    stages = report["stages"]
+    assert report["status"] == FAILED
+    assert stages["segmentation"]["status"] == FAILED
+    assert stages["segmentation"]["error"] == "boom"
+    assert stages["highlights"] == {"status": SKIPPED, "blocked_by": ["segmentation"]}
+    assert stages["summarization"]["status"] == COMPLETED
+
+
+async def test_text_stages_get_the_transcript_labelled_with_speakers():
+    claim_check = get_claim_check()
+    transcript = Transcript.from_words([
+        {"text": "hello", "start": 0.2, "end": 0.6},
+        {"text": "there", "start": 7.0, "end": 7.4},
+    ])
+    turns = [
+        {"speaker": "speaker_0", "start": 0.0, "end": 6.0},
+        {"speaker": "speaker_1", "start": 6.5, "end": 10.0},
+    ]
+    payloads = {}
+
+    async def dispatch(stage, payload):
+        payloads[stage.name] = payload
+        if stage.name == "asr":
+            return await claim_check.offload({"transcript": transcript})
+        if stage.name == "diarization":
+            return {"speakers": turns, "num_speakers": 2}
+        return {}
+
+    report = await Pipeline().run("v1", {"audio_path": "/a.wav"}, dispatch)
+
+    assert report["status"] == COMPLETED and report["stages"]["speakers"]["status"] == COMPLETED
+    assert "speakers" not in payloads  # run by the pipeline, not sent to a worker
+    for stage in ("segmentation", "summarization", "quotes", "search", "highlights"):
+        labelled = Transcript.coerce(await claim_check.resolve(payloads[stage]["transcript"]))
+        assert [labelled.speaker(i) for i in range(2)] == ["speaker_0", "speaker_1"]
+
+
+async def test_failed_diarization_leaves_the_transcript_unlabelled():
+    dispatch = FakeStages(fail={"diarization"})
+    report = await Pipeline().run("v1", {}, dispatch)
+
+    stages = report["stages"]
+    assert report["status"] == FAILED and stages["diarization"]["status"] == FAILED
+    assert stages["speakers"]["status"] == COMPLETED
+    assert dispatch.payloads["quotes"]["transcript"] == TRANSCRIPT_REF
+
+    with pytest.raises(ValueError, match="no local step"):
+        Pipeline(steps={})
+
+
+async def test_dispatcher_matches_results_by_correlation_id(nats_client):
+    dispatcher = StageDispatcher(nats_client, timeout=1.0)
+    stage = Stage("asr", "media.asr")
+
+    first = asyncio.create_task(dispatcher.dispatch(stage, {"video_id": "v1"}))
+    second = asyncio.create_task(dispatcher.dispatch(stage, {"video_id": "v1"}))
+    await asyncio.sleep(0)
+    requests = [nats_client.codec.decode(payload) for _, payload, _ in nats_client.published]
+    assert [subject for subject, _, _ in nats_client.published] == ["media.asr", "media.asr"]
+
+    error = FakeMsg(nats_client.encode({"error": "bad audio", "original_data": requests[1]})[0])
+    error.subject = "media.asr.error"
+    result = FakeMsg(nats_client.encode({
+        "video_id": "v1", CORRELATION_FIELD: requests[0][CORRELATION_FIELD],
+    })[0])
+    result.subject = "media.asr.result"
+    await dispatcher._on_message(error)
+    await dispatcher._on_message(result)
+
+    assert (await first)["video_id"] == "v1"
+    with pytest.raises(StageError, match="bad audio"):
+        await second
+    assert dispatcher.pending() == 0
+
+
+async def test_dispatcher_times_out(nats_client):
+    dispatcher = StageDispatcher(nats_client, timeout=0.01)
+    with pytest.raises(StageError, match="No result"):
+        await dispatcher.dispatch(Stage("probe", "media.probe"), {"video_id": "v1"})
@@ -0,0 +1,114 @@
+# Created automatically by Cursor AI (2026-10-18)
+
+import asyncio
+import json
+import time
+
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+import main
+from workers.base import IO_POOL, BaseWorker
+from workers.config import get_settings
+from workers.profiling import Profiler, get_profiler, span
+
+from conftest import FakeMsg
+
+
+def _blocking_step():
+    with span("blocking"):
+        time.sleep(0.01)
+    return "done"
+
+
+class SpanWorker(BaseWorker):
+    @property
+    def subject(self) -> str:
+        return "media.spans"
+
+    @property
+    def worker_name(self) -> str:
+        return "SpanWorker"
+
+    async def process_message(self, data):
+        with self.span("prepare"):
+            await asyncio.sleep(0.01)
+        for _ in range(2):
+            with self.span("window"):
+                await asyncio.sleep(0.005)
+        step = await self.run_in_pool(IO_POOL, _blocking_step)
+        return {"video_id": data["video_id"], "step": step}
+
+
+def _busy_loop():
+    deadline = time.perf_counter() + 0.2
+    while time.perf_counter() < deadline:
+        pass
+
+
+async def test_spans_are_reported_in_result_and_metrics(nats_client):
+    worker = SpanWorker(nats_client)
+    before = REGISTRY.get_sample_value(
+        "worker_span_seconds_count", {"worker": "SpanWorker", "span": "window"}
+    ) or 0.0
+
+    await worker._handle_message(FakeMsg(json.dumps({"video_id": "v1"}).encode()))
+
+    result = nats_client.codec.decode(nats_client.published[0][1])
+    timings = result["timings"]
+    assert result["step"] == "done"
+    assert {"decode", "prepare", "window", "blocking"} <= set(timings)
+    assert timings["window"] >= 0.01
+    assert timings["blocking"] >= 0.01
+    assert REGISTRY.get_sample_value(
+        "worker_span_seconds_count", {"worker": "SpanWorker", "span": "window"}
+    ) == before + 2
+
+
+async def test_profile_stops_after_messages_and_folds_stacks():
+    profiler = Profiler()
+
+    async def finish_messages():
+        await asyncio.sleep(0.05)
+        await asyncio.get_running_loop().run_in_executor(None, _busy_loop)
+        profiler.message_done()
+
+    task = asyncio.create_task(finish_messages())
+    started = time.perf_counter()
+    sampler = await profiler.run(seconds=10, messages=1, interval=0.001)
+    await task
+
+    assert time.perf_counter() - started < 5
+    assert not profiler.active
+    assert sampler.samples > 0
+    folded = sampler.collapsed().splitlines()
+    assert any("_busy_loop (test_profiling.py" in line for line in folded)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in folded)
+
+
+def test_profile_endpoint_checks_token_and_overlap(monkeypatch):
+    client = TestClient(main.app)
+    # Disabled without a token
+    assert client.post("/admin/profile?seconds=0.05").status_code == 403
+
+    monkeypatch.setenv("ADMIN_TOKEN", "secret")
+    get_settings.cache_clear()
+    assert client.post("/admin/profile?seconds=0.05").status_code == 403
+    response = client.post(
+        "/admin/profile?seconds=0.05&interval=0.00001", headers={"X-Admin-Token": "secret"}
+    )
+    assert response.status_code == 400
+
+    response = client.post(
+        "/admin/profile?seconds=0.05&interval=0.001", headers={"X-Admin-Token": "secret"}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert int(response.headers["X-Profile-Samples"]) > 0
+
+    get_profiler()._sampler = object()
+    try:
+        response = client.post("/admin/profile", headers={"X-Admin-Token": "secret"})
+        assert response.status_code == 409
+    finally:
+        get_profiler()._sampler = None
@@ -0,0 +1,203 @@
+# Created automatically by Cursor AI (2026-10-18)
+
+import asyncio
+import json
+import time
+
+from prometheus_client import REGISTRY
+
+from workers.base import BaseWorker
+from workers.result_cache import DiskResultCache, RedisResultCache, ResultCache
+
+from conftest import FakeMsg
+
+
+class FakeRedis:
+    """The handful of Redis commands the result cache uses."""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None, px=None, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    async def exists(self, key):
+        return int(key in self.data)
+
+    async def eval(self, script, numkeys, key, token, *args):
+        if self.data.get(key) != token:
+            return 0
+        if "del" in script:
+            del self.data[key]
+        return 1
+
+
+class CountingWorker(BaseWorker):
+    cache_file_fields = ("audio_path",)
+
+    def __init__(self, nats_client):
+        super().__init__(nats_client)
+        self.calls = 0
+
+    @property
+    def subject(self) -> str:
+        return "media.counting"
+
+    @property
+    def worker_name(self) -> str:
+        return "CountingWorker"
+
+    @property
+    def cache_version(self):
+        return "v1"
+
+    async def process_message(self, data):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return {"video_id": data["video_id"], "text": "hello", "status": "completed"}
+
+
+async def test_key_follows_file_content_not_path_or_video(tmp_path):
+    cache = ResultCache(None, None, ttl=60)
+    first, second = tmp_path / "a.wav", tmp_path / "b.wav"
+    first.write_bytes(b"audio")
+    second.write_bytes(b"audio")
+
+    key = await cache.key_for("asr", "v1", {"video_id": "1", "audio_path": str(first)}, ["audio_path"])
+    same = await cache.key_for("asr", "v1", {"video_id": "2", "audio_path": str(second)}, ["audio_path"])
+    assert key == same
+
+    other_params = await cache.key_for(
+        "asr", "v1", {"video_id": "1", "audio_path": str(first), "language": "de"}, ["audio_path"]
+    )
+    other_version = await cache.key_for("asr", "v2", {"video_id": "1", "audio_path": str(first)}, ["audio_path"])
+    second.write_bytes(b"other audio")
+    other_content = await cache.key_for("asr", "v1", {"audio_path": str(second)}, ["audio_path"])
+    assert len({key, other_params, other_version, other_content}) == 4
+
+
+async def test_concurrent_identical_requests_compute_once(tmp_path):
+    cache = ResultCache(DiskResultCache(str(tmp_path), 1 << 20), None, ttl=60)
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"value": 42}
+
+    results = await asyncio.gather(*(cache.get_or_compute("asr", "k", compute) for _ in range(5)))
+    assert results == [{"value": 42}] * 5
+    assert calls == 1
+    assert await cache.get_or_compute("asr", "k", compute) == {"value": 42}
+    assert cache.stats("asr") == {"hits": 1, "misses": 1, "coalesced": 4}
+
+
+async def test_lookups_are_exported_as_metrics(tmp_path):
+    cache = ResultCache(DiskResultCache(str(tmp_path), 1 << 20), None, ttl=60)
+
+    def requests(outcome):
+        labels = {"worker": "metered", "outcome": outcome}
+        return REGISTRY.get_sample_value("result_cache_requests_total", labels) or 0
+
+    async def compute():
+        return {"value": 42}
+
+    await cache.get_or_compute("metered", "k", compute)
+    await cache.get_or_compute("metered", "k", compute)
+
+    assert (requests("hits"), requests("misses")) == (1, 1)
+
+
+async def test_file_digests_are_bounded_lru(tmp_path):
+    cache = ResultCache(None, None, ttl=60, max_digests=2)
+    paths = []
+    for name in "abc":
+        path = tmp_path / f"{name}.wav"
+        path.write_bytes(name.encode())
+        paths.append(str(path))
+
+    await cache.file_digest(paths[0])
+    await cache.file_digest(paths[1])
+    await cache.file_digest(paths[0])
+    await cache.file_digest(paths[2])
+
+    assert [memo[0] for memo in cache._digests] == [paths[0], paths[2]]
+
+
+async def test_failed_results_are_not_cached(tmp_path):
+    cache = ResultCache(DiskResultCache(str(tmp_path), 1 << 20), None, ttl=60)
+
+    async def fail():
+        return None
+
+    assert await cache.get_or_compute("asr", "k", fail) is None
+    assert await cache.get("k") is None
+
+
+def test_disk_tier_expires_and_evicts(tmp_path):
+    disk = DiskResultCache(str(tmp_path), max_bytes=250)
+    disk.put("old", {"text": "x" * 50}, ttl=60)
+    disk.put("new", {"text": "y" * 50}, ttl=60)
+    assert disk.get("old") is not None  # now most recently used
+    disk.put("newest", {"text": "z" * 50}, ttl=60)
+
+    assert disk.get("new") is None
+    assert disk.get("old") is not None
+    assert disk.stats()["bytes"] <= 250
+
+    disk.put("stale", {"text": "s"}, ttl=-1)
+    assert disk.get("stale") is None
+
+    # A restarted process picks up what is on disk
+    assert DiskResultCache(str(tmp_path), max_bytes=250).get("old") == {"text": "x" * 50}
+
+
+async def test_replicas_share_results_through_redis(tmp_path):
+    redis = FakeRedis()
+    replicas = [
+        ResultCache(
+            DiskResultCache(str(tmp_path / str(i)), 1 << 20),
+            RedisResultCache(redis, ttl=60),
+            ttl=60,
+            poll_interval=0.01,
+        )
+        for i in range(2)
+    ]
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {"value": time.time()}
+
+    results = await asyncio.gather(*(r.get_or_compute("asr", "k", compute) for r in replicas))
+    assert calls == 1
+    assert results[0] == results[1]
+    assert not any(key.startswith("result-cache:lock:") for key in redis.data)
+    assert json.loads(redis.data["result-cache:k"]) == results[0]
+    assert replicas[1].disk.get("k") == results[0]
+
+
+async def test_worker_serves_reuploads_from_cache(nats_client, tmp_path, monkeypatch):
+    monkeypatch.setenv("RESULT_CACHE_PATH", str(tmp_path / "cache"))
+    audio = tmp_path / "audio.wav"
+    audio.write_bytes(b"audio")
+    worker = CountingWorker(nats_client)
+
+    for video_id in ("v1", "v2"):
+        payload, headers = nats_client.encode({"video_id": video_id, "audio_path": str(audio)})
+        await worker._handle_message(FakeMsg(payload, headers))
+
+    assert worker.calls == 1
+    results = [nats_client.codec.decode(payload) for _, payload, _ in nats_client.published]
+    assert [r["video_id"] for r in results] == ["v1", "v2"]
+    assert results[1]["text"] == "hello"
+    assert worker.stats()["cache"] == {"hits": 1, "misses": 1, "coalesced": 0}
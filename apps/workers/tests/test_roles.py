@@ -0,0 +1,39 @@
+# Created automatically by Cursor AI (2026-10-18)
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+from workers.roles import ROLE_WORKERS, resolve_roles, worker_classes
+
+SRC = os.path.join(os.path.dirname(__file__), os.pardir, "src")
+
+
+def test_resolve_roles_expands_all_and_dedupes():
+    assert resolve_roles(["all"]) == list(ROLE_WORKERS)
+    assert resolve_roles(["Text", "asr", "text"]) == ["text", "asr"]
+    with pytest.raises(ValueError, match="Unknown worker role"):
+        resolve_roles(["gpu"])
+
+
+def test_every_worker_belongs_to_one_role():
+    names = [name for role in ROLE_WORKERS.values() for name in role]
+    assert len(names) == len(set(names))
+    assert [cls.__name__ for cls in worker_classes(["media"])] == ["ProbeWorker", "ClipWorker"]
+
+
+def test_roles_import_only_their_workers():
+    code = (
+        "import sys\n"
+        "from workers.roles import worker_classes\n"
+        "worker_classes(['io', 'text'])\n"
+        "print(sorted(m for m in ('workers.asr_worker', 'workers.clip_worker', "
+        "'whisperx', 'torch') if m in sys.modules))\n"
+    )
+    env = {**os.environ, "PYTHONPATH": SRC}
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, env=env, check=True
+    ).stdout
+    assert output.strip() == "[]"
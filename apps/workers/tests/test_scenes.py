@@ -0,0 +1,143 @@
+# Created automatically by Cursor AI (2026-10-18)
+
+import os
+import sys
+import threading
+
+import numpy as np
+import pytest
+
+from workers.scenes import (
+    HISTOGRAM_BINS,
+    SceneCutDetector,
+    frame_features,
+    iter_scene_cuts,
+    merge_scenes,
+    read_frames,
+    scenes_from_cuts,
+)
+from workers.segmentation_worker import SegmentationWorker
+
+
+PALETTE = np.array([[200, 40, 40], [30, 160, 60], [40, 60, 200], [220, 200, 60]], dtype=np.uint8)
+
+
+def _shots(lengths, height=36, width=64, seed=0):
+    """Frames of shots with their own colour and texture, panning a pixel a frame."""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for shot, length in enumerate(lengths):
+        texture = rng.integers(0, 64, (height, width + length, 3)).astype(np.uint8)
+        base = texture + PALETTE[shot % len(PALETTE)] // 4 * 3
+        frames.extend(base[:, i:i + width] for i in range(length))
+    return np.stack(frames)
+
+
+def _batches(frames, size):
+    return (frames[i:i + size] for i in range(0, len(frames), size))
+
+
+def test_histograms_count_every_pixel_per_channel():
+    frames = np.zeros((2, 4, 4, 3), dtype=np.uint8)
+    frames[1, :2, :, 0] = 255
+
+    histograms, luma = frame_features(frames)
+
+    assert histograms.shape == (2, 3 * HISTOGRAM_BINS)
+    assert np.allclose(histograms.sum(axis=1), 3.0)
+    assert histograms[0, 0] == 1.0
+    assert histograms[1, 0] == 0.5 and histograms[1, HISTOGRAM_BINS - 1] == 0.5
+    assert luma.shape == (2, 4, 4) and luma[1, 0, 0] == pytest.approx(0.299 * 255)
+
+
+@pytest.mark.parametrize("batch", [1, 7, 64, 1000])
+def test_cuts_are_found_across_batch_boundaries(batch):
+    frames = _shots([20, 13, 31, 9])
+    detector = SceneCutDetector(stride=0.5, min_scene_seconds=1.0)
+
+    cuts = list(iter_scene_cuts(_batches(frames, batch), detector))
+
+    assert [cut.time for cut in cuts] == [10.0, 16.5, 32.0]
+    assert detector.frames == 73 and detector.duration == 36.5
+
+
+def test_motion_within_a_shot_is_not_a_cut():
+    rng = np.random.default_rng(1)
+    scene = rng.integers(0, 256, (36, 200, 3)).astype(np.uint8)
+    # A fast pan over a busy scene
+    frames = np.stack([scene[:, i * 4:i * 4 + 64] for i in range(32)])
+
+    assert SceneCutDetector(stride=0.25).push(frames) == []
+
+
+def test_short_scenes_are_not_cut():
+    frames = _shots([8, 2, 8])
+
+    cuts = SceneCutDetector(stride=0.25, min_scene_seconds=1.0).push(frames)
+
+    # The flash two frames after the first cut is within a second of it
+    assert [cut.time for cut in cuts] == [2.0]
+
+
+def test_scenes_and_chapters_from_cuts():
+    scenes = scenes_from_cuts([{"time": 5.0}, {"time": 70.0}, {"time": 80.0}], 100.0)
+
+    assert scenes == [
+        {"start": 0.0, "end": 5.0},
+        {"start": 5.0, "end": 70.0},
+        {"start": 70.0, "end": 80.0},
+        {"start": 80.0, "end": 100.0},
+    ]
+    assert merge_scenes(scenes, 60.0) == [{"start": 0.0, "end": 100.0}]
+    assert merge_scenes(scenes, 30.0) == [{"start": 0.0, "end": 70.0}, {"start": 70.0, "end": 100.0}]
+
+
+async def test_worker_returns_scenes_and_chapters(nats_client, monkeypatch):
+    worker = SegmentationWorker(nats_client)
+    calls = []
+
+    async def run_in_pool(pool, fn, *args):
+        calls.append((fn.__name__, args))
+        return {"cuts": [{"time": 12.0, "score": 0.8}, {"time": 90.0, "score": 0.6}], "duration": 160.0, "frames": 640}
+
+    monkeypatch.setattr(worker, "run_in_pool", run_in_pool)
+    result = await worker.process_message({"video_id": "v1", "video_path": "/videos/v1.mp4"})
+
+    assert calls[0][0] == "detect_scenes" and calls[0][1][:2] == ("/videos/v1.mp4", 0.25)
+    assert [s["start"] for s in result["scenes"]] == [0.0, 12.0, 90.0]
+    assert result["chapters"] == [
+        {"title": "Chapter 1", "start": 0.0, "end": 90.0},
+        {"title": "Chapter 2", "start": 90.0, "end": 160.0},
+    ]
+    assert result["scene_cuts"][0]["score"] == 0.8
+
+
+def test_a_chatty_ffmpeg_cannot_stall_frame_reading(tmp_path, monkeypatch):
+    # Far more stderr than a pipe buffers, before any frame is written
+    fake = tmp_path / "ffmpeg"
+    fake.write_text(
+        f"#!{sys.executable}\n"
+        "import sys\n"
+        "sys.stderr.write('warning: non-monotonic DTS\\n' * 20000)\n"
+        "sys.stderr.flush()\n"
+        "sys.stdout.buffer.write(bytes(3 * 4 * 2 * 3))\n"
+        "sys.stderr.write('Conversion failed!')\n"
+        "sys.exit(1)\n"
+    )
+    fake.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+    frames, errors = [], []
+
+    def read():
+        try:
+            for batch in read_frames("talk.mp4", stride=1.0, width=4, height=2, batch=8):
+                frames.append(len(batch))
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    reader = threading.Thread(target=read, daemon=True)
+    reader.start()
+    reader.join(timeout=10)
+
+    assert not reader.is_alive()
+    assert frames == [3] and errors[0].endswith("Conversion failed!")
@@ -0,0 +1,90 @@
+# Created automatically by Cursor AI (2026-10-18)
+
+import asyncio
+import json
+
+import pytest
+
+from workers.base import BaseWorker, WorkerScheduler
+
+from conftest import FakeMsg
+
+
+class SlowWorker(BaseWorker):
+    concurrency = 2
+
+    def __init__(self, nats_client, **kwargs):
+        super().__init__(nats_client, **kwargs)
+        self.release = asyncio.Event()
+        self.peak = 0
+
+    @property
+    def subject(self):
+        return "test.slow"
+
+    @property
+    def worker_name(self):
+        return "SlowWorker"
+
+    async def process_message(self, data):
+        self.peak = max(self.peak, self.scheduler.in_flight)
+        await self.release.wait()
+        return {"id": data["id"]}
+
+
+async def test_scheduler_bounds_in_flight_and_rejects_overflow():
+    scheduler = WorkerScheduler(limit=2, max_pending=1)
+    gate = asyncio.Event()
+
+    async def job():
+        await gate.wait()
+
+    accepted = [scheduler.submit(job) for _ in range(4)]
+    await asyncio.sleep(0)
+
+    assert accepted == [True, True, True, False]
+    assert scheduler.in_flight == 2
+    assert scheduler.queued == 1
+    assert scheduler.rejected == 1
+
+    gate.set()
+    await scheduler.drain()
+    assert scheduler.stats()["completed"] == 3
+    assert scheduler.in_flight == 0 and scheduler.queued == 0
+
+
+async def test_worker_uses_class_concurrency(nats_client):
+    worker = SlowWorker(nats_client, max_pending=0)
+    msgs = [FakeMsg(json.dumps({"id": i}).encode()) for i in range(3)]
+    for msg in msgs:
+        await worker._message_handler(msg)
+    await asyncio.sleep(0)
+
+    assert worker.scheduler.limit == 2
+    assert msgs[2].naked
+    assert worker.stats()["rejected"] == 1
+
+    worker.release.set()
+    await worker.scheduler.drain()
+    assert worker.peak == 2
+    assert all(msg.acked for msg in msgs[:2])
+    assert len(nats_client.published) == 2
+
+
+def test_settings_override_wins(nats_client, monkeypatch):
+    monkeypatch.setenv("WORKER_CONCURRENCY_OVERRIDES", '{"SlowWorker": 5}')
+    loop = asyncio.new_event_loop()
+    try:
+        worker = loop.run_until_complete(_build(nats_client))
+    finally:
+        loop.close()
+    assert worker.scheduler.limit == 5
+
+
+def test_invalid_limit_rejected():
+    with pytest.raises(ValueError):
+        WorkerScheduler(limit=0, max_pending=0)
+
+
+async def _build(nats_client):
+    return SlowWorker(nats_client)
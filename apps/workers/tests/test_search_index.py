@@ -0,0 +1,174 @@
+# Created automatically by Cursor AI (2026-10-18)
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from workers import search_index, search_worker
+from workers.ann import ExactIndex, IVFPQIndex, build_index
+from workers.base import CPU_POOL, IO_POOL, QUERY_POOL
+from workers.embeddings import EMBEDDING_DIMENSIONS
+from workers.search_index import SearchIndexCache, SegmentIndex
+from workers.search_worker import SearchWorker
+
+
+def _clustered(n, dimensions=EMBEDDING_DIMENSIONS, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(n // 100, 1), dimensions)).astype(np.float32)
+    x = centers[rng.integers(0, len(centers), n)]
+    x += 0.7 * rng.standard_normal((n, dimensions)).astype(np.float32)
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+
+def _segments(video_ids, n=4):
+    rows = [(video, f"{video} segment {i}", i * 10, i * 10 + 10) for video in video_ids for i in range(n)]
+    return SegmentIndex(
+        [r[0] for r in rows],
+        [r[1] for r in rows],
+        np.array([r[2] for r in rows], dtype=np.int32),
+        np.array([r[3] for r in rows], dtype=np.int32),
+        _clustered(len(rows), seed=len(rows)),
+        exact_below=1000,
+        nprobe=8,
+    )
+
+
+def test_ivfpq_recall_against_exact_search():
+    vectors = _clustered(4000)
+    queries = _clustered(50, seed=1)
+    approximate = IVFPQIndex(vectors, nprobe=16)
+    exact = ExactIndex(vectors)
+
+    recall = np.mean([
+        len(set(approximate.search(q, 10)[0]) & set(exact.search(q, 10)[0])) / 10
+        for q in queries
+    ])
+
+    assert recall >= 0.9
+    ids, scores = approximate.search(queries[0], 10)
+    assert len(ids) == 10 and np.all(np.diff(scores) <= 0)
+    assert approximate.nbytes < vectors.nbytes
+
+
+def test_small_collections_are_searched_exactly():
+    assert isinstance(build_index(_clustered(100), exact_below=1000), ExactIndex)
+    index = _segments(["v1"])
+    query = index.index.vectors[2]
+
+    hits = index.search(query, 2)
+
+    assert hits[0] == {
+        "video_id": "v1",
+        "text": "v1 segment 2",
+        "start_time": 20,
+        "end_time": 30,
+        "score": pytest.approx(1.0, abs=1e-3),
+    }
+    assert len(hits) == 2
+
+
+async def test_cache_loads_once_evicts_and_invalidates(monkeypatch):
+    loads = []
+
+    async def fake_load(key, exact_below, nprobe):
+        loads.append(key)
+        videos = [key.id] if key.scope == "video" else ["v1", "v2"]
+        return _segments(videos)
+
+    monkeypatch.setattr(search_index, "load_index", fake_load)
+    one_index = _segments(["x"]).nbytes
+    cache = SearchIndexCache(max_bytes=int(one_index * 3.5), ttl=60, exact_below=1000, nprobe=8)
+
+    first, second = await asyncio.gather(cache.get("video", "v1"), cache.get("video", "v1"))
+    assert first is second and len(loads) == 1
+
+    await cache.get("project", "p1")  # holds two videos, twice the size
+    await cache.get("video", "v3")
+    assert cache.stats()["evictions"] == 1  # v1, least recently used
+
+    cache.invalidate_video("v2")
+    assert cache.stats()["indexes"] == 1
+    await cache.get("project", "p1")
+    assert len(loads) == 4
+
+    with pytest.raises(ValueError):
+        await cache.get("org", "o1")
+
+
+async def test_a_load_overtaken_by_an_invalidation_is_not_kept(monkeypatch):
+    released = asyncio.Event()
+    loads = []
+
+    async def fake_load(key, exact_below, nprobe):
+        loads.append(key)
+        await released.wait()
+        return _segments(["v1", "v2"])
+
+    monkeypatch.setattr(search_index, "load_index", fake_load)
+    cache = SearchIndexCache(max_bytes=1 << 30, ttl=60, exact_below=1000, nprobe=8)
+
+    loading = asyncio.ensure_future(cache.get("project", "p1"))
+    await asyncio.sleep(0)
+    cache.invalidate_video("v2")
+    released.set()
+    index = await loading
+
+    assert len(index) == 8 and cache.stats()["indexes"] == 0
+    await cache.get("project", "p1")
+    assert len(loads) == 2 and cache.stats()["indexes"] == 1
+
+
+async def test_index_is_read_on_the_io_pool_and_built_on_the_cpu_pool(monkeypatch):
+    rows = search_index.ScopeRows(
+        ["v1"] * 3, ["a", "b", "c"], np.array([0, 10, 20]), np.array([10, 20, 30]), _clustered(3),
+    )
+    calls = []
+
+    class InlinePools:
+        async def run(self, pool, fn, *args):
+            calls.append((pool, fn.__name__))
+            return fn(*args)
+
+    monkeypatch.setattr(search_index, "get_execution_pools", InlinePools)
+    monkeypatch.setattr(search_index, "read_scope", lambda key: rows)
+
+    index = await search_index.load_index(search_index.ScopeKey("video", "v1"), 1000, 8)
+
+    assert calls == [(IO_POOL, "<lambda>"), (CPU_POOL, "build_segment_index")]
+    assert index.videos == {"v1"} and len(index) == 3
+
+
+async def test_query_is_answered_with_time_coded_hits(nats_client, monkeypatch):
+    index = _segments(["v1"])
+    target = index.index.vectors[3]
+
+    async def fake_load(key, exact_below, nprobe):
+        return index
+
+    monkeypatch.setattr(search_index, "load_index", fake_load)
+    worker = SearchWorker(nats_client)
+
+    encoded_on = []
+
+    async def run_inline(pool, fn, *args):
+        if fn is search_worker.encode_texts:
+            encoded_on.append(pool)
+            return np.stack([target])
+        return fn(*args)
+
+    monkeypatch.setattr(worker, "run_in_pool", run_inline)
+
+    for request in ({"query": "budget", "video_id": "v1", "k": 3}, {"video_id": "v1"}):
+        msg = SimpleNamespace(data=json.dumps(request).encode(), headers=None, reply="_INBOX.q")
+        await worker._answer_query(msg)
+
+    (subject, payload, _), (_, error_payload, _) = nats_client.published
+    response = json.loads(payload)
+    assert subject == "_INBOX.q"
+    assert [hit["start_time"] for hit in response["hits"]][0] == 30
+    assert len(response["hits"]) == 3 and response["took_ms"] >= 0
+    assert json.loads(error_payload)["error"] == "Missing query"
+    assert encoded_on == [QUERY_POOL]
@@ -0,0 +1,101 @@
+# Created automatically by Cursor AI (2026-10-18)
+
+import math
+import random
+
+import pytest
+
+from workers.audio import SAMPLE_RATE, plan_shards
+from workers.stitching import merge_shards
+
+
+def _reference_timeline(n_words=2000, seed=7):
+    rng = random.Random(seed)
+    vocabulary = ["the", "video", "model", "speech", "a", "summary", "chapter", "and"]
+    words, t = [], 0.0
+    for i in range(n_words):
+        t += rng.uniform(0.05, 0.4)  # gap, sometimes a long pause
+        duration = rng.uniform(0.1, 0.6)
+        words.append({
+            "text": rng.choice(vocabulary),
+            "start": round(t, 3),
+            "end": round(t + duration, 3),
+            "confidence": 0.9,
+        })
+        t += duration
+    return words, words[-1]["end"]
+
+
+def _transcribe_shard(reference, start, end, rng):
+    """Simulate ASR on one shard: edge words are lost and timings drift a little."""
+    drift = rng.uniform(-0.03, 0.03)
+    words = []
+    for word in reference:
+        if word["start"] < start or word["end"] > end:
+            continue  # clipped by the shard edge
+        jitter = drift + rng.uniform(-0.01, 0.01)
+        words.append({
+            **word,
+            "start": max(word["start"] + jitter, start),
+            "end": min(word["end"] + jitter, end),
+        })
+    return {"start": start, "end": end, "words": words, "segments": []}
+
+
+@pytest.fixture
+def shards_and_reference():
+    reference, duration = _reference_timeline()
+    rng = random.Random(3)
+    total = math.ceil(duration * SAMPLE_RATE)
+    shards = [
+        _transcribe_shard(reference, lo / SAMPLE_RATE, hi / SAMPLE_RATE, rng)
+        for lo, hi in plan_shards(total, shard_seconds=60, overlap_seconds=4)
+    ]
+    return shards, reference
+
+
+def test_merge_matches_single_pass_reference(shards_and_reference):
+    shards, reference = shards_and_reference
+    assert len(shards) > 5
+
+    merged = merge_shards(shards)["words"]
+
+    assert [w["text"] for w in merged] == [w["text"] for w in reference]
+    for got, expected in zip(merged, reference):
+        assert got["start"] == pytest.approx(expected["start"], abs=0.07)
+        assert got["end"] == pytest.approx(expected["end"], abs=0.07)
+    for previous, current in zip(merged, merged[1:]):
+        assert current["start"] >= previous["end"]
+
+
+def test_merge_is_independent_of_completion_order(shards_and_reference):
+    shards, _ = shards_and_reference
+    shuffled = shards[:]
+    random.Random(11).shuffle(shuffled)
+
+    assert merge_shards(shuffled) == merge_shards(shards)
+
+
+def test_duplicate_word_straddling_cut_is_kept_once():
+    first = {"start": 0.0, "end": 10.0, "words": [
+        {"text": "hello", "start": 7.9, "end": 8.05},
+    ]}
+    second = {"start": 6.0, "end": 16.0, "words": [
+        {"text": "Hello,", "start": 7.95, "end": 8.1},
+        {"text": "world", "start": 8.3, "end": 8.7},
+    ]}
+
+    merged = merge_shards([first, second])["words"]
+
+    assert [w["text"] for w in merged] == ["hello", "world"]
+
+
+def test_plan_shards_overlap():
+    shards = plan_shards(25 * SAMPLE_RATE, shard_seconds=10, overlap_seconds=2)
+    assert shards == [
+        (0, 10 * SAMPLE_RATE),
+        (8 * SAMPLE_RATE, 18 * SAMPLE_RATE),
+        (16 * SAMPLE_RATE, 25 * SAMPLE_RATE),
+    ]
+    with pytest.raises(ValueError):
+        plan_shards(100, shard_seconds=1, overlap_seconds=1)
@@ -0,0 +1,126 @@
+# Created automatically by Cursor AI (2026-10-18)
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from workers.result_cache import DiskResultCache, ResultCache
+from workers.summarization import (
+    MapReduceSummarizer,
+    SummaryBackend,
+    extract_summary,
+    plan_sections,
+    split_sentences,
+    textrank,
+)
+from workers.summarization_worker import SummarizationWorker
+from workers.transcript import Transcript
+
+
+def _transcript(sentences):
+    words, segments = [], []
+    t = 0.0
+    for sentence in sentences:
+        segments.append({"start": t})
+        for word in sentence.split():
+            words.append({"text": word, "start": t, "end": t + 0.4})
+            t += 0.5
+    return Transcript.from_words(words, segments=segments)
+
+
+class RecordingBackend(SummaryBackend):
+    """First-words backend that records calls and peak concurrency."""
+
+    def __init__(self):
+        self.calls = []
+        self.active = 0
+        self.peak = 0
+
+    @property
+    def version(self):
+        return "recording:1"
+
+    async def summarize(self, text, style, max_words):
+        self.calls.append(style)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        return " ".join(text.split()[:max_words])
+
+
+def test_split_sentences_cuts_unpunctuated_runs():
+    assert split_sentences("One two. Three?  Four!") == ["One two.", "Three?", "Four!"]
+    assert [len(s.split()) for s in split_sentences(" ".join(["w"] * 90))] == [40, 40, 10]
+
+
+def test_textrank_prefers_the_sentence_the_others_share_words_with():
+    sentences = [
+        "The launch budget covers marketing.",
+        "Marketing spend drives the launch budget.",
+        "The launch budget needs marketing approval.",
+        "I had pancakes this morning.",
+    ]
+    scores = textrank(sentences)
+    assert np.isclose(scores.sum(), 1.0)
+    assert scores.argmin() == 3
+
+    summary = extract_summary(" ".join(sentences), "executive", 12)
+    assert "pancakes" not in summary and len(summary.split()) <= 12
+    assert extract_summary(" ".join(sentences), "bullets", 12).startswith("- ")
+    assert extract_summary("", "executive", 10) == ""
+
+
+def test_sections_follow_chapters_and_the_word_budget():
+    transcript = _transcript([" ".join(["word"] * 6)] * 10)  # 60 words, 3 s per segment
+
+    sections = plan_sections(transcript, max_words=15)
+    assert [len(s) for s in sections] == [12] * 5  # whole segments only
+
+    sections = plan_sections(transcript, max_words=4)
+    assert [len(s) for s in sections] == [4, 2] * 10  # long segments are cut
+
+    chapters = [{"start": 0, "end": 9}, {"start": 9, "end": 30}]
+    assert [len(s) for s in plan_sections(transcript, 100, chapters)] == [18, 42]
+
+
+async def test_map_reduce_bounds_concurrency_and_reuses_sections(tmp_path):
+    sentences = [f"Sentence number {i} talks about topic {i % 7}." for i in range(200)]
+    transcript = _transcript(sentences)
+    backend = RecordingBackend()
+    cache = ResultCache(DiskResultCache(str(tmp_path), 1 << 30), None, ttl=60)
+    summarizer = MapReduceSummarizer(
+        backend, cache, section_words=100, section_summary_words=20, fan_in=4, concurrency=3
+    )
+
+    result = await summarizer.summarize(transcript, "executive")
+
+    # 7-word sentences pack 14 to a section; 15 summaries of 20 words
+    # reduce to 4, which fit in one section
+    assert len(result["sections"]) == 15 and result["levels"] == 2
+    assert backend.calls.count("section") == 15 + 4 and backend.calls[-1] == "executive"
+    assert backend.peak == 3
+    assert result["sections"][0]["start"] == 0.0 and result["content"]
+
+    backend.calls.clear()
+    await summarizer.summarize(transcript, "bullets")
+    assert backend.calls == ["bullets"]
+
+    with pytest.raises(ValueError):
+        await summarizer.summarize(transcript, "haiku")
+
+
+async def test_worker_publishes_summary_and_sections(nats_client):
+    worker = SummarizationWorker(nats_client)
+    assert worker.cache_version == "mapreduce:1:textrank:1"
+    worker.summarizer.backend = RecordingBackend()
+    worker.summarizer.cache = None
+    transcript = _transcript(["Hello there everyone.", "Today we plan the launch."])
+
+    result = await worker.process_message(
+        {"video_id": "v1", "transcript": transcript, "type": "detailed"}
+    )
+
+    assert result["content"] == "Hello there everyone. Today we plan the launch."
+    assert result["levels"] == 1 and len(result["sections"]) == 1
@@ -0,0 +1,109 @@
+# Created automatically by Cursor AI (2026-10-18)
+
+import numpy as np
+import pytest
+
+from workers.segmentation_worker import SegmentationWorker
+from workers.topics import (
+    TopicBoundary,
+    TopicSegmenter,
+    depth_scores,
+    fuse_chapters,
+    topic_windows,
+)
+from workers.transcript import Transcript
+
+from conftest import hash_embed
+
+
+def _topics(words_per_topic, vocabularies, seed=0):
+    """Two words a second, each topic drawing on its own vocabulary."""
+    rng = np.random.default_rng(seed)
+    words = []
+    for count, vocabulary in zip(words_per_topic, vocabularies):
+        for word in rng.choice(vocabulary, count):
+            t = len(words) * 0.5
+            words.append({"text": str(word), "start": t, "end": t + 0.4})
+    return Transcript.from_words(words)
+
+
+VOCABULARIES = [
+    [f"{topic}{i}" for i in range(30)] for topic in ("cooking", "rockets", "taxes", "gardens")
+]
+
+
+def test_depth_climbs_to_the_nearest_peak_on_each_side():
+    similarities = np.array([0.9, 0.5, 0.7, 0.6, 0.2, 0.8, 0.8, 0.4])
+
+    depth = depth_scores(similarities)
+
+    # Gap 4 climbs left to 0.7 (stopping before the dip at 1) and right to 0.8
+    assert depth[4] == pytest.approx((0.7 - 0.2) + (0.8 - 0.2))
+    assert depth[1] == pytest.approx((0.9 - 0.5) + (0.7 - 0.5))
+    assert depth[0] == 0 and depth[5] == 0
+
+
+@pytest.mark.parametrize("page", [7, 64, 10_000])
+def test_segmenter_finds_topic_shifts_whatever_the_page_size(page):
+    transcript = _topics([400, 240, 600, 300], VOCABULARIES)
+    windows = list(topic_windows(transcript, 60, 10))
+    segmenter = TopicSegmenter(60, 10)
+
+    for lo in range(0, len(windows), page):
+        segmenter.push(hash_embed([w.text for w in windows[lo:lo + page]]))
+
+    boundaries = segmenter.boundaries(transcript.starts, min_seconds=60.0)
+    # Topics change at words 400, 640 and 1240
+    assert [b.time for b in boundaries] == [200.0, 320.0, 620.0]
+    assert segmenter.windows == len(windows) and len(segmenter.similarities) == len(windows) - 6
+
+
+def test_close_boundaries_keep_the_deeper_one():
+    transcript = _topics([400, 60, 400], VOCABULARIES[:3])
+    segmenter = TopicSegmenter(40, 10)
+    segmenter.push(hash_embed([w.text for w in topic_windows(transcript, 40, 10)]))
+
+    boundaries = segmenter.boundaries(transcript.starts, min_seconds=60.0)
+
+    assert len(boundaries) == 1 and boundaries[0].time in (200.0, 230.0)
+
+
+def test_boundaries_snap_to_nearby_scene_cuts():
+    boundaries = [TopicBoundary(200.0, 0.9), TopicBoundary(320.0, 1.6), TopicBoundary(350.0, 0.4)]
+    cuts = [{"time": 12.0}, {"time": 204.5}, {"time": 290.0}]
+
+    chapters = fuse_chapters(boundaries, cuts, 700.0, snap_seconds=10.0, min_seconds=60.0)
+
+    assert chapters == [
+        {"start": 0.0, "end": 204.5, "confidence": 1.0, "scene_cut": False},
+        {"start": 204.5, "end": 320.0, "confidence": 0.9, "scene_cut": True},
+        {"start": 320.0, "end": 700.0, "confidence": 1.0, "scene_cut": False},
+    ]
+    assert fuse_chapters([], cuts, 700.0, 10.0, 60.0) == [
+        {"start": 0.0, "end": 700.0, "confidence": 1.0, "scene_cut": False}
+    ]
+
+
+async def test_worker_fuses_topics_with_scene_cuts(nats_client, monkeypatch):
+    worker = SegmentationWorker(nats_client)
+    transcript = _topics([400, 240, 600], VOCABULARIES[:3])
+    encoded = []
+
+    async def run_in_pool(pool, fn, *args):
+        if fn.__name__ == "detect_scenes":
+            return {"cuts": [{"time": 203.0, "score": 0.7}], "duration": 620.0, "frames": 2480}
+        encoded.append(len(args[0]))
+        return hash_embed(args[0])
+
+    monkeypatch.setattr(worker, "run_in_pool", run_in_pool)
+    result = await worker.process_message(
+        {"video_id": "v1", "video_path": "/videos/v1.mp4", "transcript": transcript}
+    )
+
+    assert [(c["title"], c["start"], c["scene_cut"]) for c in result["chapters"]] == [
+        ("Chapter 1", 0.0, False),
+        ("Chapter 2", 203.0, True),
+        ("Chapter 3", 320.0, False),
+    ]
+    # Windows are embedded a page at a time
+    assert max(encoded) <= 256 and sum(encoded) == len(list(topic_windows(transcript, 120, 20)))
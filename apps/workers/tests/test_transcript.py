@@ -0,0 +1,65 @@
+# Created automatically by Cursor AI (2026-10-18)
+
+import numpy as np
+import pytest
+
+from workers.blobstore import ClaimCheck, LocalBlobStore
+from workers.transcript import Transcript
+
+WORDS = [
+    {"text": "Hello", "start": 0.0, "end": 0.4, "confidence": 0.9, "speaker": "A"},
+    {"text": "wörld", "start": 0.5, "end": 0.9, "confidence": 0.8, "speaker": "A"},
+    {"text": "second", "start": 2.0, "end": 2.5, "confidence": 0.7, "speaker": "B"},
+    {"text": "segment", "start": 2.6, "end": 3.1, "confidence": 0.6},
+]
+SEGMENTS = [{"start": 0.0, "end": 0.9}, {"start": 1.9, "end": 3.1}]
+
+
+@pytest.fixture
+def transcript():
+    return Transcript.from_words(WORDS, language="en", segments=SEGMENTS)
+
+
+def test_round_trips_through_words_and_bytes(transcript):
+    assert [w["text"] for w in transcript.to_words()] == [w["text"] for w in WORDS]
+    assert transcript.to_words()[3].get("speaker") is None
+    assert transcript.starts.dtype == np.float32
+    assert Transcript.from_bytes(transcript.to_bytes()) == transcript
+
+
+def test_word_at_uses_bisect(transcript):
+    assert transcript.word_at(0.2) == 0
+    assert transcript.word_at(0.45) is None
+    assert transcript.word_at(2.7) == 3
+    assert transcript.word_at(10.0) is None
+
+
+def test_slice_shares_buffers(transcript):
+    chapter = transcript.slice(1.0, 5.0)
+
+    assert chapter.texts() == ["second", "segment"]
+    assert np.shares_memory(chapter.starts, transcript.starts)
+    assert chapter.text_buffer is transcript.text_buffer
+    assert chapter.speaker(0) == "B"
+    assert chapter.segments() == [{"start": 2.0, "end": pytest.approx(3.1), "text": "second segment"}]
+    assert Transcript.from_bytes(chapter.to_bytes()) == chapter
+
+
+def test_segments_rebuilt_from_word_offsets(transcript):
+    assert [s["text"] for s in transcript.segments()] == ["Hello wörld", "second segment"]
+
+
+def test_coerce_accepts_legacy_dicts(transcript):
+    legacy = {"words": WORDS, "segments": SEGMENTS, "language": "en"}
+    assert Transcript.coerce(legacy) == transcript
+    assert Transcript.coerce(transcript) is transcript
+    assert len(Transcript.coerce({"words": []})) == 0
+
+
+async def test_claim_check_stores_transcripts_as_binary(tmp_path, transcript):
+    claim_check = ClaimCheck(LocalBlobStore(str(tmp_path)), threshold=1 << 20, cache_bytes=0)
+
+    ref = (await claim_check.offload({"transcript": transcript}))["transcript"]
+
+    assert ref["type"] == "transcript"
+    assert await claim_check.resolve(ref) == transcript